@@ -6,12 +6,14 @@ Integra: MPD (musica), GPS (gpsd), OBD-II (diagnostico)
 Autor: Flavio @ ITA
 Uso: python3 app.py
 Modo teste: python3 app.py --teste
+Reproducao: python3 app.py --teste --replay telemetry/obd/.../session-*.jsonl [--replay-speed 4] [--replay-loop]
 Acesse: http://localhost:5000
 """
 
 from __future__ import annotations
 
 import argparse
+import atexit
 import copy
 import random
 import sys
@@ -29,12 +31,16 @@ def _parse_args():
     parser = argparse.ArgumentParser(add_help=True)
     parser.add_argument('--teste', '--test', action='store_true', dest='test_mode')
     parser.add_argument('--port', type=int, default=None, help='Porta HTTP do servidor web')
+    parser.add_argument('--replay', default=None, metavar='SESSION_JSONL', help='Modo teste: reproduz uma sessao OBD gravada')
+    parser.add_argument('--replay-speed', type=float, default=1.0, help='Velocidade da reproducao (1 = tempo real)')
+    parser.add_argument('--replay-loop', action='store_true', help='Reinicia a reproducao ao chegar no fim')
     args, _ = parser.parse_known_args()
     return args
 
 
 CLI_ARGS = _parse_args()
-TEST_MODE = bool(CLI_ARGS.test_mode)
+TEST_MODE = bool(CLI_ARGS.test_mode or CLI_ARGS.replay)
+TEST_REPLAY = None
 FLASK_PORT = CLI_ARGS.port if CLI_ARGS.port is not None else config.FLASK_PORT
 
 
@@ -100,6 +106,12 @@ def _estimate_test_gear(rpm, speed_kmh):
 
 
 def _update_test_telemetry(gps_data, obd_data, radio_data, wifi_data):
+    if TEST_REPLAY is None:
+        _update_test_vehicle_telemetry(gps_data, obd_data)
+    _update_test_peripheral_telemetry(radio_data, wifi_data)
+
+
+def _update_test_vehicle_telemetry(gps_data, obd_data):
     gps_data.update({
         'lat': -23.200000 + random.uniform(-0.01, 0.01),
         'lon': -45.900000 + random.uniform(-0.01, 0.01),
@@ -219,6 +231,8 @@ def _update_test_telemetry(gps_data, obd_data, radio_data, wifi_data):
         'TRIP_AVERAGE_KM_L': {'value': inferred['trip_average_km_l'], 'label': 'Trip Avg', 'unit': 'km/L'},
     }
 
+
+def _update_test_peripheral_telemetry(radio_data, wifi_data):
     radio_data.update({
         'connected': True,
         'playing': random.choice([True, False]),
@@ -238,7 +252,7 @@ def _update_test_telemetry(gps_data, obd_data, radio_data, wifi_data):
         'ssid': 'PiCASSO Test AP',
         'interface': 'wlan0',
         'source': 'test-mode',
-        'last_checked_at': sample_time,
+        'last_checked_at': datetime.now(timezone.utc).isoformat(),
     })
 
 
@@ -251,6 +265,23 @@ def _start_test_telemetry_loop(gps_data, obd_data, radio_data, wifi_data):
     threading.Thread(target=_run, daemon=True, name='test-telemetry').start()
 
 
+def _start_test_replay(gps_data, obd_data):
+    global TEST_REPLAY
+    from pathlib import Path
+
+    from backend.services.telemetry_replay import TelemetryReplay, set_telemetry_replay
+
+    TEST_REPLAY = TelemetryReplay(
+        Path(CLI_ARGS.replay),
+        obd_data,
+        gps_data,
+        speed=CLI_ARGS.replay_speed,
+        loop=CLI_ARGS.replay_loop,
+    )
+    set_telemetry_replay(TEST_REPLAY)
+    TEST_REPLAY.start()
+
+
 def _install_test_dependency_stubs():
     fake_library_tracks = [
         {
@@ -646,6 +677,8 @@ def create_app():
                 for network in copy.deepcopy(network_service.list_wifi_networks())
             ],
         }
+        if CLI_ARGS.replay:
+            _start_test_replay(gps_data, obd_data)
         _update_test_telemetry(gps_data, obd_data, radio_data, wifi_data)
         _start_test_telemetry_loop(gps_data, obd_data, radio_data, wifi_data)
         from backend.services.obd_logger_service import obd_logger_service
@@ -678,18 +711,26 @@ def _start_real_services():
 
     from backend.services import GPSService, get_obd_service, get_rtlsdr_service
     from backend.services.obd_logger_service import obd_logger_service
+    from backend.services.telemetry_estimator import telemetry_estimator
 
     gps_service = GPSService()
     gps_service.start()
     print("GPS thread started")
 
     obd_service = get_obd_service()
+    telemetry_estimator.attach(obd_service)
+    if getattr(config, 'OBD_TRIM_MONITOR_ENABLED', True):
+        from backend.services.fuel_trim_monitor import get_fuel_trim_monitor
+
+        trim_monitor = get_fuel_trim_monitor()
+        trim_monitor.attach(obd_service)
+        atexit.register(trim_monitor.stop)
     if obd_service.start():
         print("OBD thread started")
-        obd_logger_service.start()
-        print("OBD logger thread started")
     else:
-        print(f"OBD not available (check USB connection at {config.OBD_DEVICE} or {config.OBD_FALLBACK_DEVICE})")
+        print(f"OBD adapter not connected yet, waiting for {config.OBD_DEVICE} or {config.OBD_FALLBACK_DEVICE}")
+    obd_logger_service.start()
+    print("OBD logger thread started")
 
     rtlsdr_service = get_rtlsdr_service()
     if rtlsdr_service.start():
@@ -0,0 +1 @@
+# Analysis module (offline tools over the OBD logs; requires numpy)
@@ -0,0 +1,335 @@
+"""
+Pi-Car - Exportacao colunar dos logs OBD.
+
+Converte sessoes JSONL em colunas numpy (uma por campo numerico, mais o
+vetor de tempo `t` em segundos UTC) e guarda o resultado em cache como
+`.npz` ou como diretorio de `.npy` mapeaveis em memoria. O `json.loads`
+linha a linha acontece uma unica vez por sessao; as analises seguintes
+leem arrays direto do disco.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+TIME_FIELD = 't'
+FLATTENED_SECTIONS = ('direct', 'inferred', 'gps', 'metadata', 'time_context')
+META_FILE = '_meta.json'
+FORMATS = ('npz', 'npy')
+CACHE_VERSION = 1
+SESSION_NAME_PATTERN = re.compile(r'session-(\d{4})-(\d{2})-(\d{2})T(\d{2})-(\d{2})-(\d{2})Z')
+
+
+def _timestamp(record: Dict[str, Any]) -> Optional[float]:
+    value = (record.get('metadata') or {}).get('sample_time') or record.get('logged_at')
+    if not isinstance(value, str):
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+
+def flatten_record(record: Dict[str, Any]) -> Dict[str, float]:
+    """Numeric and boolean leaves of the logged sections, as `section.key` floats."""
+    row: Dict[str, float] = {}
+    for section in FLATTENED_SECTIONS:
+        values = record.get(section)
+        if not isinstance(values, dict):
+            continue
+        for key, value in values.items():
+            if isinstance(value, (int, float)):
+                row[f'{section}.{key}'] = float(value)
+    return row
+
+
+def read_session_columns(path: Path) -> Dict[str, np.ndarray]:
+    """Parse one JSONL session into sorted float64 columns (NaN where missing)."""
+    times: List[float] = []
+    rows: List[Dict[str, float]] = []
+    with Path(path).open('rb') as handle:
+        for raw_line in handle:
+            if not raw_line.endswith(b'\n'):
+                break
+            try:
+                record = json.loads(raw_line)
+            except ValueError:
+                continue
+            if not isinstance(record, dict):
+                continue
+            timestamp = _timestamp(record)
+            if timestamp is None:
+                continue
+            times.append(timestamp)
+            rows.append(flatten_record(record))
+
+    count = len(rows)
+    names = sorted({name for row in rows for name in row})
+    columns = {TIME_FIELD: np.asarray(times, dtype=np.float64)}
+    for name in names:
+        columns[name] = np.fromiter((row.get(name, np.nan) for row in rows), dtype=np.float64, count=count)
+    order = np.argsort(columns[TIME_FIELD], kind='stable')
+    if count and np.any(order != np.arange(count)):
+        columns = {name: values[order] for name, values in columns.items()}
+    return columns
+
+
+def write_npz(columns: Dict[str, np.ndarray], target: Path, source_stat: Optional[os.stat_result] = None) -> Path:
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = target.with_name(target.name + '.tmp.npz')
+    payload = dict(columns)
+    payload['__source__'] = np.asarray(_source_key(source_stat), dtype=np.float64)
+    np.savez(tmp_path, **payload)
+    os.replace(tmp_path, target)
+    return target
+
+
+def load_npz(path: Path) -> Dict[str, np.ndarray]:
+    with np.load(path) as archive:
+        return {name: archive[name] for name in archive.files if name != '__source__'}
+
+
+def write_npy_dir(columns: Dict[str, np.ndarray], target: Path, source_stat: Optional[os.stat_result] = None) -> Path:
+    target.mkdir(parents=True, exist_ok=True)
+    for name, values in columns.items():
+        np.save(target / f'{name}.npy', values)
+    meta = {'version': CACHE_VERSION, 'fields': sorted(columns), 'source': _source_key(source_stat)}
+    (target / META_FILE).write_text(json.dumps(meta), encoding='utf-8')
+    return target
+
+
+def load_npy_dir(path: Path, *, mmap: bool = True) -> Dict[str, np.ndarray]:
+    meta = json.loads((path / META_FILE).read_text(encoding='utf-8'))
+    mode = 'r' if mmap else None
+    return {name: np.load(path / f'{name}.npy', mmap_mode=mode) for name in meta['fields']}
+
+
+def _source_key(source_stat: Optional[os.stat_result]) -> List[float]:
+    if source_stat is None:
+        return [CACHE_VERSION, -1.0, -1.0]
+    return [CACHE_VERSION, float(source_stat.st_size), float(source_stat.st_mtime)]
+
+
+def _cached_source_key(target: Path, fmt: str) -> Optional[List[float]]:
+    try:
+        if fmt == 'npz':
+            with np.load(target) as archive:
+                return [float(value) for value in archive['__source__']]
+        return json.loads((target / META_FILE).read_text(encoding='utf-8'))['source']
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def cache_path_for(source: Path, source_root: Path, cache_root: Path, fmt: str) -> Path:
+    try:
+        relative = Path(source).resolve().relative_to(Path(source_root).resolve())
+    except ValueError:
+        relative = Path(Path(source).name)
+    stem = relative.with_name(relative.name[:-len('.jsonl')] if relative.name.endswith('.jsonl') else relative.name)
+    return Path(cache_root) / (str(stem) + ('.npz' if fmt == 'npz' else '.npy.d'))
+
+
+def load_session(
+    source: Path,
+    *,
+    source_root: Path,
+    cache_root: Path,
+    fmt: str = 'npz',
+    mmap: bool = True,
+) -> Dict[str, np.ndarray]:
+    """Columns for one session, converting (and caching) only when the source changed."""
+    if fmt not in FORMATS:
+        raise ValueError(f'Unknown columnar format: {fmt}')
+    source = Path(source)
+    stat = source.stat()
+    target = cache_path_for(source, source_root, cache_root, fmt)
+    if target.exists() and _cached_source_key(target, fmt) == _source_key(stat):
+        return load_npz(target) if fmt == 'npz' else load_npy_dir(target, mmap=mmap)
+
+    columns = read_session_columns(source)
+    if fmt == 'npz':
+        write_npz(columns, target, stat)
+    else:
+        write_npy_dir(columns, target, stat)
+    return columns
+
+
+@dataclass
+class SessionSet:
+    """Several sessions concatenated; `offsets[i]` is where session i starts."""
+
+    columns: Dict[str, np.ndarray]
+    offsets: np.ndarray
+    names: List[str] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return int(self.columns[TIME_FIELD].shape[0])
+
+    def column(self, name: str) -> np.ndarray:
+        values = self.columns.get(name)
+        if values is None:
+            return np.full(len(self), np.nan)
+        return values
+
+
+def concat_sessions(sessions: Sequence[Dict[str, np.ndarray]], names: Sequence[str] = ()) -> SessionSet:
+    names = list(names) or [''] * len(sessions)
+    kept = [(session, name) for session, name in zip(sessions, names) if session[TIME_FIELD].shape[0]]
+    sessions = [session for session, _name in kept]
+    names = [name for _session, name in kept]
+    lengths = np.asarray([session[TIME_FIELD].shape[0] for session in sessions], dtype=np.int64)
+    offsets = np.concatenate(([0], np.cumsum(lengths)[:-1])) if len(lengths) else np.zeros(0, dtype=np.int64)
+    fields = sorted({name for session in sessions for name in session})
+    columns: Dict[str, np.ndarray] = {}
+    for name in fields:
+        parts = [
+            np.asarray(session[name]) if name in session else np.full(session[TIME_FIELD].shape[0], np.nan)
+            for session in sessions
+        ]
+        columns[name] = np.concatenate(parts) if parts else np.zeros(0)
+    if TIME_FIELD not in columns:
+        columns[TIME_FIELD] = np.zeros(0)
+    return SessionSet(columns, offsets.astype(np.int64), names)
+
+
+def session_started_at(path: Path) -> Optional[float]:
+    match = SESSION_NAME_PATTERN.search(Path(path).name)
+    if not match:
+        return None
+    try:
+        return datetime(*(int(part) for part in match.groups()), tzinfo=timezone.utc).timestamp()
+    except ValueError:
+        return None
+
+
+def find_sessions(root: Path, *, since: Optional[float] = None, until: Optional[float] = None) -> List[Path]:
+    """Raw and downsampled JSONL sessions under `root`, oldest first."""
+    found = []
+    for path in Path(root).rglob('*.jsonl'):
+        started = session_started_at(path)
+        if started is None:
+            started = path.stat().st_mtime
+        if since is not None and started < since:
+            continue
+        if until is not None and started > until:
+            continue
+        found.append((started, path))
+    return [path for _started, path in sorted(found)]
+
+
+def resample(t: np.ndarray, values: np.ndarray, grid: np.ndarray, *, max_gap_s: float = 5.0) -> np.ndarray:
+    """Linear interpolation onto `grid`; points further than `max_gap_s` from data are NaN."""
+    t = np.asarray(t, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    grid = np.asarray(grid, dtype=np.float64)
+    valid = ~np.isnan(values)
+    if not valid.any():
+        return np.full(grid.shape, np.nan)
+    t_valid, v_valid = t[valid], values[valid]
+    result = np.interp(grid, t_valid, v_valid, left=np.nan, right=np.nan)
+    index = np.clip(np.searchsorted(t_valid, grid), 1, max(1, len(t_valid) - 1))
+    before = t_valid[index - 1]
+    after = t_valid[np.minimum(index, len(t_valid) - 1)]
+    gap = np.minimum(np.abs(grid - before), np.abs(after - grid))
+    result[gap > max_gap_s] = np.nan
+    return result
+
+
+def uniform_grid(t: np.ndarray, step_s: float) -> np.ndarray:
+    if not len(t):
+        return np.zeros(0)
+    return np.arange(t[0], t[-1] + step_s / 2, step_s)
+
+
+def join_nearest(
+    t_left: np.ndarray,
+    t_right: np.ndarray,
+    values_right: np.ndarray,
+    *,
+    tolerance_s: float = 1.0,
+) -> np.ndarray:
+    """For each left timestamp, the right value closest in time (NaN beyond tolerance).
+
+    `t_right` must be sorted, as every column loaded here is.
+    """
+    t_left = np.asarray(t_left, dtype=np.float64)
+    t_right = np.asarray(t_right, dtype=np.float64)
+    values_right = np.asarray(values_right, dtype=np.float64)
+    if not len(t_right):
+        return np.full(t_left.shape, np.nan)
+    index = np.clip(np.searchsorted(t_right, t_left), 1, max(1, len(t_right) - 1))
+    left_index = index - 1
+    right_index = np.minimum(index, len(t_right) - 1)
+    use_right = np.abs(t_right[right_index] - t_left) < np.abs(t_left - t_right[left_index])
+    nearest = np.where(use_right, right_index, left_index)
+    result = values_right[nearest].copy()
+    result[np.abs(t_right[nearest] - t_left) > tolerance_s] = np.nan
+    return result
+
+
+def join_gps(
+    obd: Dict[str, np.ndarray],
+    gps: Dict[str, np.ndarray],
+    *,
+    fields: Iterable[str] = ('lat', 'lon', 'speed', 'altitude'),
+    tolerance_s: float = 2.0,
+) -> Dict[str, np.ndarray]:
+    """Attach GPS columns (from any time-stamped track) to OBD samples by nearest time."""
+    joined = dict(obd)
+    for name in fields:
+        source = gps.get(name, gps.get(f'gps.{name}'))
+        if source is None:
+            continue
+        joined[f'gps_joined.{name}'] = join_nearest(obd[TIME_FIELD], gps[TIME_FIELD], source, tolerance_s=tolerance_s)
+    return joined
+
+
+def _reduce(ufunc: np.ufunc, values: np.ndarray, offsets: np.ndarray, fill: float) -> np.ndarray:
+    if not len(offsets):
+        return np.zeros(0)
+    return ufunc.reduceat(np.where(np.isnan(values), fill, values), offsets)
+
+
+def trip_stats(sessions: SessionSet) -> Dict[str, np.ndarray]:
+    """Per-session statistics computed with `reduceat`, one array entry per session."""
+    offsets = sessions.offsets
+    t = sessions.column(TIME_FIELD)
+    speed = sessions.column('direct.speed_kmh')
+    rpm = sessions.column('direct.rpm')
+    distance = sessions.column('inferred.trip_distance_km')
+    fuel = sessions.column('inferred.trip_consumed_l')
+    coolant = sessions.column('direct.coolant_temp_c')
+
+    counts = np.diff(np.append(offsets, len(sessions)))
+    ends = offsets + counts - 1
+    rpm_count = np.add.reduceat((~np.isnan(rpm)).astype(np.int64), offsets) if len(offsets) else np.zeros(0)
+    rpm_sum = _reduce(np.add, rpm, offsets, 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_rpm = np.where(rpm_count > 0, rpm_sum / np.maximum(rpm_count, 1), np.nan)
+
+    max_speed = _reduce(np.fmax, speed, offsets, np.nan)
+    distance_km = _reduce(np.fmax, distance, offsets, np.nan) - _reduce(np.fmin, distance, offsets, np.nan)
+    fuel_l = _reduce(np.fmax, fuel, offsets, np.nan) - _reduce(np.fmin, fuel, offsets, np.nan)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        km_per_l = np.where(fuel_l > 0, distance_km / fuel_l, np.nan)
+
+    return {
+        'start': t[offsets] if len(offsets) else np.zeros(0),
+        'duration_s': t[ends] - t[offsets] if len(offsets) else np.zeros(0),
+        'samples': counts,
+        'max_speed_kmh': max_speed,
+        'mean_rpm': mean_rpm,
+        'max_rpm': _reduce(np.fmax, rpm, offsets, np.nan),
+        'max_coolant_c': _reduce(np.fmax, coolant, offsets, np.nan),
+        'distance_km': distance_km,
+        'fuel_l': fuel_l,
+        'km_per_l': km_per_l,
+    }
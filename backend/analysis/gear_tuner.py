@@ -0,0 +1,198 @@
+"""
+Pi-Car - Ajuste offline das faixas de marcha.
+
+Agrupa a distribuicao de rpm/velocidade das sessoes gravadas (k-means 1-D
+em escala log) para achar a relacao de cada marcha, deriva faixas de
+entrada/retencao a partir dos centros e reproduz cada conjunto candidato
+pela maquina de estados real (`OBDService._calculate_gear_inference`),
+medindo oscilacao (flicker), cobertura e acerto.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+Bands = Dict[int, Tuple[float, Optional[float]]]
+
+MIN_SPEED_KMH = 15.0
+MIN_RPM = 1000.0
+MAX_ACCEL_KMH_S = 4.0
+REFERENCE_TOLERANCE = 0.06  # +-6 % around a cluster centre counts as clearly in that gear
+SHORT_DWELL_S = 2.0
+
+
+def steady_ratios(columns: Dict[str, np.ndarray]) -> np.ndarray:
+    """rpm/speed for moving, non-shifting samples (vectorised filter)."""
+    t = np.asarray(columns['t'], dtype=np.float64)
+    rpm = np.asarray(columns.get('direct.rpm', np.full(t.shape, np.nan)), dtype=np.float64)
+    speed = np.asarray(columns.get('direct.speed_kmh', np.full(t.shape, np.nan)), dtype=np.float64)
+    if len(t) < 2:
+        return np.zeros(0)
+    accel = np.abs(np.gradient(speed, t))
+    mask = (speed >= MIN_SPEED_KMH) & (rpm >= MIN_RPM) & (accel <= MAX_ACCEL_KMH_S)
+    mask &= np.isfinite(rpm) & np.isfinite(speed)
+    return rpm[mask] / speed[mask]
+
+
+def cluster_gear_ratios(ratios: np.ndarray, gears: int = 5, iterations: int = 50) -> np.ndarray:
+    """1-D k-means in log space; returns centres ordered 1st gear (highest ratio) first."""
+    values = np.log(np.asarray(ratios, dtype=np.float64))
+    values = values[np.isfinite(values)]
+    if len(values) < gears:
+        raise ValueError(f'Need at least {gears} steady samples, got {len(values)}.')
+    centres = np.quantile(values, (np.arange(gears) + 0.5) / gears)
+    for _ in range(iterations):
+        labels = np.argmin(np.abs(values[:, None] - centres[None, :]), axis=1)
+        sums = np.bincount(labels, weights=values, minlength=gears)
+        counts = np.bincount(labels, minlength=gears)
+        updated = np.where(counts > 0, sums / np.maximum(counts, 1), centres)
+        if np.allclose(updated, centres, atol=1e-6):
+            break
+        centres = updated
+    return np.sort(np.exp(centres))[::-1]
+
+
+def bands_from_centres(centres: np.ndarray, hysteresis: float = 0.03) -> Tuple[Bands, Bands]:
+    """Entry bands split at geometric midpoints; hold bands widen them by `hysteresis`."""
+    centres = np.asarray(centres, dtype=np.float64)
+    bounds = np.sqrt(centres[:-1] * centres[1:])
+    # The top gear is bounded below as far as it is above.
+    bottom = centres[-1] ** 2 / bounds[-1] if len(bounds) else centres[-1] * 0.8
+    lowers = np.append(bounds, bottom)
+    uppers: List[Optional[float]] = [None, *bounds.tolist()]
+
+    entry: Bands = {}
+    hold: Bands = {}
+    for index, (lower, upper) in enumerate(zip(lowers.tolist(), uppers), start=1):
+        entry[index] = (round(lower, 1), None if upper is None else round(upper, 1))
+        hold[index] = (
+            round(lower * (1 - hysteresis), 1),
+            None if upper is None else round(upper * (1 + hysteresis), 1),
+        )
+    return entry, hold
+
+
+def replay_gear_inference(service: Any, columns: Dict[str, np.ndarray], offsets: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """Feed samples through the service's gear state machine, resetting between sessions.
+
+    The state machine is sequential, so this is a tight per-sample loop over
+    pre-extracted arrays rather than a vectorised pass.
+    """
+    t = np.asarray(columns['t'], dtype=np.float64)
+    rpm = np.asarray(columns.get('direct.rpm', np.full(t.shape, np.nan)), dtype=np.float64)
+    speed = np.asarray(columns.get('direct.speed_kmh', np.full(t.shape, np.nan)), dtype=np.float64)
+    stale_age = np.asarray(columns.get('metadata.dynamic_stale_age_s', np.zeros(t.shape)), dtype=np.float64)
+    starts = set(int(offset) for offset in (offsets if offsets is not None else [0]))
+
+    gears = np.zeros(len(t), dtype=np.int8)
+    in_gear = np.zeros(len(t), dtype=bool)
+    infer = service._calculate_gear_inference
+    for index in range(len(t)):
+        if index in starts:
+            service._reset_gear_state()
+        age = 0.0 if np.isnan(stale_age[index]) else float(stale_age[index])
+        direct = {
+            'rpm': None if np.isnan(rpm[index]) else float(rpm[index]),
+            'speed_kmh': None if np.isnan(speed[index]) else float(speed[index]),
+        }
+        output = infer(direct, dynamic_stale=age > 1.5, dynamic_stale_age_s=age, now=float(t[index]))
+        if output['state'] == 'IN_GEAR' and output['gear'] is not None:
+            gears[index] = output['gear']
+            in_gear[index] = True
+    return {'gear': gears, 'in_gear': in_gear}
+
+
+def score_replay(
+    columns: Dict[str, np.ndarray],
+    replay: Dict[str, np.ndarray],
+    centres: np.ndarray,
+    offsets: Optional[np.ndarray] = None,
+) -> Dict[str, float]:
+    """Flicker, coverage and accuracy against the nearest cluster centre."""
+    t = np.asarray(columns['t'], dtype=np.float64)
+    rpm = np.asarray(columns.get('direct.rpm', np.full(t.shape, np.nan)), dtype=np.float64)
+    speed = np.asarray(columns.get('direct.speed_kmh', np.full(t.shape, np.nan)), dtype=np.float64)
+    gears = replay['gear']
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ratio = rpm / speed
+        distance = np.abs(np.log(ratio[:, None]) - np.log(np.asarray(centres)[None, :]))
+    moving = (speed >= MIN_SPEED_KMH) & (rpm >= MIN_RPM) & np.isfinite(ratio)
+    nearest = np.argmin(np.where(np.isfinite(distance), distance, np.inf), axis=1) + 1
+    clear = moving & (np.min(np.where(np.isfinite(distance), distance, np.inf), axis=1) <= np.log1p(REFERENCE_TOLERANCE))
+
+    session_break = np.zeros(len(t), dtype=bool)
+    if offsets is not None and len(offsets):
+        session_break[np.asarray(offsets, dtype=np.int64)] = True
+    changes = np.flatnonzero((gears[1:] != gears[:-1]) & (gears[1:] > 0) & ~session_break[1:]) + 1
+
+    # Dwell of each displayed-gear segment: a change followed soon by another is flicker.
+    change_times = t[changes]
+    dwell = np.diff(change_times)
+    short_dwells = int(np.count_nonzero(dwell < SHORT_DWELL_S))
+
+    moving_minutes = float(np.count_nonzero(moving)) * float(np.median(np.diff(t))) / 60 if len(t) > 1 else 0.0
+    return {
+        'samples': int(len(t)),
+        'moving_samples': int(np.count_nonzero(moving)),
+        'coverage': float(np.count_nonzero(replay['in_gear'] & moving) / max(1, np.count_nonzero(moving))),
+        'accuracy': float(np.count_nonzero((gears == nearest) & clear) / max(1, np.count_nonzero(clear))),
+        'gear_changes': int(len(changes)),
+        'short_dwell_changes': short_dwells,
+        'flicker_per_min': short_dwells / moving_minutes if moving_minutes > 0 else 0.0,
+    }
+
+
+def evaluate_bands(
+    service_factory: Callable[[], Any],
+    columns: Dict[str, np.ndarray],
+    centres: np.ndarray,
+    entry: Bands,
+    hold: Bands,
+    offsets: Optional[np.ndarray] = None,
+) -> Dict[str, Any]:
+    service = service_factory()
+    service.set_gear_bands(entry, hold)
+    started = time.perf_counter()
+    replay = replay_gear_inference(service, columns, offsets)
+    elapsed = time.perf_counter() - started
+    metrics = score_replay(columns, replay, centres, offsets)
+    t = np.asarray(columns['t'], dtype=np.float64)
+    recorded_s = float(np.sum(np.clip(np.diff(t), 0, 5))) if len(t) > 1 else 0.0
+    metrics['replay_seconds'] = elapsed
+    metrics['realtime_factor'] = recorded_s / elapsed if elapsed > 0 else float('inf')
+    return {'entry_bands': entry, 'hold_bands': hold, 'metrics': metrics}
+
+
+def tune(
+    service_factory: Callable[[], Any],
+    columns: Dict[str, np.ndarray],
+    *,
+    gears: int = 5,
+    hysteresis_options: Tuple[float, ...] = (0.0, 0.03, 0.06),
+    baseline: Optional[Tuple[Bands, Bands]] = None,
+    offsets: Optional[np.ndarray] = None,
+) -> Dict[str, Any]:
+    """Cluster, derive candidates, replay them all and pick the best."""
+    centres = cluster_gear_ratios(steady_ratios(columns), gears)
+    candidates = []
+    if baseline is not None:
+        result = evaluate_bands(service_factory, columns, centres, *baseline, offsets=offsets)
+        result['name'] = 'current'
+        candidates.append(result)
+    for hysteresis in hysteresis_options:
+        entry, hold = bands_from_centres(centres, hysteresis)
+        result = evaluate_bands(service_factory, columns, centres, entry, hold, offsets=offsets)
+        result['name'] = f'tuned (hysteresis {hysteresis:.0%})'
+        candidates.append(result)
+
+    def _score(candidate: Dict[str, Any]) -> float:
+        metrics = candidate['metrics']
+        return metrics['accuracy'] + 0.5 * metrics['coverage'] - 0.2 * metrics['flicker_per_min']
+
+    tuned = [candidate for candidate in candidates if candidate['name'] != 'current']
+    best = max(tuned, key=_score)
+    return {'centres': [round(float(value), 2) for value in centres], 'candidates': candidates, 'best': best}
@@ -6,12 +6,11 @@ Endpoints da API para controle do RTL-SDR.
 
 import os
 import json
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request, stream_with_context
 from backend.services.rtlsdr_service import (
     radio_data,
     get_rtlsdr_service,
     AIRPORT_PRESETS,
-    FM_PRESETS
 )
 
 radio_bp = Blueprint('radio', __name__)
@@ -159,6 +158,40 @@ def radio_fft():
     return jsonify(result)
 
 
+@radio_bp.route('/fft/stream')
+def radio_fft_stream():
+    """Stream binario de linhas do waterfall (uint8 por bin, cabecalho fixo).
+
+    Query params:
+        center: frequencia central em MHz (opcional, segue o sintonizador)
+        span: largura de banda em MHz (opcional, default: 2.0)
+        bins: bins por linha (opcional)
+        integration: tempo de integracao em segundos (opcional)
+        interval: intervalo minimo entre linhas em ms (opcional)
+        smoothing, margin, min_range: ajuste da faixa de dB (opcionais)
+    """
+    service = get_rtlsdr_service()
+    result = service.open_waterfall_stream(
+        center_freq=request.args.get('center', type=float),
+        span_mhz=request.args.get('span', type=float, default=2.0),
+        bins=request.args.get('bins', type=int),
+        integration_time=request.args.get('integration', type=float),
+        interval_ms=request.args.get('interval', type=float),
+        smoothing=request.args.get('smoothing', type=float, default=0.1),
+        margin_db=request.args.get('margin', type=float, default=5.0),
+        min_range_db=request.args.get('min_range', type=float, default=10.0),
+    )
+
+    if 'error' in result:
+        return jsonify(result), 500
+
+    return Response(
+        stream_with_context(result['stream']),
+        mimetype='application/octet-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
 @radio_bp.route('/spectrum/start', methods=['POST'])
 def radio_spectrum_start():
     """Inicia modo espectrograma (para audio)."""
@@ -183,13 +216,149 @@ def radio_spectrum_stop():
     return jsonify(result)
 
 
+@radio_bp.route('/scanner/start', methods=['POST'])
+def radio_scanner_start():
+    """Inicia o scanner de aviacao (varios canais AM ao mesmo tempo).
+
+    Body JSON:
+        icao: aeroporto dos presets (ex: 'SBSJ')
+        frequencies: opcional, lista em MHz (prioridade = ordem)
+    """
+    data = request.get_json(silent=True) or {}
+    result = get_rtlsdr_service().start_air_scan(icao=data.get('icao'), frequencies=data.get('frequencies'))
+
+    if 'error' in result:
+        return jsonify(result), 400
+
+    return jsonify(result)
+
+
+@radio_bp.route('/scanner/stop', methods=['POST'])
+def radio_scanner_stop():
+    """Para o scanner de aviacao e volta para a frequencia sintonizada."""
+    return jsonify(get_rtlsdr_service().stop_air_scan())
+
+
+@radio_bp.route('/adsb')
+def radio_adsb():
+    """Retorna a tabela de aeronaves do modo ADS-B (1090 MHz)."""
+    result = get_rtlsdr_service().get_adsb()
+
+    if 'error' in result:
+        return jsonify(result), 400
+
+    return jsonify(result)
+
+
+@radio_bp.route('/adsb/start', methods=['POST'])
+def radio_adsb_start():
+    """Inicia o modo ADS-B (o audio para enquanto o dongle fica em 1090 MHz)."""
+    result = get_rtlsdr_service().start_adsb_mode()
+
+    if 'error' in result:
+        return jsonify(result), 500
+
+    return jsonify(result)
+
+
+@radio_bp.route('/adsb/stop', methods=['POST'])
+def radio_adsb_stop():
+    """Para o modo ADS-B e volta ao radio."""
+    return jsonify(get_rtlsdr_service().stop_adsb_mode())
+
+
+@radio_bp.route('/recordings')
+def radio_recordings():
+    """Lista as gravacoes IQ disponiveis para replay."""
+    return jsonify(get_rtlsdr_service().list_iq_recordings())
+
+
+@radio_bp.route('/record/start', methods=['POST'])
+def radio_record_start():
+    """Grava o IQ bruto do pipeline (backend iq).
+
+    Body JSON:
+        seconds: opcional, duracao maxima
+        format: opcional, 'cu8' ou 'cf32'
+    """
+    data = request.get_json(silent=True) or {}
+    seconds = data.get('seconds')
+    result = get_rtlsdr_service().start_iq_recording(
+        seconds=float(seconds) if seconds is not None else None,
+        fmt=data.get('format'),
+    )
+
+    if 'error' in result:
+        return jsonify(result), 400
+
+    return jsonify(result)
+
+
+@radio_bp.route('/record/stop', methods=['POST'])
+def radio_record_stop():
+    """Encerra a gravacao IQ."""
+    result = get_rtlsdr_service().stop_iq_recording()
+
+    if 'error' in result:
+        return jsonify(result), 400
+
+    return jsonify(result)
+
+
+@radio_bp.route('/replay/start', methods=['POST'])
+def radio_replay_start():
+    """Roda o pipeline a partir de uma gravacao IQ em vez do dongle.
+
+    Body JSON:
+        name: arquivo em RTL_RECORD_DIRECTORY
+        realtime: opcional (padrao true); false = o mais rapido possivel
+        loop: opcional (padrao true)
+    """
+    data = request.get_json(silent=True) or {}
+    if not data.get('name'):
+        return jsonify({'error': 'name required'}), 400
+
+    result = get_rtlsdr_service().start_iq_replay(
+        data['name'],
+        realtime=data.get('realtime', True),
+        loop=data.get('loop', True),
+    )
+
+    if 'error' in result:
+        return jsonify(result), 400
+
+    return jsonify(result)
+
+
+@radio_bp.route('/replay/stop', methods=['POST'])
+def radio_replay_stop():
+    """Para o replay e volta para o dongle."""
+    return jsonify(get_rtlsdr_service().stop_iq_replay())
+
+
 @radio_bp.route('/presets')
 def radio_presets():
-    """Retorna presets de frequencias (FM e aeroportos)."""
-    return jsonify({
-        'fm': FM_PRESETS,
-        'airports': AIRPORT_PRESETS
-    })
+    """Retorna presets de frequencias (FM e aeroportos).
+
+    As estacoes FM vem da ultima varredura desta regiao, se houver.
+    """
+    return jsonify(get_rtlsdr_service().get_presets())
+
+
+@radio_bp.route('/scan', methods=['POST'])
+def radio_scan():
+    """Varre a banda FM e atualiza as estacoes da regiao atual.
+
+    Body JSON:
+        force: opcional, ignora o cache da regiao
+    """
+    data = request.get_json(silent=True) or {}
+    result = get_rtlsdr_service().scan_fm_band(force=bool(data.get('force')))
+
+    if 'error' in result:
+        return jsonify(result), 500
+
+    return jsonify(result)
 
 
 @radio_bp.route('/presets/airport/<icao>')
@@ -5,7 +5,11 @@ API endpoints for vehicle data via OBD-II.
 """
 
 from flask import Blueprint, jsonify, request
+from backend.services.fuel_trim_monitor import get_fuel_trim_monitor
+from backend.services.gps_service import gps_data
 from backend.services.obd_service import get_obd_service
+from backend.services.telemetry_estimator import telemetry_estimator
+from backend.services.telemetry_replay import get_telemetry_replay
 
 vehicle_bp = Blueprint('vehicle', __name__)
 
@@ -14,7 +18,23 @@ vehicle_bp = Blueprint('vehicle', __name__)
 def vehicle_status():
     """Returns current OBD-II data including all available metrics."""
     service = get_obd_service()
-    return jsonify(service.get_status())
+    status = service.get_status()
+    telemetry_estimator.ingest_snapshot(status, gps_data)
+    status['estimate'] = telemetry_estimator.snapshot()
+    return jsonify(status)
+
+
+@vehicle_bp.route('/estimate')
+def vehicle_estimate():
+    """Smoothed rpm/speed/GPS speed with rates, for client-side extrapolation."""
+    telemetry_estimator.ingest_snapshot(get_obd_service().get_status(), gps_data)
+    return jsonify(telemetry_estimator.snapshot())
+
+
+@vehicle_bp.route('/trims')
+def vehicle_trims():
+    """Per-regime fuel trim / O2 baselines and drift warnings for this VIN."""
+    return jsonify(get_fuel_trim_monitor().get_status())
 
 
 @vehicle_bp.route('/supported')
@@ -39,3 +59,37 @@ def vehicle_trip_reset():
     service = get_obd_service()
     service.reset_trip()
     return jsonify(service.get_status())
+
+
+@vehicle_bp.route('/replay')
+def vehicle_replay_status():
+    """Returns the recorded-session replay state (test mode --replay)."""
+    replay = get_telemetry_replay()
+    if replay is None:
+        return jsonify({'error': 'Replay not active'}), 404
+    return jsonify(replay.get_status())
+
+
+@vehicle_bp.route('/replay', methods=['POST'])
+def vehicle_replay_control():
+    """Controls the replay: {"action": "pause"|"resume"|"seek", "position_s", "speed"}."""
+    replay = get_telemetry_replay()
+    if replay is None:
+        return jsonify({'error': 'Replay not active'}), 404
+
+    payload = request.get_json(silent=True) or {}
+    try:
+        if payload.get('speed') is not None:
+            replay.set_speed(float(payload['speed']))
+        action = payload.get('action')
+        if action == 'pause':
+            replay.pause()
+        elif action == 'resume':
+            replay.resume()
+        elif action == 'seek':
+            replay.seek(float(payload.get('position_s', 0.0)))
+        elif action is not None:
+            return jsonify({'error': f'Unknown action: {action}'}), 400
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid speed or position_s'}), 400
+    return jsonify(replay.get_status())
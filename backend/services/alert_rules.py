@@ -0,0 +1,223 @@
+"""
+Pi-Car - Motor de regras de alerta do OBD.
+
+Regras declarativas (dicts, ver `DEFAULT_ALERT_RULES` e `OBD_ALERT_RULES`
+no config.py) avaliadas a cada amostra com estado O(1) por regra:
+
+- threshold: `metric op value`
+- duration:  a condicao vale ha pelo menos `for_s` segundos
+- rate:      taxa de variacao (unidade/s, suavizada em `window_s`) `op value`
+- mean:      media movel em `window_s` segundos `op value` (soma corrente)
+
+Todas aceitam `when` (condicoes extras, ex.: motor ligado) e `output` (nome
+da flag publicada em `inferred`, ex.: `coolant_alert`).
+"""
+
+from __future__ import annotations
+
+import math
+import operator
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+OPERATORS: Dict[str, Callable[[float, float], bool]] = {
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+}
+LEVELS = ('info', 'warn', 'crit')
+
+# Reproduce the historical hard-coded checks of OBDService._calculate_inferred.
+DEFAULT_ALERT_RULES: List[Dict[str, Any]] = [
+    {
+        'id': 'coolant_high',
+        'type': 'threshold',
+        'metric': 'coolant_temp_c',
+        'op': '>=',
+        'value': 105,
+        'level': 'crit',
+        'message': 'Temperatura alta',
+        'output': 'coolant_alert',
+    },
+    {
+        'id': 'battery_low_running',
+        'type': 'threshold',
+        'metric': 'adapter_voltage_v',
+        'op': '<',
+        'value': 13.0,
+        'when': [['rpm', '>', 0]],
+        'level': 'warn',
+        'message': 'Tensao baixa com motor ligado',
+        'output': 'battery_alert',
+    },
+]
+
+
+def _number(value: Any) -> Optional[float]:
+    if isinstance(value, bool):
+        return float(value)
+    if not isinstance(value, (int, float)) or math.isnan(value):
+        return None
+    return float(value)
+
+
+def _compile_condition(spec: Any) -> Tuple[str, Callable[[float, float], bool], float]:
+    metric, op, value = spec
+    if op not in OPERATORS:
+        raise ValueError(f'Unknown operator {op!r}')
+    return str(metric), OPERATORS[op], float(value)
+
+
+class AlertRule:
+    """Base rule: `when` gating plus the per-type incremental test."""
+
+    def __init__(self, spec: Dict[str, Any]):
+        self.id = str(spec['id'])
+        self.metric = str(spec['metric'])
+        if spec.get('op') not in OPERATORS:
+            raise ValueError(f"Rule {self.id}: unknown operator {spec.get('op')!r}")
+        self.compare = OPERATORS[spec['op']]
+        self.value = float(spec['value'])
+        self.level = spec.get('level', 'warn')
+        if self.level not in LEVELS:
+            raise ValueError(f'Rule {self.id}: unknown level {self.level!r}')
+        self.message = spec.get('message') or self.id
+        self.output = spec.get('output')
+        self.when = [_compile_condition(item) for item in spec.get('when') or []]
+        self.active = False
+
+    def _gated(self, values: Dict[str, Any]) -> bool:
+        for metric, compare, threshold in self.when:
+            current = _number(values.get(metric))
+            if current is None or not compare(current, threshold):
+                return False
+        return True
+
+    def update(self, values: Dict[str, Any], now: float) -> bool:
+        current = _number(values.get(self.metric))
+        self.active = self._test(current, now) if current is not None and self._gated(values) else self._idle(now)
+        return self.active
+
+    def _test(self, current: float, now: float) -> bool:
+        return self.compare(current, self.value)
+
+    def _idle(self, now: float) -> bool:
+        return False
+
+
+class DurationRule(AlertRule):
+    def __init__(self, spec: Dict[str, Any]):
+        super().__init__(spec)
+        self.for_s = float(spec['for_s'])
+        self._since: Optional[float] = None
+
+    def _test(self, current: float, now: float) -> bool:
+        if not self.compare(current, self.value):
+            self._since = None
+            return False
+        if self._since is None:
+            self._since = now
+        return now - self._since >= self.for_s
+
+    def _idle(self, now: float) -> bool:
+        self._since = None
+        return False
+
+
+class RateRule(AlertRule):
+    """Rate of change, EWMA-smoothed with time constant `window_s`."""
+
+    def __init__(self, spec: Dict[str, Any]):
+        super().__init__(spec)
+        self.window_s = float(spec.get('window_s', 5.0))
+        self._previous: Optional[Tuple[float, float]] = None
+        self._rate: Optional[float] = None
+
+    def _test(self, current: float, now: float) -> bool:
+        previous, self._previous = self._previous, (now, current)
+        if previous is None or now <= previous[0]:
+            return self._rate is not None and self.compare(self._rate, self.value)
+        dt = now - previous[0]
+        instant = (current - previous[1]) / dt
+        weight = 1.0 - math.exp(-dt / self.window_s) if self.window_s > 0 else 1.0
+        self._rate = instant if self._rate is None else self._rate + weight * (instant - self._rate)
+        return self.compare(self._rate, self.value)
+
+    def _idle(self, now: float) -> bool:
+        self._previous = None
+        self._rate = None
+        return False
+
+
+class MeanRule(AlertRule):
+    """Mean over the last `window_s` seconds, kept as a running sum."""
+
+    def __init__(self, spec: Dict[str, Any]):
+        super().__init__(spec)
+        self.window_s = float(spec['window_s'])
+        self.min_samples = int(spec.get('min_samples', 3))
+        self._samples: Deque[Tuple[float, float]] = deque()
+        self._sum = 0.0
+
+    def _test(self, current: float, now: float) -> bool:
+        self._samples.append((now, current))
+        self._sum += current
+        # Each sample is appended and evicted once: amortised O(1) per update.
+        while self._samples and now - self._samples[0][0] > self.window_s:
+            self._sum -= self._samples.popleft()[1]
+        if len(self._samples) < self.min_samples:
+            return False
+        return self.compare(self._sum / len(self._samples), self.value)
+
+    def _idle(self, now: float) -> bool:
+        while self._samples and now - self._samples[0][0] > self.window_s:
+            self._sum -= self._samples.popleft()[1]
+        return False
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self._sum / len(self._samples) if self._samples else None
+
+
+RULE_TYPES = {
+    'threshold': AlertRule,
+    'duration': DurationRule,
+    'rate': RateRule,
+    'mean': MeanRule,
+}
+
+
+def build_rule(spec: Dict[str, Any]) -> AlertRule:
+    try:
+        rule_class = RULE_TYPES[spec.get('type', 'threshold')]
+    except KeyError:
+        raise ValueError(f"Rule {spec.get('id')}: unknown type {spec.get('type')!r}") from None
+    try:
+        return rule_class(spec)
+    except KeyError as exc:
+        raise ValueError(f"Rule {spec.get('id')}: missing {exc.args[0]!r}") from None
+
+
+class AlertRulesEngine:
+    """Evaluates every rule once per OBD sample."""
+
+    def __init__(self, rules: Optional[List[Dict[str, Any]]] = None):
+        specs = DEFAULT_ALERT_RULES if rules is None else rules
+        self.rules = [build_rule(spec) for spec in specs]
+        ids = [rule.id for rule in self.rules]
+        if len(ids) != len(set(ids)):
+            raise ValueError('Alert rule ids must be unique.')
+        self.outputs = sorted({rule.output for rule in self.rules if rule.output})
+
+    def evaluate(self, values: Dict[str, Any], now: float) -> Dict[str, Any]:
+        """Return output flags plus the list of active alerts, most severe first."""
+        flags = {output: False for output in self.outputs}
+        active = []
+        for rule in self.rules:
+            if rule.update(values, now):
+                if rule.output:
+                    flags[rule.output] = True
+                active.append({'id': rule.id, 'level': rule.level, 'message': rule.message})
+        active.sort(key=lambda alert: -LEVELS.index(alert['level']))
+        return {'flags': flags, 'alerts': active}
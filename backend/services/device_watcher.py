@@ -0,0 +1,202 @@
+"""
+Pi-Car - Espera por adaptadores seriais conectados a quente.
+
+`DeviceWatcher` acorda o OBDService assim que o no do adaptador aparece (ou
+muda de permissao) em /dev ou /dev/serial/by-id, usando inotify via ctypes,
+sem dependencias extras. Sem inotify (outro SO, container restrito) cai para
+polling curto. `Backoff` e o atraso exponencial com teto usado entre
+tentativas depois de erros de protocolo.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+IN_ATTRIB = 0x00000004
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_CREATE | IN_DELETE | IN_ATTRIB | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE_SELF | IN_MOVE_SELF
+_EVENT = struct.Struct('iIII')
+POLL_INTERVAL_S = 0.5
+
+
+def _load_inotify() -> Optional[ctypes.CDLL]:
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+class Backoff:
+    """Capped exponential delay: initial, initial*factor, ... up to max_s."""
+
+    def __init__(self, initial_s: float, max_s: float, factor: float = 2.0):
+        self.initial_s = float(initial_s)
+        self.max_s = max(float(max_s), self.initial_s)
+        self.factor = float(factor)
+        self.attempts = 0
+        self._next = self.initial_s
+
+    def next(self) -> float:
+        delay = self._next
+        self._next = min(self.max_s, self._next * self.factor)
+        self.attempts += 1
+        return delay
+
+    def reset(self) -> None:
+        self.attempts = 0
+        self._next = self.initial_s
+
+
+class DeviceWatcher:
+    """Blocks until one of `paths` is created, removed or re-permissioned.
+
+    Every existing ancestor directory is watched, so `/dev/serial/by-id`
+    appearing with the first USB serial device is noticed as well.
+    """
+
+    def __init__(self, paths: Iterable[str], *, poll_interval_s: float = POLL_INTERVAL_S):
+        self.paths = [Path(path) for path in paths if path]
+        self.poll_interval_s = float(poll_interval_s)
+        self._names: Set[bytes] = set()
+        directories: Dict[Path, None] = {}
+        for path in self.paths:
+            self._names.add(os.fsencode(path.name))
+            for parent in path.parents:
+                if parent == parent.parent:
+                    break
+                self._names.add(os.fsencode(parent.name))
+                directories[parent] = None
+        self._directories = list(directories)
+        self._watches: Dict[int, Path] = {}
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        self._closed = False
+        self._libc = _load_inotify()
+        self._fd: Optional[int] = None
+        if self._libc is not None:
+            fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            if fd >= 0:
+                self._fd = fd
+            else:
+                logger.warning(f"inotify unavailable ({os.strerror(ctypes.get_errno())}), polling for devices")
+        self.mode = 'inotify' if self._fd is not None else 'polling'
+        self._seen = self._present()
+
+    def _present(self) -> Set[Path]:
+        return {path for path in self.paths if os.path.exists(path)}
+
+    def _arm(self) -> None:
+        watched = set(self._watches.values())
+        for directory in self._directories:
+            if directory in watched or not directory.is_dir():
+                continue
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+            if wd >= 0:
+                self._watches[wd] = directory
+
+    def _drain_events(self) -> bool:
+        relevant = False
+        while True:
+            try:
+                data = os.read(self._fd, 4096)
+            except BlockingIOError:
+                return relevant
+            if not data:
+                return relevant
+            offset = 0
+            while offset + _EVENT.size <= len(data):
+                wd, mask, _cookie, length = _EVENT.unpack_from(data, offset)
+                name = data[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b'\0')
+                offset += _EVENT.size + length
+                if mask & (IN_IGNORED | IN_DELETE_SELF | IN_MOVE_SELF):
+                    # The directory itself went away; re-armed once it is back.
+                    self._watches.pop(wd, None)
+                    relevant = True
+                elif name in self._names:
+                    relevant = True
+
+    def _drain_wake(self) -> bool:
+        try:
+            return bool(os.read(self._wake_r, 64))
+        except BlockingIOError:
+            return False
+
+    def wait(self, timeout: float) -> bool:
+        """Return True on a device change or `wake()`, False once `timeout` passes.
+
+        Changes are measured against what the previous wait() (or the
+        constructor) saw, so a node created between two waits still counts.
+        """
+        try:
+            return self._wait(time.monotonic() + max(0.0, timeout), self._seen)
+        finally:
+            self._seen = self._present()
+
+    def _wait(self, deadline: float, present: Set[Path]) -> bool:
+        while True:
+            if self._fd is not None:
+                self._arm()
+            # Checked after arming: a node created before its directory was
+            # watched produces no event.
+            if self._present() != present:
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            if self._fd is None:
+                readable, _, _ = select.select([self._wake_r], [], [], min(self.poll_interval_s, remaining))
+                if readable and self._drain_wake():
+                    return True
+                continue
+            readable, _, _ = select.select([self._fd, self._wake_r], [], [], remaining)
+            if self._wake_r in readable and self._drain_wake():
+                return True
+            if self._fd in readable and self._drain_events():
+                return True
+
+    def wake(self) -> None:
+        """Interrupt a pending `wait()` (e.g. on service stop)."""
+        if self._closed:
+            return
+        try:
+            os.write(self._wake_w, b'x')
+        except OSError:
+            pass
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        for fd in (self._fd, self._wake_r, self._wake_w):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self._fd = None
+        self._watches = {}
@@ -0,0 +1,178 @@
+"""
+Pi-Car - Captura e reproducao do trafego serial do ELM327.
+
+Com `OBD_CAPTURE_ENABLED`, cada `OBDService._command` grava um registro
+binario compacto: instante, duracao, timeout, comando e os bytes crus
+recebidos (incluindo o prompt `>`). `ReplaySerial` implementa a parte da
+API do pyserial usada pelo servico e responde a partir de uma captura, de
+modo que uma sessao real vira fixture deterministica de regressao e de
+desempenho (ver scripts/replay_elm_capture.py).
+
+Formato: cabecalho `ELMCAP` + versao (u8) + inicio em epoch (f64); depois
+registros `<B tipo, d offset_s, I duracao_us, H timeout_ms, B len_cmd,
+H len_resp>` seguidos do comando e da resposta.
+"""
+
+from __future__ import annotations
+
+import logging
+import struct
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'ELMCAP'
+VERSION = 1
+_HEADER = struct.Struct('<6sBd')
+_RECORD = struct.Struct('<BdIHBH')
+KIND_COMMAND = 1
+KIND_OPEN = 2          # Serial port (re)opened; command field holds the port name
+UNKNOWN_RESPONSE = b'?\r\r>'
+
+
+class ElmCaptureWriter:
+    """Appends command/response records; stops quietly once `max_bytes` is reached."""
+
+    def __init__(self, path: Path, *, max_bytes: int = 50 * 1024 ** 2):
+        self.path = Path(path)
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._handle = self.path.open('ab')
+        if self._handle.tell() == 0:
+            self._started_at = time.time()
+            self._handle.write(_HEADER.pack(MAGIC, VERSION, self._started_at))
+        else:
+            with self.path.open('rb') as existing:
+                _magic, _version, self._started_at = _HEADER.unpack(existing.read(_HEADER.size))
+        self._started_mono = time.monotonic() - (time.time() - self._started_at)
+        self._size = self._handle.tell()
+        self.records = 0
+        self.full = False
+
+    def record(self, command: str, response: bytes, started_mono: float, duration_s: float, timeout_s: float, kind: int = KIND_COMMAND) -> None:
+        encoded = command.encode('ascii', errors='replace')[:255]
+        response = response[:65535]
+        header = _RECORD.pack(
+            kind,
+            started_mono - self._started_mono,
+            min(0xFFFFFFFF, max(0, int(duration_s * 1e6))),
+            min(0xFFFF, int(timeout_s * 1000)),
+            len(encoded),
+            len(response),
+        )
+        with self._lock:
+            if self._handle is None or self.full:
+                return
+            if self._size + len(header) + len(encoded) + len(response) > self.max_bytes:
+                self.full = True
+                logger.warning(f"ELM capture {self.path} reached {self.max_bytes} bytes, recording stopped")
+                return
+            self._handle.write(header + encoded + response)
+            self._handle.flush()
+            self._size += len(header) + len(encoded) + len(response)
+            self.records += 1
+
+    def mark_open(self, port: str) -> None:
+        self.record(port, b'', time.monotonic(), 0.0, 0.0, kind=KIND_OPEN)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._handle is not None:
+                self._handle.close()
+                self._handle = None
+
+    @classmethod
+    def for_session(cls, directory: Path, **kwargs: Any) -> 'ElmCaptureWriter':
+        stamp = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H-%M-%SZ')
+        return cls(Path(directory) / f'elm-{stamp}.elmcap', **kwargs)
+
+
+def read_capture(path: Path) -> Iterator[Dict[str, Any]]:
+    """Yield records in order; a torn final record is ignored."""
+    data = Path(path).read_bytes()
+    if len(data) < _HEADER.size:
+        return
+    magic, version, started_at = _HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f'{path} is not an ELM capture (version {VERSION})')
+    offset = _HEADER.size
+    while offset + _RECORD.size <= len(data):
+        kind, t, duration_us, timeout_ms, command_len, response_len = _RECORD.unpack_from(data, offset)
+        body = offset + _RECORD.size
+        end = body + command_len + response_len
+        if end > len(data):
+            break
+        yield {
+            'kind': kind,
+            't': t,
+            'wall_time': started_at + t,
+            'duration_s': duration_us / 1e6,
+            'timeout_s': timeout_ms / 1000,
+            'command': data[body:body + command_len].decode('ascii', errors='replace'),
+            'response': data[body + command_len:end],
+        }
+        offset = end
+
+
+class ReplaySerial:
+    """Fake serial port answering each command with its next recorded response.
+
+    Responses are queued per command, so replay stays deterministic even when
+    the poll scheduler issues commands in a different order than on the road.
+    With `realtime=True` each response is held back for its recorded duration.
+    """
+
+    def __init__(self, records: Any, *, realtime: bool = False):
+        self.realtime = realtime
+        self.is_open = True
+        self._responses: Dict[str, Deque[tuple]] = defaultdict(deque)
+        self.total = 0
+        for record in records:
+            if record['kind'] != KIND_COMMAND:
+                continue
+            self._responses[record['command']].append((record['response'], record['duration_s']))
+            self.total += 1
+        self.served = 0
+        self.unknown: List[str] = []
+        self._pending = b''
+        self._ready_at = 0.0
+
+    @classmethod
+    def from_file(cls, path: Path, **kwargs: Any) -> 'ReplaySerial':
+        return cls(read_capture(path), **kwargs)
+
+    def remaining(self, command: Optional[str] = None) -> int:
+        if command is not None:
+            return len(self._responses.get(command, ()))
+        return sum(len(queue) for queue in self._responses.values())
+
+    def reset_input_buffer(self) -> None:
+        self._pending = b''
+
+    def write(self, data: bytes) -> int:
+        command = data.decode('ascii', errors='ignore').strip()
+        queue = self._responses.get(command)
+        if queue:
+            response, duration_s = queue.popleft()
+            self.served += 1
+        else:
+            response, duration_s = UNKNOWN_RESPONSE, 0.0
+            self.unknown.append(command)
+        self._pending = response
+        self._ready_at = time.monotonic() + (duration_s if self.realtime else 0.0)
+        return len(data)
+
+    def read(self, size: int = 1) -> bytes:
+        if not self._pending or time.monotonic() < self._ready_at:
+            return b''
+        chunk, self._pending = self._pending[:size], self._pending[size:]
+        return chunk
+
+    def close(self) -> None:
+        self.is_open = False
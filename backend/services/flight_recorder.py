@@ -0,0 +1,216 @@
+"""
+Pi-Car - Gravador de eventos OBD (flight recorder).
+
+Mantem em memoria um buffer circular com todas as amostras do OBDService
+(taxa completa de polling, nao a de 1 Hz do logger). Quando um gatilho
+dispara -- DTC novo, borda de subida de `coolant_alert`/`battery_alert` ou
+queda de RPM parecida com falha de ignicao -- a janela anterior e a
+posterior ao evento sao gravadas em `telemetry/obd/events/.../*.event.json`.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from backend.services.obd_log_retention import EVENT_SUFFIX
+
+MAX_BUFFERED_SAMPLES = 5000
+
+
+def _number(value: Any) -> Optional[float]:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return float(value)
+
+
+class FlightRecorder:
+    """Pre/post-trigger capture of full-rate OBD samples.
+
+    `on_sample` runs on the OBD monitor thread, so it only appends to the
+    ring buffer and checks triggers; files are written by a worker thread.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        *,
+        pre_seconds: float = 30.0,
+        post_seconds: float = 30.0,
+        rpm_dip_rpm: float = 300.0,
+        cooldown_seconds: float = 60.0,
+        on_event_written: Optional[Callable[[Path], None]] = None,
+    ):
+        self.root = Path(root)
+        self.pre_seconds = float(pre_seconds)
+        self.post_seconds = float(post_seconds)
+        self.rpm_dip_rpm = float(rpm_dip_rpm)
+        self.cooldown_seconds = float(cooldown_seconds)
+        self.on_event_written = on_event_written
+        self._lock = threading.Lock()
+        self._buffer: Deque[Dict[str, Any]] = deque(maxlen=MAX_BUFFERED_SAMPLES)
+        self._active: Optional[Dict[str, Any]] = None
+        self._previous: Optional[Dict[str, Any]] = None
+        self._known_dtcs: Optional[set[str]] = None
+        self._last_trigger_at: Dict[str, float] = {}
+        self._queue: 'queue.Queue[Optional[Dict[str, Any]]]' = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._status: Dict[str, Any] = {
+            'events_written': 0,
+            'last_event_file': None,
+            'last_event_triggers': [],
+            'last_error': None,
+        }
+
+    def start(self) -> None:
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._writer_loop, daemon=True, name='obd-flight-recorder')
+            self._worker.start()
+
+    def stop(self) -> None:
+        """Flush any capture in progress (with whatever post-trigger data exists)."""
+        with self._lock:
+            active, self._active = self._active, None
+        if active is not None:
+            self._queue.put(active)
+        if self._worker is not None and self._worker.is_alive():
+            self._queue.put(None)
+            self._worker.join(timeout=5)
+        else:
+            self._queue.put(None)
+            self._writer_loop()
+        self._worker = None
+
+    def get_status(self) -> Dict[str, Any]:
+        with self._lock:
+            status = dict(self._status)
+            status['buffered_samples'] = len(self._buffer)
+            status['capturing'] = self._active is not None
+            status['pre_seconds'] = self.pre_seconds
+            status['post_seconds'] = self.post_seconds
+        return status
+
+    def on_sample(self, sample: Dict[str, Any]) -> None:
+        now = float(sample.get('t') or time.time())
+        with self._lock:
+            self._buffer.append(sample)
+            while self._buffer and now - self._buffer[0].get('t', now) > self.pre_seconds:
+                self._buffer.popleft()
+
+            triggers = self._evaluate_triggers(sample, now)
+            self._previous = sample
+
+            if self._active is not None:
+                self._active['samples'].append(sample)
+                self._active['triggers'].extend(triggers)
+                if now >= self._active['ends_at']:
+                    self._queue.put(self._active)
+                    self._active = None
+                return
+
+            if triggers:
+                self._active = {
+                    'triggered_at': now,
+                    'ends_at': now + self.post_seconds,
+                    'vin': sample.get('vin'),
+                    'triggers': triggers,
+                    'samples': list(self._buffer),
+                }
+
+    def _fire(self, name: str, now: float, triggers: List[Dict[str, Any]], **detail: Any) -> None:
+        last = self._last_trigger_at.get(name)
+        if last is not None and now - last < self.cooldown_seconds:
+            return
+        self._last_trigger_at[name] = now
+        triggers.append({'trigger': name, 't': now, **detail})
+
+    def _evaluate_triggers(self, sample: Dict[str, Any], now: float) -> List[Dict[str, Any]]:
+        triggers: List[Dict[str, Any]] = []
+        direct = sample.get('direct') or {}
+        inferred = sample.get('inferred') or {}
+
+        dtcs = {code for code in direct.get('active_dtcs') or [] if isinstance(code, str)}
+        if self._known_dtcs is None:
+            # Codes already stored when the recorder starts are not events.
+            self._known_dtcs = dtcs
+        elif dtcs - self._known_dtcs:
+            self._fire('new_dtc', now, triggers, codes=sorted(dtcs - self._known_dtcs))
+            self._known_dtcs |= dtcs
+
+        previous = self._previous
+        if previous is None:
+            return triggers
+        previous_inferred = previous.get('inferred') or {}
+        for flag in ('coolant_alert', 'battery_alert'):
+            if inferred.get(flag) and not previous_inferred.get(flag):
+                self._fire(flag, now, triggers)
+
+        # Misfire-like dip: RPM falls sharply between consecutive samples while
+        # road speed and throttle hold steady (not a gear change or lift-off).
+        previous_direct = previous.get('direct') or {}
+        rpm, previous_rpm = _number(direct.get('rpm')), _number(previous_direct.get('rpm'))
+        speed, previous_speed = _number(direct.get('speed_kmh')), _number(previous_direct.get('speed_kmh'))
+        throttle, previous_throttle = _number(direct.get('throttle_pct')), _number(previous_direct.get('throttle_pct'))
+        if rpm is not None and previous_rpm is not None and previous_rpm >= 900 and rpm > 0:
+            steady_speed = speed is not None and previous_speed is not None and abs(speed - previous_speed) <= 2
+            steady_throttle = throttle is None or previous_throttle is None or throttle >= previous_throttle - 2
+            if previous_rpm - rpm >= self.rpm_dip_rpm and steady_speed and steady_throttle:
+                self._fire('rpm_dip', now, triggers, rpm_before=previous_rpm, rpm_after=rpm)
+        return triggers
+
+    def event_path(self, event: Dict[str, Any]) -> Path:
+        dt = datetime.fromtimestamp(event['triggered_at'], timezone.utc)
+        vin = str(event.get('vin') or 'unknown-vin').lower()
+        kind = event['triggers'][0]['trigger'] if event['triggers'] else 'event'
+        name = dt.strftime('event-%Y-%m-%dT%H-%M-%S') + f'-{int(dt.microsecond / 1000):03d}Z-{kind}{EVENT_SUFFIX}'
+        return self.root / f'{dt.year:04d}' / f'{dt.month:02d}' / f'{dt.day:02d}' / vin / name
+
+    def write_event(self, event: Dict[str, Any]) -> Path:
+        samples = event['samples']
+        payload = {
+            'triggered_at': datetime.fromtimestamp(event['triggered_at'], timezone.utc).isoformat(),
+            'vin': event.get('vin'),
+            'triggers': event['triggers'],
+            'pre_seconds': self.pre_seconds,
+            'post_seconds': self.post_seconds,
+            'sample_count': len(samples),
+            'samples': samples,
+        }
+        target = self.event_path(event)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = target.with_name(target.name + '.tmp')
+        with tmp_path.open('w', encoding='utf-8') as handle:
+            handle.write(json.dumps(payload, ensure_ascii=True, separators=(',', ':')) + '\n')
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp_path, target)
+        return target
+
+    def _writer_loop(self) -> None:
+        while True:
+            event = self._queue.get()
+            if event is None:
+                return
+            try:
+                target = self.write_event(event)
+            except OSError as exc:
+                with self._lock:
+                    self._status['last_error'] = str(exc)
+                continue
+            with self._lock:
+                self._status['events_written'] += 1
+                self._status['last_event_file'] = str(target)
+                self._status['last_event_triggers'] = [item['trigger'] for item in event['triggers']]
+                self._status['last_error'] = None
+            if self.on_event_written is not None:
+                try:
+                    self.on_event_written(target)
+                except Exception:
+                    continue
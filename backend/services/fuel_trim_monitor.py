@@ -0,0 +1,353 @@
+"""
+Pi-Car - Monitor estatistico de fuel trims e sonda O2.
+
+Mantem, por VIN e por regime de operacao (faixas de RPM x carga), uma linha
+de base de longo prazo (Welford: media/variancia) e um nivel recente (EWMA)
+para STFT, LTFT e tensao da O2 B1S1, com memoria e custo constantes por
+amostra. Quando o nivel recente se afasta da base o monitor gera um aviso de
+deriva. A O2 e lida a cada ~5 s, bem abaixo da frequencia de chaveamento da
+sonda (~1 Hz), entao em vez da frequencia mede-se a fracao de leituras que
+cruzam 0,45 V: uma sonda saudavel amostrada assim cruza em ~metade delas, uma
+sonda preguicosa ou travada quase nunca. As bases sao salvas em JSON por VIN.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+import queue
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+RPM_EDGES = (1200, 2000, 3000)        # idle | low | mid | high
+LOAD_EDGES = (30, 60)                 # light | medium | heavy (%)
+EWMA_ALPHA = 0.05
+EWMA_NOISE_FACTOR = math.sqrt(EWMA_ALPHA / (2 - EWMA_ALPHA))
+MIN_BASELINE_SAMPLES = 200
+DRIFT_SIGMA = 3.0
+SAVE_INTERVAL_S = 60.0
+O2_SWITCH_VOLTAGE = 0.45
+O2_LAZY_FRACTION = 0.15
+O2_SWITCH_DRIFT = 0.2                 # Change in crossing fraction vs. this car's baseline
+O2_MIN_SAMPLES = 30
+O2_MIN_COOLANT_C = 70.0
+
+# metric -> (min seconds between samples, i.e. its poll interval; drift floor in metric units)
+METRICS: Dict[str, Dict[str, float]] = {
+    'short_fuel_trim_b1_pct': {'min_interval_s': 1.0, 'drift_floor': 4.0},
+    'long_fuel_trim_b1_pct': {'min_interval_s': 1.0, 'drift_floor': 3.0},
+    'o2_b1s1_voltage_v': {'min_interval_s': 5.0, 'drift_floor': 0.08},
+}
+
+
+def _number(value: Any) -> Optional[float]:
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or math.isnan(value):
+        return None
+    return float(value)
+
+
+def _bin(value: float, edges: tuple) -> int:
+    for index, edge in enumerate(edges):
+        if value < edge:
+            return index
+    return len(edges)
+
+
+def regime_key(rpm: float, load: float) -> str:
+    return f'rpm{_bin(rpm, RPM_EDGES)}-load{_bin(load, LOAD_EDGES)}'
+
+
+class RunningStats:
+    """Welford mean/variance (baseline) plus EWMA mean/variance (recent level)."""
+
+    __slots__ = ('n', 'mean', 'm2', 'ewma', 'ewvar')
+
+    def __init__(self, n: int = 0, mean: float = 0.0, m2: float = 0.0, ewma: Optional[float] = None, ewvar: float = 0.0):
+        self.n = n
+        self.mean = mean
+        self.m2 = m2
+        self.ewma = ewma
+        self.ewvar = ewvar
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else 0.0
+
+    def add_recent(self, value: float, alpha: float = EWMA_ALPHA) -> None:
+        if self.ewma is None:
+            self.ewma = value
+            return
+        delta = value - self.ewma
+        self.ewma += alpha * delta
+        self.ewvar = (1 - alpha) * (self.ewvar + alpha * delta * delta)
+
+    def add_baseline(self, value: float) -> None:
+        self.n += 1
+        delta = value - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (value - self.mean)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'n': self.n, 'mean': self.mean, 'm2': self.m2, 'ewma': self.ewma, 'ewvar': self.ewvar}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'RunningStats':
+        return cls(
+            int(data.get('n', 0)),
+            float(data.get('mean', 0.0)),
+            float(data.get('m2', 0.0)),
+            data.get('ewma'),
+            float(data.get('ewvar', 0.0)),
+        )
+
+
+class FuelTrimMonitor:
+    """OBD sample listener that learns per-regime baselines and flags drift."""
+
+    def __init__(self, root: Path, *, save_interval_s: float = SAVE_INTERVAL_S):
+        self.root = Path(root)
+        self.save_interval_s = float(save_interval_s)
+        self._lock = threading.Lock()
+        self._vin: Optional[str] = None
+        self._regimes: Dict[str, Dict[str, RunningStats]] = {}
+        self._o2 = RunningStats()
+        self._o2_previous_side: Optional[bool] = None
+        self._last_taken: Dict[str, float] = {}
+        self._drifting: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        self._last_saved_at = 0.0
+        # Periodic saves are written here so on_sample never touches the disk.
+        self._queue: 'queue.Queue[Optional[tuple]]' = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+
+    def path_for(self, vin: str) -> Path:
+        safe = re.sub(r'[^A-Za-z0-9_-]', '_', vin) or 'unknown'
+        return self.root / f'{safe}.json'
+
+    def attach(self, obd_service: Any) -> None:
+        self.start()
+        obd_service.add_sample_listener(self.on_sample)
+
+    def detach(self, obd_service: Any) -> None:
+        obd_service.remove_sample_listener(self.on_sample)
+        self.stop()
+
+    def start(self) -> None:
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._writer_loop, daemon=True, name='obd-trim-baselines')
+            self._worker.start()
+
+    def stop(self) -> None:
+        """Drain queued saves, then write whatever changed since the last one."""
+        if self._worker is not None and self._worker.is_alive():
+            self._queue.put(None)
+            self._worker.join(timeout=5)
+        self._worker = None
+        self.save()
+
+    def on_sample(self, sample: Dict[str, Any]) -> None:
+        direct = sample.get('direct') or {}
+        t = float(sample.get('t') or time.time())
+        vin = sample.get('vin') or 'unknown'
+        rpm = _number(direct.get('rpm'))
+        load = _number(direct.get('engine_load_pct'))
+        coolant = _number(direct.get('coolant_temp_c'))
+        with self._lock:
+            if vin != self._vin:
+                self._switch_vin_locked(vin)
+            # Trims are only meaningful warm and in closed loop with the engine running.
+            if rpm is None or rpm <= 0 or load is None or (coolant is not None and coolant < O2_MIN_COOLANT_C):
+                return
+            regime = regime_key(rpm, load)
+            stats = self._regimes.setdefault(regime, {})
+            for metric, params in METRICS.items():
+                value = _number(direct.get(metric))
+                # Values carry over between polls; take each metric at its own poll rate.
+                if value is None or t - self._last_taken.get(metric, -math.inf) < params['min_interval_s']:
+                    continue
+                self._last_taken[metric] = t
+                self._add_locked(regime, metric, stats.setdefault(metric, RunningStats()), value, params['drift_floor'])
+                if metric == 'o2_b1s1_voltage_v':
+                    self._add_o2_switch_locked(value)
+            self._dirty = True
+            if t - self._last_saved_at >= self.save_interval_s:
+                self._queue_save_locked()
+                self._last_saved_at = t
+
+    def _add_locked(self, regime: str, metric: str, stats: RunningStats, value: float, drift_floor: float) -> None:
+        stats.add_recent(value)
+        key = f'{regime}/{metric}'
+        if stats.n >= MIN_BASELINE_SAMPLES:
+            offset = stats.ewma - stats.mean
+            # Noise alone moves an EWMA by std * sqrt(alpha / (2 - alpha)).
+            limit = max(drift_floor, DRIFT_SIGMA * stats.std * EWMA_NOISE_FACTOR)
+            if abs(offset) > limit:
+                self._drifting[key] = {
+                    'kind': 'drift',
+                    'regime': regime,
+                    'metric': metric,
+                    'baseline': round(stats.mean, 3),
+                    'recent': round(stats.ewma, 3),
+                    'offset': round(offset, 3),
+                }
+                # Keep the drifted level out of the baseline it is being compared with.
+                return
+            self._drifting.pop(key, None)
+        stats.add_baseline(value)
+
+    def _add_o2_switch_locked(self, voltage: float) -> None:
+        side = voltage >= O2_SWITCH_VOLTAGE
+        if self._o2_previous_side is not None:
+            crossed = 1.0 if side != self._o2_previous_side else 0.0
+            self._o2.add_recent(crossed)
+            self._o2.add_baseline(crossed)
+        self._o2_previous_side = side
+
+    def _switch_vin_locked(self, vin: str) -> None:
+        if self._vin is not None and self._dirty:
+            self._queue_save_locked()
+        self._vin = vin
+        self._regimes = {}
+        self._o2 = RunningStats()
+        self._o2_previous_side = None
+        self._drifting = {}
+        self._dirty = False
+        path = self.path_for(vin)
+        try:
+            data = json.loads(path.read_text(encoding='utf-8'))
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as exc:
+            logger.warning(f"Fuel trim baselines unreadable ({path}): {exc}")
+            return
+        self._regimes = {
+            regime: {metric: RunningStats.from_dict(values) for metric, values in metrics.items()}
+            for regime, metrics in (data.get('regimes') or {}).items()
+        }
+        self._o2 = RunningStats.from_dict(data.get('o2_switching') or {})
+
+    def _snapshot_locked(self) -> Optional[tuple]:
+        if self._vin is None or not self._dirty:
+            return None
+        self._dirty = False
+        payload = {
+            'version': 1,
+            'vin': self._vin,
+            'updated_at': time.time(),
+            'regimes': {
+                regime: {metric: stats.to_dict() for metric, stats in metrics.items()}
+                for regime, metrics in self._regimes.items()
+            },
+            'o2_switching': self._o2.to_dict(),
+        }
+        return self.path_for(self._vin), payload
+
+    def _queue_save_locked(self) -> None:
+        snapshot = self._snapshot_locked()
+        if snapshot is None:
+            return
+        if self._worker is not None and self._worker.is_alive():
+            self._queue.put(snapshot)
+        else:
+            # Not started (tests, or used without attach): save inline.
+            self._write(*snapshot)
+
+    def _writer_loop(self) -> None:
+        while True:
+            snapshot = self._queue.get()
+            try:
+                if snapshot is None:
+                    return
+                self._write(*snapshot)
+            finally:
+                self._queue.task_done()
+
+    def _write(self, path: Path, payload: Dict[str, Any]) -> None:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(path.name + '.tmp')
+            with tmp_path.open('w', encoding='utf-8') as handle:
+                handle.write(json.dumps(payload, separators=(',', ':')) + '\n')
+                handle.flush()
+                os.fsync(handle.fileno())
+            os.replace(tmp_path, path)
+        except OSError as exc:
+            logger.warning(f"Could not save fuel trim baselines ({path}): {exc}")
+
+    def save(self) -> None:
+        with self._lock:
+            self._queue_save_locked()
+        if self._worker is not None and self._worker.is_alive():
+            # Wait behind any older snapshot so it cannot overwrite this one.
+            self._queue.join()
+
+    def warnings(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return self._warnings_locked()
+
+    def _warnings_locked(self) -> List[Dict[str, Any]]:
+        items = list(self._drifting.values())
+        if self._o2.n >= O2_MIN_SAMPLES and self._o2.ewma is not None and self._o2.ewma < O2_LAZY_FRACTION:
+            items.append({
+                'kind': 'o2_lazy',
+                'metric': 'o2_b1s1_voltage_v',
+                'baseline': round(self._o2.mean, 3),
+                'recent': round(self._o2.ewma, 3),
+            })
+        elif (
+            self._o2.n >= MIN_BASELINE_SAMPLES
+            and self._o2.ewma is not None
+            and abs(self._o2.ewma - self._o2.mean) > O2_SWITCH_DRIFT
+        ):
+            items.append({
+                'kind': 'o2_switching_drift',
+                'metric': 'o2_b1s1_voltage_v',
+                'baseline': round(self._o2.mean, 3),
+                'recent': round(self._o2.ewma, 3),
+            })
+        return items
+
+    def get_status(self) -> Dict[str, Any]:
+        with self._lock:
+            regimes = {
+                regime: {
+                    metric: {
+                        'samples': stats.n,
+                        'baseline_mean': round(stats.mean, 3),
+                        'baseline_std': round(stats.std, 3),
+                        'recent_mean': None if stats.ewma is None else round(stats.ewma, 3),
+                    }
+                    for metric, stats in metrics.items()
+                }
+                for regime, metrics in sorted(self._regimes.items())
+            }
+            return {
+                'vin': self._vin,
+                'regimes': regimes,
+                'o2_switching': {
+                    'samples': self._o2.n,
+                    'baseline_cross_fraction': round(self._o2.mean, 3),
+                    'recent_cross_fraction': None if self._o2.ewma is None else round(self._o2.ewma, 3),
+                },
+                'warnings': self._warnings_locked(),
+            }
+
+
+_monitor_instance: Optional[FuelTrimMonitor] = None
+
+
+def get_fuel_trim_monitor() -> FuelTrimMonitor:
+    global _monitor_instance
+    if _monitor_instance is None:
+        import config
+
+        root = getattr(config, 'OBD_TRIM_BASELINE_DIRECTORY', str(Path.home() / '.pi-car' / 'obd_baselines'))
+        _monitor_instance = FuelTrimMonitor(Path(root).expanduser())
+    return _monitor_instance
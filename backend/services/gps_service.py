@@ -7,6 +7,7 @@ Gerencia conexao e leitura de dados GPS.
 import threading
 import time
 import config
+from backend.services.telemetry_estimator import telemetry_estimator
 
 # Dados globais de GPS (atualizados pela thread)
 gps_data = {
@@ -67,6 +68,7 @@ class GPSService:
                     gps_data['lon'] = data_stream.TPV['lon']
                     gps_data['speed'] = float(data_stream.TPV['speed'] or 0) * 3.6  # m/s -> km/h
                     gps_data['altitude'] = data_stream.TPV['alt']
+                    telemetry_estimator.update('gps_speed_kmh', gps_data['speed'])
 
                 if data_stream.SKY['satellites'] != 'n/a':
                     sats = data_stream.SKY['satellites']
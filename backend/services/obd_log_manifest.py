@@ -0,0 +1,225 @@
+"""
+Pi-Car - Manifesto de upload dos logs OBD.
+
+Registra tamanho, hash e estado de upload de cada arquivo em
+`telemetry/obd`, para que cada sync envie apenas sessoes novas ou
+alteradas e retome de onde parou se o Wi-Fi cair no meio.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+MANIFEST_VERSION = 1
+HASH_CHUNK_BYTES = 1024 * 1024
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open('rb') as handle:
+        while True:
+            chunk = handle.read(HASH_CHUNK_BYTES)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class UploadManifest:
+    """Persistent per-file upload state for the OBD log tree.
+
+    Sizes are kept current in memory from logger writes; only the upload
+    state is persisted, so the manifest file is rewritten once per uploaded
+    file rather than once per record.
+    """
+
+    def __init__(self, root: Path, manifest_path: Optional[Path] = None):
+        self.root = Path(root)
+        self.path = manifest_path or self.root / '.upload_manifest.json'
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._load()
+
+    def _key(self, path: Path) -> str:
+        return Path(path).relative_to(self.root).as_posix()
+
+    def _load(self) -> None:
+        try:
+            payload = json.loads(self.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return
+        if not isinstance(payload, dict) or payload.get('version') != MANIFEST_VERSION:
+            return
+        entries = payload.get('files')
+        if isinstance(entries, dict):
+            self._entries = {key: value for key, value in entries.items() if isinstance(value, dict)}
+
+    def save(self) -> None:
+        with self._lock:
+            payload = {'version': MANIFEST_VERSION, 'files': self._entries}
+            text = json.dumps(payload, ensure_ascii=True, separators=(',', ':'))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with tmp_path.open('w', encoding='utf-8') as handle:
+            handle.write(text)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _entry(self, key: str) -> Dict[str, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = {
+                'size': 0,
+                'mtime': None,
+                'sha256': None,
+                'uploaded_size': 0,
+                'uploaded_sha256': None,
+                'last_upload': None,
+            }
+            self._entries[key] = entry
+        return entry
+
+    def reconcile(self, files: Iterable[Tuple[Path, int, float]]) -> None:
+        """Align the manifest with the files currently on disk."""
+        seen = set()
+        with self._lock:
+            for path, size, mtime in files:
+                try:
+                    key = self._key(path)
+                except ValueError:
+                    continue
+                seen.add(key)
+                entry = self._entry(key)
+                # A rewrite can keep the size (session summaries do), so the
+                # mtime also invalidates the cached hash.
+                if entry['size'] != size or entry['mtime'] != mtime:
+                    entry['sha256'] = None
+                entry['size'] = size
+                entry['mtime'] = mtime
+            for key in [key for key in self._entries if key not in seen]:
+                del self._entries[key]
+
+    def note_write(self, path: Path, nbytes: int, mtime: float) -> None:
+        with self._lock:
+            entry = self._entry(self._key(path))
+            entry['size'] += nbytes
+            entry['mtime'] = mtime
+            entry['sha256'] = None
+
+    def note_file(self, path: Path) -> None:
+        with self._lock:
+            key = self._key(path)
+            try:
+                stat = Path(path).stat()
+            except OSError:
+                self._entries.pop(key, None)
+                return
+            entry = self._entry(key)
+            entry['size'] = stat.st_size
+            entry['mtime'] = stat.st_mtime
+            entry['sha256'] = None
+
+    def pending(self, open_paths: Iterable[Path] = ()) -> List[Dict[str, Any]]:
+        """Return uploads still owed to the remote, closed files first (oldest first).
+
+        Closed files are hashed once and compared with the hash recorded at
+        upload time; the open session is only ever sent as an appended tail.
+        """
+        open_keys = set()
+        for path in open_paths:
+            try:
+                open_keys.add(self._key(path))
+            except ValueError:
+                continue
+
+        with self._lock:
+            items = [(key, dict(entry)) for key, entry in self._entries.items()]
+
+        closed: List[Dict[str, Any]] = []
+        tails: List[Dict[str, Any]] = []
+        for key, entry in items:
+            path = self.root / key
+            size = entry['size']
+            uploaded_size = entry.get('uploaded_size') or 0
+            if key in open_keys:
+                if size > uploaded_size:
+                    tails.append({'key': key, 'path': path, 'size': size, 'mode': 'tail', 'offset': uploaded_size})
+                continue
+
+            sha256 = entry.get('sha256')
+            if sha256 is None:
+                try:
+                    sha256 = file_sha256(path)
+                except OSError:
+                    continue
+                with self._lock:
+                    current = self._entries.get(key)
+                    if current is not None and current['size'] == size:
+                        current['sha256'] = sha256
+            if sha256 == entry.get('uploaded_sha256') and uploaded_size == size:
+                continue
+
+            changed = size < uploaded_size or (size == uploaded_size and entry.get('uploaded_sha256') is not None)
+            closed.append({
+                'key': key,
+                'path': path,
+                'size': size,
+                'sha256': sha256,
+                'mode': 'full' if changed else 'append',
+                'offset': 0 if changed else uploaded_size,
+                'mtime': entry.get('mtime') or 0,
+            })
+
+        closed.sort(key=lambda item: (item['mtime'], item['key']))
+        return closed + tails
+
+    def mark_uploaded(
+        self,
+        key: str,
+        *,
+        size: int,
+        sha256: Optional[str],
+        bytes_sent: int,
+        seconds: float,
+    ) -> None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry['uploaded_size'] = size
+            entry['uploaded_sha256'] = sha256
+            entry['last_upload'] = {
+                'at': datetime.now(timezone.utc).isoformat(),
+                'bytes': bytes_sent,
+                'seconds': round(seconds, 3),
+            }
+
+    def is_uploaded(self, path: Path) -> bool:
+        try:
+            key = self._key(path)
+        except ValueError:
+            return False
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False
+            return entry.get('uploaded_sha256') is not None and entry.get('uploaded_size') == entry['size']
+
+    def get_status(self) -> Dict[str, Any]:
+        with self._lock:
+            total = len(self._entries)
+            uploaded = sum(
+                1 for entry in self._entries.values()
+                if entry.get('uploaded_sha256') is not None and entry.get('uploaded_size') == entry['size']
+            )
+            pending_bytes = sum(
+                max(0, entry['size'] - (entry.get('uploaded_size') or 0)) for entry in self._entries.values()
+            )
+        return {'files': total, 'uploaded_files': uploaded, 'pending_bytes': pending_bytes}
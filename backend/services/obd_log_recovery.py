@@ -0,0 +1,157 @@
+"""
+Pi-Car - Recuperacao dos logs OBD apos queda de energia.
+
+Um corte de energia no meio de uma escrita pode deixar a ultima linha JSONL
+truncada (ou preenchida com bytes nulos pelo sistema de arquivos). Na
+inicializacao do logger, apenas o final das sessoes recentes e lido: linhas
+rasgadas sao removidas e resumos ausentes sao reconstruidos a partir do
+primeiro e do ultimo registro, marcados como `partial`.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from backend.services.obd_log_retention import DAY_S, SessionSummary, summary_path_for, write_summary
+
+TAIL_BYTES = 8 * 1024
+HEAD_BYTES = 8 * 1024
+RECOVERY_WINDOW_S = 2 * DAY_S
+
+# Fields that need every record; a head/tail summary cannot know them.
+_FULL_SCAN_FIELDS = ('record_count', 'max_speed_kmh', 'max_rpm', 'max_coolant_temp_c', 'min_battery_v')
+
+
+def _decode_line(raw_line: bytes) -> Optional[Dict[str, Any]]:
+    try:
+        record = json.loads(raw_line)
+    except ValueError:
+        return None
+    return record if isinstance(record, dict) else None
+
+
+def repair_tail(path: Path, tail_bytes: int = TAIL_BYTES) -> int:
+    """Truncate torn or undecodable trailing records; return the bytes removed.
+
+    Only the last `tail_bytes` of the file are read. If no intact record is
+    found in that window the file is left alone rather than guessed at.
+    """
+    path = Path(path)
+    with path.open('r+b') as handle:
+        size = handle.seek(0, os.SEEK_END)
+        if size == 0:
+            return 0
+        start = max(0, size - tail_bytes)
+        handle.seek(start)
+        tail = handle.read()
+
+        keep = len(tail)
+        while keep > 0:
+            end = keep if tail[keep - 1:keep] == b'\n' else tail.rfind(b'\n', 0, keep) + 1
+            if end <= 0:
+                # No line boundary inside the window: only safe to cut to zero
+                # when the window covers the whole file.
+                keep = 0 if start == 0 else -1
+                break
+            line_start = tail.rfind(b'\n', 0, end - 1) + 1
+            if line_start == 0 and start > 0:
+                keep = end
+                break
+            if _decode_line(tail[line_start:end]) is not None:
+                keep = end
+                break
+            keep = line_start
+
+        if keep < 0 or keep == len(tail):
+            return 0
+        handle.truncate(start + keep)
+        handle.flush()
+        os.fsync(handle.fileno())
+        return len(tail) - keep
+
+
+def _first_record(path: Path, head_bytes: int) -> Optional[Dict[str, Any]]:
+    with path.open('rb') as handle:
+        head = handle.read(head_bytes)
+    for raw_line in head.split(b'\n')[:-1]:
+        record = _decode_line(raw_line)
+        if record is not None:
+            return record
+    return None
+
+
+def _last_record(path: Path, tail_bytes: int) -> Optional[Dict[str, Any]]:
+    with path.open('rb') as handle:
+        size = handle.seek(0, os.SEEK_END)
+        handle.seek(max(0, size - tail_bytes))
+        tail = handle.read()
+    lines = tail.split(b'\n')[:-1]
+    if size > tail_bytes:
+        lines = lines[1:]
+    for raw_line in reversed(lines):
+        record = _decode_line(raw_line)
+        if record is not None:
+            return record
+    return None
+
+
+def build_partial_summary(path: Path, head_bytes: int = HEAD_BYTES, tail_bytes: int = TAIL_BYTES) -> Optional[Dict[str, Any]]:
+    """Summarise a session from its first and last records only."""
+    first = _first_record(path, head_bytes)
+    last = _last_record(path, tail_bytes)
+    if first is None and last is None:
+        return None
+    summary = SessionSummary(path)
+    for record in (first, last):
+        if record is not None:
+            summary.add(record)
+    payload = summary.to_dict()
+    for field in _FULL_SCAN_FIELDS:
+        payload[field] = None
+    payload['partial'] = True
+    return payload
+
+
+def recover_log_tree(
+    files: Iterable[tuple[Path, int, float]],
+    *,
+    window_s: float = RECOVERY_WINDOW_S,
+    tail_bytes: int = TAIL_BYTES,
+) -> Dict[str, Any]:
+    """Repair the raw sessions written within `window_s` of the newest one.
+
+    `files` is the retention ledger (path, size, mtime); nothing else on disk
+    is listed. Returns the repaired and summarised paths so callers can
+    refresh their own bookkeeping.
+    """
+    raw = [(Path(path), mtime) for path, _size, mtime in files if Path(path).name.endswith('.jsonl')
+           and not Path(path).name.endswith('.downsampled.jsonl')]
+    report: Dict[str, Any] = {'checked': 0, 'truncated_bytes': 0, 'repaired': [], 'summaries': []}
+    if not raw:
+        return report
+
+    newest = max(mtime for _path, mtime in raw)
+    for path, mtime in raw:
+        if newest - mtime > window_s:
+            continue
+        report['checked'] += 1
+        try:
+            removed = repair_tail(path, tail_bytes)
+        except OSError:
+            continue
+        if removed:
+            report['truncated_bytes'] += removed
+            report['repaired'].append(path)
+
+        if summary_path_for(path).exists():
+            continue
+        try:
+            summary = build_partial_summary(path, tail_bytes=tail_bytes)
+            if summary is not None:
+                report['summaries'].append(write_summary(path, summary))
+        except OSError:
+            continue
+    return report
@@ -0,0 +1,527 @@
+"""
+Pi-Car - Retencao local dos logs OBD.
+
+Mantem `telemetry/obd` dentro de um orcamento de disco. Sessoes ja
+sincronizadas sao apagadas primeiro, dados antigos sao reduzidos antes de
+serem removidos e os resumos (`*.summary.json`) sobrevivem aos dados brutos.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+RAW_SUFFIX = '.jsonl'
+DOWNSAMPLED_SUFFIX = '.downsampled.jsonl'
+SUMMARY_SUFFIX = '.summary.json'
+EVENT_SUFFIX = '.event.json'
+AGE_SWEEP_INTERVAL_S = 3600.0
+DAY_S = 86400.0
+SESSION_NAME_PATTERN = re.compile(r'session-(\d{4})-(\d{2})-(\d{2})T(\d{2})-(\d{2})-(\d{2})Z')
+
+
+def classify_log_file(path: Path) -> Optional[str]:
+    name = path.name
+    if name.endswith(SUMMARY_SUFFIX):
+        return 'summary'
+    if name.endswith(EVENT_SUFFIX):
+        return 'event'
+    if name.endswith(DOWNSAMPLED_SUFFIX):
+        return 'downsampled'
+    if name.endswith(RAW_SUFFIX):
+        return 'raw'
+    return None
+
+
+def session_stem(path: Path) -> str:
+    name = path.name
+    for suffix in (SUMMARY_SUFFIX, DOWNSAMPLED_SUFFIX, RAW_SUFFIX):
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+
+def summary_path_for(path: Path) -> Path:
+    return path.with_name(session_stem(path) + SUMMARY_SUFFIX)
+
+
+def downsampled_path_for(path: Path) -> Path:
+    return path.with_name(session_stem(path) + DOWNSAMPLED_SUFFIX)
+
+
+def session_started_at(path: Path) -> Optional[float]:
+    match = SESSION_NAME_PATTERN.search(path.name)
+    if not match:
+        return None
+    year, month, day, hour, minute, second = (int(part) for part in match.groups())
+    try:
+        return datetime(year, month, day, hour, minute, second, tzinfo=timezone.utc).timestamp()
+    except ValueError:
+        return None
+
+
+def _parse_timestamp(value: Any) -> Optional[float]:
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+
+def record_timestamp(record: Dict[str, Any]) -> Optional[float]:
+    metadata = record.get('metadata') or {}
+    return _parse_timestamp(metadata.get('sample_time')) or _parse_timestamp(record.get('logged_at'))
+
+
+def iter_records(path: Path) -> Iterator[Dict[str, Any]]:
+    """Yield decoded JSONL records, skipping torn or invalid lines."""
+    with path.open('rb') as handle:
+        for raw_line in handle:
+            if not raw_line.endswith(b'\n'):
+                break
+            try:
+                record = json.loads(raw_line)
+            except ValueError:
+                continue
+            if isinstance(record, dict):
+                yield record
+
+
+def _write_json_atomic(path: Path, payload: Dict[str, Any]) -> None:
+    tmp_path = path.with_name(path.name + '.tmp')
+    with tmp_path.open('w', encoding='utf-8') as handle:
+        handle.write(json.dumps(payload, ensure_ascii=True, indent=2) + '\n')
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(tmp_path, path)
+
+
+class SessionSummary:
+    """Incremental per-file session summary, cheap enough to update on every record."""
+
+    def __init__(self, source: Optional[Path] = None):
+        self.source = source
+        self.record_count = 0
+        self.session_id: Optional[str] = None
+        self.vin: Optional[str] = None
+        self.device_name: Optional[str] = None
+        self.first_sample_time: Optional[str] = None
+        self.last_sample_time: Optional[str] = None
+        self._first_ts: Optional[float] = None
+        self._last_ts: Optional[float] = None
+        self._first_distance: Optional[float] = None
+        self._last_distance: Optional[float] = None
+        self._first_fuel: Optional[float] = None
+        self._last_fuel: Optional[float] = None
+        self.max_speed_kmh: Optional[float] = None
+        self.max_rpm: Optional[float] = None
+        self.max_coolant_temp_c: Optional[float] = None
+        self.min_battery_v: Optional[float] = None
+        self.dtcs: set[str] = set()
+        self.gps_start: Optional[Dict[str, float]] = None
+        self.gps_end: Optional[Dict[str, float]] = None
+
+    @staticmethod
+    def _number(value: Any) -> Optional[float]:
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return None
+        return float(value)
+
+    def _max(self, current: Optional[float], value: Any) -> Optional[float]:
+        number = self._number(value)
+        if number is None:
+            return current
+        return number if current is None else max(current, number)
+
+    def add(self, record: Dict[str, Any]) -> None:
+        self.record_count += 1
+        self.session_id = self.session_id or record.get('session_id')
+        self.vin = self.vin or record.get('vin')
+        self.device_name = self.device_name or record.get('device_name')
+
+        sample_time = (record.get('metadata') or {}).get('sample_time') or record.get('logged_at')
+        timestamp = record_timestamp(record)
+        if timestamp is not None:
+            if self._first_ts is None:
+                self._first_ts = timestamp
+                self.first_sample_time = sample_time
+            self._last_ts = timestamp
+            self.last_sample_time = sample_time
+
+        direct = record.get('direct') or {}
+        inferred = record.get('inferred') or {}
+        distance = self._number(inferred.get('trip_distance_km'))
+        fuel = self._number(inferred.get('trip_consumed_l'))
+        if distance is not None:
+            if self._first_distance is None:
+                self._first_distance = distance
+            self._last_distance = distance
+        if fuel is not None:
+            if self._first_fuel is None:
+                self._first_fuel = fuel
+            self._last_fuel = fuel
+
+        self.max_speed_kmh = self._max(self.max_speed_kmh, direct.get('speed_kmh'))
+        self.max_rpm = self._max(self.max_rpm, direct.get('rpm'))
+        self.max_coolant_temp_c = self._max(self.max_coolant_temp_c, direct.get('coolant_temp_c'))
+        battery = self._number(direct.get('adapter_voltage_v'))
+        if battery is not None:
+            self.min_battery_v = battery if self.min_battery_v is None else min(self.min_battery_v, battery)
+        for code in direct.get('active_dtcs') or []:
+            if isinstance(code, str):
+                self.dtcs.add(code)
+
+        gps = record.get('gps') or {}
+        lat = self._number(gps.get('lat'))
+        lon = self._number(gps.get('lon'))
+        if lat is not None and lon is not None:
+            point = {'lat': lat, 'lon': lon}
+            if self.gps_start is None:
+                self.gps_start = point
+            self.gps_end = point
+
+    def to_dict(self) -> Dict[str, Any]:
+        def _delta(first: Optional[float], last: Optional[float], digits: int) -> Optional[float]:
+            if first is None or last is None:
+                return None
+            return round(max(0.0, last - first), digits)
+
+        duration = None
+        if self._first_ts is not None and self._last_ts is not None:
+            duration = round(self._last_ts - self._first_ts, 1)
+        return {
+            'session_id': self.session_id,
+            'vin': self.vin,
+            'device_name': self.device_name,
+            'source_file': self.source.name if self.source else None,
+            'record_count': self.record_count,
+            'first_sample_time': self.first_sample_time,
+            'last_sample_time': self.last_sample_time,
+            'duration_s': duration,
+            'distance_km': _delta(self._first_distance, self._last_distance, 2),
+            'fuel_l': _delta(self._first_fuel, self._last_fuel, 3),
+            'max_speed_kmh': self.max_speed_kmh,
+            'max_rpm': self.max_rpm,
+            'max_coolant_temp_c': self.max_coolant_temp_c,
+            'min_battery_v': self.min_battery_v,
+            'dtcs': sorted(self.dtcs),
+            'gps_start': self.gps_start,
+            'gps_end': self.gps_end,
+        }
+
+
+def build_summary(path: Path) -> Dict[str, Any]:
+    summary = SessionSummary(path)
+    for record in iter_records(path):
+        summary.add(record)
+    return summary.to_dict()
+
+
+def write_summary(path: Path, summary: Dict[str, Any]) -> Path:
+    target = summary_path_for(path)
+    _write_json_atomic(target, summary)
+    return target
+
+
+def _is_partial_summary(path: Path) -> bool:
+    try:
+        return bool(json.loads(path.read_text(encoding='utf-8')).get('partial'))
+    except (OSError, ValueError, AttributeError):
+        return False
+
+
+def downsample_file(path: Path, interval_s: float) -> Path:
+    """Keep at most one record per `interval_s` and replace `path` with the result."""
+    target = downsampled_path_for(path)
+    tmp_path = target.with_name(target.name + '.tmp')
+    last_kept: Optional[float] = None
+    with path.open('rb') as source, tmp_path.open('wb') as handle:
+        for raw_line in source:
+            if not raw_line.endswith(b'\n'):
+                break
+            try:
+                record = json.loads(raw_line)
+            except ValueError:
+                continue
+            timestamp = record_timestamp(record) if isinstance(record, dict) else None
+            if timestamp is None:
+                continue
+            if last_kept is not None and timestamp - last_kept < interval_s:
+                continue
+            handle.write(raw_line)
+            last_kept = timestamp
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(tmp_path, target)
+    path.unlink()
+    return target
+
+
+@dataclass
+class _Entry:
+    size: int
+    mtime: float
+    kind: str
+    started_at: Optional[float] = None
+
+    @property
+    def age_base(self) -> float:
+        return self.started_at if self.started_at is not None else self.mtime
+
+
+class TelemetryRetentionManager:
+    """Keep the local OBD log tree inside a disk budget.
+
+    Usage is tracked incrementally: the tree is walked once by `rescan()` and
+    afterwards every write and removal updates the in-memory ledger, so
+    `needs_enforcement()` is O(1).
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        *,
+        budget_bytes: int,
+        downsample_after_days: float,
+        downsample_interval_s: float,
+        raw_retention_days: float,
+        summary_retention_days: float,
+        is_synced: Optional[Callable[[Path, float], bool]] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.root = Path(root)
+        self.budget_bytes = int(budget_bytes)
+        self.downsample_after_s = float(downsample_after_days) * DAY_S
+        self.downsample_interval_s = float(downsample_interval_s)
+        self.raw_retention_s = float(raw_retention_days) * DAY_S
+        self.summary_retention_s = float(summary_retention_days) * DAY_S
+        self.is_synced = is_synced or (lambda path, mtime: False)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: Dict[Path, _Entry] = {}
+        self._usage_bytes = 0
+        self._scanned = False
+        self._last_age_sweep: Optional[float] = None
+        self._last_report: Dict[str, Any] = {}
+
+    @property
+    def usage_bytes(self) -> int:
+        return self._usage_bytes
+
+    @property
+    def scanned(self) -> bool:
+        return self._scanned
+
+    def files(self) -> list[tuple[Path, int, float]]:
+        with self._lock:
+            return [(path, entry.size, entry.mtime) for path, entry in self._entries.items()]
+
+    def rescan(self) -> None:
+        entries: Dict[Path, _Entry] = {}
+        if self.root.exists():
+            stack = [self.root]
+            while stack:
+                current = stack.pop()
+                try:
+                    with os.scandir(current) as iterator:
+                        for item in iterator:
+                            if item.is_dir(follow_symlinks=False):
+                                stack.append(Path(item.path))
+                                continue
+                            path = Path(item.path)
+                            kind = classify_log_file(path)
+                            if kind is None:
+                                continue
+                            stat = item.stat(follow_symlinks=False)
+                            entries[path] = _Entry(stat.st_size, stat.st_mtime, kind, session_started_at(path))
+                except OSError:
+                    continue
+        with self._lock:
+            self._entries = entries
+            self._usage_bytes = sum(entry.size for entry in entries.values())
+            self._scanned = True
+
+    def note_write(self, path: Path, nbytes: int) -> None:
+        path = Path(path)
+        kind = classify_log_file(path)
+        if kind is None:
+            return
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None:
+                entry = _Entry(0, 0.0, kind, session_started_at(path))
+                self._entries[path] = entry
+            entry.size += nbytes
+            entry.mtime = self._clock()
+            self._usage_bytes += nbytes
+
+    def note_file(self, path: Path) -> None:
+        """Refresh one ledger entry from disk after it was replaced or truncated."""
+        path = Path(path)
+        kind = classify_log_file(path)
+        with self._lock:
+            previous = self._entries.pop(path, None)
+            if previous is not None:
+                self._usage_bytes -= previous.size
+            if kind is None:
+                return
+            try:
+                stat = path.stat()
+            except OSError:
+                return
+            self._entries[path] = _Entry(stat.st_size, stat.st_mtime, kind, session_started_at(path))
+            self._usage_bytes += stat.st_size
+
+    def needs_enforcement(self, now: Optional[float] = None) -> bool:
+        now = self._clock() if now is None else now
+        if not self._scanned:
+            return True
+        if self._usage_bytes > self.budget_bytes:
+            return True
+        return self._last_age_sweep is None or now - self._last_age_sweep >= AGE_SWEEP_INTERVAL_S
+
+    def enforce(self, *, protected: Iterable[Path] = (), now: Optional[float] = None) -> Dict[str, Any]:
+        now = self._clock() if now is None else now
+        if not self._scanned:
+            self.rescan()
+        protected_set = {Path(path) for path in protected}
+        report = {'downsampled': 0, 'deleted': 0, 'summaries_deleted': 0, 'freed_bytes': 0}
+        start_usage = self._usage_bytes
+
+        self._age_sweep(now, protected_set, report)
+        self._last_age_sweep = now
+        if self._usage_bytes > self.budget_bytes:
+            self._budget_sweep(protected_set, report)
+
+        report['freed_bytes'] = max(0, start_usage - self._usage_bytes)
+        report['usage_bytes'] = self._usage_bytes
+        report['budget_bytes'] = self.budget_bytes
+        report['over_budget'] = self._usage_bytes > self.budget_bytes
+        self._last_report = report
+        return report
+
+    def get_status(self) -> Dict[str, Any]:
+        with self._lock:
+            counts: Dict[str, int] = {'raw': 0, 'downsampled': 0, 'summary': 0, 'event': 0}
+            for entry in self._entries.values():
+                counts[entry.kind] = counts.get(entry.kind, 0) + 1
+        return {
+            'usage_bytes': self._usage_bytes,
+            'budget_bytes': self.budget_bytes,
+            'files': counts,
+            'last_report': dict(self._last_report),
+        }
+
+    def _snapshot(self, kinds: Iterable[str], protected: set[Path]) -> list[tuple[Path, _Entry]]:
+        kinds = set(kinds)
+        with self._lock:
+            items = [
+                (path, _Entry(entry.size, entry.mtime, entry.kind, entry.started_at))
+                for path, entry in self._entries.items()
+                if entry.kind in kinds and path not in protected
+            ]
+        items.sort(key=lambda item: item[1].age_base)
+        return items
+
+    def _age_sweep(self, now: float, protected: set[Path], report: Dict[str, Any]) -> None:
+        for path, entry in self._snapshot(('raw', 'downsampled'), protected):
+            age = now - entry.age_base
+            if age >= self.raw_retention_s:
+                self._delete_data(path, report)
+            elif entry.kind == 'raw' and age >= self.downsample_after_s:
+                self._downsample(path, report)
+
+        for path, entry in self._snapshot(('event',), protected):
+            if now - entry.age_base >= self.raw_retention_s:
+                self._remove(path)
+                report['deleted'] += 1
+
+        for path, entry in self._snapshot(('summary',), protected):
+            if now - entry.age_base >= self.summary_retention_s:
+                self._remove(path)
+                report['summaries_deleted'] += 1
+
+    def _budget_sweep(self, protected: set[Path], report: Dict[str, Any]) -> None:
+        data = self._snapshot(('raw', 'downsampled'), protected)
+        synced = [(path, entry) for path, entry in data if self.is_synced(path, entry.mtime)]
+        unsynced = [(path, entry) for path, entry in data if not self.is_synced(path, entry.mtime)]
+
+        for path, _entry in synced:
+            if self._usage_bytes <= self.budget_bytes:
+                return
+            self._delete_data(path, report)
+
+        for path, entry in unsynced:
+            if self._usage_bytes <= self.budget_bytes:
+                return
+            if entry.kind == 'raw':
+                self._downsample(path, report)
+
+        for path, _entry in self._snapshot(('raw', 'downsampled'), protected):
+            if self._usage_bytes <= self.budget_bytes:
+                return
+            self._delete_data(path, report)
+
+        # Flight-recorder captures go after the sessions they came from.
+        for path, _entry in self._snapshot(('event',), protected):
+            if self._usage_bytes <= self.budget_bytes:
+                return
+            self._remove(path)
+            report['deleted'] += 1
+
+        for path, _entry in self._snapshot(('summary',), protected):
+            if self._usage_bytes <= self.budget_bytes:
+                return
+            self._remove(path)
+            report['summaries_deleted'] += 1
+
+    def _ensure_summary(self, path: Path) -> None:
+        target = summary_path_for(path)
+        if target.exists() and not _is_partial_summary(target):
+            return
+        write_summary(path, build_summary(path))
+        self.note_file(target)
+
+    def _downsample(self, path: Path, report: Dict[str, Any]) -> None:
+        try:
+            self._ensure_summary(path)
+            target = downsample_file(path, self.downsample_interval_s)
+        except OSError:
+            return
+        self.note_file(path)
+        self.note_file(target)
+        report['downsampled'] += 1
+
+    def _delete_data(self, path: Path, report: Dict[str, Any]) -> None:
+        try:
+            self._ensure_summary(path)
+        except OSError:
+            return
+        self._remove(path)
+        report['deleted'] += 1
+
+    def _remove(self, path: Path) -> None:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        except OSError:
+            return
+        self.note_file(path)
+        self._prune_empty_dirs(path.parent)
+
+    def _prune_empty_dirs(self, directory: Path) -> None:
+        while directory != self.root and self.root in directory.parents:
+            try:
+                directory.rmdir()
+            except OSError:
+                return
+            directory = directory.parent
@@ -21,6 +21,11 @@ from pathlib import Path
 from typing import Any, Dict
 
 import config
+from backend.services.flight_recorder import FlightRecorder
+from backend.services.obd_log_manifest import UploadManifest
+from backend.services.obd_log_recovery import recover_log_tree
+from backend.services.obd_log_retention import SessionSummary, TelemetryRetentionManager, write_summary
+from backend.services.telemetry_http import ChunkedUploadClient
 
 
 def _utc_now() -> datetime:
@@ -59,6 +64,11 @@ class OBDLoggerService:
         self.sync_interval_seconds = int(getattr(config, 'OBD_LOG_SYNC_INTERVAL_SECONDS', 900))
         self.device_name = _slugify(getattr(config, 'OBD_LOG_DEVICE_NAME', socket.gethostname()))
         self.enabled = bool(getattr(config, 'OBD_LOG_ENABLED', True))
+        self.transport = str(getattr(config, 'OBD_LOG_TRANSPORT', 'rsync')).lower()
+        self.http_url = getattr(config, 'OBD_LOG_HTTP_URL', '')
+        self.http_chunk_bytes = int(getattr(config, 'OBD_LOG_HTTP_CHUNK_BYTES', 256 * 1024))
+        self.http_token = getattr(config, 'OBD_LOG_HTTP_TOKEN', '') or None
+        self._http_client: ChunkedUploadClient | None = None
         self._lock = threading.Lock()
         self._writer_thread: threading.Thread | None = None
         self._sync_thread: threading.Thread | None = None
@@ -69,6 +79,25 @@ class OBDLoggerService:
         self._last_seen_connected_at_monotonic: float | None = None
         self._session_idle_timeout_s = max(self.log_interval_seconds * 3, 10.0)
         self._last_wifi_connected = False
+        self._session_summaries: Dict[Path, SessionSummary] = {}
+        self.manifest = UploadManifest(self.local_dir)
+        self.retention = TelemetryRetentionManager(
+            self.local_dir,
+            budget_bytes=int(getattr(config, 'OBD_LOG_MAX_BYTES', 2 * 1024 ** 3)),
+            downsample_after_days=float(getattr(config, 'OBD_LOG_DOWNSAMPLE_AFTER_DAYS', 14)),
+            downsample_interval_s=float(getattr(config, 'OBD_LOG_DOWNSAMPLE_INTERVAL_SECONDS', 10.0)),
+            raw_retention_days=float(getattr(config, 'OBD_LOG_RAW_RETENTION_DAYS', 180)),
+            summary_retention_days=float(getattr(config, 'OBD_LOG_SUMMARY_RETENTION_DAYS', 1825)),
+            is_synced=self._is_synced,
+        )
+        self.flight_recorder_enabled = bool(getattr(config, 'OBD_FLIGHT_RECORDER_ENABLED', True))
+        self.flight_recorder = FlightRecorder(
+            self.local_dir / 'events',
+            pre_seconds=float(getattr(config, 'OBD_FLIGHT_RECORDER_PRE_SECONDS', 30.0)),
+            post_seconds=float(getattr(config, 'OBD_FLIGHT_RECORDER_POST_SECONDS', 30.0)),
+            rpm_dip_rpm=float(getattr(config, 'OBD_FLIGHT_RECORDER_RPM_DIP', 300)),
+            on_event_written=self._note_event_file,
+        )
         self._status = {
             'running': False,
             'writer_running': False,
@@ -86,16 +115,31 @@ class OBDLoggerService:
             'last_sync_summary': 'OBD log sync has not run yet.',
             'last_sync_output': '',
             'local_dir': str(self.local_dir),
-            'remote': self.remote,
+            'remote': self.http_url if self.transport == 'http' else self.remote,
             'remote_dir': self.remote_dir,
+            'transport': self.transport,
             'device_name': self.device_name,
             'log_interval_seconds': self.log_interval_seconds,
             'sync_interval_seconds': self.sync_interval_seconds,
             'sync_policy': 'on-first-network-connection-or-manual',
+            'last_sync_files': 0,
+            'last_sync_bytes': 0,
+            'last_sync_seconds': None,
+            'storage_used_bytes': None,
+            'storage_budget_bytes': self.retention.budget_bytes,
+            'last_retention_at': None,
+            'last_retention_summary': None,
+            'last_recovery_summary': None,
         }
         self._load_persisted_status()
 
     def _preflight_error(self) -> str | None:
+        if self.transport == 'http':
+            if not self.http_url:
+                return 'OBD_LOG_HTTP_URL is not configured.'
+            return None
+        if self.transport != 'rsync':
+            return f'Unknown OBD log transport: {self.transport}'
         if shutil.which('rsync') is None:
             return 'rsync is not installed on this system.'
         if not self.ssh_key.exists():
@@ -106,8 +150,11 @@ class OBDLoggerService:
 
     def _snapshot(self) -> dict:
         status = dict(self._status)
-        for key in ('last_log_at', 'last_sync_started_at', 'last_sync_finished_at', 'last_sync_success_at'):
+        for key in ('last_log_at', 'last_sync_started_at', 'last_sync_finished_at', 'last_sync_success_at', 'last_retention_at'):
             status[key] = _isoformat(status[key])
+        status['storage_used_bytes'] = self.retention.usage_bytes if status['last_retention_at'] else None
+        status['upload_manifest'] = self.manifest.get_status()
+        status['flight_recorder'] = self.flight_recorder.get_status() if self.flight_recorder_enabled else None
         preflight_error = self._preflight_error()
         status['preflight_error'] = preflight_error
         status['configured'] = preflight_error is None
@@ -126,10 +173,12 @@ class OBDLoggerService:
             self._status['running'] = True
             self._status['enabled'] = self.enabled
             self.local_dir.mkdir(parents=True, exist_ok=True)
+            self._status['last_recovery_summary'] = self._recover_logs()
             self._writer_thread = threading.Thread(target=self._writer_loop, daemon=True, name='obd-log-writer')
             self._sync_thread = threading.Thread(target=self._sync_loop, daemon=True, name='obd-log-sync')
             self._writer_thread.start()
             self._sync_thread.start()
+        self._attach_flight_recorder()
 
     def stop(self) -> None:
         with self._lock:
@@ -137,6 +186,7 @@ class OBDLoggerService:
             self._status['running'] = False
             self._status['writer_running'] = False
             self._status['sync_running'] = False
+        self._detach_flight_recorder()
 
     def update_settings(self, settings: Dict[str, Any]) -> dict:
         enabled = settings.get('enabled')
@@ -214,6 +264,7 @@ class OBDLoggerService:
                     self._status['last_sync_output'] = str(exc)
             time.sleep(self.log_interval_seconds)
 
+        self._finalize_session_summaries()
         with self._lock:
             self._status['writer_running'] = False
 
@@ -255,6 +306,7 @@ class OBDLoggerService:
             if should_sync:
                 self._run_sync(reason='network-connected', force=False)
 
+            self._enforce_retention()
             time.sleep(min(max(self.sync_interval_seconds, 5), 30))
 
         with self._lock:
@@ -276,10 +328,14 @@ class OBDLoggerService:
         record = self._build_record(snapshot)
         target_path = self._path_for_record(record)
         target_path.parent.mkdir(parents=True, exist_ok=True)
+        line = json.dumps(record, ensure_ascii=True, separators=(',', ':')) + '\n'
         with target_path.open('a', encoding='utf-8') as handle:
-            handle.write(json.dumps(record, ensure_ascii=True, separators=(',', ':')) + '\n')
+            handle.write(line)
             handle.flush()
             os.fsync(handle.fileno())
+        self.retention.note_write(target_path, len(line))
+        self.manifest.note_write(target_path, len(line), time.time())
+        self._session_summaries.setdefault(target_path, SessionSummary(target_path)).add(record)
 
         self._last_sample_time = sample_time
         with self._lock:
@@ -365,10 +421,84 @@ class OBDLoggerService:
         self._session_id = None
         self._session_started_at = None
         self._last_seen_connected_at_monotonic = None
+        self._finalize_session_summaries()
         with self._lock:
             self._status['current_session_id'] = None
             self._status['current_session_started_at'] = None
 
+    def _finalize_session_summaries(self) -> None:
+        summaries, self._session_summaries = self._session_summaries, {}
+        for path, summary in summaries.items():
+            try:
+                written = write_summary(path, summary.to_dict())
+            except OSError:
+                continue
+            self.retention.note_file(written)
+            self.manifest.note_file(written)
+
+    def _attach_flight_recorder(self) -> None:
+        from backend.services.obd_service import get_obd_service
+
+        service = get_obd_service()
+        if not self.flight_recorder_enabled or not hasattr(service, 'add_sample_listener'):
+            return
+        self.flight_recorder.start()
+        service.add_sample_listener(self.flight_recorder.on_sample)
+
+    def _detach_flight_recorder(self) -> None:
+        from backend.services.obd_service import get_obd_service
+
+        service = get_obd_service()
+        if hasattr(service, 'remove_sample_listener'):
+            service.remove_sample_listener(self.flight_recorder.on_sample)
+        self.flight_recorder.stop()
+
+    def _note_event_file(self, path: Path) -> None:
+        self.retention.note_file(path)
+        self.manifest.note_file(path)
+
+    def _recover_logs(self) -> str:
+        """Repair sessions torn by a power cut before the writer starts appending."""
+        try:
+            self.retention.rescan()
+            report = recover_log_tree(self.retention.files())
+        except OSError as exc:
+            return f'Log recovery failed: {exc}'
+        for path in report['repaired']:
+            self.retention.note_file(path)
+            self.manifest.note_file(path)
+        for path in report['summaries']:
+            self.retention.note_file(path)
+        return (
+            f"Checked {report['checked']} recent session(s); repaired {len(report['repaired'])} "
+            f"({report['truncated_bytes']} B removed), rebuilt {len(report['summaries'])} summary(ies)."
+        )
+
+    def _is_synced(self, path: Path, mtime: float) -> bool:
+        return self.manifest.is_uploaded(path)
+
+    def _enforce_retention(self) -> None:
+        if not self.retention.needs_enforcement():
+            return
+        try:
+            report = self.retention.enforce(protected=self._open_log_files())
+        except Exception as exc:
+            with self._lock:
+                self._status['last_retention_at'] = _utc_now()
+                self._status['last_retention_summary'] = f'Retention failed: {exc}'
+            return
+
+        summary = (
+            f"{report['usage_bytes'] / 1024 ** 2:.1f} MB of {report['budget_bytes'] / 1024 ** 2:.0f} MB used; "
+            f"{report['downsampled']} downsampled, {report['deleted']} deleted, "
+            f"{report['summaries_deleted']} summaries deleted."
+        )
+        if report['over_budget']:
+            summary += ' Still over budget (only open sessions left).'
+        with self._lock:
+            self._status['last_retention_at'] = _utc_now()
+            self._status['last_retention_summary'] = summary
+
     def _path_for_record(self, record: Dict[str, Any]) -> Path:
         timestamp = record.get('metadata', {}).get('sample_time') or record.get('logged_at')
         try:
@@ -391,7 +521,7 @@ class OBDLoggerService:
         summary = 'OBD log sync finished.'
         try:
             self.local_dir.mkdir(parents=True, exist_ok=True)
-            output.append(self._run_rsync())
+            output.append(self._run_incremental_upload())
             summary = f'OBD logs synced successfully ({reason}).'
         except Exception as exc:
             error = str(exc)
@@ -410,15 +540,99 @@ class OBDLoggerService:
                 if error is None:
                     self._status['last_sync_success_at'] = finished_at
 
-    def _run_rsync(self) -> str:
+    def _open_log_files(self) -> list[Path]:
+        with self._lock:
+            open_file = self._status.get('last_file') if self._status.get('current_session_id') else None
+        return [Path(open_file)] if open_file else []
+
+    def _run_incremental_upload(self) -> str:
+        if not self.retention.scanned:
+            self.retention.rescan()
+        self.manifest.reconcile(self.retention.files())
+        uploads = self.manifest.pending(self._open_log_files())
+
+        lines = []
+        total_bytes = 0
+        uploaded = 0
+        started = time.monotonic()
+        try:
+            for item in uploads:
+                item_started = time.monotonic()
+                bytes_sent = self._upload_file(item)
+                seconds = time.monotonic() - item_started
+                self.manifest.mark_uploaded(
+                    item['key'],
+                    size=item['size'],
+                    sha256=item.get('sha256'),
+                    bytes_sent=bytes_sent,
+                    seconds=seconds,
+                )
+                self.manifest.save()
+                uploaded += 1
+                total_bytes += bytes_sent
+                lines.append(f"{item['key']} [{item['mode']}]: {bytes_sent} B in {seconds:.2f} s")
+        except Exception as exc:
+            lines.append(str(exc))
+            lines.append(f'Stopped after {uploaded}/{len(uploads)} uploads; the next sync resumes from here.')
+            raise RuntimeError('\n'.join(lines)) from exc
+        finally:
+            if self._http_client is not None:
+                self._http_client.close()
+            elapsed = time.monotonic() - started
+            with self._lock:
+                self._status['last_sync_files'] = uploaded
+                self._status['last_sync_bytes'] = total_bytes
+                self._status['last_sync_seconds'] = round(elapsed, 2)
+
+        if not uploads:
+            return 'No changes.'
+        lines.append(f'Uploaded {uploaded} file(s), {total_bytes} B in {elapsed:.2f} s.')
+        return '\n'.join(lines)
+
+    def _upload_file(self, item: Dict[str, Any]) -> int:
+        if self.transport == 'http':
+            return self._http_upload_file(item)
+        return self._rsync_file(item)
+
+    def _http_upload_file(self, item: Dict[str, Any]) -> int:
+        if self._http_client is None:
+            self._http_client = ChunkedUploadClient(
+                self.http_url,
+                chunk_bytes=self.http_chunk_bytes,
+                token=self.http_token,
+            )
+        # The receiver's acknowledged offset is authoritative, so an upload cut
+        # off mid-file resumes at the last accepted chunk rather than at the
+        # manifest's last completed upload.
+        return self._http_client.upload(
+            item['path'],
+            f"{self.device_name}/{item['key']}",
+            size=item['size'],
+            reset=item['mode'] == 'full',
+            sha256=item.get('sha256'),
+        )
+
+    def _rsync_file(self, item: Dict[str, Any]) -> int:
+        mode_flags = {
+            'tail': ['--append'],
+            'append': ['--append-verify'],
+            'full': [],
+        }[item['mode']]
+        ssh_command = (
+            f'ssh -i {self.ssh_key} -o StrictHostKeyChecking=accept-new '
+            f'-o ControlMaster=auto -o ControlPath=/tmp/picasso-obd-ssh-%C -o ControlPersist=60'
+        )
         command = [
             'rsync',
-            '-avz',
+            '-az',
+            '--partial',
             '--mkpath',
+            '--stats',
+            *mode_flags,
             '-e',
-            f'ssh -i {self.ssh_key} -o StrictHostKeyChecking=accept-new',
-            f'{self.local_dir}/',
-            f'{self.remote}:{self.remote_dir.rstrip("/")}/{self.device_name}/',
+            ssh_command,
+            str(item['path']),
+            f"{self.remote}:{self.remote_dir.rstrip('/')}/{self.device_name}/{item['key']}",
         ]
         completed = subprocess.run(
             command,
@@ -430,9 +644,12 @@ class OBDLoggerService:
         stderr = completed.stderr.strip()
         if completed.returncode != 0:
             raise RuntimeError(
-                f"rsync failed for OBD logs (exit {completed.returncode}): {stderr or stdout or 'no output'}"
+                f"rsync failed for {item['key']} (exit {completed.returncode}): {stderr or stdout or 'no output'}"
             )
-        return stdout or 'No changes.'
+        match = re.search(r'Total bytes sent:\s*([\d,.]+)', stdout)
+        if match:
+            return int(re.sub(r'[^0-9]', '', match.group(1)) or 0)
+        return max(0, item['size'] - item.get('offset', 0))
 
     def _load_persisted_status(self) -> None:
         if not self.state_file.exists():
@@ -12,9 +12,13 @@ import re
 import threading
 import time
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
 
 import config
+from backend.services.alert_rules import AlertRulesEngine
+from backend.services.device_watcher import Backoff, DeviceWatcher
+from backend.services.trip_journal import TripJournal
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -25,6 +29,9 @@ BAUDRATE = getattr(config, 'OBD_BAUDRATE', 38400)
 POLL_INTERVAL = getattr(config, 'OBD_POLL_INTERVAL', 0.8)
 SECONDARY_POLL_INTERVAL = getattr(config, 'OBD_SECONDARY_POLL_INTERVAL', 0.5)
 STALE_TIMEOUT = getattr(config, 'OBD_STALE_TIMEOUT', 6.0)
+RECONNECT_INITIAL_DELAY_S = getattr(config, 'OBD_RECONNECT_INITIAL_DELAY_S', 0.25)
+RECONNECT_MAX_DELAY_S = getattr(config, 'OBD_RECONNECT_MAX_DELAY_S', 5.0)
+DEVICE_RESCAN_S = 30.0  # Safety rescan while waiting for a hot-plug event
 
 PID_INFO = {
     'RPM': {'label': 'RPM', 'unit': 'rpm'},
@@ -50,6 +57,7 @@ PID_INFO = {
 GEAR_UNKNOWN_HOLD_S = 2.0
 GEAR_CONFIRMATION_TIME_S = 0.8
 GEAR_RECENT_CONFIRMATION_S = 1.0
+GEAR_RESTORE_MAX_AGE_S = 120.0  # A journalled gear is only trusted across a quick restart
 GEAR_UPSHIFT_RPM = 3000
 GEAR_DOWNSHIFT_RPM = 1300
 
@@ -82,6 +90,11 @@ INITIAL_DATA: Dict[str, Any] = {
         'adapter': None,
         'protocol': None,
         'ecu_ready': False,
+        'watch_mode': None,
+        'retry_delay_s': None,
+        'reconnect_attempts': 0,
+        'time_to_first_sample_s': None,
+        'connect_to_first_sample_s': None,
     },
     'direct': {
         'rpm': None,
@@ -130,6 +143,7 @@ INITIAL_DATA: Dict[str, Any] = {
         'shift_hint_display': '',
         'coolant_alert': False,
         'battery_alert': False,
+        'alerts': [],
     },
     'metadata': {
         'vehicle': getattr(config, 'OBD_VEHICLE_NAME', 'Citroen C3 Picasso 2013 1.5 Flex'),
@@ -256,7 +270,12 @@ def _decode_obd_standard(value: int) -> Optional[str]:
 class OBDService:
     """Persistent ELM327 monitor for the vehicle dashboard."""
 
-    def __init__(self, device: str = None):
+    def __init__(
+        self,
+        device: str = None,
+        trip_journal_path: Optional[str] = None,
+        serial_factory: Optional[Callable[[str], Any]] = None,
+    ):
         self.device = device or STABLE_PORT
         self.fallback_device = FALLBACK_PORT
         self.baudrate = BAUDRATE
@@ -264,7 +283,11 @@ class OBDService:
         self._running = False
         self._lock = threading.Lock()
         self._serial = None
-        self._retry_delay = 5
+        self._serial_factory = serial_factory
+        self._capture = None
+        self._capture_enabled = bool(getattr(config, 'OBD_CAPTURE_ENABLED', False))
+        self._backoff = Backoff(RECONNECT_INITIAL_DELAY_S, RECONNECT_MAX_DELAY_S)
+        self._watcher: Optional[DeviceWatcher] = None
         self._supported_commands = ['RPM', 'SPEED', 'COOLANT_TEMP', 'INTAKE_PRESSURE']
         self._last_sample_at: Optional[float] = None
         self._fuel = getattr(config, 'OBD_DEFAULT_FUEL', 'gasoline_e27')
@@ -285,6 +308,62 @@ class OBDService:
         self._gear_candidate_since: Optional[float] = None
         self._last_confirmed_gear: Optional[int] = None
         self._last_confirmed_gear_at: Optional[float] = None
+        self._sample_listeners: List[Callable[[Dict[str, Any]], None]] = []
+        journal_path = trip_journal_path if trip_journal_path is not None else getattr(config, 'OBD_TRIP_JOURNAL_PATH', '')
+        self._trip_journal: Optional[TripJournal] = None
+        if journal_path:
+            self._trip_journal = TripJournal(
+                Path(journal_path).expanduser(),
+                interval_s=getattr(config, 'OBD_TRIP_JOURNAL_INTERVAL_S', 15.0),
+            )
+        self._trip_restored = False
+        self._alert_rules = self._build_alert_rules(getattr(config, 'OBD_ALERT_RULES', None))
+        self._gear_entry_bands: Dict[int, tuple] = {}
+        self._gear_hold_bands: Dict[int, tuple] = {}
+        self.set_gear_bands(
+            getattr(config, 'OBD_GEAR_ENTRY_BANDS', None) or GEAR_ENTRY_BANDS,
+            getattr(config, 'OBD_GEAR_HOLD_BANDS', None) or GEAR_HOLD_BANDS,
+        )
+
+    def set_gear_bands(self, entry_bands: Dict[int, tuple], hold_bands: Dict[int, tuple]) -> None:
+        """Replace the rpm/speed ratio bands (e.g. with output of scripts/tune_gear_bands.py)."""
+        entry = {int(gear): (float(lower), None if upper is None else float(upper)) for gear, (lower, upper) in entry_bands.items()}
+        hold = {int(gear): (float(lower), None if upper is None else float(upper)) for gear, (lower, upper) in hold_bands.items()}
+        if not entry or set(entry) != set(hold):
+            raise ValueError('Entry and hold bands must cover the same gears.')
+        self._gear_entry_bands = dict(sorted(entry.items()))
+        self._gear_hold_bands = dict(sorted(hold.items()))
+        # Below the top gear's entry band the clutch is taken as disengaged;
+        # with the default bands this is the original 31/33 hysteresis pair.
+        self._gear_disengaged_ratio = min(lower for lower, _upper in self._gear_entry_bands.values())
+        self._gear_disengaged_hold_ratio = self._gear_disengaged_ratio + 2.0
+        self._reset_gear_state()
+
+    @staticmethod
+    def _build_alert_rules(rules: Optional[List[Dict[str, Any]]]) -> AlertRulesEngine:
+        try:
+            return AlertRulesEngine(rules)
+        except (TypeError, ValueError) as exc:
+            logger.warning(f"Invalid OBD_ALERT_RULES, using defaults: {exc}")
+            return AlertRulesEngine()
+
+    def add_sample_listener(self, listener: Callable[[Dict[str, Any]], None]) -> None:
+        """Receive every polled sample, at the full poll rate, on the monitor thread.
+
+        Listeners must return quickly; slow work belongs on their own thread.
+        """
+        if listener not in self._sample_listeners:
+            self._sample_listeners = [*self._sample_listeners, listener]
+
+    def remove_sample_listener(self, listener: Callable[[Dict[str, Any]], None]) -> None:
+        self._sample_listeners = [item for item in self._sample_listeners if item != listener]
+
+    def _notify_sample_listeners(self, sample: Dict[str, Any]) -> None:
+        for listener in self._sample_listeners:
+            try:
+                listener(sample)
+            except Exception as exc:
+                logger.warning(f"OBD sample listener failed: {exc}")
 
     def _resolve_device(self) -> Optional[str]:
         if os.path.exists(self.device):
@@ -293,22 +372,70 @@ class OBDService:
             return self.fallback_device
         return None
 
+    def restore_trip(self) -> Optional[Dict[str, Any]]:
+        """Reload trip accumulators (and a recent confirmed gear) from the journal, once."""
+        if self._trip_journal is None or self._trip_restored:
+            return None
+        self._trip_restored = True
+        saved = self._trip_journal.load()
+        if saved is None:
+            return None
+        with self._lock:
+            self._trip_consumed_l = saved['trip_consumed_l']
+            self._trip_distance_km = saved['trip_distance_km']
+            obd_data['inferred']['trip_consumed_l'] = _round(self._trip_consumed_l, 3)
+            obd_data['inferred']['trip_distance_km'] = _round(self._trip_distance_km, 2)
+            if self._trip_consumed_l > 0 and self._trip_distance_km > 0:
+                obd_data['inferred']['trip_average_km_l'] = _round(self._trip_distance_km / self._trip_consumed_l, 1)
+        age_s = time.time() - saved['saved_at']
+        if saved['gear'] in self._gear_entry_bands and 0 <= age_s <= GEAR_RESTORE_MAX_AGE_S:
+            restored_at = time.monotonic()
+            self._gear_confirmed_state = 'IN_GEAR'
+            self._gear_confirmed_gear = saved['gear']
+            self._gear_confirmed_at = restored_at
+            self._last_confirmed_gear = saved['gear']
+            self._last_confirmed_gear_at = restored_at
+        logger.info(
+            f"Trip restored from journal: {saved['trip_distance_km']:.2f} km, "
+            f"{saved['trip_consumed_l']:.3f} L, gear {saved['gear']} ({age_s:.0f}s old)"
+        )
+        return saved
+
+    def _checkpoint_trip(self, force: bool = False) -> None:
+        if self._trip_journal is None:
+            return
+        self._trip_journal.checkpoint({
+            'trip_consumed_l': self._trip_consumed_l,
+            'trip_distance_km': self._trip_distance_km,
+            'gear': self._last_confirmed_gear,
+            'gear_state': self._gear_confirmed_state,
+        }, force=force)
+
     def start(self) -> bool:
+        """Start monitoring; returns whether the adapter is plugged in right now.
+
+        The thread starts either way and connects as soon as the adapter
+        appears, so a missing adapter at boot is no longer permanent.
+        """
+        self.restore_trip()
         port = self._resolve_device()
         if not port:
             self._set_error(f'Device not found: {self.device} or {self.fallback_device}')
-            return False
 
         if self._thread is None or not self._thread.is_alive():
             self._running = True
             self._thread = threading.Thread(target=self._monitor_loop, daemon=True)
             self._thread.start()
             logger.info("OBD monitoring thread started")
-        return True
+        return port is not None
 
     def stop(self) -> None:
         self._running = False
+        if self._watcher is not None:
+            self._watcher.wake()
         self._close_serial()
+        self._stop_capture()
+        self._checkpoint_trip(force=True)
         self._reset_gear_state()
         with self._lock:
             obd_data['connected'] = False
@@ -316,12 +443,17 @@ class OBDService:
         logger.info("OBD service stopped")
 
     def reset_trip(self) -> None:
+        # Mark the journal as consumed first, or a later restore_trip() would
+        # load the discarded trip over the zeros.
+        self._trip_restored = True
         with self._lock:
             self._trip_consumed_l = 0.0
             self._trip_distance_km = 0.0
             obd_data['inferred']['trip_consumed_l'] = 0.0
             obd_data['inferred']['trip_distance_km'] = 0.0
             obd_data['inferred']['trip_average_km_l'] = None
+        # Journal the zeros now, or a restart would bring the old trip back.
+        self._checkpoint_trip(force=True)
 
     def update_settings(self, settings: Dict[str, Any]) -> Dict[str, Any]:
         fuel = settings.get('fuel')
@@ -343,6 +475,8 @@ class OBDService:
         self._last_successful_command = command
 
     def _open_serial(self, port: str):
+        if self._serial_factory is not None:
+            return self._serial_factory(port)
         import serial
 
         return serial.Serial(
@@ -363,22 +497,49 @@ class OBDService:
                 pass
         self._serial = None
 
+    def _start_capture(self, port: str) -> None:
+        if not self._capture_enabled:
+            return
+        from backend.services.elm_capture import ElmCaptureWriter
+
+        try:
+            if self._capture is None:
+                self._capture = ElmCaptureWriter.for_session(
+                    Path(getattr(config, 'OBD_CAPTURE_DIRECTORY', 'telemetry/elm_capture')),
+                    max_bytes=getattr(config, 'OBD_CAPTURE_MAX_BYTES', 50 * 1024 ** 2),
+                )
+                logger.info(f"Recording ELM327 traffic to {self._capture.path}")
+            self._capture.mark_open(port)
+        except OSError as exc:
+            logger.warning(f"ELM capture disabled: {exc}")
+            self._capture_enabled = False
+
+    def _stop_capture(self) -> None:
+        if self._capture is not None:
+            self._capture.close()
+            self._capture = None
+
     def _command(self, command: str, timeout: float = 1.2) -> str:
         if not self._serial:
             return ''
         self._serial.reset_input_buffer()
+        started_at = time.monotonic()
         self._serial.write((command + '\r').encode('ascii'))
-        deadline = time.monotonic() + timeout
+        deadline = started_at + timeout
         chunks = []
+        raw = []
         while time.monotonic() < deadline:
             data = self._serial.read(256)
             if data:
+                raw.append(data)
                 text = data.decode('ascii', errors='ignore')
                 chunks.append(text)
                 if '>' in text:
                     break
             else:
                 time.sleep(0.02)
+        if self._capture is not None:
+            self._capture.record(command, b''.join(raw), started_at, time.monotonic() - started_at, timeout)
         return ''.join(chunks).replace('\r', '\n').replace('>', '').strip()
 
     def _initialize_elm(self) -> Dict[str, Any]:
@@ -569,8 +730,6 @@ class OBDService:
     def _calculate_inferred(self, direct: Dict[str, Any], now: float) -> Dict[str, Any]:
         rpm = direct.get('rpm') or 0
         speed = direct.get('speed_kmh') or 0
-        coolant = direct.get('coolant_temp_c')
-        voltage = direct.get('adapter_voltage_v')
         gasoline_l_h = self._estimate_fuel_rate(direct, 'gasoline_e27')
         ethanol_l_h = self._estimate_fuel_rate(direct, 'ethanol')
         selected_rate = gasoline_l_h if self._fuel == 'gasoline_e27' else ethanol_l_h
@@ -601,7 +760,7 @@ class OBDService:
         )
         shift_hint = self._calculate_shift_hint(direct, gear)
 
-        return {
+        inferred = {
             'engine_on': rpm > 0,
             'stationary': speed == 0,
             'fuel': self._fuel,
@@ -621,9 +780,13 @@ class OBDService:
             'gear_display': gear['display'],
             'shift_hint': shift_hint,
             'shift_hint_display': '↑' if shift_hint == 'up' else '↓' if shift_hint == 'down' else '',
-            'coolant_alert': coolant is not None and coolant >= 105,
-            'battery_alert': rpm > 0 and voltage is not None and voltage < 13.0,
+            'coolant_alert': False,
+            'battery_alert': False,
         }
+        alerts = self._alert_rules.evaluate({**direct, **inferred}, now)
+        inferred.update(alerts['flags'])
+        inferred['alerts'] = alerts['alerts']
+        return inferred
 
     def _reset_gear_state(self) -> None:
         self._gear_confirmed_state = 'UNKNOWN'
@@ -658,16 +821,16 @@ class OBDService:
         ratio = rpm / speed
 
         if self._gear_confirmed_gear is not None:
-            lower, upper = GEAR_HOLD_BANDS[self._gear_confirmed_gear]
+            lower, upper = self._gear_hold_bands[self._gear_confirmed_gear]
             if ratio >= lower and (upper is None or ratio < upper):
                 return {'state': 'IN_GEAR', 'gear': self._gear_confirmed_gear, 'ratio': _round(ratio, 1), 'reason': 'confirmed_gear_hysteresis_hold'}
 
-        if self._gear_confirmed_state == 'DISENGAGED' and ratio < 33:
+        if self._gear_confirmed_state == 'DISENGAGED' and ratio < self._gear_disengaged_hold_ratio:
             return {'state': 'DISENGAGED', 'gear': None, 'ratio': _round(ratio, 1), 'reason': 'disengaged_hysteresis_hold'}
-        if ratio < 31:
+        if ratio < self._gear_disengaged_ratio:
             return {'state': 'DISENGAGED', 'gear': None, 'ratio': _round(ratio, 1), 'reason': 'ratio_below_engaged_threshold'}
 
-        for gear, (lower, upper) in GEAR_ENTRY_BANDS.items():
+        for gear, (lower, upper) in self._gear_entry_bands.items():
             if ratio >= lower and (upper is None or ratio < upper):
                 return {'state': 'IN_GEAR', 'gear': gear, 'ratio': _round(ratio, 1), 'reason': 'ratio_in_gear_band'}
 
@@ -708,7 +871,7 @@ class OBDService:
     def _gear_boundary_distance(self, gear: Optional[int], ratio: Optional[float]) -> Optional[float]:
         if gear is None or ratio is None:
             return None
-        lower, upper = GEAR_ENTRY_BANDS[gear]
+        lower, upper = self._gear_entry_bands[gear]
         distances = [abs(ratio - lower)]
         if upper is not None:
             distances.append(abs(upper - ratio))
@@ -736,9 +899,9 @@ class OBDService:
         if current_gear is None or rpm is None or speed is None or speed < 8:
             return 'none'
 
-        if current_gear < max(GEAR_ENTRY_BANDS) and rpm >= GEAR_UPSHIFT_RPM:
+        if current_gear < max(self._gear_entry_bands) and rpm >= GEAR_UPSHIFT_RPM:
             return 'up'
-        if current_gear > min(GEAR_ENTRY_BANDS) and rpm <= GEAR_DOWNSHIFT_RPM:
+        if current_gear > min(self._gear_entry_bands) and rpm <= GEAR_DOWNSHIFT_RPM:
             return 'down'
         return 'none'
 
@@ -937,16 +1100,37 @@ class OBDService:
         }
 
     def _monitor_loop(self) -> None:
+        watcher = DeviceWatcher([self.device, self.fallback_device])
+        self._watcher = watcher
+        with self._lock:
+            obd_data['connection']['watch_mode'] = watcher.mode
+        try:
+            self._run_connections(watcher)
+        finally:
+            self._watcher = None
+            watcher.close()
+
+    def _run_connections(self, watcher: DeviceWatcher) -> None:
+        # Reference point for time_to_first_sample_s: service start or the
+        # adapter appearing. After a session that delivered data it is unset
+        # and the reconnect attempt itself is the reference.
+        available_since: Optional[float] = time.monotonic()
         while self._running:
             port = self._resolve_device()
             if not port:
                 self._set_error(f'Device not found: {self.device} or {self.fallback_device}')
-                time.sleep(self._retry_delay)
+                # Sleep until udev creates the node; the timeout is only a rescan.
+                watcher.wait(DEVICE_RESCAN_S)
+                available_since = time.monotonic()
+                self._backoff.reset()
                 continue
 
+            attempt_started_at = time.monotonic()
+            first_sample = True
             try:
                 logger.info(f"Connecting to OBD at {port} ({self.baudrate} baud)...")
                 self._serial = self._open_serial(port)
+                self._start_capture(port)
                 init = self._initialize_elm()
                 self._last_secondary_poll_at = 0.0
                 self._last_medium_poll_at = 0.0
@@ -981,18 +1165,48 @@ class OBDService:
                     inferred = self._calculate_inferred(direct, loop_started_at)
                     metrics = self._metrics_from_snapshot(direct, inferred)
 
+                    sample_time = datetime.now(timezone.utc).isoformat()
                     with self._lock:
                         obd_data['connected'] = True
                         obd_data['connection']['connected'] = True
                         obd_data['direct'].update(direct)
                         obd_data['inferred'].update(inferred)
                         obd_data['metrics'] = metrics
-                        obd_data['metadata']['sample_time'] = datetime.now(timezone.utc).isoformat()
+                        obd_data['metadata']['sample_time'] = sample_time
                         obd_data['metadata']['last_dynamic_sample_time'] = self._last_dynamic_sample_time
                         obd_data['metadata']['dynamic_stale_age_s'] = round(stale_age, 1)
                         obd_data['metadata']['dynamic_stale'] = stale_age > 1.5
                         obd_data['metadata']['last_successful_command'] = self._last_successful_command
                         obd_data['error'] = None
+                        if first_sample:
+                            first_sample_at = time.monotonic()
+                            reference = attempt_started_at if available_since is None else available_since
+                            time_to_first_sample = round(first_sample_at - reference, 3)
+                            obd_data['connection'].update({
+                                'time_to_first_sample_s': time_to_first_sample,
+                                'connect_to_first_sample_s': round(first_sample_at - attempt_started_at, 3),
+                                'reconnect_attempts': self._backoff.attempts,
+                                'retry_delay_s': None,
+                            })
+                        vin = obd_data['metadata'].get('vin')
+
+                    self._notify_sample_listeners({
+                        't': time.time(),
+                        'sample_time': sample_time,
+                        'vin': vin,
+                        'dynamic_stale_age_s': round(stale_age, 2),
+                        'direct': direct,
+                        'inferred': inferred,
+                    })
+                    if first_sample:
+                        first_sample = False
+                        available_since = None
+                        logger.info(
+                            f"First OBD sample {time_to_first_sample}s after the adapter "
+                            f"was available ({self._backoff.attempts} retries)"
+                        )
+                        self._backoff.reset()
+                    self._checkpoint_trip()
 
                     loop_elapsed = time.monotonic() - loop_started_at
                     time.sleep(max(0.0, POLL_INTERVAL - loop_elapsed))
@@ -1002,11 +1216,18 @@ class OBDService:
                 self._set_error(str(exc))
             finally:
                 self._last_sample_at = None
+                self._checkpoint_trip(force=True)
                 self._reset_gear_state()
                 self._close_serial()
 
             if self._running:
-                time.sleep(self._retry_delay)
+                delay = self._backoff.next()
+                with self._lock:
+                    obd_data['connection']['retry_delay_s'] = delay
+                    obd_data['connection']['reconnect_attempts'] = self._backoff.attempts
+                if watcher.wait(delay):
+                    # Re-plugged or re-enumerated: retry now, from the short end.
+                    self._backoff.reset()
 
     def get_status(self) -> Dict[str, Any]:
         with self._lock:
@@ -2,7 +2,11 @@
 RTL-SDR Service for Pi-Car
 
 Provides RTL-SDR device control for software-defined radio functionality.
-Uses rtl_fm for demodulation and aplay for audio output.
+Uses rtl_fm for demodulation and aplay for audio output, or, with
+RTL_BACKEND = 'iq', an in-process numpy pipeline (sdr_pipeline.py) that keeps
+the dongle open so retunes and setting changes apply without restarts.
+The IQ pipeline can also record raw IQ to disk and run from a recording
+instead of the dongle (sdr_iq.py: IQRecorder / IQFileSource).
 """
 
 import subprocess
@@ -11,6 +15,7 @@ import time
 import logging
 import shutil
 import os
+from pathlib import Path
 from typing import Optional, List, Dict, Any
 
 try:
@@ -21,6 +26,8 @@ except ImportError:
 
 import config
 
+REPO_DIR = Path(__file__).resolve().parents[2]
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -39,7 +46,15 @@ radio_data: Dict[str, Any] = {
     'squelch': 0,  # squelch level
     'gain': 'auto',
     'sample_rate': 2.4,  # MHz
-    'signal_strength': -60,  # dBm (estimated)
+    'signal_strength': None,  # dBFS channel power (iq backend only)
+    'noise_floor': None,  # dBFS noise in the channel bandwidth
+    'snr': None,  # dB
+    'scanner': None,  # Aviation scanner channels/active channel (iq backend)
+    'rds': None,  # PS/RadioText/PTY/clock decoded from the FM station (iq backend)
+    'adsb': None,  # Aircraft table while the ADS-B (1090 MHz) mode is active
+    'recording': None,  # IQ recording in progress / last finished (iq backend)
+    'replay': None,  # IQ file replayed instead of the dongle
+    'backend': getattr(config, 'RTL_BACKEND', 'rtl_fm'),
     'error': None,
 }
 
@@ -108,8 +123,24 @@ class RTLSDRService:
         self._fft_thread: Optional[threading.Thread] = None
         self._spectrum_mode = False
         self._spectrum_process: Optional[subprocess.Popen] = None
+        self._spectrum_engine = None  # Background Welch FFT capture (sdr_spectrum.py)
         self._rtl_power_path = shutil.which('rtl_power')
 
+        # In-process IQ backend (RTL_BACKEND = 'iq')
+        self._backend = getattr(config, 'RTL_BACKEND', 'rtl_fm')
+        self._pipeline = None
+        self._station_cache = None
+        self._air_scan: Optional[Dict[str, Any]] = None  # Aviation scanner plan while active
+        self._scan_lock = threading.Lock()
+        self._adsb = None  # ADS-B receiver thread (sdr_adsb.py) while in traffic mode
+        self._recorder = None  # IQRecorder attached to the pipeline
+        self._live_backend = self._backend
+        self._replay: Optional[Dict[str, Any]] = None  # IQ file standing in for the dongle
+        replay_file = getattr(config, 'RTL_REPLAY_FILE', '')
+        if replay_file:
+            self._replay = {'path': str(self._recordings_dir() / replay_file), 'realtime': True, 'loop': True}
+            self._backend = 'iq'
+
     def _pause_music(self) -> None:
         """Pause MPD music playback when radio starts."""
         try:
@@ -136,6 +167,9 @@ class RTLSDRService:
         """
         logger.info(f"start() called. rtl_fm={self._rtl_fm_path}, aplay={self._aplay_path}")
 
+        if self._backend == 'iq':
+            return self._start_iq()
+
         if not self._rtl_fm_path:
             logger.error("rtl_fm not found. Install: sudo apt install rtl-sdr")
             radio_data['error'] = 'rtl_fm not installed'
@@ -179,9 +213,93 @@ class RTLSDRService:
         logger.info("RTL-SDR service started successfully")
         return True
 
+    def _start_iq(self) -> bool:
+        """Open the dongle through librtlsdr and start the IQ pipeline."""
+        if not NUMPY_AVAILABLE:
+            radio_data['error'] = 'numpy not available'
+            return False
+        if not self._aplay_path:
+            logger.error("aplay not found. Install: sudo apt install alsa-utils")
+            radio_data['error'] = 'aplay not installed'
+            return False
+
+        from backend.services.sdr_iq import IQFileSource, RtlSdrSource
+        from backend.services.sdr_pipeline import AplaySink, IQPipeline
+
+        try:
+            if self._replay:
+                source = IQFileSource(self._replay['path'], realtime=self._replay['realtime'], loop=self._replay['loop'])
+            else:
+                source = RtlSdrSource(
+                    device_index=getattr(config, 'RTL_DEVICE_INDEX', 0),
+                    sample_rate=getattr(config, 'RTL_SAMPLE_RATE', 2400000),
+                )
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not open IQ recording: {e}")
+            radio_data['error'] = str(e)
+            return False
+        try:
+            source.open()
+            self._pipeline = IQPipeline(
+                source,
+                audio_sink=AplaySink(),
+                on_status=self._on_pipeline_status,
+                rds=getattr(config, 'RTL_RDS_ENABLED', True),
+            )
+        except Exception as e:
+            logger.error(f"Could not open RTL-SDR for IQ streaming: {e}")
+            source.close()
+            radio_data['error'] = str(e)
+            radio_data['connected'] = False
+            return False
+
+        self._pipeline.configure(
+            frequency_mhz=radio_data['frequency'],
+            mode=radio_data['mode'],
+            gain=radio_data['gain'],
+            squelch=radio_data['squelch'],
+        )
+        self._pipeline.start()
+        self._running = True
+        radio_data['connected'] = True
+        radio_data['playing'] = True
+        radio_data['error'] = None
+        threading.Thread(target=self._pause_music, daemon=True).start()
+        logger.info("RTL-SDR IQ pipeline started")
+        return True
+
+    def _on_pipeline_status(self, status: Dict[str, Any]) -> None:
+        radio_data['iq'] = status
+        if self._air_scan and status.get('scanner'):
+            radio_data['scanner'] = self._scanner_view(status['scanner'])
+        radio_data['signal_strength'] = status['rssi_db']
+        radio_data['noise_floor'] = status['noise_floor_db']
+        radio_data['snr'] = status['snr_db']
+        radio_data['rds'] = status.get('rds')
+        if self._recorder:
+            radio_data['recording'] = self._recorder.get_status()
+        if self._replay and self._pipeline:
+            radio_data['replay'] = self._pipeline.source.get_status()
+        if not status['running']:
+            radio_data['playing'] = False
+            radio_data['rds'] = None
+            radio_data['signal_strength'] = radio_data['noise_floor'] = radio_data['snr'] = None
+            if status.get('error'):
+                radio_data['error'] = status['error']
+
     def stop(self) -> None:
         """Stop the RTL-SDR service."""
         self._running = False
+        self._spectrum_mode = False
+        self._air_scan = None
+        radio_data['scanner'] = None
+        radio_data['rds'] = None
+        self._stop_adsb_receiver()
+        self._stop_recorder()
+        self._stop_spectrum_engine()
+        if self._pipeline:
+            self._pipeline.stop()
+            self._pipeline = None
         self._stop_playback()
         radio_data['connected'] = False
         radio_data['playing'] = False
@@ -192,6 +310,25 @@ class RTLSDRService:
         # Pause music before starting radio (in background to not block)
         threading.Thread(target=self._pause_music, daemon=True).start()
 
+        if self._pipeline:
+            # IQ backend: hand the settings to the running stream, no restart.
+            if self._air_scan:
+                self._pipeline.configure(
+                    scan_mhz=self._air_scan['frequencies'],
+                    gain=radio_data['gain'],
+                    squelch=radio_data['squelch'],
+                )
+            else:
+                self._pipeline.configure(
+                    frequency_mhz=radio_data['frequency'],
+                    mode=radio_data['mode'],
+                    gain=radio_data['gain'],
+                    squelch=radio_data['squelch'],
+                )
+            self._pipeline.audio_enabled = True
+            radio_data['playing'] = self._pipeline.running
+            return self._pipeline.running
+
         with self._lock:
             # Stop existing playback
             self._stop_playback_internal()
@@ -216,6 +353,8 @@ class RTLSDRService:
                 # Aviation uses squelch to reduce noise
                 if squelch == 0:
                     squelch = 50  # Default squelch for aviation
+            if radio_data['gain'] != 'auto':
+                gain = str(radio_data['gain'])
 
             rtl_fm_cmd = [
                 'rtl_fm',
@@ -275,6 +414,10 @@ class RTLSDRService:
 
     def _stop_playback_internal(self) -> None:
         """Stop playback (internal, no lock)."""
+        if self._pipeline:
+            # Keep the IQ stream (and the dongle) running; only mute the audio.
+            self._pipeline.audio_enabled = False
+
         if self._aplay_process:
             try:
                 self._aplay_process.terminate()
@@ -322,6 +465,10 @@ class RTLSDRService:
             return {'error': f'Frequency {frequency_mhz} MHz out of range (24-1800 MHz)'}
 
         radio_data['frequency'] = frequency_mhz
+        self._air_scan = None
+        radio_data['scanner'] = None
+        if self._adsb and not self._leave_adsb():
+            return {'error': 'Failed to tune'}
 
         # Restart playback with new frequency
         if self._start_playback():
@@ -358,6 +505,30 @@ class RTLSDRService:
             'mode': mode
         }
 
+    def set_gain(self, gain: Any) -> Dict[str, Any]:
+        """
+        Set tuner gain.
+
+        Args:
+            gain: 'auto' or gain in dB (snapped to the nearest valid value)
+
+        Returns:
+            Dict with result status
+        """
+        if gain != 'auto':
+            try:
+                value = float(gain)
+            except (TypeError, ValueError):
+                return {'error': f'Invalid gain: {gain}'}
+            gain = min(self.get_valid_gains(), key=lambda valid: abs(valid - value))
+
+        radio_data['gain'] = gain
+
+        if self._running and radio_data['playing']:
+            self._start_playback()
+
+        return {'success': True, 'gain': gain}
+
     def set_volume(self, volume: int) -> Dict[str, Any]:
         """
         Set volume level using amixer.
@@ -412,6 +583,9 @@ class RTLSDRService:
         if not self._running:
             return {'error': 'RTL-SDR not running'}
 
+        if self._adsb and not self._leave_adsb():
+            return {'error': 'Failed to start playback'}
+
         if self._start_playback():
             return {'success': True, 'playing': True}
         else:
@@ -422,29 +596,385 @@ class RTLSDRService:
         self._stop_playback()
         return {'success': True, 'playing': False}
 
+    def start_air_scan(self, icao: str = None, frequencies: List[float] = None) -> Dict[str, Any]:
+        """
+        Monitor several aviation channels at once and play the first active one.
+
+        The capture is split into 25 kHz AM channels by a polyphase filter
+        bank; only the frequencies that fit in one capture are monitored.
+
+        Args:
+            icao: Airport from AIRPORT_PRESETS (priority = preset order)
+            frequencies: Explicit list in MHz, used instead of `icao`
+
+        Returns:
+            Dict with monitored and skipped channels, or error
+        """
+        if not self._pipeline:
+            return {'error': "aviation scanner needs RTL_BACKEND = 'iq'"}
+        if not self._running:
+            return {'error': 'RTL-SDR not running'}
+
+        labels: Dict[float, str] = {}
+        if frequencies is None:
+            airport = AIRPORT_PRESETS.get((icao or '').upper())
+            if not airport:
+                return {'error': f'Airport {icao} not found'}
+            frequencies = [preset['freq'] for preset in airport['frequencies']]
+            labels = {preset['freq']: preset['label'] for preset in airport['frequencies']}
+        if not frequencies:
+            return {'error': 'no frequencies to scan'}
+
+        from backend.services.sdr_channelizer import plan_channels
+
+        _, monitored, skipped = plan_channels(
+            [int(round(float(freq) * 1e6)) for freq in frequencies], self._pipeline.sample_rate,
+        )
+        self._air_scan = {
+            'icao': (icao or '').upper() or None,
+            'frequencies': [freq / 1e6 for freq in monitored],
+            'labels': labels,
+        }
+        radio_data['scanner'] = {'icao': self._air_scan['icao'], 'active': None, 'channels': []}
+        self._start_playback()
+        logger.info(f"Aviation scanner: monitoring {self._air_scan['frequencies']}, skipped {[f / 1e6 for f in skipped]}")
+        return {
+            'success': True,
+            'monitored': self._air_scan['frequencies'],
+            'skipped': [freq / 1e6 for freq in skipped],
+        }
+
+    def stop_air_scan(self) -> Dict[str, Any]:
+        """Leave the aviation scanner and go back to the tuned frequency."""
+        if not self._air_scan:
+            return {'success': True, 'scanning': False}
+        self._air_scan = None
+        radio_data['scanner'] = None
+        if self._running and self._pipeline:
+            self._pipeline.configure(scan_mhz=[])
+        return {'success': True, 'scanning': False}
+
+    def _scanner_view(self, status: Dict[str, Any]) -> Dict[str, Any]:
+        labels = self._air_scan['labels']
+
+        def describe(frequency_hz):
+            mhz = round(frequency_hz / 1e6, 3)
+            return {'freq': mhz, 'label': labels.get(mhz)}
+
+        return {
+            'icao': self._air_scan['icao'],
+            'active': None if status['active_hz'] is None else describe(status['active_hz']),
+            'channels': [
+                {**describe(channel['frequency_hz']), 'power_db': channel['power_db'], 'open': channel['open']}
+                for channel in status['channels']
+            ],
+            'skipped': [describe(freq) for freq in status['skipped_hz']],
+        }
+
+    def start_adsb_mode(self) -> Dict[str, Any]:
+        """
+        Listen to ADS-B (Mode S extended squitters) on 1090 MHz at 2 MS/s.
+
+        The dongle leaves the broadcast/aviation bands while this runs, so
+        audio (rtl_fm or the IQ pipeline) and the spectrum capture stop;
+        stop_adsb_mode() brings them back.
+
+        Returns:
+            Dict with result status
+        """
+        if not self._running:
+            return {'error': 'RTL-SDR not running'}
+        if not NUMPY_AVAILABLE:
+            return {'error': 'numpy not available'}
+        if self._adsb and self._adsb.running:
+            return {'success': True, 'adsb': True}
+
+        from backend.services.sdr_adsb import ADSB_SAMPLE_RATE, AdsbReceiver
+        from backend.services.sdr_iq import RtlSdrSource
+
+        with self._lock:
+            self._spectrum_mode = False
+            self._stop_spectrum_engine()
+            self._stop_playback_internal()
+            if self._pipeline:
+                self._pipeline.stop()
+                self._pipeline = None
+            self._air_scan = None
+            radio_data['scanner'] = None
+            radio_data['rds'] = None
+
+            source = RtlSdrSource(
+                device_index=getattr(config, 'RTL_DEVICE_INDEX', 0),
+                sample_rate=ADSB_SAMPLE_RATE,
+            )
+            try:
+                source.open()
+                source.set_gain(getattr(config, 'RTL_ADSB_GAIN', 'auto'))
+            except Exception as e:
+                logger.error(f"Could not open RTL-SDR for ADS-B: {e}")
+                source.close()
+                error = str(e)
+            else:
+                error = None
+                self._adsb = AdsbReceiver(source, on_status=self._on_adsb_status)
+                self._adsb.set_reference(*self._position())
+                self._adsb.start()
+
+        if error:
+            self._resume_audio()
+            return {'error': f'ADS-B unavailable: {error}'}
+        logger.info("ADS-B mode started (1090 MHz)")
+        return {'success': True, 'adsb': True}
+
+    def stop_adsb_mode(self) -> Dict[str, Any]:
+        """Stop the ADS-B receiver and resume the radio."""
+        if not self._adsb:
+            return {'success': True, 'adsb': False}
+        self._stop_adsb_receiver()
+        if self._running:
+            self._resume_audio()
+        logger.info("ADS-B mode stopped, audio resumed")
+        return {'success': True, 'adsb': False}
+
+    def get_adsb(self) -> Dict[str, Any]:
+        """Aircraft table of the running ADS-B receiver."""
+        if not self._adsb:
+            return {'error': 'ADS-B mode not active'}
+        self._adsb.set_reference(*self._position())
+        return {'success': True, **self._adsb.get_status()}
+
+    def _on_adsb_status(self, status: Dict[str, Any]) -> None:
+        radio_data['adsb'] = status
+
+    def _stop_adsb_receiver(self) -> None:
+        receiver, self._adsb = self._adsb, None
+        if receiver:
+            receiver.stop()
+        radio_data['adsb'] = None
+
+    def _resume_audio(self) -> None:
+        if self._backend == 'iq':
+            self._start_iq()
+        else:
+            self._start_playback()
+
+    def _leave_adsb(self) -> bool:
+        """Free the dongle from ADS-B before a tune/play; the caller restarts playback."""
+        self._stop_adsb_receiver()
+        return self._start_iq() if self._backend == 'iq' else True
+
+    @staticmethod
+    def _recordings_dir() -> Path:
+        directory = Path(getattr(config, 'RTL_RECORD_DIRECTORY', 'telemetry/iq'))
+        return directory if directory.is_absolute() else REPO_DIR / directory
+
+    def start_iq_recording(self, seconds: float = None, fmt: str = None) -> Dict[str, Any]:
+        """
+        Record the raw IQ the pipeline is receiving (iq backend).
+
+        The file (sdr_iq.py format) ends after `seconds`, at
+        RTL_RECORD_MAX_BYTES, on a hardware retune, when the disk falls
+        behind the capture ('overrun') or on stop_iq_recording(); NCO
+        retunes inside the capture keep recording.
+
+        Returns:
+            Dict with result status and the recording's path
+        """
+        if not self._pipeline or not self._pipeline.running:
+            return {'error': 'IQ recording needs the iq backend running'}
+        if self._recorder and self._recorder.active:
+            return {'error': 'IQ recording already running'}
+        center = self._pipeline.center_freq_hz
+        if center is None:
+            return {'error': 'IQ stream not tuned yet'}
+
+        from backend.services.sdr_iq import IQ_EXTENSION, IQRecorder
+
+        name = f"iq-{time.strftime('%Y%m%dT%H%M%S')}-{radio_data['frequency']:.3f}MHz{IQ_EXTENSION}"
+        try:
+            recorder = IQRecorder(
+                str(self._recordings_dir() / name),
+                self._pipeline.sample_rate,
+                center,
+                fmt=fmt or getattr(config, 'RTL_RECORD_FORMAT', 'cu8'),
+                max_bytes=getattr(config, 'RTL_RECORD_MAX_BYTES', None),
+                max_seconds=seconds,
+            )
+        except (OSError, ValueError) as e:
+            return {'error': f'Could not start IQ recording: {e}'}
+        self._stop_recorder()
+        self._recorder = recorder
+        self._pipeline.add_consumer(recorder.write)
+        radio_data['recording'] = recorder.get_status()
+        logger.info(f"IQ recording started: {recorder.path}")
+        return {'success': True, **recorder.get_status()}
+
+    def stop_iq_recording(self) -> Dict[str, Any]:
+        """Close the IQ recording; returns its final size and length."""
+        if not self._recorder:
+            return {'error': 'No IQ recording'}
+        recorder = self._recorder
+        self._stop_recorder()
+        return {'success': True, **recorder.get_status()}
+
+    def _stop_recorder(self) -> None:
+        recorder, self._recorder = self._recorder, None
+        if recorder:
+            if self._pipeline:
+                self._pipeline.remove_consumer(recorder.write)
+            recorder.close()
+            radio_data['recording'] = recorder.get_status()
+
+    def list_iq_recordings(self) -> Dict[str, Any]:
+        """IQ recordings available for replay, newest first."""
+        from backend.services.sdr_iq import IQ_EXTENSION, read_iq_header
+
+        recordings = []
+        directory = self._recordings_dir()
+        for path in sorted(directory.glob(f'*{IQ_EXTENSION}'), reverse=True) if directory.is_dir() else []:
+            try:
+                header = read_iq_header(str(path))
+            except (OSError, ValueError) as e:
+                logger.debug(f"Skipping {path}: {e}")
+                continue
+            recordings.append({
+                'name': path.name,
+                'bytes': path.stat().st_size,
+                'format': header['format'],
+                'sample_rate': header['sample_rate'],
+                'center_freq': header['center_freq'],
+                'seconds': round(header['samples'] / header['sample_rate'], 2) if header['sample_rate'] else 0,
+            })
+        return {'success': True, 'recordings': recordings}
+
+    def start_iq_replay(self, name: str, realtime: bool = True, loop: bool = True) -> Dict[str, Any]:
+        """
+        Run the IQ pipeline from a recording instead of the dongle.
+
+        Args:
+            name: File name inside RTL_RECORD_DIRECTORY
+            realtime: Pace blocks at the recorded sample rate (False = as fast as possible)
+            loop: Start over at the end of the file
+
+        Returns:
+            Dict with result status
+        """
+        if not NUMPY_AVAILABLE:
+            return {'error': 'numpy not available'}
+
+        from backend.services.sdr_iq import read_iq_header
+        from backend.services.sdr_pipeline import TUNE_OFFSET_HZ
+
+        path = self._recordings_dir() / os.path.basename(name or '')
+        try:
+            header = read_iq_header(str(path))
+        except (OSError, ValueError) as e:
+            return {'error': f'Invalid IQ recording: {e}'}
+
+        self.stop()
+        self._replay = {'path': str(path), 'realtime': bool(realtime), 'loop': bool(loop)}
+        self._backend = 'iq'
+        # Recordings are made with the hardware off the channel: tune back to it.
+        radio_data['frequency'] = round((header['center_freq'] - TUNE_OFFSET_HZ) / 1e6, 3)
+        if not self._start_iq():
+            self._replay = None
+            self._backend = self._live_backend
+            return {'error': radio_data['error'] or 'Failed to start replay'}
+        radio_data['replay'] = self._pipeline.source.get_status()
+        return {'success': True, 'replay': radio_data['replay']}
+
+    def stop_iq_replay(self) -> Dict[str, Any]:
+        """Stop replaying and go back to the dongle."""
+        if not self._replay:
+            return {'success': True, 'replay': None}
+        self.stop()
+        self._replay = None
+        self._backend = self._live_backend
+        radio_data['replay'] = None
+        self.start()
+        return {'success': True, 'replay': None}
+
     def start_spectrum_mode(self) -> Dict[str, Any]:
         """
         Start spectrum analysis mode.
-        This stops audio playback and uses rtl_power for spectrum capture.
+        This stops audio playback and starts a background capture thread
+        that keeps Welch-averaged FFT frames in a ring buffer (rtl_power
+        per request is only the fallback when pyrtlsdr is missing).
+        With the iq backend the FFT is fed from the pipeline's own IQ
+        blocks and audio keeps playing.
 
         Returns:
             Dict with result status
         """
-        if not self._rtl_power_path:
-            return {'error': 'rtl_power not installed'}
-
         if not self._running:
             return {'error': 'RTL-SDR not running'}
 
+        if self._pipeline:
+            with self._lock:
+                self._attach_spectrum_engine()
+                self._spectrum_mode = True
+            logger.info("Spectrum mode started (shared IQ stream, audio kept)")
+            return {'success': True, 'spectrum_mode': True, 'audio': radio_data['playing']}
+
         with self._lock:
             # Stop audio playback to free the device
             self._stop_playback_internal()
             self._spectrum_mode = True
             radio_data['playing'] = False
+            engine_started = self._start_spectrum_engine()
 
-        logger.info("Spectrum mode started")
+        if not engine_started and not self._rtl_power_path:
+            self._spectrum_mode = False
+            return {'error': 'rtl_power not installed'}
+
+        logger.info(f"Spectrum mode started ({'capture thread' if engine_started else 'rtl_power'})")
         return {'success': True, 'spectrum_mode': True}
 
+    def _start_spectrum_engine(self) -> bool:
+        """Open the dongle for continuous IQ and start the FFT capture thread (lock held)."""
+        if not NUMPY_AVAILABLE:
+            return False
+        if self._spectrum_engine and self._spectrum_engine.running:
+            return True
+
+        from backend.services.sdr_iq import RtlSdrSource
+        from backend.services.sdr_spectrum import SpectrumEngine
+
+        source = RtlSdrSource(
+            device_index=getattr(config, 'RTL_DEVICE_INDEX', 0),
+            sample_rate=getattr(config, 'RTL_SAMPLE_RATE', 2400000),
+        )
+        try:
+            source.open()
+            if radio_data['gain'] != 'auto':
+                source.set_gain(radio_data['gain'])
+        except Exception as e:
+            logger.warning(f"Spectrum capture unavailable, falling back to rtl_power: {e}")
+            source.close()
+            return False
+
+        self._spectrum_engine = SpectrumEngine(source.sample_rate)
+        self._spectrum_engine.start(source, int(radio_data['frequency'] * 1e6))
+        return True
+
+    def _attach_spectrum_engine(self) -> None:
+        """Feed the FFT from the IQ pipeline's blocks instead of a second capture (lock held)."""
+        if self._spectrum_engine and self._spectrum_engine.running:
+            return
+
+        from backend.services.sdr_spectrum import SpectrumEngine
+
+        self._spectrum_engine = SpectrumEngine(self._pipeline.sample_rate)
+        self._spectrum_engine.start()
+        self._pipeline.add_consumer(self._spectrum_engine.feed)
+
+    def _stop_spectrum_engine(self) -> None:
+        if self._spectrum_engine:
+            if self._pipeline:
+                self._pipeline.remove_consumer(self._spectrum_engine.feed)
+            self._spectrum_engine.stop()
+            self._spectrum_engine = None
+
     def stop_spectrum_mode(self) -> Dict[str, Any]:
         """
         Stop spectrum analysis mode and resume audio.
@@ -454,6 +984,7 @@ class RTLSDRService:
         """
         with self._lock:
             self._spectrum_mode = False
+            self._stop_spectrum_engine()
             if self._spectrum_process:
                 try:
                     self._spectrum_process.terminate()
@@ -465,8 +996,8 @@ class RTLSDRService:
                         pass
                 self._spectrum_process = None
 
-        # Resume audio playback
-        if self._running:
+        # Resume audio playback (the iq backend never stopped it)
+        if self._running and not self._pipeline:
             self._start_playback()
 
         logger.info("Spectrum mode stopped, audio resumed")
@@ -474,12 +1005,15 @@ class RTLSDRService:
 
     def get_fft(self, center_freq: float = None, span_mhz: float = 2.0, integration_time: float = 0.1) -> Dict[str, Any]:
         """
-        Get FFT data for spectrogram using rtl_power.
+        Get FFT data for spectrogram.
+
+        Returns the latest frame of the background capture thread; without
+        it, falls back to one rtl_power sweep per call.
 
         Args:
             center_freq: Center frequency in MHz (default: current frequency)
             span_mhz: Frequency span in MHz (default: 2.0)
-            integration_time: Integration time in seconds for rtl_power (default: 0.1)
+            integration_time: Integration time in seconds (default: 0.1)
 
         Returns:
             Dict with FFT data and metadata, or error if not available
@@ -487,9 +1021,6 @@ class RTLSDRService:
         if not NUMPY_AVAILABLE:
             return {'error': 'numpy not available'}
 
-        if not self._rtl_power_path:
-            return {'error': 'rtl_power not installed'}
-
         if center_freq is None:
             center_freq = radio_data['frequency']
 
@@ -497,6 +1028,21 @@ class RTLSDRService:
         if not self._spectrum_mode:
             return {'error': 'spectrum mode not active'}
 
+        engine = self._spectrum_engine
+        if engine and engine.running:
+            engine.set_integration(integration_time)
+            center_hz = int(round(center_freq * 1e6))
+            if engine.owns_source and center_hz != engine.center_freq_hz:
+                engine.set_center(center_hz)
+            # A shared capture is centred off the station; crop around it instead.
+            frame = engine.latest(span_mhz=span_mhz, center_mhz=None if engine.owns_source else center_freq)
+            if frame is None:
+                return {'error': 'no FFT frame yet'}
+            return frame
+
+        if not self._rtl_power_path:
+            return {'error': 'rtl_power not installed'}
+
         # Calculate frequency range
         start_freq = center_freq - (span_mhz / 2)
         end_freq = center_freq + (span_mhz / 2)
@@ -564,18 +1110,206 @@ class RTLSDRService:
             logger.error(f"FFT capture error: {e}")
             return {'error': str(e)}
 
+    def open_waterfall_stream(
+        self,
+        center_freq: float = None,
+        span_mhz: float = 2.0,
+        bins: int = None,
+        integration_time: float = None,
+        interval_ms: float = None,
+        smoothing: float = 0.1,
+        margin_db: float = 5.0,
+        min_range_db: float = 10.0,
+    ) -> Dict[str, Any]:
+        """
+        Open a push stream of binary waterfall rows.
+
+        Each row is a fixed header (see sdr_spectrum.ROW_HEADER) followed by
+        one uint8 per bin, quantised against a dB range tracked here.
+
+        Args:
+            center_freq: Center frequency in MHz (default: follow the tuner)
+            span_mhz: Frequency span in MHz (default: 2.0)
+            bins: Bins per row (default: sdr_spectrum.TARGET_BINS)
+            integration_time: Integration time in seconds (default: unchanged)
+            interval_ms: Minimum spacing of the rows sent (default: every frame)
+            smoothing, margin_db, min_range_db: dB range tracking
+
+        Returns:
+            Dict with a 'stream' generator of bytes, or error
+        """
+        engine = self._spectrum_engine
+        if not self._spectrum_mode or not engine or not engine.running:
+            return {'error': 'spectrum capture not running'}
+
+        from backend.services.sdr_spectrum import TARGET_BINS, WaterfallEncoder
+
+        encoder = WaterfallEncoder(
+            span_mhz=span_mhz,
+            bins=bins or TARGET_BINS,
+            smoothing=smoothing,
+            margin_db=margin_db,
+            min_range_db=min_range_db,
+        )
+        if integration_time is not None:
+            engine.set_integration(integration_time)
+        if engine.owns_source and center_freq is not None:
+            engine.set_center(int(round(center_freq * 1e6)))
+        min_spacing_s = max(0.0, (interval_ms or 0.0) / 1000)
+
+        def rows():
+            seq = max(0, engine.ring.seq - 1)
+            last_sent = 0.0
+            while self._spectrum_engine is engine and engine.running:
+                frames = engine.ring.since(seq)
+                if not frames:
+                    time.sleep(engine.frame_interval_s / 2)
+                    continue
+                seq = frames[-1][0]
+                if min_spacing_s > engine.frame_interval_s:
+                    kept = []
+                    for item in frames:
+                        # Half a frame of slack, or frame jitter would halve the rate.
+                        if item[2]['timestamp'] - last_sent >= min_spacing_s - engine.frame_interval_s / 2:
+                            kept.append(item)
+                            last_sent = item[2]['timestamp']
+                    frames = kept
+                    if not frames:
+                        continue
+                center = None
+                if not engine.owns_source:
+                    center = center_freq if center_freq is not None else radio_data['frequency']
+                yield b''.join(encoder.encode(number, frame, meta, center) for number, frame, meta in frames)
+
+        return {'success': True, 'stream': rows()}
+
     def get_status(self) -> Dict[str, Any]:
         """Get current radio status."""
         # Check if processes are still running
         if self._rtl_fm_process and self._rtl_fm_process.poll() is not None:
             radio_data['playing'] = False
+        if self._pipeline:
+            radio_data['iq'] = self._pipeline.get_status()
+        if self._spectrum_engine:
+            radio_data['spectrum'] = self._spectrum_engine.get_status()
+        else:
+            radio_data.pop('spectrum', None)
 
         return radio_data.copy()
 
+    def _stations(self):
+        if self._station_cache is None:
+            from backend.services.sdr_scan import StationCache
+            self._station_cache = StationCache(
+                getattr(config, 'RTL_STATION_CACHE', os.path.expanduser('~/.pi-car/fm_stations.json'))
+            )
+        return self._station_cache
+
+    @staticmethod
+    def _position():
+        from backend.services.gps_service import gps_data
+        return gps_data.get('lat'), gps_data.get('lon')
+
+    @staticmethod
+    def _label_stations(stations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Scanned carriers as presets; names come from FM_PRESETS when the frequency matches."""
+        known = {preset['freq']: preset for preset in FM_PRESETS}
+        labelled = []
+        for station in stations:
+            preset = known.get(station['freq'], {})
+            labelled.append({
+                'freq': station['freq'],
+                'label': preset.get('label', f"{station['freq']:.1f} FM"),
+                'genre': preset.get('genre'),
+                'mode': 'FM',
+                'snr_db': station['snr_db'],
+            })
+        return labelled
+
+    def scan_fm_band(self, force: bool = False) -> Dict[str, Any]:
+        """
+        Find FM stations with a wideband sweep of 87.5-108 MHz.
+
+        Results are cached per GPS grid cell; a cached cell is returned
+        without touching the dongle unless `force` is set.
+
+        Returns:
+            Dict with stations (strongest SNR first), or error
+        """
+        if not NUMPY_AVAILABLE:
+            return {'error': 'numpy not available'}
+        lat, lon = self._position()
+        cache = self._stations()
+        if not force:
+            cached = cache.get(lat, lon)
+            if cached:
+                return {'success': True, 'cached': True, 'stations': self._label_stations(cached['stations'])}
+        if self._spectrum_mode:
+            return {'error': 'stop spectrum mode before scanning'}
+        if self._replay:
+            # A recording cannot retune; its sweep would be cached for this cell.
+            return {'error': 'stop IQ replay before scanning'}
+        if not self._scan_lock.acquire(blocking=False):
+            return {'error': 'scan already running'}
+
+        from backend.services.sdr_scan import scan_band
+
+        try:
+            if self._pipeline and self._pipeline.running:
+                # The capture thread lends its open dongle; audio resumes on its own.
+                result = self._pipeline.borrow_source(scan_band)
+            else:
+                result = self._scan_with_own_source(scan_band)
+        except Exception as e:
+            logger.error(f"FM band scan failed: {e}")
+            return {'error': str(e)}
+        finally:
+            self._scan_lock.release()
+
+        cache.put(lat, lon, result['stations'])
+        logger.info(f"FM scan: {len(result['stations'])} stations in {result['duration_s']} s ({result['hops']} hops)")
+        return {
+            'success': True,
+            'cached': False,
+            'stations': self._label_stations(result['stations']),
+            'hops': result['hops'],
+            'duration_s': result['duration_s'],
+        }
+
+    def _scan_with_own_source(self, scan):
+        """rtl_fm backend: free the dongle, scan through pyrtlsdr, resume playback."""
+        from backend.services.sdr_iq import RtlSdrSource
+
+        was_playing = radio_data['playing']
+        self._stop_playback()
+        source = RtlSdrSource(
+            device_index=getattr(config, 'RTL_DEVICE_INDEX', 0),
+            sample_rate=getattr(config, 'RTL_SAMPLE_RATE', 2400000),
+        )
+        try:
+            source.open()
+            if radio_data['gain'] != 'auto':
+                source.set_gain(radio_data['gain'])
+            return scan(source)
+        finally:
+            source.close()
+            if was_playing and self._running:
+                self._start_playback()
+
     def get_presets(self) -> Dict[str, Any]:
-        """Get all available presets."""
+        """Get all available presets (scanned FM stations for this area when cached)."""
+        fm, fm_source = FM_PRESETS, 'builtin'
+        if NUMPY_AVAILABLE:
+            try:
+                cached = self._stations().get(*self._position())
+            except Exception as e:
+                logger.debug(f"Station cache lookup failed: {e}")
+                cached = None
+            if cached and cached['stations']:
+                fm, fm_source = self._label_stations(cached['stations']), 'scan'
         return {
-            'fm': FM_PRESETS,
+            'fm': fm,
+            'fm_source': fm_source,
             'airports': AIRPORT_PRESETS
         }
 
@@ -0,0 +1,362 @@
+"""
+Pi-Car - Receptor ADS-B (Mode S, 1090 MHz) a 2 MS/s.
+
+Cada bit PPM dura 1 us = 2 amostras. O preambulo (pulsos em 0; 1; 3,5 e
+4,5 us) e procurado em todo o bloco de uma vez por correlacao com o padrao
+de pulsos e vales; os candidatos sao fatiados em uma matriz (N x 224), os
+bits saem da comparacao entre as duas metades e o CRC-24 roda vetorizado
+sobre todos os candidatos. So squitters estendidos (DF17/18) sao aceitos:
+indicativo (TC 1-4), posicao e altitude barometrica (TC 9-18, CPR global
+com par par/impar ou local em torno de uma referencia) e velocidade (TC 19)
+vao para uma tabela de aeronaves em memoria que expira sem mensagens novas.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ADSB_FREQ_HZ = 1_090_000_000
+ADSB_SAMPLE_RATE = 2_000_000
+BLOCK_SAMPLES = 262_144          # ~131 ms at 2 MS/s
+PREAMBLE_SAMPLES = 16
+LONG_BITS = 112
+MESSAGE_SAMPLES = PREAMBLE_SAMPLES + 2 * LONG_BITS
+PULSES = (0, 2, 7, 9)
+QUIET = (1, 3, 4, 5, 6, 8, 10, 11, 12, 13, 14, 15)
+PREAMBLE_RATIO = 2.0             # Mean pulse over mean quiet sample (~6 dB)
+NOISE_RATIO = 3.0                # Mean pulse over the block's mean magnitude
+AIRCRAFT_TTL_S = 60.0
+POSITION_PAIR_S = 10.0           # Even/odd CPR frames further apart are not paired
+STATUS_INTERVAL_S = 1.0
+
+CRC_POLY = 0xFFF409
+CALLSIGN_CHARS = '#ABCDEFGHIJKLMNOPQRSTUVWXYZ##### ###############0123456789######'
+CPR_NZ = 15
+
+
+def _crc_table() -> np.ndarray:
+    table = np.zeros(256, dtype=np.int64)
+    for byte in range(256):
+        crc = byte << 16
+        for _ in range(8):
+            crc = ((crc << 1) ^ CRC_POLY) if crc & 0x800000 else crc << 1
+        table[byte] = crc & 0xFFFFFF
+    return table
+
+
+_CRC_TABLE = _crc_table()
+
+
+def crc24(messages: np.ndarray) -> np.ndarray:
+    """Mode S parity of the first len-3 bytes of each row of a (N, bytes) uint8 array."""
+    crc = np.zeros(len(messages), dtype=np.int64)
+    for column in range(messages.shape[1] - 3):
+        crc = ((crc << 8) & 0xFFFFFF) ^ _CRC_TABLE[((crc >> 16) ^ messages[:, column]) & 0xFF]
+    return crc
+
+
+def _parity(messages: np.ndarray) -> np.ndarray:
+    tail = messages[:, -3:].astype(np.int64)
+    return (tail[:, 0] << 16) | (tail[:, 1] << 8) | tail[:, 2]
+
+
+def detect_preambles(magnitude: np.ndarray) -> np.ndarray:
+    """Start indexes whose next 16 samples look like a Mode S preamble."""
+    count = len(magnitude) - MESSAGE_SAMPLES + 1
+    if count <= 0:
+        return np.zeros(0, dtype=np.int64)
+    m = magnitude
+    # Cheap pass over the whole block: each pulse above the gap after it
+    # (~1/16 of noise positions survive), then the full pattern on those only.
+    starts = np.flatnonzero(
+        (m[0:count] > m[1:count + 1]) & (m[2:count + 2] > m[3:count + 3])
+        & (m[7:count + 7] > m[8:count + 8]) & (m[9:count + 9] > m[10:count + 10])
+    )
+    window = m[starts[:, None] + np.arange(PREAMBLE_SAMPLES)[None, :]]
+    high = window[:, PULSES].mean(axis=1)
+    low = window[:, QUIET].mean(axis=1)
+    noise = float(np.mean(m)) or 1e-6
+    shape = (window[:, 2] > window[:, 1]) & (window[:, 7] > window[:, 6]) & (window[:, 9] > window[:, 8])
+    return starts[shape & (high > PREAMBLE_RATIO * low) & (high > NOISE_RATIO * noise)]
+
+
+def demodulate(magnitude: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """(N, 14) message bytes for preambles at `starts` (PPM: early half > late half = 1)."""
+    offsets = PREAMBLE_SAMPLES + np.arange(2 * LONG_BITS)
+    chips = magnitude[starts[:, None] + offsets[None, :]].reshape(len(starts), LONG_BITS, 2)
+    return np.packbits(chips[:, :, 0] > chips[:, :, 1], axis=1)
+
+
+def _cpr_nl(lat: float) -> int:
+    """Number of longitude zones at a latitude."""
+    if lat == 0:
+        return 59
+    if abs(lat) == 87:
+        return 2
+    if abs(lat) > 87:
+        return 1
+    a = 1 - math.cos(math.pi / (2 * CPR_NZ))
+    b = math.cos(math.pi / 180 * abs(lat)) ** 2
+    return int(math.floor(2 * math.pi / math.acos(1 - a / b)))
+
+
+def cpr_global(even: Tuple[float, float], odd: Tuple[float, float], latest_odd: bool) -> Optional[Tuple[float, float]]:
+    """Position from an even/odd pair of normalised (lat_cpr, lon_cpr) frames."""
+    lat_even_cpr, lon_even_cpr = even
+    lat_odd_cpr, lon_odd_cpr = odd
+    j = math.floor(59 * lat_even_cpr - 60 * lat_odd_cpr + 0.5)
+    lat_even = 360 / 60 * (j % 60 + lat_even_cpr)
+    lat_odd = 360 / 59 * (j % 59 + lat_odd_cpr)
+    lat_even -= 360 if lat_even >= 270 else 0
+    lat_odd -= 360 if lat_odd >= 270 else 0
+    if _cpr_nl(lat_even) != _cpr_nl(lat_odd):
+        return None  # The pair straddles a zone boundary: wait for the next one
+    lat = lat_odd if latest_odd else lat_even
+    nl = _cpr_nl(lat)
+    zones = max(nl - 1, 1) if latest_odd else max(nl, 1)
+    m = math.floor(lon_even_cpr * (nl - 1) - lon_odd_cpr * nl + 0.5)
+    lon = 360 / zones * (m % zones + (lon_odd_cpr if latest_odd else lon_even_cpr))
+    lon -= 360 if lon >= 180 else 0
+    return round(lat, 5), round(lon, 5)
+
+
+def cpr_local(frame: Tuple[float, float], odd: bool, reference: Tuple[float, float]) -> Tuple[float, float]:
+    """Position from one frame, unambiguous within ~180 NM of `reference`."""
+    lat_cpr, lon_cpr = frame
+    ref_lat, ref_lon = reference
+    dlat = 360 / (60 - int(odd))
+    j = math.floor(ref_lat / dlat) + math.floor(0.5 + (ref_lat % dlat) / dlat - lat_cpr)
+    lat = dlat * (j + lat_cpr)
+    dlon = 360 / max(_cpr_nl(lat) - int(odd), 1)
+    m = math.floor(ref_lon / dlon) + math.floor(0.5 + (ref_lon % dlon) / dlon - lon_cpr)
+    return round(lat, 5), round(dlon * (m + lon_cpr), 5)
+
+
+def decode_message(message: bytes) -> Optional[Dict[str, Any]]:
+    """Fields of one CRC-checked DF17/18 extended squitter."""
+    df = message[0] >> 3
+    if df not in (17, 18) or len(message) != 14:
+        return None
+    me = int.from_bytes(message[4:11], 'big')
+    tc = me >> 51
+    decoded: Dict[str, Any] = {'df': df, 'icao': message[1:4].hex().upper(), 'tc': tc}
+    if 1 <= tc <= 4:
+        chars = [CALLSIGN_CHARS[(me >> (42 - 6 * index)) & 0x3F] for index in range(8)]
+        decoded['callsign'] = ''.join(chars).replace('#', '').strip()
+    elif 9 <= tc <= 18:
+        altitude = (me >> 36) & 0xFFF
+        if altitude & 0x10:  # Q bit: 25 ft steps (Gillham-coded altitudes are skipped)
+            n = ((altitude & 0xFE0) >> 1) | (altitude & 0xF)
+            decoded['altitude_ft'] = n * 25 - 1000
+        decoded['cpr_odd'] = bool((me >> 34) & 1)
+        decoded['cpr'] = (((me >> 17) & 0x1FFFF) / 131072, (me & 0x1FFFF) / 131072)
+    elif tc == 19 and (me >> 48) & 0x7 in (1, 2):
+        scale = 1 if (me >> 48) & 0x7 == 1 else 4
+        east = ((me >> 32) & 0x3FF) - 1
+        north = ((me >> 21) & 0x3FF) - 1
+        if east >= 0 and north >= 0:
+            vx = -east * scale if (me >> 42) & 1 else east * scale
+            vy = -north * scale if (me >> 31) & 1 else north * scale
+            decoded['ground_speed_kt'] = round(math.hypot(vx, vy), 1)
+            decoded['track_deg'] = round(math.degrees(math.atan2(vx, vy)) % 360, 1)
+        rate = (me >> 10) & 0x1FF
+        if rate:
+            decoded['vertical_rate_fpm'] = (rate - 1) * 64 * (-1 if (me >> 19) & 1 else 1)
+    return decoded
+
+
+class AircraftTable:
+    """Aircraft seen recently, keyed by ICAO address."""
+
+    def __init__(self, ttl_s: float = AIRCRAFT_TTL_S):
+        self.ttl_s = ttl_s
+        self.reference: Optional[Tuple[float, float]] = None  # Receiver position for local CPR
+        self._aircraft: Dict[str, Dict[str, Any]] = {}
+
+    def update(self, message: Dict[str, Any], now: Optional[float] = None) -> Dict[str, Any]:
+        now = time.time() if now is None else now
+        entry = self._aircraft.setdefault(message['icao'], {
+            'icao': message['icao'], 'callsign': None, 'altitude_ft': None, 'lat': None, 'lon': None,
+            'ground_speed_kt': None, 'track_deg': None, 'vertical_rate_fpm': None, 'messages': 0,
+            '_cpr': {},
+        })
+        entry['messages'] += 1
+        entry['last_seen'] = now
+        for key in ('callsign', 'altitude_ft', 'ground_speed_kt', 'track_deg', 'vertical_rate_fpm'):
+            if key in message:
+                entry[key] = message[key]
+        if 'cpr' in message:
+            self._position(entry, message['cpr_odd'], message['cpr'], now)
+        return entry
+
+    def _position(self, entry: Dict[str, Any], odd: bool, frame: Tuple[float, float], now: float) -> None:
+        frames = entry['_cpr']
+        frames[odd] = (frame, now)
+        other = frames.get(not odd)
+        position = None
+        if other is not None and now - other[1] <= POSITION_PAIR_S:
+            even_frame = other[0] if odd else frame
+            odd_frame = frame if odd else other[0]
+            position = cpr_global(even_frame, odd_frame, latest_odd=odd)
+        if position is None:
+            reference = (entry['lat'], entry['lon']) if entry['lat'] is not None else self.reference
+            if reference is not None:
+                position = cpr_local(frame, odd, reference)
+        if position is not None:
+            entry['lat'], entry['lon'] = position
+            entry['position_at'] = now
+
+    def expire(self, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        stale = [icao for icao, entry in self._aircraft.items() if now - entry['last_seen'] > self.ttl_s]
+        for icao in stale:
+            del self._aircraft[icao]
+        return len(stale)
+
+    def snapshot(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        now = time.time() if now is None else now
+        aircraft = []
+        for entry in self._aircraft.values():
+            view = {key: value for key, value in entry.items() if not key.startswith('_') and key != 'position_at'}
+            view['seen_s'] = round(now - entry['last_seen'], 1)
+            view['last_seen'] = round(entry['last_seen'], 1)
+            aircraft.append(view)
+        return sorted(aircraft, key=lambda item: item['seen_s'])
+
+    def __len__(self) -> int:
+        return len(self._aircraft)
+
+
+class AdsbDecoder:
+    """IQ (or magnitude) blocks at 2 MS/s -> decoded extended squitters."""
+
+    def __init__(self, sample_rate: int = ADSB_SAMPLE_RATE):
+        if int(sample_rate) != ADSB_SAMPLE_RATE:
+            raise ValueError(f'ADS-B decoding needs {ADSB_SAMPLE_RATE} S/s, got {sample_rate}')
+        self.sample_rate = ADSB_SAMPLE_RATE
+        self._tail = np.zeros(0, dtype=np.float32)
+        self.stats = {'samples': 0, 'preambles': 0, 'messages': 0, 'crc_failures': 0}
+
+    def reset(self) -> None:
+        self._tail = np.zeros(0, dtype=np.float32)
+
+    def process(self, samples: np.ndarray) -> List[bytes]:
+        """Messages whose preamble starts in this block; the last samples carry over."""
+        magnitude = np.abs(samples).astype(np.float32) if np.iscomplexobj(samples) else samples.astype(np.float32)
+        self.stats['samples'] += len(magnitude)
+        magnitude = np.concatenate((self._tail, magnitude))
+        starts = detect_preambles(magnitude)
+        self._tail = magnitude[max(0, len(magnitude) - MESSAGE_SAMPLES + 1):]
+        if len(starts) == 0:
+            return []
+        self.stats['preambles'] += len(starts)
+        messages = demodulate(magnitude, starts)
+        df = messages[:, 0] >> 3
+        extended = (df == 17) | (df == 18)
+        valid = extended & (crc24(messages) == _parity(messages))
+        self.stats['crc_failures'] += int(np.count_nonzero(extended & ~valid))
+        found: List[bytes] = []
+        last_end = -1
+        # A strong message matches at neighbouring offsets too: keep the first per burst.
+        for start, message in zip(starts[valid], messages[valid]):
+            if start < last_end:
+                continue
+            found.append(message.tobytes())
+            last_end = start + MESSAGE_SAMPLES
+        self.stats['messages'] += len(found)
+        return found
+
+
+class AdsbReceiver:
+    """Capture thread: source tuned to 1090 MHz -> decoder -> aircraft table."""
+
+    def __init__(
+        self,
+        source: Any,
+        *,
+        block_samples: int = BLOCK_SAMPLES,
+        on_status: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ):
+        self.source = source
+        self.block_samples = int(block_samples)
+        self.on_status = on_status
+        self.decoder = AdsbDecoder(source.sample_rate)
+        self.table = AircraftTable()
+        self._lock = threading.Lock()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self._last_status_at = 0.0
+        self.error: Optional[str] = None
+
+    def step(self) -> bool:
+        """Read and decode one block. False at end of stream."""
+        samples = self.source.read(self.block_samples)
+        if samples is None or len(samples) == 0:
+            return False
+        messages = self.decoder.process(samples)
+        now = time.time()
+        with self._lock:
+            for raw in messages:
+                decoded = decode_message(raw)
+                if decoded is not None:
+                    self.table.update(decoded, now)
+            self.table.expire(now)
+        return True
+
+    def start(self) -> None:
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True, name='adsb-receiver')
+        self._thread.start()
+
+    def _run(self) -> None:
+        try:
+            self.source.set_center_freq(ADSB_FREQ_HZ)
+            while self._running and self.step():
+                if time.monotonic() - self._last_status_at >= STATUS_INTERVAL_S:
+                    self._publish()
+        except Exception as exc:
+            logger.error(f"ADS-B receiver failed: {exc}")
+            self.error = str(exc)
+        finally:
+            self._running = False
+            self.source.close()
+            self._publish()
+
+    def _publish(self) -> None:
+        self._last_status_at = time.monotonic()
+        if self.on_status:
+            try:
+                self.on_status(self.get_status())
+            except Exception as exc:
+                logger.debug(f"ADS-B status callback failed: {exc}")
+
+    def stop(self) -> None:
+        self._running = False
+        if self._thread and self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def set_reference(self, lat: Optional[float], lon: Optional[float]) -> None:
+        with self._lock:
+            self.table.reference = (lat, lon) if lat is not None and lon is not None else None
+
+    def get_status(self) -> Dict[str, Any]:
+        with self._lock:
+            aircraft = self.table.snapshot()
+        return {
+            'running': self._running,
+            'error': self.error,
+            'aircraft': aircraft,
+            **self.decoder.stats,
+        }
@@ -0,0 +1,201 @@
+"""
+Pi-Car - Canalizador polifasico e scanner de aviacao (AM) para o backend `iq`.
+
+`PolyphaseChannelizer` divide a captura de 2,4 MHz em canais de 25 kHz (ou
+8,33 kHz) de uma vez: janelas deslizantes + soma polifasica + uma FFT por
+quadro, tudo em numpy. `AviationScanner` mede a potencia de todos os canais
+monitorados em paralelo, aplica squelch com histerese em vetor e manda o
+primeiro canal ativo (por prioridade) para o audio, sem retune.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from backend.services.sdr_dsp import AMDemodulator, FirDecimator, lowpass_taps
+
+AIR_CHANNEL_SPACING_HZ = 25_000
+TAPS_PER_BRANCH = 8
+USABLE_FRACTION = 0.8            # Channels past this share of the capture sit on the roll-off
+SQUELCH_HYSTERESIS_DB = 3.0
+HANG_S = 0.8                     # Keep the routed channel through pauses between phrases
+VOICE_CUTOFF_HZ = 3_500
+
+
+class PolyphaseChannelizer:
+    """Critically sampled analysis filter bank: `num_channels` outputs at sample_rate / num_channels.
+
+    Output column k is the channel centred k * spacing above the capture
+    centre (columns past num_channels / 2 are the negative offsets).
+    """
+
+    def __init__(self, num_channels: int, taps_per_branch: int = TAPS_PER_BRANCH, cutoff: Optional[float] = None):
+        self.num_channels = int(num_channels)
+        self.taps_per_branch = int(taps_per_branch)
+        length = self.num_channels * self.taps_per_branch
+        prototype = lowpass_taps(length, cutoff if cutoff is not None else 0.4 / self.num_channels)
+        # Reversed so every output frame is frame * taps, summed per branch.
+        self._branches = prototype[::-1].reshape(self.taps_per_branch, self.num_channels).astype(np.complex64)
+        self._history = np.zeros(length - self.num_channels, dtype=np.complex64)
+
+    def reset(self) -> None:
+        self._history[:] = 0
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """(frames, num_channels) complex channel samples for one IQ block."""
+        data = np.concatenate((self._history, block.astype(np.complex64, copy=False)))
+        length = self.num_channels * self.taps_per_branch
+        count = (len(data) - length) // self.num_channels + 1
+        if count <= 0:
+            self._history = data
+            return np.zeros((0, self.num_channels), dtype=np.complex64)
+        frames = sliding_window_view(data, length)[::self.num_channels][:count]
+        summed = np.einsum(
+            'fpm,pm->fm',
+            frames.reshape(count, self.taps_per_branch, self.num_channels),
+            self._branches,
+        )
+        self._history = data[count * self.num_channels:].copy()
+        return np.fft.fft(summed, axis=1).astype(np.complex64)
+
+
+class LinearResampler:
+    """Streaming linear-interpolation resampler (voice that is already band-limited)."""
+
+    def __init__(self, in_rate: float, out_rate: float):
+        self.step = float(in_rate) / float(out_rate)
+        self._last = np.float32(0.0)
+        self._position = 0.0  # Next output, in samples from the previous block's last sample
+
+    def reset(self) -> None:
+        self._last = np.float32(0.0)
+        self._position = 0.0
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        if len(block) == 0:
+            return np.zeros(0, dtype=np.float32)
+        data = np.concatenate(([self._last], block))
+        count = int(math.floor((len(data) - 1 - self._position) / self.step)) + 1
+        positions = self._position + np.arange(count) * self.step
+        output = np.interp(positions, np.arange(len(data)), data).astype(np.float32)
+        self._position += count * self.step - len(block)
+        self._last = data[-1]
+        return output
+
+
+def plan_channels(
+    frequencies_hz: Sequence[int],
+    sample_rate: int,
+    spacing_hz: float = AIR_CHANNEL_SPACING_HZ,
+    usable_fraction: float = USABLE_FRACTION,
+) -> Tuple[int, List[int], List[int]]:
+    """Capture centre and the frequencies it can monitor (priority order kept), plus the rest.
+
+    Picks the window holding the most frequencies, ties going to the one
+    with the highest-priority member; the centre sits on the channel grid
+    but never on a monitored channel (the DC spike).
+    `frequencies_hz` are expected on the 25 kHz raster or its 8.33 kHz split.
+    """
+    usable = sample_rate * usable_fraction
+    best: List[int] = []
+    for anchor in frequencies_hz:
+        members = [freq for freq in frequencies_hz if 0 <= freq - anchor <= usable]
+        if len(members) > len(best):
+            best = members
+    if not best:
+        return 0, [], list(frequencies_hz)
+    # Snapped to the 25 kHz raster, which 8.33 kHz channels also divide.
+    middle = (min(best) + max(best)) / 2
+    center = int(round(middle / AIR_CHANNEL_SPACING_HZ) * AIR_CHANNEL_SPACING_HZ)
+    step = AIR_CHANNEL_SPACING_HZ if max(best) - middle <= middle - min(best) else -AIR_CHANNEL_SPACING_HZ
+    while any(abs(freq - center) < spacing_hz / 2 for freq in best):
+        center += step
+    skipped = [freq for freq in frequencies_hz if freq not in best]
+    return center, best, skipped
+
+
+class AviationScanner:
+    """Parallel squelch over channelized AM, routing one active channel to audio."""
+
+    def __init__(
+        self,
+        sample_rate: int,
+        frequencies_hz: Sequence[int],
+        *,
+        audio_rate: int,
+        squelch_threshold_db: float,
+        spacing_hz: float = AIR_CHANNEL_SPACING_HZ,
+        hang_s: float = HANG_S,
+    ):
+        self.sample_rate = int(sample_rate)
+        num_channels = int(round(self.sample_rate / spacing_hz))
+        self.spacing_hz = self.sample_rate / num_channels
+        self.center_hz, self.frequencies_hz, self.skipped_hz = plan_channels(
+            list(frequencies_hz), self.sample_rate, self.spacing_hz,
+        )
+        self.channel_rate = self.sample_rate / num_channels
+        self.threshold_db = float(squelch_threshold_db)
+        self.hang_s = float(hang_s)
+        self._channelizer = PolyphaseChannelizer(num_channels)
+        offsets = np.array(self.frequencies_hz, dtype=np.float64) - self.center_hz
+        self._columns = np.round(offsets / self.spacing_hz).astype(np.int64) % num_channels
+        self._open = np.zeros(len(self.frequencies_hz), dtype=bool)
+        self.power_db = np.full(len(self.frequencies_hz), -np.inf)
+        self.active: Optional[int] = None
+        self._hang_left = 0.0
+        self._demodulator = AMDemodulator()
+        self._voice = FirDecimator(lowpass_taps(63, VOICE_CUTOFF_HZ / self.channel_rate), 1, dtype=np.float32)
+        self._resampler = LinearResampler(self.channel_rate, audio_rate)
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """Audio at `audio_rate` for the routed channel (zeros when none is active)."""
+        channels = self._channelizer.process(samples)[:, self._columns]
+        power = (channels.real ** 2 + channels.imag ** 2).mean(axis=0)
+        self.power_db = 10 * np.log10(np.maximum(power, 1e-20))
+        self._open = np.where(
+            self._open,
+            self.power_db >= self.threshold_db - SQUELCH_HYSTERESIS_DB,
+            self.power_db >= self.threshold_db,
+        )
+        self._route(len(channels) / self.channel_rate)
+        if self.active is None or not self._open[self.active]:
+            audio = np.zeros(len(channels), dtype=np.float32)
+        else:
+            audio = self._voice.process(self._demodulator.process(channels[:, self.active]))
+        return self._resampler.process(audio)
+
+    def _route(self, block_s: float) -> None:
+        if self.active is not None:
+            if self._open[self.active]:
+                self._hang_left = self.hang_s
+                return
+            self._hang_left -= block_s
+            if self._hang_left > 0 and not self._open.any():
+                return
+        first = np.flatnonzero(self._open)
+        active = int(first[0]) if len(first) else None
+        if active != self.active:
+            self.active = active
+            self._hang_left = self.hang_s
+            self._demodulator.reset()
+            self._voice.reset()
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            'center_hz': self.center_hz,
+            'spacing_hz': round(self.spacing_hz, 1),
+            'active_hz': None if self.active is None else self.frequencies_hz[self.active],
+            'skipped_hz': self.skipped_hz,
+            'channels': [
+                {
+                    'frequency_hz': freq,
+                    'power_db': round(float(level), 1) if math.isfinite(level) else None,
+                    'open': bool(is_open),
+                }
+                for freq, level, is_open in zip(self.frequencies_hz, self.power_db, self._open)
+            ],
+        }
@@ -0,0 +1,311 @@
+"""
+Pi-Car - Fontes de amostras IQ para o pipeline do RTL-SDR.
+
+`RtlSdrSource` mantem o dongle aberto via librtlsdr (pyrtlsdr) e entrega
+blocos complex64 normalizados em +-1; frequencia e ganho mudam sem reabrir o
+dispositivo. `IQRecorder` grava os blocos em disco (cabecalho de 64 bytes +
+amostras cu8 ou cf32) e `IQFileSource` reproduz essas gravacoes como um
+dongle virtual via numpy.memmap, em tempo real ou o mais rapido possivel.
+Todas as fontes expoem a mesma interface minima usada por `IQPipeline`:
+sample_rate, read(n), set_center_freq(hz), set_gain(g), close().
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import queue
+import struct
+import threading
+import time
+from typing import Any, Dict, Optional, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# The RTL2832U delivers offset-binary uint8 pairs centred on 127.4.
+_IQ_LUT = ((np.arange(256, dtype=np.float32) - 127.4) / 128.0).astype(np.float32)
+
+
+# Recording format: header, then interleaved I/Q from byte IQ_HEADER_BYTES on.
+IQ_MAGIC = b'PCIQ'
+IQ_VERSION = 1
+IQ_HEADER = struct.Struct('<4sHHIQd')  # magic, version, format, sample rate, centre Hz, start time
+IQ_HEADER_BYTES = 64
+IQ_FORMATS = {'cu8': 1, 'cf32': 2}     # rtl_sdr-style offset-binary bytes, or complex64
+IQ_EXTENSION = '.pciq'
+
+
+def uint8_to_complex(raw: Union[bytes, bytearray, np.ndarray]) -> np.ndarray:
+    """Interleaved uint8 I/Q -> complex64 with one table lookup, no Python loop."""
+    data = np.frombuffer(raw, dtype=np.uint8) if not isinstance(raw, np.ndarray) else raw
+    return _IQ_LUT[data[:len(data) & ~1]].view(np.complex64)
+
+
+def complex_to_uint8(samples: np.ndarray) -> np.ndarray:
+    """complex64 in +-1 -> interleaved uint8, the inverse of uint8_to_complex."""
+    interleaved = np.ascontiguousarray(samples, dtype=np.complex64).view(np.float32)
+    return np.clip(np.rint(interleaved * 128.0 + 127.4), 0, 255).astype(np.uint8)
+
+
+def read_iq_header(path: str) -> Dict[str, Any]:
+    with open(path, 'rb') as handle:
+        raw = handle.read(IQ_HEADER_BYTES)
+    if len(raw) < IQ_HEADER_BYTES:
+        raise ValueError(f'{path}: too short for an IQ recording header')
+    magic, version, code, sample_rate, center_freq, started_at = IQ_HEADER.unpack_from(raw)
+    formats = {value: name for name, value in IQ_FORMATS.items()}
+    if magic != IQ_MAGIC or version != IQ_VERSION or code not in formats:
+        raise ValueError(f'{path}: not a Pi-Car IQ recording (magic={magic!r}, version={version})')
+    fmt = formats[code]
+    sample_bytes = 2 if fmt == 'cu8' else 8
+    return {
+        'format': fmt,
+        'sample_rate': sample_rate,
+        'center_freq': center_freq,
+        'started_at': started_at,
+        'samples': (os.path.getsize(path) - IQ_HEADER_BYTES) // sample_bytes,
+    }
+
+
+class IQRecorder:
+    """Appends IQ blocks to a headered file; stops on a retune or at its limits.
+
+    `write(samples, center_freq_hz)` matches the IQPipeline consumer
+    signature, so a recorder can be attached to a running pipeline. It only
+    converts and queues the block; a writer thread does the disk I/O, so a
+    slow card never stalls the capture. If the queue fills up the recording
+    ends there with reason 'overrun': a file is always one gapless stream,
+    never samples with silent holes. close() waits for the queue to drain.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        sample_rate: int,
+        center_freq_hz: int,
+        fmt: str = 'cu8',
+        max_bytes: Optional[int] = None,
+        max_seconds: Optional[float] = None,
+        max_blocks: int = 64,
+    ):
+        if fmt not in IQ_FORMATS:
+            raise ValueError(f'Unknown IQ format {fmt!r} (use {", ".join(IQ_FORMATS)})')
+        self.path = path
+        self.sample_rate = int(sample_rate)
+        self.center_freq_hz = int(center_freq_hz)
+        self.format = fmt
+        self._sample_bytes = 2 if fmt == 'cu8' else 8
+        limits = []
+        if max_bytes is not None:
+            limits.append(int(max_bytes) // self._sample_bytes)
+        if max_seconds is not None:
+            limits.append(int(max_seconds * self.sample_rate))
+        self.max_samples = min(limits) if limits else None
+        self.samples = 0
+        self.reason: Optional[str] = None
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[bytes]" = queue.Queue(maxsize=max_blocks)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, 'wb')
+        header = IQ_HEADER.pack(IQ_MAGIC, IQ_VERSION, IQ_FORMATS[fmt], self.sample_rate, self.center_freq_hz, time.time())
+        self._file.write(header.ljust(IQ_HEADER_BYTES, b'\0'))
+        self._thread = threading.Thread(target=self._writer, daemon=True, name='iq-recorder')
+        self._thread.start()
+
+    def write(self, samples: np.ndarray, center_freq_hz: Optional[int] = None) -> bool:
+        """Queue a block for the file; False once the recording has ended."""
+        with self._lock:
+            if self.reason is not None:
+                return False
+            if center_freq_hz is not None and int(center_freq_hz) != self.center_freq_hz:
+                self._end('retuned')  # One file holds one centre frequency
+                return False
+            if self.max_samples is not None:
+                samples = samples[:self.max_samples - self.samples]
+            # Both conversions copy, so the source may reuse its buffer.
+            if self.format == 'cu8':
+                data = complex_to_uint8(samples).tobytes()
+            else:
+                data = np.ascontiguousarray(samples, dtype=np.complex64).tobytes()
+            try:
+                self._queue.put_nowait(data)
+            except queue.Full:
+                self._end('overrun')
+                return False
+            self.samples += len(samples)
+            if self.max_samples is not None and self.samples >= self.max_samples:
+                self._end('limit')
+                return False
+            return True
+
+    def _writer(self) -> None:
+        while True:
+            try:
+                data = self._queue.get(timeout=0.2)
+            except queue.Empty:
+                if self.reason is not None:
+                    break
+                continue
+            try:
+                self._file.write(data)
+            except OSError as exc:
+                logger.warning(f"IQ recording {self.path} write failed: {exc}")
+                with self._lock:
+                    self._end('error')
+                break
+        self._file.close()
+        logger.info(f"IQ recording {self.path} closed ({self.reason}, {self.samples} samples)")
+
+    def _end(self, reason: str) -> None:
+        if self.reason is None:
+            self.reason = reason
+
+    def close(self, reason: str = 'stopped') -> None:
+        """End the recording and wait until the queued blocks are on disk."""
+        with self._lock:
+            self._end(reason)
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+
+    @property
+    def active(self) -> bool:
+        return self.reason is None
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            'path': self.path,
+            'format': self.format,
+            'active': self.active,
+            'reason': self.reason,
+            'samples': self.samples,
+            'bytes': IQ_HEADER_BYTES + self.samples * self._sample_bytes,
+            'seconds': round(self.samples / self.sample_rate, 2),
+            'sample_rate': self.sample_rate,
+            'center_freq': self.center_freq_hz,
+        }
+
+
+class IQFileSource:
+    """Virtual dongle replaying an IQRecorder file through numpy.memmap.
+
+    `realtime` paces read() to the recorded sample rate, like the dongle's
+    blocking reads; otherwise blocks come as fast as the consumer takes
+    them (benchmarks, tests). The capture cannot be retuned: center_freq
+    stays where it was recorded and the pipeline mixes relative to it.
+    """
+
+    def __init__(self, path: str, realtime: bool = True, loop: bool = False):
+        self.path = path
+        self.realtime = bool(realtime)
+        self.loop = bool(loop)
+        header = read_iq_header(path)
+        self.format = header['format']
+        self.sample_rate = int(header['sample_rate'])
+        self.center_freq = int(header['center_freq'])
+        self.started_at = header['started_at']
+        self.total_samples = int(header['samples'])
+        self.requested_center_freq: Optional[int] = None
+        self.gain: Union[str, float] = 'auto'
+        self.position = 0
+        self.delivered = 0
+        self._data: Optional[np.ndarray] = None
+        self._clock_start: Optional[float] = None
+
+    def open(self) -> None:
+        if self._data is not None:
+            return
+        if self.format == 'cu8':
+            self._data = np.memmap(self.path, dtype=np.uint8, mode='r', offset=IQ_HEADER_BYTES, shape=(2 * self.total_samples,))
+        else:
+            self._data = np.memmap(self.path, dtype=np.complex64, mode='r', offset=IQ_HEADER_BYTES, shape=(self.total_samples,))
+        logger.info(f"Replaying {self.path} ({self.total_samples / self.sample_rate:.1f} s at {self.sample_rate / 1e6:.3f} MS/s)")
+
+    def set_center_freq(self, frequency_hz: int) -> None:
+        self.requested_center_freq = int(frequency_hz)
+
+    def set_gain(self, gain: Union[str, float]) -> None:
+        self.gain = gain
+
+    def read(self, num_samples: int) -> Optional[np.ndarray]:
+        """Next block (a view converted to complex64); None at the end unless looping."""
+        self.open()
+        if self.position >= self.total_samples:
+            if not self.loop or self.total_samples == 0:
+                return None
+            self.position = 0
+        end = min(self.position + int(num_samples), self.total_samples)
+        if self.format == 'cu8':
+            block = uint8_to_complex(self._data[2 * self.position:2 * end])
+        else:
+            block = np.array(self._data[self.position:end])
+        self.position = end
+        self.delivered += len(block)
+        if self.realtime:
+            if self._clock_start is None:
+                self._clock_start = time.monotonic()
+            delay = self._clock_start + self.delivered / self.sample_rate - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        return block
+
+    @property
+    def duration_s(self) -> float:
+        return self.total_samples / self.sample_rate if self.sample_rate else 0.0
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            'path': self.path,
+            'realtime': self.realtime,
+            'loop': self.loop,
+            'sample_rate': self.sample_rate,
+            'center_freq': self.center_freq,
+            'duration_s': round(self.duration_s, 2),
+            'position_s': round(self.position / self.sample_rate, 2) if self.sample_rate else 0.0,
+        }
+
+    def close(self) -> None:
+        self._data = None
+
+
+class RtlSdrSource:
+    """RTL-SDR dongle kept open through librtlsdr."""
+
+    def __init__(self, device_index: int = 0, sample_rate: int = 2_400_000):
+        self.device_index = int(device_index)
+        self.sample_rate = int(sample_rate)
+        self._sdr = None
+        self.center_freq: Optional[int] = None
+        self.gain: Union[str, float] = 'auto'
+
+    def open(self) -> None:
+        try:
+            from rtlsdr import RtlSdr
+        except ImportError as exc:
+            raise RuntimeError('pyrtlsdr not installed (pip3 install pyrtlsdr)') from exc
+        self._sdr = RtlSdr(self.device_index)
+        self._sdr.sample_rate = self.sample_rate
+        self.sample_rate = int(self._sdr.sample_rate)
+        logger.info(f"RTL-SDR opened for IQ streaming at {self.sample_rate / 1e6:.3f} MS/s")
+
+    def set_center_freq(self, frequency_hz: int) -> None:
+        self._sdr.center_freq = int(frequency_hz)
+        self.center_freq = int(frequency_hz)
+
+    def set_gain(self, gain: Union[str, float]) -> None:
+        self._sdr.gain = 'auto' if gain == 'auto' else float(gain)
+        self.gain = gain
+
+    def read(self, num_samples: int) -> np.ndarray:
+        return uint8_to_complex(self._sdr.read_bytes(2 * num_samples))
+
+    def close(self) -> None:
+        if self._sdr is not None:
+            try:
+                self._sdr.close()
+            except Exception as exc:
+                logger.debug(f"RTL-SDR close failed: {exc}")
+            self._sdr = None
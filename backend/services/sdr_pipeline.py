@@ -0,0 +1,531 @@
+"""
+Pi-Car - Pipeline IQ em processo para o RTL-SDR (backend `iq`).
+
+Uma thread le blocos IQ do dongle (mantido aberto), desloca o canal com um
+NCO, decima e demodula em numpy (WBFM ou AM) e entrega PCM a um `aplay`
+de vida longa. Mudancas de frequencia, modo, ganho e squelch so registram o
+pedido; a thread de captura aplica entre dois blocos (~14 ms a 2,4 MS/s),
+sem reiniciar processos. Retunes dentro da banda capturada so mexem no NCO.
+Outros consumidores (p.ex. o espectrograma) recebem o mesmo array de cada
+bloco, sem copia, entao audio e waterfall saem de uma unica captura. No
+modo scanner (aviacao) um canalizador polifasico substitui NCO + cadeia e
+vigia varios canais AM ao mesmo tempo. Em FM o MPX do discriminador tambem
+alimenta o decodificador RDS (nome da estacao, RadioText, PTY, hora).
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import queue
+import subprocess
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from backend.services.sdr_channelizer import AviationScanner
+from backend.services.sdr_dsp import (
+    AMDemodulator,
+    Deemphasis,
+    FMDemodulator,
+    Mixer,
+    SignalMeter,
+    design_decimator,
+    power_db,
+    to_pcm16,
+)
+from backend.services.sdr_rds import RdsDecoder
+
+logger = logging.getLogger(__name__)
+
+BLOCK_SAMPLES = 32768            # ~13.7 ms at 2.4 MS/s
+AUDIO_RATE = 48_000
+CHANNEL_RATE = 240_000           # Complex rate the demodulators run at
+TUNE_OFFSET_HZ = 250_000         # Hardware centre sits off the channel, away from the DC spike
+MIN_NCO_OFFSET_HZ = 150_000
+RETUNE_FLUSH_BLOCKS = 1          # Samples already in flight after a hardware retune
+SQUELCH_FLOOR_DB = -70.0         # Level 1 opens here; each level adds 0.5 dB
+SQUELCH_HYSTERESIS_DB = 3.0
+AM_DEFAULT_SQUELCH = 50          # Same default rtl_fm got for aviation
+STATUS_INTERVAL_S = 0.25
+
+
+def squelch_threshold_db(level: int) -> Optional[float]:
+    return None if level <= 0 else SQUELCH_FLOOR_DB + 0.5 * level
+
+
+class _FMChain:
+    """Channel (+-100 kHz) -> discriminator -> 15 kHz audio -> de-emphasis.
+
+    With `rds` the discriminator output (MPX at CHANNEL_RATE) also feeds
+    the RDS decoder before the audio filter drops the 57 kHz subcarrier.
+    """
+
+    noise_bandwidth_hz = 240_000  # Last channel stage cuts off at +-120 kHz
+
+    def __init__(self, sample_rate: int, rds: bool = False):
+        self.stages = []
+        rate = sample_rate
+        if sample_rate % (2 * CHANNEL_RATE) == 0 and sample_rate > 2 * CHANNEL_RATE:
+            factor = sample_rate // (2 * CHANNEL_RATE)
+            self.stages.append(design_decimator(rate, factor, 100_000, rate / factor - 100_000))
+            rate //= factor
+        factor = rate // CHANNEL_RATE
+        if factor > 1:
+            self.stages.append(design_decimator(rate, factor, 100_000, 140_000))
+        self.demodulator = FMDemodulator(CHANNEL_RATE)
+        self.audio = design_decimator(CHANNEL_RATE, CHANNEL_RATE // AUDIO_RATE, 15_000, 24_000, dtype=np.float32)
+        self.deemphasis = Deemphasis(AUDIO_RATE)
+        self.rds = RdsDecoder(CHANNEL_RATE) if rds else None
+
+    def channel(self, samples: np.ndarray) -> np.ndarray:
+        for stage in self.stages:
+            samples = stage.process(samples)
+        return samples
+
+    def demodulate(self, channel: np.ndarray) -> np.ndarray:
+        mpx = self.demodulator.process(channel)
+        if self.rds is not None:
+            self.rds.process(mpx)
+        return self.deemphasis.process(self.audio.process(mpx))
+
+    def reset(self) -> None:
+        if self.rds is not None:
+            self.rds.reset()
+
+
+class _AMChain:
+    """Channel (+-3.5 kHz, fits 8.33 and 25 kHz spacing) -> envelope."""
+
+    noise_bandwidth_hz = 9_500  # Last channel stage cuts off at +-4.75 kHz
+
+    rds = None
+
+    def __init__(self, sample_rate: int, rds: bool = False):
+        self.stages = []
+        rate = sample_rate
+        factor = rate // CHANNEL_RATE
+        if factor > 1:
+            self.stages.append(design_decimator(rate, factor, 20_000, rate / factor - 20_000))
+            rate //= factor
+        self.stages.append(design_decimator(rate, rate // AUDIO_RATE, 4_000, 20_000))
+        self.stages.append(design_decimator(AUDIO_RATE, 1, 3_500, 6_000))
+        self.demodulator = AMDemodulator()
+
+    def channel(self, samples: np.ndarray) -> np.ndarray:
+        for stage in self.stages:
+            samples = stage.process(samples)
+        return samples
+
+    def demodulate(self, channel: np.ndarray) -> np.ndarray:
+        return self.demodulator.process(channel)
+
+    def reset(self) -> None:
+        self.demodulator.reset()
+
+
+CHAINS = {'FM': _FMChain, 'AM': _AMChain}
+
+
+class AplaySink:
+    """Long-lived aplay fed through a small queue; never blocks the capture thread."""
+
+    def __init__(self, rate: int = AUDIO_RATE, max_blocks: int = 16):
+        self.rate = rate
+        self.dropped = 0
+        self._queue: "queue.Queue[bytes]" = queue.Queue(maxsize=max_blocks)
+        self._process: Optional[subprocess.Popen] = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+    def start(self) -> None:
+        self._running = True
+        self._spawn()
+        self._thread = threading.Thread(target=self._writer, daemon=True)
+        self._thread.start()
+
+    def _spawn(self) -> None:
+        self._process = subprocess.Popen(
+            ['aplay', '-r', str(self.rate), '-f', 'S16_LE', '-t', 'raw', '-c', '1', '-q'],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+    def write(self, pcm: np.ndarray) -> None:
+        data = pcm.tobytes()
+        try:
+            self._queue.put_nowait(data)
+        except queue.Full:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            self._queue.put_nowait(data)
+            self.dropped += 1
+
+    def _writer(self) -> None:
+        while self._running:
+            try:
+                data = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                self._process.stdin.write(data)
+                self._process.stdin.flush()
+            except (BrokenPipeError, OSError, AttributeError) as exc:
+                if not self._running:
+                    break
+                logger.warning(f"aplay exited ({exc}), restarting")
+                self._spawn()
+
+    def stop(self) -> None:
+        self._running = False
+        process, self._process = self._process, None
+        if process is not None:
+            try:
+                process.stdin.close()
+                process.terminate()
+                process.wait(timeout=1)
+            except Exception:
+                process.kill()
+
+
+class IQPipeline:
+    """Owns the IQ source on a capture thread and demodulates it to audio."""
+
+    def __init__(
+        self,
+        source: Any,
+        *,
+        audio_sink: Optional[Any] = None,
+        block_samples: int = BLOCK_SAMPLES,
+        on_status: Optional[Callable[[Dict[str, Any]], None]] = None,
+        rds: bool = True,
+    ):
+        self.sample_rate = int(source.sample_rate)
+        if self.sample_rate % CHANNEL_RATE:
+            raise ValueError(f'IQ sample rate must be a multiple of {CHANNEL_RATE} Hz, got {self.sample_rate}')
+        self.source = source
+        self.audio_sink = audio_sink
+        self.block_samples = int(block_samples)
+        self.on_status = on_status
+        self.audio_enabled = True
+        self.mode = 'FM'
+        self.frequency_hz: Optional[int] = None
+        self.center_freq_hz: Optional[int] = None
+        self.gain: Any = None  # Unknown until the first configure() sets it
+        self.squelch = 0
+        self.rds = bool(rds)
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Any] = {}
+        self._pending_since: Optional[float] = None
+        self._applied_since: Optional[float] = None
+        self._mixer = Mixer(self.sample_rate)
+        self._chain = CHAINS[self.mode](self.sample_rate, rds=self.rds)
+        self._meter = SignalMeter(self.sample_rate)
+        self._scanner: Optional[AviationScanner] = None
+        self._flush_blocks = 0
+        self._squelch_open = True
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self._last_status_at = 0.0
+        self._consumers: List[Callable[[np.ndarray, int], Any]] = []
+        self._tasks: List[tuple] = []
+        self.stats: Dict[str, Any] = {
+            'blocks': 0,
+            'hardware_retunes': 0,
+            'nco_retunes': 0,
+            'last_apply_ms': None,
+            'channel_power_db': None,
+            'rssi_db': None,
+            'noise_floor_db': None,
+            'snr_db': None,
+            'squelch_open': True,
+            'process_ms_per_block': None,
+            'scanner': None,
+            'rds': None,
+            'consumers': 0,
+            'consumers_ms_per_block': None,
+        }
+
+    def configure(
+        self,
+        *,
+        frequency_mhz: Optional[float] = None,
+        mode: Optional[str] = None,
+        gain: Any = None,
+        squelch: Optional[int] = None,
+        scan_mhz: Optional[Sequence[float]] = None,
+    ) -> None:
+        """Queue changes for the capture thread; returns immediately.
+
+        `scan_mhz` starts the aviation scanner over those frequencies
+        (priority order); an empty list, or a new `frequency_mhz`, ends it.
+        """
+        with self._lock:
+            if frequency_mhz is not None:
+                self._pending['frequency_hz'] = int(round(float(frequency_mhz) * 1e6))
+            if mode is not None:
+                self._pending['mode'] = mode.upper()
+            if gain is not None:
+                self._pending['gain'] = gain
+            if squelch is not None:
+                self._pending['squelch'] = int(squelch)
+            if scan_mhz is not None:
+                self._pending['scan_hz'] = [int(round(float(freq) * 1e6)) for freq in scan_mhz]
+            elif frequency_mhz is not None:
+                self._pending['scan_hz'] = []
+            if self._pending_since is None:
+                self._pending_since = time.monotonic()
+
+    def apply_pending(self) -> None:
+        with self._lock:
+            changes, self._pending = self._pending, {}
+            since, self._pending_since = self._pending_since, None
+        if not changes:
+            return
+        mode = changes.get('mode')
+        if mode in CHAINS and mode != self.mode:
+            self.mode = mode
+            self._chain = CHAINS[mode](self.sample_rate, rds=self.rds)
+            self._meter.reset()
+            self._squelch_open = True
+        if 'gain' in changes and changes['gain'] != self.gain:
+            self.source.set_gain(changes['gain'])
+            self.gain = changes['gain']
+        if 'squelch' in changes:
+            self.squelch = max(0, min(100, changes['squelch']))
+            if self._scanner is not None:
+                self._scanner.threshold_db = squelch_threshold_db(self.squelch or AM_DEFAULT_SQUELCH)
+        if 'frequency_hz' in changes:
+            self.frequency_hz = changes['frequency_hz']
+        if changes.get('scan_hz'):
+            self._start_scanner(changes['scan_hz'])
+        elif 'frequency_hz' in changes or ('scan_hz' in changes and self._scanner is not None):
+            if self._scanner is not None:
+                # The hardware sits on the scanner's centre: retune it too.
+                self._scanner = None
+                self.stats['scanner'] = None
+                self.center_freq_hz = None
+            if self.frequency_hz is not None:
+                self._retune(self.frequency_hz)
+        self._applied_since = since
+
+    def _start_scanner(self, frequencies_hz: List[int]) -> None:
+        level = self.squelch or AM_DEFAULT_SQUELCH
+        self._scanner = AviationScanner(
+            self.sample_rate,
+            frequencies_hz,
+            audio_rate=AUDIO_RATE,
+            squelch_threshold_db=squelch_threshold_db(level),
+        )
+        self.center_freq_hz = self._scanner.center_hz
+        self.source.set_center_freq(self.center_freq_hz)
+        self._flush_blocks = RETUNE_FLUSH_BLOCKS
+        self.stats['hardware_retunes'] += 1
+        self.stats['scanner'] = self._scanner.get_status()
+
+    def borrow_source(self, task: Callable[[Any], Any], timeout: float = 30.0) -> Any:
+        """Run `task(source)` on the capture thread between two blocks and return its result.
+
+        Audio pauses while the task holds the dongle (e.g. a band scan); the
+        channel is retuned in hardware afterwards.
+        """
+        if not self._running:
+            return task(self.source)
+        done = threading.Event()
+        outcome: Dict[str, Any] = {}
+        with self._lock:
+            self._tasks.append((task, done, outcome))
+        if not done.wait(timeout):
+            raise TimeoutError('IQ pipeline did not run the task in time')
+        if 'error' in outcome:
+            raise outcome['error']
+        return outcome.get('result')
+
+    def _run_tasks(self) -> None:
+        with self._lock:
+            tasks, self._tasks = self._tasks, []
+        if not tasks:
+            return
+        for task, done, outcome in tasks:
+            try:
+                outcome['result'] = task(self.source)
+            except Exception as exc:
+                outcome['error'] = exc
+            finally:
+                done.set()
+        # The task moved the hardware: put it back where the capture was.
+        if self._scanner is not None:
+            self.source.set_center_freq(self.center_freq_hz)
+            self._flush_blocks = RETUNE_FLUSH_BLOCKS
+            return
+        self.center_freq_hz = None
+        if self.frequency_hz is not None:
+            self._retune(self.frequency_hz)
+
+    def _fail_tasks(self, reason: str) -> None:
+        with self._lock:
+            tasks, self._tasks = self._tasks, []
+        for _, done, outcome in tasks:
+            outcome['error'] = RuntimeError(reason)
+            done.set()
+
+    def _retune(self, frequency_hz: int) -> None:
+        self.frequency_hz = frequency_hz
+        offset = None if self.center_freq_hz is None else frequency_hz - self.center_freq_hz
+        usable = self.sample_rate / 2 - CHANNEL_RATE / 2
+        if offset is not None and MIN_NCO_OFFSET_HZ <= abs(offset) <= usable:
+            # Still inside the captured band: only the oscillator moves.
+            self.stats['nco_retunes'] += 1
+        else:
+            self.center_freq_hz = frequency_hz + TUNE_OFFSET_HZ
+            self.source.set_center_freq(self.center_freq_hz)
+            # A replayed capture (IQFileSource) stays where it was recorded.
+            self.center_freq_hz = getattr(self.source, 'center_freq', None) or self.center_freq_hz
+            self._flush_blocks = RETUNE_FLUSH_BLOCKS
+            self.stats['hardware_retunes'] += 1
+        self._mixer.set_offset(self.frequency_hz - self.center_freq_hz)
+        self._chain.reset()
+        self._meter.reset()
+
+    def add_consumer(self, consumer: Callable[[np.ndarray, int], Any]) -> None:
+        """Also hand every IQ block to `consumer(samples, center_freq_hz)`.
+
+        Called on the capture thread with the block the demodulator saw; it
+        must not modify it and should return quickly (copy what it keeps).
+        """
+        with self._lock:
+            self._consumers = self._consumers + [consumer]
+            self.stats['consumers'] = len(self._consumers)
+
+    def remove_consumer(self, consumer: Callable[[np.ndarray, int], Any]) -> None:
+        with self._lock:
+            self._consumers = [item for item in self._consumers if item != consumer]
+            self.stats['consumers'] = len(self._consumers)
+            if not self._consumers:
+                self.stats['consumers_ms_per_block'] = None
+
+    def _squelch_gate(self, level_db: float) -> bool:
+        level = self.squelch or (AM_DEFAULT_SQUELCH if self.mode == 'AM' else 0)
+        threshold = squelch_threshold_db(level)
+        if threshold is None:
+            self._squelch_open = True
+        elif self._squelch_open:
+            self._squelch_open = level_db >= threshold - SQUELCH_HYSTERESIS_DB
+        else:
+            self._squelch_open = level_db >= threshold
+        return self._squelch_open
+
+    def process_block(self, samples: np.ndarray) -> np.ndarray:
+        """Demodulate one IQ block; returns float audio at AUDIO_RATE (zeros when squelched)."""
+        if self._scanner is not None:
+            audio = self._scanner.process(samples)
+            status = self._scanner.get_status()
+            self.stats['scanner'] = status
+            self.stats['squelch_open'] = status['active_hz'] is not None
+            return audio
+        channel = self._chain.channel(self._mixer.process(samples))
+        level_db = power_db(channel)
+        audio = self._chain.demodulate(channel)
+        self.stats['channel_power_db'] = round(level_db, 1) if math.isfinite(level_db) else None
+        self._meter.update(samples, channel)
+        self.stats.update(self._meter.readings(self._chain.noise_bandwidth_hz))
+        self.stats['squelch_open'] = self._squelch_gate(level_db)
+        self.stats['rds'] = self._chain.rds.get_status() if self._chain.rds is not None else None
+        if not self.stats['squelch_open']:
+            audio = np.zeros_like(audio)
+        return audio
+
+    def step(self) -> bool:
+        """Apply pending changes, read and process one block. False at end of stream."""
+        self.apply_pending()
+        self._run_tasks()
+        samples = self.source.read(self.block_samples)
+        if samples is None or len(samples) == 0:
+            return False
+        if self._flush_blocks:
+            self._flush_blocks -= 1
+            return True
+        started = time.perf_counter()
+        audio = self.process_block(samples)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        previous = self.stats['process_ms_per_block']
+        self.stats['process_ms_per_block'] = round(elapsed_ms if previous is None else previous + 0.1 * (elapsed_ms - previous), 2)
+        self.stats['blocks'] += 1
+        if self._applied_since is not None:
+            self.stats['last_apply_ms'] = round((time.monotonic() - self._applied_since) * 1000, 1)
+            self._applied_since = None
+        if self.audio_sink is not None and self.audio_enabled:
+            self.audio_sink.write(to_pcm16(audio))
+        self._feed_consumers(samples)
+        self._publish_status()
+        return True
+
+    def _feed_consumers(self, samples: np.ndarray) -> None:
+        consumers = self._consumers  # Replaced, never mutated: safe without the lock
+        if not consumers:
+            return
+        started = time.perf_counter()
+        for consumer in consumers:
+            try:
+                consumer(samples, self.center_freq_hz)
+            except Exception as exc:
+                logger.error(f"IQ consumer failed, removing it: {exc}")
+                self.remove_consumer(consumer)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        previous = self.stats['consumers_ms_per_block']
+        self.stats['consumers_ms_per_block'] = round(elapsed_ms if previous is None else previous + 0.1 * (elapsed_ms - previous), 2)
+
+    def _run(self) -> None:
+        try:
+            while self._running and self.step():
+                pass
+        except Exception as exc:
+            logger.error(f"IQ pipeline stopped: {exc}")
+            self.stats['error'] = str(exc)
+        finally:
+            self._running = False
+            self._fail_tasks('IQ pipeline stopped')
+            self._publish_status(force=True)
+
+    def _publish_status(self, force: bool = False) -> None:
+        if self.on_status is None:
+            return
+        now = time.monotonic()
+        if force or now - self._last_status_at >= STATUS_INTERVAL_S:
+            self._last_status_at = now
+            self.on_status(self.get_status())
+
+    def start(self) -> None:
+        if self.audio_sink is not None:
+            self.audio_sink.start()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+        if self.audio_sink is not None:
+            self.audio_sink.stop()
+        self.source.close()
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            'running': self._running,
+            'mode': 'SCAN' if self._scanner is not None else self.mode,
+            'frequency_hz': self.frequency_hz,
+            'center_freq_hz': self.center_freq_hz,
+            'sample_rate': self.sample_rate,
+            'audio_enabled': self.audio_enabled,
+            **self.stats,
+        }
@@ -0,0 +1,348 @@
+"""
+Pi-Car - Decodificador RDS (57 kHz) para o pipeline FM do backend `iq`.
+
+Recebe o MPX (saida do discriminador a 240 kHz), desce a subportadora de
+57 kHz com o NCO, decima para 24 kHz, remove a fase da portadora (BPSK ao
+quadrado), aplica o filtro casado bifase e amostra cada bit com um relogio
+estimado pela energia por fase do bit; tudo em blocos numpy. Bits
+diferenciais viram blocos de 26 bits, a sindrome (polinomio 0x5B9 + palavra
+de offset A/B/C/C'/D) e calculada para todas as posicoes de uma vez e os
+grupos validos alimentam PS, RadioText, PTY e hora (grupo 4A).
+Nao ha correcao de erros: grupos com bit errado sao descartados.
+"""
+
+from __future__ import annotations
+
+import math
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from backend.services.sdr_dsp import FirDecimator, Mixer, design_decimator
+
+SUBCARRIER_HZ = 57_000
+BIT_RATE = 1187.5
+RDS_RATE = 24_000                # Complex rate after decimation (~20.2 samples per bit)
+PHASE_BINS = 16
+TIMING_MEMORY = 0.8              # Per-call decay of the bit-phase energy histogram
+MAX_TIMING_STEP = 0.25           # Largest clock correction per call, in bits
+
+POLY = 0x5B9                     # x^10 + x^8 + x^7 + x^5 + x^4 + x^3 + 1
+OFFSETS = {'A': 0x0FC, 'B': 0x198, 'C': 0x168, "C'": 0x350, 'D': 0x1B4}
+_OFFSET_CODES = {value: name for name, value in OFFSETS.items()}
+BLOCK_BITS = 26
+GROUP_BITS = 4 * BLOCK_BITS
+
+PTY_NAMES = [
+    'None', 'News', 'Current Affairs', 'Information', 'Sport', 'Education', 'Drama', 'Culture',
+    'Science', 'Varied', 'Pop Music', 'Rock Music', 'Easy Listening', 'Light Classical',
+    'Serious Classical', 'Other Music', 'Weather', 'Finance', "Children's", 'Social Affairs',
+    'Religion', 'Phone-In', 'Travel', 'Leisure', 'Jazz Music', 'Country Music', 'National Music',
+    'Oldies Music', 'Folk Music', 'Documentary', 'Alarm Test', 'Alarm',
+]
+
+
+def _remainder(value: int, bits: int) -> int:
+    """value(x) * x^10 mod POLY for a `bits`-bit value."""
+    register = value << 10
+    for shift in range(bits + 9, 9, -1):
+        if register & (1 << shift):
+            register ^= POLY << (shift - 10)
+    return register
+
+
+# Check-word contribution of each of the 16 information bits (MSB first).
+_INFO_REMAINDERS = np.array([_remainder(1 << (15 - index), 16) for index in range(16)], dtype=np.int64)
+_CHECK_WEIGHTS = (1 << np.arange(9, -1, -1)).astype(np.int64)
+_INFO_WEIGHTS = (1 << np.arange(15, -1, -1)).astype(np.int64)
+
+
+def block_offsets(bits: np.ndarray) -> np.ndarray:
+    """Offset word matched by the 26-bit window starting at each position (0 = none)."""
+    if len(bits) < BLOCK_BITS:
+        return np.zeros(0, dtype=np.int64)
+    windows = sliding_window_view(bits.astype(np.int64), BLOCK_BITS)
+    remainder = np.bitwise_xor.reduce(windows[:, :16] * _INFO_REMAINDERS, axis=1)
+    syndrome = remainder ^ (windows[:, 16:] @ _CHECK_WEIGHTS)
+    return np.where(np.isin(syndrome, list(OFFSETS.values())), syndrome, 0)
+
+
+def _mjd_to_date(mjd: int):
+    year = int((mjd - 15078.2) / 365.25)
+    month = int((mjd - 14956.1 - int(year * 365.25)) / 30.6001)
+    day = mjd - 14956 - int(year * 365.25) - int(month * 30.6001)
+    carry = 1 if month in (14, 15) else 0
+    return year + carry + 1900, month - 1 - carry * 12, day
+
+
+class RdsGroups:
+    """Station data assembled from decoded groups."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.pi: Optional[int] = None
+        self.pty: Optional[int] = None
+        self.tp: Optional[bool] = None
+        self._ps = [' '] * 8
+        self._ps_seen = 0
+        self.ps: Optional[str] = None
+        self._rt = [' '] * 64
+        self._rt_ab: Optional[int] = None
+        self.radiotext: Optional[str] = None
+        self.clock: Optional[str] = None
+        self.groups = 0
+
+    @staticmethod
+    def _char(code: int) -> str:
+        return chr(code) if 0x20 <= code < 0x7F else ' '
+
+    def handle(self, blocks: Sequence[Optional[int]], version_b: bool) -> None:
+        a, b, c, d = blocks
+        self.groups += 1
+        if a is not None:
+            self.pi = a
+        if b is None:
+            return
+        group_type = b >> 12
+        self.tp = bool(b & 0x400)
+        self.pty = (b >> 5) & 0x1F
+        if group_type == 0 and d is not None:
+            segment = b & 0x3
+            self._ps[2 * segment:2 * segment + 2] = [self._char(d >> 8), self._char(d & 0xFF)]
+            self._ps_seen |= 1 << segment
+            if self._ps_seen == 0xF:
+                self.ps = ''.join(self._ps)
+        elif group_type == 2:
+            self._radiotext(b, c, d, version_b)
+        elif group_type == 4 and not version_b and c is not None and d is not None:
+            self._clock(b, c, d)
+
+    def _radiotext(self, b: int, c: Optional[int], d: Optional[int], version_b: bool) -> None:
+        ab = (b >> 4) & 1
+        if self._rt_ab is not None and ab != self._rt_ab:
+            self._rt = [' '] * 64  # Text A/B flag flipped: a new message
+        self._rt_ab = ab
+        segment = b & 0xF
+        if version_b:
+            if d is None:
+                return
+            position, words = 2 * segment, [d]
+        else:
+            if c is None or d is None:
+                return
+            position, words = 4 * segment, [c, d]
+        codes = [byte for word in words for byte in (word >> 8, word & 0xFF)]
+        # 0x0D ends the message; checked before _char() maps it to a space.
+        if 0x0D in codes:
+            codes = codes[:codes.index(0x0D)]
+            self._rt[position + len(codes):] = [' '] * (64 - position - len(codes))
+        self._rt[position:position + len(codes)] = [self._char(code) for code in codes]
+        self.radiotext = ''.join(self._rt).rstrip() or None
+
+    def _clock(self, b: int, c: int, d: int) -> None:
+        mjd = ((b & 0x3) << 15) | (c >> 1)
+        hour = ((c & 1) << 4) | (d >> 12)
+        minute = (d >> 6) & 0x3F
+        offset = timedelta(minutes=30 * (d & 0x1F)) * (-1 if d & 0x20 else 1)
+        if hour > 23 or minute > 59 or mjd == 0:
+            return
+        year, month, day = _mjd_to_date(mjd)
+        try:
+            utc = datetime(year, month, day, hour, minute, tzinfo=timezone.utc)
+        except ValueError:
+            return
+        self.clock = (utc + offset).replace(tzinfo=timezone(offset)).isoformat()
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'pi': None if self.pi is None else f'{self.pi:04X}',
+            'ps': self.ps,
+            'radiotext': self.radiotext,
+            'pty': self.pty,
+            'pty_name': None if self.pty is None else PTY_NAMES[self.pty],
+            'tp': self.tp,
+            'clock': self.clock,
+            'groups': self.groups,
+        }
+
+
+class RdsDecoder:
+    """MPX (FM discriminator output) -> RDS groups, block by block."""
+
+    def __init__(self, mpx_rate: int):
+        self.mpx_rate = int(mpx_rate)
+        factor = self.mpx_rate // RDS_RATE
+        if self.mpx_rate % RDS_RATE:
+            raise ValueError(f'MPX rate must be a multiple of {RDS_RATE} Hz, got {self.mpx_rate}')
+        self._mixer = Mixer(self.mpx_rate, SUBCARRIER_HZ)
+        self._filter = design_decimator(self.mpx_rate, factor, 2_500, 5_000)
+        self.samples_per_bit = RDS_RATE / BIT_RATE
+        half = int(round(self.samples_per_bit / 2))
+        self._matched = FirDecimator(np.concatenate((np.ones(half), -np.ones(half))).astype(np.float32), 1, dtype=np.float32)
+        self.data = RdsGroups()
+        self.reset()
+
+    def reset(self) -> None:
+        """Drop sync and station data (call after a retune)."""
+        self._filter.reset()
+        self._matched.reset()
+        self._carrier2: Optional[float] = None
+        self._phase_energy = np.zeros(PHASE_BINS)
+        self._samples = 0                 # Absolute index of the next matched-filter sample
+        self._last_sample = 0.0
+        self._next_bit_at: Optional[float] = None
+        self._last_symbol = 0
+        self._bits = np.zeros(0, dtype=np.uint8)
+        self._bits_start = 0              # Absolute bit number of self._bits[0]
+        self._bit_count = 0
+        self._last_group_at: Optional[int] = None
+        self.blocks_ok = 0
+        self.groups_ok = 0
+        self.data.reset()
+
+    def _derotate(self, baseband: np.ndarray) -> np.ndarray:
+        """BPSK carrier phase from the squared signal, kept continuous across calls."""
+        doubled = float(np.angle(np.mean(baseband * baseband)))
+        if self._carrier2 is not None:
+            doubled += 2 * math.pi * round((self._carrier2 - doubled) / (2 * math.pi))
+        self._carrier2 = doubled
+        return (baseband * np.complex64(np.exp(-0.5j * doubled))).real.astype(np.float32)
+
+    def _sample_bits(self, matched: np.ndarray) -> np.ndarray:
+        period = self.samples_per_bit
+        start = self._samples
+        indexes = start + np.arange(len(matched))
+        bins = ((indexes % period) / period * PHASE_BINS).astype(np.int64) % PHASE_BINS
+        energy = np.bincount(bins, weights=matched.astype(np.float64) ** 2, minlength=PHASE_BINS)
+        self._phase_energy = TIMING_MEMORY * self._phase_energy + energy
+        best = (int(np.argmax(self._phase_energy)) + 0.5) / PHASE_BINS * period
+
+        if self._next_bit_at is None:
+            self._next_bit_at = start + (best - start % period) % period
+        else:
+            error = (best - self._next_bit_at) % period
+            if error > period / 2:
+                error -= period
+            self._next_bit_at += float(np.clip(error, -MAX_TIMING_STEP * period, MAX_TIMING_STEP * period))
+
+        end = start + len(matched) - 1
+        count = int(math.floor((end - self._next_bit_at) / period)) + 1 if self._next_bit_at <= end else 0
+        times = self._next_bit_at + np.arange(count) * period
+        values = np.interp(times, np.arange(start - 1, end + 1), np.concatenate(([self._last_sample], matched)))
+        self._next_bit_at += count * period
+        self._samples = end + 1
+        self._last_sample = float(matched[-1]) if len(matched) else self._last_sample
+
+        symbols = (values > 0).astype(np.uint8)
+        previous = np.concatenate(([self._last_symbol], symbols[:-1])).astype(np.uint8)
+        if len(symbols):
+            self._last_symbol = int(symbols[-1])
+        return symbols ^ previous
+
+    def _find_groups(self) -> None:
+        bits = self._bits
+        offsets = block_offsets(bits)
+        if len(offsets) == 0:
+            return
+        names = np.array([_OFFSET_CODES.get(int(code)) for code in offsets], dtype=object)
+        consumed = 0
+        position = 0
+        limit = len(bits) - GROUP_BITS
+        while position <= limit:
+            absolute = self._bits_start + position
+            synced = self._last_group_at is not None and absolute - self._last_group_at == GROUP_BITS
+            expected = [names[position], names[position + 26], names[position + 52], names[position + 78]]
+            valid = [
+                expected[0] == 'A',
+                expected[1] == 'B',
+                expected[2] in ('C', "C'"),
+                expected[3] == 'D',
+            ]
+            if sum(valid) >= 3 or (synced and valid[1]):
+                words = [
+                    int(bits[position + 26 * index:position + 26 * index + 16] @ _INFO_WEIGHTS) if ok else None
+                    for index, ok in enumerate(valid)
+                ]
+                version_b = expected[2] == "C'" or (words[1] is not None and bool(words[1] & 0x800))
+                self.data.handle(words, version_b)
+                self.blocks_ok += sum(valid)
+                self.groups_ok += 1
+                self._last_group_at = absolute
+                position += GROUP_BITS
+                consumed = position
+                continue
+            if synced:
+                self._last_group_at = None  # Lost sync: search every position again
+            position += 1
+            consumed = position
+        self._bits = bits[consumed:]
+        self._bits_start += consumed
+
+    def process(self, mpx: np.ndarray) -> None:
+        baseband = self._filter.process(self._mixer.process(mpx))
+        if len(baseband) == 0:
+            return
+        bits = self._sample_bits(self._matched.process(self._derotate(baseband)))
+        self._bit_count += len(bits)
+        self._bits = np.concatenate((self._bits, bits))
+        self._find_groups()
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            **self.data.as_dict(),
+            'synced': self._last_group_at is not None,
+            'bits': self._bit_count,
+            'groups_ok': self.groups_ok,
+        }
+
+
+# Encoder side, for loopback tests and scripts/benchmark_rds.py.
+
+def encode_blocks(words: Sequence[int], offsets: Sequence[str]) -> np.ndarray:
+    """26-bit blocks (info + check word xor offset), MSB first."""
+    bits: List[int] = []
+    for word, offset in zip(words, offsets):
+        block = (word << 10) | (_remainder(word, 16) ^ OFFSETS[offset])
+        bits.extend((block >> shift) & 1 for shift in range(25, -1, -1))
+    return np.array(bits, dtype=np.uint8)
+
+
+def encode_station(pi: int, pty: int, ps: str, radiotext: str, clock_utc: Optional[datetime] = None) -> np.ndarray:
+    """One cycle of 0A (PS), 2A (RadioText) and optionally 4A (clock) groups."""
+    groups: List[np.ndarray] = []
+    abcd = ('A', 'B', 'C', 'D')
+    ps = ps.ljust(8)[:8]
+    for segment in range(4):
+        b = (0 << 12) | (pty << 5) | segment
+        d = (ord(ps[2 * segment]) << 8) | ord(ps[2 * segment + 1])
+        groups.append(encode_blocks([pi, b, 0xE0CD, d], abcd))
+    text = (radiotext + '\r').ljust(4 * math.ceil((len(radiotext) + 1) / 4))[:64]
+    for segment in range(len(text) // 4):
+        chunk = text[4 * segment:4 * segment + 4]
+        b = (2 << 12) | (pty << 5) | segment
+        c = (ord(chunk[0]) << 8) | ord(chunk[1])
+        d = (ord(chunk[2]) << 8) | ord(chunk[3])
+        groups.append(encode_blocks([pi, b, c, d], abcd))
+    if clock_utc is not None:
+        date = clock_utc.date()
+        mjd = (date - datetime(1858, 11, 17).date()).days
+        b = (4 << 12) | (pty << 5) | (mjd >> 15)
+        c = ((mjd & 0x7FFF) << 1) | (clock_utc.hour >> 4)
+        d = ((clock_utc.hour & 0xF) << 12) | (clock_utc.minute << 6)
+        groups.append(encode_blocks([pi, b, c, d], abcd))
+    return np.concatenate(groups)
+
+
+def rds_waveform(bits: np.ndarray, sample_rate: int, amplitude: float = 0.04, phase: float = 0.0) -> np.ndarray:
+    """Differentially encoded biphase BPSK on 57 kHz, in MPX units (1.0 = 75 kHz deviation)."""
+    encoded = np.bitwise_xor.accumulate(bits.astype(np.uint8))
+    symbols = encoded.astype(np.float32) * 2 - 1
+    t = np.arange(int(len(bits) * sample_rate / BIT_RATE)) / sample_rate
+    position = t * BIT_RATE
+    index = np.minimum(position.astype(np.int64), len(bits) - 1)
+    shape = np.where(position - np.floor(position) < 0.5, 1.0, -1.0)
+    return (amplitude * symbols[index] * shape * np.cos(2 * np.pi * SUBCARRIER_HZ * t + phase)).astype(np.float32)
@@ -0,0 +1,178 @@
+"""
+Pi-Car - Varredura da banda FM com cache de estacoes por regiao.
+
+Cobre 87,5-108 MHz em saltos de banda larga (a 2,4 MS/s, ~11 saltos),
+monta um espectro de Welch da banda inteira e acha as portadoras em numpy:
+potencia por canal da grade de 100 kHz via somas cumulativas, piso de ruido
+por percentil e maximos locais acima de um SNR minimo. A lista de estacoes
+fica em cache por celula de grade GPS, entao voltar a uma regiao ja
+varrida da presets na hora.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from backend.services.sdr_spectrum import welch_power
+
+logger = logging.getLogger(__name__)
+
+FM_BAND_START_HZ = 87_500_000
+FM_BAND_END_HZ = 108_000_000
+FM_CHANNEL_STEP_HZ = 100_000
+FM_CHANNEL_HALF_WIDTH_HZ = 75_000   # Bins averaged per channel (inside the +-100 kHz station)
+FM_STATION_SPACING_HZ = 200_000     # Weaker peaks closer than this to a station are its skirts
+USABLE_FRACTION = 0.8               # Hop edges sit on the dongle's anti-alias roll-off
+SCAN_FFT_SIZE = 2048
+SCAN_SAMPLES = 262_144              # ~110 ms per hop at 2.4 MS/s
+SCAN_FLUSH_SAMPLES = 32_768         # Samples in flight after each retune
+MIN_SNR_DB = 10.0
+NOISE_PERCENTILE = 20.0
+GRID_DEG = 0.25                     # ~28 km cells, well inside an FM coverage area
+
+
+def hop_centers(start_hz: int, end_hz: int, sample_rate: int, usable_fraction: float = USABLE_FRACTION) -> List[int]:
+    """Centre frequencies whose usable slices tile [start_hz, end_hz] without overlap."""
+    usable = sample_rate * usable_fraction
+    hops = max(1, math.ceil((end_hz - start_hz) / usable))
+    first = start_hz + usable / 2 - (hops * usable - (end_hz - start_hz)) / 2
+    return [int(round(first + index * usable)) for index in range(hops)]
+
+
+def channel_snr(
+    freqs_hz: np.ndarray,
+    power: np.ndarray,
+    channels_hz: np.ndarray,
+    half_width_hz: float = FM_CHANNEL_HALF_WIDTH_HZ,
+    noise_percentile: float = NOISE_PERCENTILE,
+) -> Dict[str, np.ndarray]:
+    """Mean power per channel (cumulative sums, no Python loop) and its SNR over the band's floor."""
+    cumulative = np.concatenate(([0.0], np.cumsum(power, dtype=np.float64)))
+    low = np.searchsorted(freqs_hz, channels_hz - half_width_hz, side='left')
+    high = np.searchsorted(freqs_hz, channels_hz + half_width_hz, side='right')
+    counts = np.maximum(high - low, 1)
+    mean = (cumulative[high] - cumulative[low]) / counts
+    mean[high <= low] = np.nan
+    noise = float(np.nanpercentile(mean, noise_percentile))
+    snr_db = 10 * np.log10(np.maximum(mean / noise, 1e-12))
+    return {'power_db': 10 * np.log10(np.maximum(mean, 1e-20)), 'snr_db': snr_db, 'noise_db': 10 * math.log10(noise)}
+
+
+def find_stations(
+    freqs_hz: np.ndarray,
+    power: np.ndarray,
+    *,
+    start_hz: int = FM_BAND_START_HZ,
+    end_hz: int = FM_BAND_END_HZ,
+    step_hz: int = FM_CHANNEL_STEP_HZ,
+    min_snr_db: float = MIN_SNR_DB,
+    spacing_hz: int = FM_STATION_SPACING_HZ,
+) -> List[Dict[str, Any]]:
+    """Carriers on the channel grid, strongest SNR first."""
+    channels = np.arange(start_hz, end_hz + step_hz // 2, step_hz, dtype=np.float64)
+    levels = channel_snr(freqs_hz, power, channels)
+    snr = np.nan_to_num(levels['snr_db'], nan=-np.inf)
+    padded = np.concatenate(([-np.inf], snr, [-np.inf]))
+    peaks = (snr >= padded[:-2]) & (snr > padded[2:]) & (snr >= min_snr_db)
+
+    stations: List[Dict[str, Any]] = []
+    for index in np.flatnonzero(peaks)[np.argsort(-snr[peaks])]:
+        frequency = channels[index]
+        if any(abs(frequency - station['freq'] * 1e6) < spacing_hz for station in stations):
+            continue
+        stations.append({
+            'freq': round(frequency / 1e6, 1),
+            'snr_db': round(float(snr[index]), 1),
+            'power_db': round(float(levels['power_db'][index]), 1),
+        })
+    return stations
+
+
+def scan_band(
+    source: Any,
+    start_hz: int = FM_BAND_START_HZ,
+    end_hz: int = FM_BAND_END_HZ,
+    *,
+    samples: int = SCAN_SAMPLES,
+    fft_size: int = SCAN_FFT_SIZE,
+    min_snr_db: float = MIN_SNR_DB,
+) -> Dict[str, Any]:
+    """Hop `source` across the band and return the stations found plus timing."""
+    started = time.monotonic()
+    sample_rate = int(source.sample_rate)
+    usable_half = sample_rate * USABLE_FRACTION / 2
+    offsets = (np.arange(fft_size) - fft_size // 2) * (sample_rate / fft_size)
+    keep = np.abs(offsets) <= usable_half
+    window = np.hanning(fft_size).astype(np.float32)
+    freqs: List[np.ndarray] = []
+    powers: List[np.ndarray] = []
+    centers = hop_centers(start_hz, end_hz, sample_rate)
+    for center in centers:
+        source.set_center_freq(center)
+        source.read(SCAN_FLUSH_SAMPLES)
+        power = welch_power(source.read(samples), fft_size, window)
+        freqs.append(center + offsets[keep])
+        powers.append(power[keep])
+
+    all_freqs = np.concatenate(freqs)
+    order = np.argsort(all_freqs, kind='stable')
+    stations = find_stations(
+        all_freqs[order], np.concatenate(powers)[order],
+        start_hz=start_hz, end_hz=end_hz, min_snr_db=min_snr_db,
+    )
+    return {
+        'stations': stations,
+        'hops': len(centers),
+        'duration_s': round(time.monotonic() - started, 2),
+    }
+
+
+def grid_cell(lat: float, lon: float, grid_deg: float = GRID_DEG) -> str:
+    return f"{math.floor(lat / grid_deg) * grid_deg:.2f},{math.floor(lon / grid_deg) * grid_deg:.2f}"
+
+
+class StationCache:
+    """Scanned station lists keyed by GPS grid cell, in one JSON file."""
+
+    def __init__(self, path: str, grid_deg: float = GRID_DEG):
+        self.path = Path(path).expanduser()
+        self.grid_deg = float(grid_deg)
+        self._cells: Optional[Dict[str, Any]] = None
+
+    def _load(self) -> Dict[str, Any]:
+        if self._cells is None:
+            try:
+                with open(self.path, 'r') as f:
+                    self._cells = json.load(f)
+            except FileNotFoundError:
+                self._cells = {}
+            except (OSError, ValueError) as exc:
+                logger.warning(f"Station cache unreadable, starting empty: {exc}")
+                self._cells = {}
+        return self._cells
+
+    def get(self, lat: Optional[float], lon: Optional[float]) -> Optional[Dict[str, Any]]:
+        if lat is None or lon is None:
+            return None
+        return self._load().get(grid_cell(lat, lon, self.grid_deg))
+
+    def put(self, lat: Optional[float], lon: Optional[float], stations: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if lat is None or lon is None:
+            return None
+        entry = {'scanned_at': time.time(), 'stations': stations}
+        cells = self._load()
+        cells[grid_cell(lat, lon, self.grid_deg)] = entry
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix('.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(cells, f, indent=2)
+        os.replace(tmp, self.path)
+        return entry
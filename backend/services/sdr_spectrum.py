@@ -0,0 +1,365 @@
+"""
+Pi-Car - Motor de espectro continuo para o espectrograma do radio.
+
+Substitui um `rtl_power -1` por requisicao: uma thread de vida longa le IQ
+do dongle e, a cada intervalo de quadro, calcula um espectro de Welch
+(janela de Hann, 50% de sobreposicao, segmentos FFT em lote no numpy) e o
+grava num ring buffer pre-alocado. `/api/radio/fft` so le o ultimo quadro.
+Blocos entre dois quadros nao sao processados, entao o custo e
+proporcional a taxa de quadros, nao a taxa de amostragem. Com o backend
+`iq` o motor nao abre o dongle: recebe os blocos do `IQPipeline` via
+`feed()`, junto com a demodulacao. `WaterfallEncoder` empacota cada quadro
+como uma linha binaria uint8 (cabecalho fixo + um byte por bin) para o
+stream do waterfall.
+"""
+
+from __future__ import annotations
+
+import logging
+import struct
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+logger = logging.getLogger(__name__)
+
+FFT_SIZE = 1024
+MAX_INTEGRATION_SAMPLES = 131072  # Welch average cap per frame (~55 ms of IQ at 2.4 MS/s)
+FRAME_INTERVAL_S = 0.1
+RING_FRAMES = 128
+TARGET_BINS = 256              # Bins per published frame (max-pooled, keeps narrow carriers)
+READ_BLOCK_SAMPLES = 16384
+
+# Waterfall row: magic, seq, bins, reserved, start/end MHz, dB range of 0 and 255.
+ROW_HEADER = struct.Struct('<4sIHHddff')
+ROW_MAGIC = b'PCWF'
+
+
+def welch_db(samples: np.ndarray, fft_size: int = FFT_SIZE, window: Optional[np.ndarray] = None) -> np.ndarray:
+    """Hann-windowed, 50%-overlap averaged power spectrum in dBFS, DC in the middle."""
+    return (10 * np.log10(welch_power(samples, fft_size, window) + 1e-20)).astype(np.float32)
+
+
+def welch_power(samples: np.ndarray, fft_size: int = FFT_SIZE, window: Optional[np.ndarray] = None) -> np.ndarray:
+    """Linear-power version of `welch_db`."""
+    if window is None:
+        window = np.hanning(fft_size).astype(np.float32)
+    hop = fft_size // 2
+    segments = sliding_window_view(samples, fft_size)[::hop]
+    spectra = np.fft.fft(segments * window, axis=1)
+    power = (spectra.real ** 2 + spectra.imag ** 2).mean(axis=0)
+    # Normalised so a full-scale tone reads 0 dBFS.
+    power = np.fft.fftshift(power) / float(window.sum()) ** 2
+    middle = fft_size // 2
+    # The RTL2832U DC offset shows up as a spike in the centre bin.
+    power[middle] = 0.5 * (power[middle - 1] + power[middle + 1])
+    return power
+
+
+def pool_max(frame: np.ndarray, bins: int) -> np.ndarray:
+    if len(frame) <= bins:
+        return frame
+    edges = np.linspace(0, len(frame), bins + 1).astype(np.int64)[:-1]
+    return np.maximum.reduceat(frame, edges)
+
+
+class SpectrumRing:
+    """Fixed-size ring of frames; readers copy, the writer never allocates."""
+
+    def __init__(self, capacity: int, bins: int):
+        self.capacity = int(capacity)
+        self.frames = np.full((self.capacity, bins), np.nan, dtype=np.float32)
+        self.meta: List[Optional[Dict[str, Any]]] = [None] * self.capacity
+        self.seq = 0
+        self._lock = threading.Lock()
+
+    def push(self, frame: np.ndarray, meta: Dict[str, Any]) -> int:
+        with self._lock:
+            index = self.seq % self.capacity
+            self.frames[index, :] = frame
+            self.meta[index] = meta
+            self.seq += 1
+            return self.seq
+
+    def latest(self) -> Optional[Tuple[int, np.ndarray, Dict[str, Any]]]:
+        with self._lock:
+            if self.seq == 0:
+                return None
+            index = (self.seq - 1) % self.capacity
+            return self.seq, self.frames[index].copy(), dict(self.meta[index])
+
+    def since(self, seq: int) -> List[Tuple[int, np.ndarray, Dict[str, Any]]]:
+        """Frames newer than `seq`, oldest first (at most `capacity`)."""
+        with self._lock:
+            first = max(seq, self.seq - self.capacity)
+            return [
+                (number + 1, self.frames[number % self.capacity].copy(), dict(self.meta[number % self.capacity]))
+                for number in range(first, self.seq)
+            ]
+
+
+class SpectrumEngine:
+    """Welch FFT frames from an IQ stream into a ring buffer."""
+
+    def __init__(
+        self,
+        sample_rate: int,
+        *,
+        fft_size: int = FFT_SIZE,
+        frame_interval_s: float = FRAME_INTERVAL_S,
+        integration_s: float = 0.1,
+        ring_frames: int = RING_FRAMES,
+    ):
+        self.sample_rate = int(sample_rate)
+        self.fft_size = int(fft_size)
+        self.frame_interval_s = float(frame_interval_s)
+        self.window = np.hanning(self.fft_size).astype(np.float32)
+        self.ring = SpectrumRing(ring_frames, self.fft_size)
+        self._buffer = np.zeros(max(self.fft_size, MAX_INTEGRATION_SAMPLES), dtype=np.complex64)
+        self._filled = 0
+        self._needed = self.fft_size
+        self.set_integration(integration_s)
+        self._next_frame_at = 0.0
+        self._source = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._pending_center: Optional[int] = None
+        self.center_freq_hz: Optional[int] = None
+        self.frames = 0
+        self.compute_ms: Optional[float] = None
+
+    def set_integration(self, integration_s: float) -> None:
+        """Samples averaged per frame: at least one FFT, at most MAX_INTEGRATION_SAMPLES."""
+        wanted = int(max(0.0, float(integration_s)) * self.sample_rate)
+        self._needed = max(self.fft_size, min(len(self._buffer), wanted))
+
+    def feed(self, samples: np.ndarray, center_freq_hz: int, now: Optional[float] = None) -> bool:
+        """Offer one IQ block; returns True when it completed a frame."""
+        now = time.monotonic() if now is None else now
+        if center_freq_hz != self.center_freq_hz:
+            self.center_freq_hz = center_freq_hz
+            self._filled = 0
+        if now < self._next_frame_at:
+            return False
+        take = min(len(samples), self._needed - self._filled)
+        self._buffer[self._filled:self._filled + take] = samples[:take]
+        self._filled += take
+        if self._filled < self._needed:
+            return False
+        started = time.perf_counter()
+        frame = welch_db(self._buffer[:self._filled], self.fft_size, self.window)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.compute_ms = elapsed_ms if self.compute_ms is None else self.compute_ms + 0.1 * (elapsed_ms - self.compute_ms)
+        self.ring.push(frame, {
+            'center_freq_hz': center_freq_hz,
+            'sample_rate': self.sample_rate,
+            'samples': self._filled,
+            'timestamp': time.time(),
+        })
+        self.frames += 1
+        self._filled = 0
+        self._next_frame_at = max(self._next_frame_at + self.frame_interval_s, now)
+        return True
+
+    def set_center(self, frequency_hz: int) -> None:
+        """Retune the engine's own source (applied by the capture thread).
+
+        Ignored when fed by another capture, which owns the tuning.
+        """
+        if self._source is not None:
+            self._pending_center = int(frequency_hz)
+
+    @property
+    def owns_source(self) -> bool:
+        return self._source is not None
+
+    def start(self, source: Any = None, center_freq_hz: Optional[int] = None) -> None:
+        """Capture from `source` on a thread, or, without one, wait for `feed()` calls."""
+        self._running = True
+        if source is None:
+            return
+        self._source = source
+        self._pending_center = int(center_freq_hz)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        try:
+            while self._running:
+                if self._pending_center is not None:
+                    center, self._pending_center = self._pending_center, None
+                    if center != self.center_freq_hz:
+                        self._source.set_center_freq(center)
+                        self._source.read(READ_BLOCK_SAMPLES)  # Drop samples from before the retune
+                        self.center_freq_hz = center
+                        self._filled = 0
+                samples = self._source.read(READ_BLOCK_SAMPLES)
+                if samples is None or len(samples) == 0:
+                    break
+                self.feed(samples, self.center_freq_hz)
+        except Exception as exc:
+            logger.error(f"Spectrum capture stopped: {exc}")
+        finally:
+            self._running = False
+
+    def stop(self) -> None:
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+        if self._source is not None:
+            self._source.close()
+            self._source = None
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def latest(
+        self,
+        span_mhz: Optional[float] = None,
+        bins: int = TARGET_BINS,
+        center_mhz: Optional[float] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Latest frame cropped to `span_mhz` around `center_mhz` (default: capture centre), in the old get_fft shape."""
+        item = self.ring.latest()
+        if item is None:
+            return None
+        seq, frame, meta = item
+        return self.describe(seq, frame, meta, span_mhz, bins, center_mhz)
+
+    @staticmethod
+    def crop(
+        frame: np.ndarray,
+        meta: Dict[str, Any],
+        span_mhz: Optional[float],
+        center_mhz: Optional[float] = None,
+    ) -> Tuple[np.ndarray, float, float]:
+        """Slice of `frame` covering `span_mhz`, kept inside the capture; returns (bins, span, centre)."""
+        full_span_mhz = meta['sample_rate'] / 1e6
+        capture_center = meta['center_freq_hz'] / 1e6
+        span = full_span_mhz if not span_mhz or span_mhz <= 0 else min(float(span_mhz), full_span_mhz)
+        keep = max(2, int(round(len(frame) * span / full_span_mhz)))
+        bin_mhz = full_span_mhz / len(frame)
+        if center_mhz is None:
+            start = (len(frame) - keep) // 2
+        else:
+            first = (center_mhz - capture_center + full_span_mhz / 2) / bin_mhz - keep / 2
+            start = min(max(0, int(round(first))), len(frame) - keep)
+        center = capture_center - full_span_mhz / 2 + (start + keep / 2) * bin_mhz
+        return frame[start:start + keep], keep * bin_mhz, center
+
+    @classmethod
+    def row(
+        cls,
+        frame: np.ndarray,
+        meta: Dict[str, Any],
+        span_mhz: Optional[float],
+        bins: int = TARGET_BINS,
+        center_mhz: Optional[float] = None,
+    ) -> Tuple[np.ndarray, float, float]:
+        """Cropped, max-pooled bins with their span and centre in MHz."""
+        cropped, span, center = cls.crop(frame, meta, span_mhz, center_mhz)
+        return pool_max(cropped, bins), span, center
+
+    def describe(
+        self,
+        seq: int,
+        frame: np.ndarray,
+        meta: Dict[str, Any],
+        span_mhz: Optional[float],
+        bins: int = TARGET_BINS,
+        center_mhz: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        pooled, span, center = self.row(frame, meta, span_mhz, bins, center_mhz)
+        return {
+            'fft': [round(float(value), 1) for value in pooled],
+            'frequency': center,
+            'start_freq': center - span / 2,
+            'end_freq': center + span / 2,
+            'span': span,
+            'bins': len(pooled),
+            'seq': seq,
+            'timestamp': meta['timestamp'],
+            'age_s': round(max(0.0, time.time() - meta['timestamp']), 3),
+            'averaged_samples': meta['samples'],
+        }
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            'running': self._running,
+            'frames': self.frames,
+            'owns_source': self._source is not None,
+            'center_freq_hz': self.center_freq_hz,
+            'fft_size': self.fft_size,
+            'frame_interval_s': self.frame_interval_s,
+            'compute_ms': None if self.compute_ms is None else round(self.compute_ms, 2),
+        }
+
+
+class WaterfallEncoder:
+    """Quantises frames to uint8 rows against a smoothed dB range (same rule the UI used)."""
+
+    def __init__(
+        self,
+        *,
+        span_mhz: Optional[float] = None,
+        bins: int = TARGET_BINS,
+        smoothing: float = 0.1,
+        margin_db: float = 5.0,
+        min_range_db: float = 10.0,
+        min_db: float = -80.0,
+        max_db: float = -30.0,
+    ):
+        self.span_mhz = span_mhz
+        self.bins = int(bins)
+        self.smoothing = min(1.0, max(0.0, float(smoothing)))
+        self.margin_db = float(margin_db)
+        self.min_range_db = float(min_range_db)
+        self.min_db = float(min_db)
+        self.max_db = float(max_db)
+
+    def track(self, row: np.ndarray) -> None:
+        finite = row[np.isfinite(row)]
+        if len(finite) == 0:
+            return
+        target_min = float(finite.min()) - self.margin_db
+        target_max = float(finite.max()) + self.margin_db
+        self.min_db += (target_min - self.min_db) * self.smoothing
+        self.max_db += (target_max - self.max_db) * self.smoothing
+        if self.max_db - self.min_db < self.min_range_db:
+            middle = (self.max_db + self.min_db) / 2
+            self.min_db = middle - self.min_range_db / 2
+            self.max_db = middle + self.min_range_db / 2
+
+    def quantize(self, row: np.ndarray) -> np.ndarray:
+        scale = 255.0 / (self.max_db - self.min_db)
+        levels = np.nan_to_num((row - self.min_db) * scale, nan=0.0)
+        return np.clip(levels, 0, 255).astype(np.uint8)
+
+    def encode(self, seq: int, frame: np.ndarray, meta: Dict[str, Any], center_mhz: Optional[float] = None) -> bytes:
+        row, span, center = SpectrumEngine.row(frame, meta, self.span_mhz, self.bins, center_mhz)
+        self.track(row)
+        header = ROW_HEADER.pack(
+            ROW_MAGIC, seq & 0xFFFFFFFF, len(row), 0,
+            center - span / 2, center + span / 2, self.min_db, self.max_db,
+        )
+        return header + self.quantize(row).tobytes()
+
+
+def decode_rows(data: bytes) -> List[Tuple[Dict[str, Any], np.ndarray]]:
+    """Inverse of WaterfallEncoder.encode for a buffer of whole rows."""
+    rows = []
+    offset = 0
+    while offset + ROW_HEADER.size <= len(data):
+        magic, seq, bins, _, start, end, min_db, max_db = ROW_HEADER.unpack_from(data, offset)
+        if magic != ROW_MAGIC:
+            raise ValueError(f'bad waterfall row at byte {offset}')
+        offset += ROW_HEADER.size
+        levels = np.frombuffer(data, dtype=np.uint8, count=bins, offset=offset)
+        offset += bins
+        rows.append(({'seq': seq, 'start_freq': start, 'end_freq': end, 'min_db': min_db, 'max_db': max_db}, levels))
+    return rows
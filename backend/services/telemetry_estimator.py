@@ -0,0 +1,162 @@
+"""
+Pi-Car - Estimador alfa-beta para RPM e velocidades.
+
+Suaviza RPM, velocidade OBD e velocidade GPS com um filtro alfa-beta
+(posicao + taxa) por canal e publica valor, taxa de variacao e o instante da
+ultima medida. O frontend extrapola `value + rate * dt` a cada quadro
+(30-60 fps) sem polling extra; quando a ultima medida fica velha demais o
+canal e marcado `stale` e a extrapolacao deve parar.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import config
+
+STALE_AFTER_S = getattr(config, 'OBD_ESTIMATE_STALE_S', 1.5)
+MAX_EXTRAPOLATION_S = 0.5  # Clients should not project further than this past the last sample
+RESET_GAP_S = 3.0          # After a gap this long the filter restarts from the raw value
+
+# alpha, beta, max |rate| per second, floor
+CHANNELS: Dict[str, Dict[str, float]] = {
+    'rpm': {'alpha': 0.6, 'beta': 0.2, 'max_rate': 6000.0, 'floor': 0.0},
+    'speed_kmh': {'alpha': 0.5, 'beta': 0.1, 'max_rate': 40.0, 'floor': 0.0},
+    'gps_speed_kmh': {'alpha': 0.4, 'beta': 0.05, 'max_rate': 40.0, 'floor': 0.0},
+}
+
+
+class AlphaBetaFilter:
+    """Constant-rate alpha-beta tracker over irregularly spaced samples."""
+
+    def __init__(self, alpha: float, beta: float, max_rate: float, floor: Optional[float] = None):
+        self.alpha = alpha
+        self.beta = beta
+        self.max_rate = max_rate
+        self.floor = floor
+        self.value: Optional[float] = None
+        self.rate = 0.0
+        self.t: Optional[float] = None
+        self.raw: Optional[float] = None
+
+    def reset(self) -> None:
+        self.value = None
+        self.rate = 0.0
+        self.t = None
+        self.raw = None
+
+    def update(self, measurement: float, t: float) -> None:
+        self.raw = measurement
+        if self.value is None or self.t is None or t - self.t > RESET_GAP_S:
+            self.value, self.rate, self.t = measurement, 0.0, t
+            return
+        dt = t - self.t
+        if dt <= 0:
+            return
+        predicted = self.value + self.rate * dt
+        residual = measurement - predicted
+        self.value = predicted + self.alpha * residual
+        self.rate = max(-self.max_rate, min(self.max_rate, self.rate + self.beta * residual / dt))
+        if self.floor is not None and self.value <= self.floor:
+            self.value = self.floor
+            self.rate = max(0.0, self.rate)
+        self.t = t
+
+    def predict(self, t: float) -> Optional[float]:
+        if self.value is None or self.t is None:
+            return None
+        projected = self.value + self.rate * min(MAX_EXTRAPOLATION_S, max(0.0, t - self.t))
+        return projected if self.floor is None else max(self.floor, projected)
+
+
+class TelemetryEstimator:
+    """One alpha-beta filter per channel, fed from OBD samples and GPS fixes."""
+
+    def __init__(self, stale_after_s: float = STALE_AFTER_S):
+        self.stale_after_s = float(stale_after_s)
+        self._lock = threading.Lock()
+        self._filters = {name: AlphaBetaFilter(**params) for name, params in CHANNELS.items()}
+        self._last_sample_time: Optional[str] = None
+        self._source_stale = False
+        self._attached = False
+
+    def attach(self, obd_service: Any) -> None:
+        """Take every OBD sample at full poll rate instead of polling the shared dict."""
+        obd_service.add_sample_listener(self.on_obd_sample)
+        self._attached = True
+
+    def update(self, channel: str, value: Any, t: Optional[float] = None) -> None:
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return
+        with self._lock:
+            self._filters[channel].update(float(value), time.time() if t is None else t)
+
+    def on_obd_sample(self, sample: Dict[str, Any]) -> None:
+        """OBDService sample listener (runs on the monitor thread)."""
+        with self._lock:
+            if sample.get('sample_time') == self._last_sample_time:
+                return
+            self._last_sample_time = sample.get('sample_time')
+            self._source_stale = float(sample.get('dynamic_stale_age_s') or 0.0) > self.stale_after_s
+        direct = sample.get('direct') or {}
+        t = sample.get('t')
+        self.update('rpm', direct.get('rpm'), t)
+        self.update('speed_kmh', direct.get('speed_kmh'), t)
+
+    def ingest_snapshot(self, obd_snapshot: Dict[str, Any], gps_snapshot: Optional[Dict[str, Any]] = None) -> None:
+        """Feed from the shared dicts when no listener is attached (test mode, replay).
+
+        Deduplicated by `metadata.sample_time`, so calling it on every request is cheap.
+        """
+        if self._attached or not obd_snapshot.get('connected'):
+            return
+        metadata = obd_snapshot.get('metadata') or {}
+        sample_time = metadata.get('sample_time')
+        if not sample_time or sample_time == self._last_sample_time:
+            return
+        now = time.time()
+        self.on_obd_sample({
+            't': now,
+            'sample_time': sample_time,
+            'dynamic_stale_age_s': metadata.get('dynamic_stale_age_s'),
+            'direct': obd_snapshot.get('direct') or {},
+        })
+        if gps_snapshot and gps_snapshot.get('connected'):
+            self.update('gps_speed_kmh', gps_snapshot.get('speed'), now)
+
+    def snapshot(self, now: Optional[float] = None) -> Dict[str, Any]:
+        now = time.time() if now is None else now
+        channels: Dict[str, Any] = {}
+        with self._lock:
+            for name, tracker in self._filters.items():
+                if tracker.value is None or tracker.t is None:
+                    channels[name] = {'value': None, 'rate': None, 't': None, 'age_s': None, 'raw': None, 'stale': True}
+                    continue
+                age_s = max(0.0, now - tracker.t)
+                stale = age_s > self.stale_after_s or (name != 'gps_speed_kmh' and self._source_stale)
+                channels[name] = {
+                    'value': round(tracker.value, 2),
+                    'rate': 0.0 if stale else round(tracker.rate, 3),
+                    't': round(tracker.t, 3),
+                    'age_s': round(age_s, 3),
+                    'raw': tracker.raw,
+                    'stale': stale,
+                }
+        return {
+            'server_time': round(now, 3),
+            'max_extrapolation_s': MAX_EXTRAPOLATION_S,
+            'stale_after_s': self.stale_after_s,
+            'channels': channels,
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            for tracker in self._filters.values():
+                tracker.reset()
+            self._last_sample_time = None
+            self._source_stale = False
+
+
+telemetry_estimator = TelemetryEstimator()
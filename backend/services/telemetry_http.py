@@ -0,0 +1,333 @@
+"""
+Pi-Car - Transporte HTTP retomavel para os logs OBD.
+
+Alternativa ao rsync/ssh: cada arquivo e enviado em blocos de tamanho fixo
+com SHA-256 por bloco, sobre uma unica conexao keep-alive. O receptor
+guarda o offset confirmado, entao um upload interrompido continua do ultimo
+bloco aceito. `TelemetryReceiver` e o receptor minimo usado em testes,
+benchmarks locais e no servidor de destino.
+
+Protocolo:
+  HEAD /<chave>            -> 200, `Upload-Offset: <bytes confirmados>`
+  HEAD /<chave>?verify=1   -> idem + `X-Content-SHA256` do arquivo remoto
+  PUT  /<chave>?offset=N   -> corpo = bloco, `X-Chunk-SHA256`; 204 + novo offset
+                              409 + offset atual se N nao bate com o remoto
+"""
+
+from __future__ import annotations
+
+import hashlib
+import http.client
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path, PurePosixPath
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+DEFAULT_CHUNK_BYTES = 256 * 1024
+MAX_CHUNK_BYTES = 16 * 1024 * 1024
+OFFSET_HEADER = 'Upload-Offset'
+CHUNK_SHA_HEADER = 'X-Chunk-SHA256'
+CONTENT_SHA_HEADER = 'X-Content-SHA256'
+RESET_HEADER = 'X-Upload-Reset'
+
+
+class UploadError(RuntimeError):
+    """Raised when the receiver rejects an upload or the link drops."""
+
+
+def _sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open('rb') as handle:
+        while True:
+            chunk = handle.read(1024 * 1024)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ChunkedUploadClient:
+    """Upload files in checksummed chunks over one keep-alive HTTP connection."""
+
+    def __init__(
+        self,
+        base_url: str,
+        *,
+        chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+        token: Optional[str] = None,
+        timeout: float = 30.0,
+    ):
+        parts = urlsplit(base_url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise ValueError(f'Unsupported telemetry upload URL: {base_url}')
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.base_path = parts.path.rstrip('/')
+        self.chunk_bytes = max(1024, min(int(chunk_bytes), MAX_CHUNK_BYTES))
+        self.token = token or None
+        self.timeout = timeout
+        self.requests = 0
+        self._connection: Optional[http.client.HTTPConnection] = None
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def _connect(self) -> http.client.HTTPConnection:
+        if self._connection is None:
+            factory = http.client.HTTPSConnection if self.scheme == 'https' else http.client.HTTPConnection
+            self._connection = factory(self.host, self.port, timeout=self.timeout)
+        return self._connection
+
+    def _request(
+        self,
+        method: str,
+        key: str,
+        *,
+        query: str = '',
+        body: bytes | None = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Tuple[int, Dict[str, str]]:
+        path = f'{self.base_path}/{quote(key)}' + (f'?{query}' if query else '')
+        request_headers = dict(headers or {})
+        if self.token:
+            request_headers['Authorization'] = f'Bearer {self.token}'
+        if body is not None:
+            request_headers['Content-Length'] = str(len(body))
+
+        # A keep-alive connection may have been closed by the server while
+        # idle; retry once on a fresh connection before giving up.
+        for attempt in range(2):
+            connection = self._connect()
+            try:
+                connection.request(method, path, body=body, headers=request_headers)
+                response = connection.getresponse()
+                response.read()
+            except (OSError, http.client.HTTPException) as exc:
+                self.close()
+                if attempt:
+                    raise UploadError(f'{method} {key} failed: {exc}') from exc
+                continue
+            self.requests += 1
+            if response.will_close:
+                self.close()
+            return response.status, {name.lower(): value for name, value in response.getheaders()}
+        raise UploadError(f'{method} {key} failed')
+
+    def remote_offset(self, key: str) -> int:
+        status, headers = self._request('HEAD', key)
+        if status == 401:
+            raise UploadError('Telemetry receiver rejected the upload token.')
+        if status != 200:
+            raise UploadError(f'HEAD {key} returned HTTP {status}')
+        return int(headers.get(OFFSET_HEADER.lower(), 0))
+
+    def remote_sha256(self, key: str) -> Optional[str]:
+        status, headers = self._request('HEAD', key, query='verify=1')
+        if status != 200:
+            raise UploadError(f'HEAD {key} returned HTTP {status}')
+        return headers.get(CONTENT_SHA_HEADER.lower())
+
+    def upload(
+        self,
+        path: Path,
+        key: str,
+        *,
+        size: int,
+        reset: bool = False,
+        sha256: Optional[str] = None,
+    ) -> int:
+        """Send `path[:size]` to `key`, resuming at the receiver's offset.
+
+        Returns the number of payload bytes sent. When `sha256` is given the
+        remote file is verified afterwards and resent in full on mismatch.
+        """
+        sent = self._send_from_remote_offset(path, key, size=size, reset=reset)
+        if sha256 is not None and self.remote_sha256(key) != sha256:
+            sent += self._send_from_remote_offset(path, key, size=size, reset=True)
+            if self.remote_sha256(key) != sha256:
+                raise UploadError(f'Remote copy of {key} does not match the local file.')
+        return sent
+
+    def _send_from_remote_offset(self, path: Path, key: str, *, size: int, reset: bool) -> int:
+        offset = 0 if reset else self.remote_offset(key)
+        if offset > size:
+            offset, reset = 0, True
+
+        sent = 0
+        conflicts = 0
+        with Path(path).open('rb') as handle:
+            while offset < size or reset:
+                handle.seek(offset)
+                chunk = handle.read(min(self.chunk_bytes, size - offset))
+                if len(chunk) != min(self.chunk_bytes, size - offset):
+                    raise UploadError(f'{path} shrank while uploading.')
+                headers = {CHUNK_SHA_HEADER: hashlib.sha256(chunk).hexdigest()}
+                if reset:
+                    headers[RESET_HEADER] = '1'
+                status, response_headers = self._request(
+                    'PUT', key, query=f'offset={offset}', body=chunk, headers=headers,
+                )
+                remote = int(response_headers.get(OFFSET_HEADER.lower(), -1))
+                if status == 204:
+                    sent += len(chunk)
+                    offset = remote if remote >= 0 else offset + len(chunk)
+                    reset = False
+                    continue
+                if status == 409 and 0 <= remote <= size and conflicts < 3:
+                    # Another attempt already stored part of this file.
+                    conflicts += 1
+                    offset = remote
+                    continue
+                if status == 401:
+                    raise UploadError('Telemetry receiver rejected the upload token.')
+                raise UploadError(f'PUT {key} at offset {offset} returned HTTP {status}')
+        return sent
+
+
+class _ReceiverHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server: 'TelemetryReceiver'
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _target(self) -> Tuple[Optional[Path], Dict[str, list]]:
+        parts = urlsplit(self.path)
+        # Keys arrive quoted by the client; decode before the traversal check.
+        relative = PurePosixPath(unquote(parts.path).lstrip('/'))
+        if not relative.parts or relative.is_absolute() or any(part in ('', '.', '..') for part in relative.parts):
+            return None, {}
+        return self.server.root.joinpath(*relative.parts), parse_qs(parts.query)
+
+    def _authorized(self) -> bool:
+        if not self.server.token:
+            return True
+        return self.headers.get('Authorization') == f'Bearer {self.server.token}'
+
+    def _reply(self, status: int, offset: Optional[int] = None, extra: Optional[Dict[str, str]] = None) -> None:
+        self.send_response(status)
+        if offset is not None:
+            self.send_header(OFFSET_HEADER, str(offset))
+        for name, value in (extra or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_HEAD(self) -> None:
+        target, query = self._target()
+        if not self._authorized():
+            self._reply(401)
+            return
+        if target is None:
+            self._reply(400)
+            return
+        if target.is_dir():
+            self._reply(404)
+            return
+        with self.server.lock_for(target):
+            offset = target.stat().st_size if target.exists() else 0
+            extra = {}
+            if query.get('verify') and target.exists():
+                extra[CONTENT_SHA_HEADER] = _sha256_file(target)
+        self._reply(200, offset, extra)
+
+    def do_PUT(self) -> None:
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_CHUNK_BYTES:
+            self.close_connection = True
+            self._reply(413)
+            return
+        body = self.rfile.read(length)
+        target, query = self._target()
+        if not self._authorized():
+            self._reply(401)
+            return
+        try:
+            offset = int(query.get('offset', [''])[0])
+        except ValueError:
+            offset = -1
+        if target is None or offset < 0:
+            self._reply(400)
+            return
+        if hashlib.sha256(body).hexdigest() != self.headers.get(CHUNK_SHA_HEADER):
+            self._reply(400)
+            return
+        if target.is_dir():
+            self._reply(404)
+            return
+
+        with self.server.lock_for(target):
+            target.parent.mkdir(parents=True, exist_ok=True)
+            if self.headers.get(RESET_HEADER) == '1' and offset == 0:
+                target.write_bytes(b'')
+            current = target.stat().st_size if target.exists() else 0
+            if offset != current:
+                self._reply(409, current)
+                return
+            with target.open('ab') as handle:
+                handle.write(body)
+                handle.flush()
+                os.fsync(handle.fileno())
+            current += len(body)
+        self._reply(204, current)
+
+
+class TelemetryReceiver(ThreadingHTTPServer):
+    """Minimal receiver for the chunked upload protocol."""
+
+    daemon_threads = True
+
+    def __init__(self, root: Path, address: Tuple[str, int] = ('127.0.0.1', 0), *, token: Optional[str] = None, verbose: bool = False):
+        self.root = Path(root)
+        self.token = token or None
+        self.verbose = verbose
+        self._locks: Dict[Path, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        super().__init__(address, _ReceiverHandler)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def lock_for(self, path: Path) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(path, threading.Lock())
+
+    def start_background(self) -> threading.Thread:
+        thread = threading.Thread(target=self.serve_forever, daemon=True, name='telemetry-receiver')
+        thread.start()
+        return thread
+
+
+def benchmark_upload(
+    path: Path,
+    base_url: str,
+    *,
+    key: str = 'benchmark.bin',
+    chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+    token: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Upload one file from scratch and report throughput."""
+    client = ChunkedUploadClient(base_url, chunk_bytes=chunk_bytes, token=token)
+    size = Path(path).stat().st_size
+    started = time.perf_counter()
+    try:
+        sent = client.upload(path, key, size=size, reset=True)
+    finally:
+        client.close()
+    seconds = time.perf_counter() - started
+    return {
+        'chunk_bytes': client.chunk_bytes,
+        'bytes': sent,
+        'seconds': seconds,
+        'requests': client.requests,
+        'mb_per_s': (sent / 1024 ** 2) / seconds if seconds > 0 else None,
+    }
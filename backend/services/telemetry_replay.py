@@ -0,0 +1,259 @@
+"""
+Pi-Car - Reproducao de sessoes OBD gravadas (modo teste).
+
+Le uma sessao `session-*.jsonl` do logger e publica cada registro em
+`obd_data`/`gps_data` respeitando os intervalos gravados (tempo real ou N
+vezes mais rapido), com pausa, seek e loop. Um indice de offsets em bytes e
+montado na abertura, entao o seek nao precisa reler o arquivo inteiro e so o
+registro atual fica em memoria.
+"""
+
+from __future__ import annotations
+
+import bisect
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from backend.services.obd_log_retention import record_timestamp
+from backend.services.obd_service import PID_INFO
+
+logger = logging.getLogger(__name__)
+
+MAX_GAP_S = 5.0  # Longer recorded gaps (pauses, session joins) are replayed as this
+MIN_SPEED = 0.1
+MAX_SPEED = 1000.0
+
+
+def build_index(path: Path) -> tuple[List[int], List[float]]:
+    """Byte offset and recorded timestamp of every complete, timestamped line."""
+    offsets: List[int] = []
+    times: List[float] = []
+    with Path(path).open('rb') as handle:
+        position = 0
+        for raw_line in handle:
+            start = position
+            position += len(raw_line)
+            if not raw_line.endswith(b'\n'):
+                break
+            try:
+                record = json.loads(raw_line)
+            except ValueError:
+                continue
+            stamp = record_timestamp(record) if isinstance(record, dict) else None
+            if stamp is None or (times and stamp < times[-1]):
+                continue
+            offsets.append(start)
+            times.append(stamp)
+    return offsets, times
+
+
+class TelemetryReplay:
+    """Streams a recorded OBD session into the shared telemetry dicts."""
+
+    def __init__(
+        self,
+        path: Path,
+        obd_data: Dict[str, Any],
+        gps_data: Dict[str, Any],
+        *,
+        speed: float = 1.0,
+        loop: bool = False,
+    ):
+        self.path = Path(path)
+        self.obd_data = obd_data
+        self.gps_data = gps_data
+        self.loop = bool(loop)
+        self._offsets, self._times = build_index(self.path)
+        if not self._offsets:
+            raise ValueError(f'No replayable records in {self.path}')
+        self._speed = self._clamp_speed(speed)
+        self._cond = threading.Condition()
+        self._index = 0
+        self._paused = False
+        self._running = False
+        self._finished = False
+        self._loops = 0
+        self._records_published = 0
+        self._anchor_wall = 0.0
+        self._anchor_index = 0
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _clamp_speed(speed: float) -> float:
+        return min(MAX_SPEED, max(MIN_SPEED, float(speed)))
+
+    @property
+    def duration_s(self) -> float:
+        return self._times[-1] - self._times[0]
+
+    def start(self) -> None:
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+            self._rebase_locked()
+        self._thread = threading.Thread(target=self._run, daemon=True, name='telemetry-replay')
+        self._thread.start()
+        logger.info('Replaying %s (%d records, %.0fs at %.1fx)', self.path, len(self._offsets), self.duration_s, self._speed)
+
+    def stop(self) -> None:
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+
+    def pause(self) -> Dict[str, Any]:
+        with self._cond:
+            self._paused = True
+            self._cond.notify_all()
+        return self.get_status()
+
+    def resume(self) -> Dict[str, Any]:
+        with self._cond:
+            if self._finished:
+                self._index = 0
+                self._finished = False
+            self._paused = False
+            self._rebase_locked()
+            self._cond.notify_all()
+        return self.get_status()
+
+    def seek(self, position_s: float) -> Dict[str, Any]:
+        """Jump to `position_s` seconds from the start of the recording."""
+        target = self._times[0] + max(0.0, float(position_s))
+        with self._cond:
+            self._index = min(bisect.bisect_left(self._times, target), len(self._times) - 1)
+            self._finished = False
+            self._rebase_locked()
+            self._cond.notify_all()
+        return self.get_status()
+
+    def set_speed(self, speed: float) -> Dict[str, Any]:
+        with self._cond:
+            self._speed = self._clamp_speed(speed)
+            self._rebase_locked()
+            self._cond.notify_all()
+        return self.get_status()
+
+    def get_status(self) -> Dict[str, Any]:
+        with self._cond:
+            index = min(self._index, len(self._times) - 1)
+            return {
+                'source': str(self.path),
+                'records': len(self._offsets),
+                'index': index,
+                'position_s': round(self._times[index] - self._times[0], 3),
+                'duration_s': round(self.duration_s, 3),
+                'speed': self._speed,
+                'loop': self.loop,
+                'loops': self._loops,
+                'paused': self._paused,
+                'running': self._running,
+                'finished': self._finished,
+                'records_published': self._records_published,
+            }
+
+    def _rebase_locked(self) -> None:
+        # Next record is due now; later ones follow at recorded spacing / speed.
+        self._anchor_wall = time.monotonic()
+        self._anchor_index = min(self._index, len(self._times) - 1)
+
+    def _due_at_locked(self, index: int) -> float:
+        # Clamp long gaps individually so a parked car does not stall playback.
+        recorded = 0.0
+        for position in range(self._anchor_index + 1, index + 1):
+            recorded += min(MAX_GAP_S, self._times[position] - self._times[position - 1])
+        return self._anchor_wall + recorded / self._speed
+
+    def _run(self) -> None:
+        with self.path.open('rb') as handle:
+            while True:
+                with self._cond:
+                    while self._running and (self._paused or self._finished):
+                        self._cond.wait()
+                    if not self._running:
+                        return
+                    index = self._index
+                    wait_s = self._due_at_locked(index) - time.monotonic()
+                    if wait_s > 0:
+                        self._cond.wait(timeout=wait_s)
+                        continue  # re-check: a seek, pause or speed change may have happened
+                    handle.seek(self._offsets[index])
+                    raw_line = handle.readline()
+                    self._advance_locked()
+                try:
+                    record = json.loads(raw_line)
+                except ValueError:
+                    continue
+                self.apply_record(record, index)
+
+    def _advance_locked(self) -> None:
+        self._index += 1
+        self._records_published += 1
+        if self._index < len(self._offsets):
+            # Keep the anchor close so _due_at_locked stays O(1) per record.
+            self._anchor_wall = self._due_at_locked(self._index - 1)
+            self._anchor_index = self._index - 1
+            return
+        if self.loop:
+            self._loops += 1
+            self._index = 0
+            self._rebase_locked()
+        else:
+            self._index = len(self._offsets) - 1
+            self._finished = True
+
+    def apply_record(self, record: Dict[str, Any], index: int) -> None:
+        """Publish one logged record the way OBDService/GPSService would."""
+        sample_time = datetime.now(timezone.utc).isoformat()
+        metadata = dict(record.get('metadata') or {})
+        metadata.update({
+            'vehicle': record.get('vehicle'),
+            'vin': record.get('vin'),
+            'sample_time': sample_time,
+            'last_dynamic_sample_time': sample_time,
+            'replay': {
+                'source': self.path.name,
+                'index': index,
+                'recorded_sample_time': (record.get('metadata') or {}).get('sample_time'),
+            },
+        })
+        previous_metrics = self.obd_data.get('metrics') or {}
+        metrics = {}
+        for key, value in (record.get('metrics') or {}).items():
+            info = previous_metrics.get(key) or PID_INFO.get(key) or {'label': key, 'unit': ''}
+            metrics[key] = {'value': value, 'label': info.get('label', key), 'unit': info.get('unit', '')}
+
+        connection = dict(self.obd_data.get('connection') or {})
+        connection.update({key: value for key, value in (record.get('connection') or {}).items() if value is not None})
+        connection['connected'] = True
+
+        self.obd_data['connected'] = True
+        self.obd_data['error'] = None
+        self.obd_data['supported_commands'] = list(record.get('supported_commands') or [])
+        self.obd_data['connection'] = connection
+        self.obd_data['metadata'] = {**(self.obd_data.get('metadata') or {}), **metadata}
+        self.obd_data['direct'] = {**(self.obd_data.get('direct') or {}), **(record.get('direct') or {})}
+        self.obd_data['inferred'] = {**(self.obd_data.get('inferred') or {}), **(record.get('inferred') or {})}
+        self.obd_data['metrics'] = metrics
+        gps = record.get('gps')
+        if isinstance(gps, dict):
+            self.gps_data.update(gps)
+
+
+_replay_instance: Optional[TelemetryReplay] = None
+
+
+def get_telemetry_replay() -> Optional[TelemetryReplay]:
+    return _replay_instance
+
+
+def set_telemetry_replay(replay: Optional[TelemetryReplay]) -> None:
+    global _replay_instance
+    _replay_instance = replay
@@ -0,0 +1,166 @@
+"""
+Pi-Car - Diario persistente dos acumuladores de viagem.
+
+Guarda `trip_consumed_l`, `trip_distance_km` e a ultima marcha confirmada em
+registros binarios de tamanho fixo (40 bytes, com CRC32) anexados a um
+arquivo. Na abertura vale o ultimo registro integro; uma cauda cortada por
+queda de energia e descartada. Depois de `compact_after` registros o arquivo
+e reescrito (tmp + fsync + rename) so com o estado atual.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'TJ'
+VERSION = 1
+# magic, version, gear_state code, seq, wall time, consumed L, distance km, gear (-1 = none), pad
+_BODY = struct.Struct('<2sBBIdddb3x')
+_CRC = struct.Struct('<I')
+RECORD_SIZE = _BODY.size + _CRC.size
+
+GEAR_STATES = ('UNKNOWN', 'IN_GEAR', 'DISENGAGED', 'STOPPED', 'OFF')
+
+
+def encode_record(seq: int, state: Dict[str, Any]) -> bytes:
+    gear = state.get('gear')
+    gear_state = state.get('gear_state') or 'UNKNOWN'
+    body = _BODY.pack(
+        MAGIC,
+        VERSION,
+        GEAR_STATES.index(gear_state) if gear_state in GEAR_STATES else 0,
+        seq & 0xFFFFFFFF,
+        float(state.get('saved_at') or time.time()),
+        float(state.get('trip_consumed_l') or 0.0),
+        float(state.get('trip_distance_km') or 0.0),
+        -1 if gear is None else int(gear),
+    )
+    return body + _CRC.pack(zlib.crc32(body))
+
+
+def decode_record(raw: bytes) -> Optional[Dict[str, Any]]:
+    if len(raw) != RECORD_SIZE:
+        return None
+    body, (crc,) = raw[:_BODY.size], _CRC.unpack(raw[_BODY.size:])
+    if zlib.crc32(body) != crc:
+        return None
+    magic, version, state_code, seq, saved_at, consumed, distance, gear = _BODY.unpack(body)
+    if magic != MAGIC or version != VERSION:
+        return None
+    return {
+        'seq': seq,
+        'saved_at': saved_at,
+        'trip_consumed_l': consumed,
+        'trip_distance_km': distance,
+        'gear': None if gear < 0 else gear,
+        'gear_state': GEAR_STATES[state_code] if state_code < len(GEAR_STATES) else 'UNKNOWN',
+    }
+
+
+class TripJournal:
+    """Append-only checkpoint file for the OBD trip accumulators."""
+
+    def __init__(self, path: Path, *, interval_s: float = 15.0, compact_after: int = 256):
+        self.path = Path(path)
+        self.interval_s = float(interval_s)
+        self.compact_after = max(2, int(compact_after))
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._records = 0
+        self._last_saved_at: Optional[float] = None
+        self._last_saved: Optional[tuple] = None
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """Return the newest intact checkpoint, truncating any torn or corrupt tail."""
+        with self._lock:
+            try:
+                data = self.path.read_bytes()
+            except FileNotFoundError:
+                return None
+            except OSError as exc:
+                logger.warning(f"Trip journal unreadable ({self.path}): {exc}")
+                return None
+
+            latest = None
+            valid_bytes = 0
+            for start in range(0, len(data) - RECORD_SIZE + 1, RECORD_SIZE):
+                record = decode_record(data[start:start + RECORD_SIZE])
+                if record is None:
+                    break
+                latest = record
+                valid_bytes = start + RECORD_SIZE
+            if valid_bytes < len(data):
+                logger.warning(f"Trip journal: dropping {len(data) - valid_bytes} bytes of torn/corrupt tail")
+                with self.path.open('r+b') as handle:
+                    handle.truncate(valid_bytes)
+            self._records = valid_bytes // RECORD_SIZE
+            if latest is not None:
+                self._seq = latest['seq']
+                self._last_saved = self._key(latest)
+            return latest
+
+    @staticmethod
+    def _key(state: Dict[str, Any]) -> tuple:
+        return (
+            round(float(state.get('trip_consumed_l') or 0.0), 4),
+            round(float(state.get('trip_distance_km') or 0.0), 3),
+            state.get('gear'),
+            state.get('gear_state'),
+        )
+
+    def checkpoint(self, state: Dict[str, Any], *, force: bool = False, now: Optional[float] = None) -> bool:
+        """Append `state` if the interval elapsed (or `force`) and it changed."""
+        now = time.monotonic() if now is None else now
+        key = self._key(state)
+        with self._lock:
+            if not force:
+                if self._last_saved_at is not None and now - self._last_saved_at < self.interval_s:
+                    return False
+            if key == self._last_saved:
+                return False
+            self._seq += 1
+            record = encode_record(self._seq, {**state, 'saved_at': time.time()})
+            try:
+                if self._records + 1 > self.compact_after:
+                    self._rewrite_locked(record)
+                else:
+                    self._append_locked(record)
+            except OSError as exc:
+                logger.warning(f"Trip journal write failed ({self.path}): {exc}")
+                return False
+            self._last_saved_at = now
+            self._last_saved = key
+            return True
+
+    def _append_locked(self, record: bytes) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open('ab') as handle:
+            handle.write(record)
+            handle.flush()
+            os.fsync(handle.fileno())
+        self._records += 1
+
+    def _rewrite_locked(self, record: bytes) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with tmp_path.open('wb') as handle:
+            handle.write(record)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp_path, self.path)
+        self._records = 1
+
+    def size_bytes(self) -> int:
+        try:
+            return self.path.stat().st_size
+        except OSError:
+            return 0
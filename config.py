@@ -32,10 +32,25 @@ OBD_BAUDRATE = 38400
 OBD_POLL_INTERVAL = 0.25
 OBD_SECONDARY_POLL_INTERVAL = 0.5
 OBD_STALE_TIMEOUT = 6.0
+OBD_RECONNECT_INITIAL_DELAY_S = 0.25         # Backoff after an ELM/protocol error, doubled per failure...
+OBD_RECONNECT_MAX_DELAY_S = 5.0              # ...up to this cap; hot-plug events retry at once
+OBD_ESTIMATE_STALE_S = 1.5                   # Gauges stop extrapolating rpm/speed after this
+# Alert rules (backend/services/alert_rules.py). None = built-in coolant/battery
+# rules. Types: threshold, duration (for_s), rate (per second, window_s), mean (window_s).
+# Example: {'id': 'coolant_rising', 'type': 'rate', 'metric': 'coolant_temp_c',
+#           'op': '>', 'value': 0.5, 'window_s': 20, 'level': 'warn', 'message': 'Temperatura subindo rapido'}
+OBD_ALERT_RULES = None
+OBD_TRIM_MONITOR_ENABLED = True             # Per-VIN fuel trim / O2 baselines and drift warnings
+OBD_TRIM_BASELINE_DIRECTORY = str(Path.home() / '.pi-car' / 'obd_baselines')
+OBD_CAPTURE_ENABLED = False                  # Record raw ELM327 traffic (scripts/replay_elm_capture.py)
+OBD_CAPTURE_DIRECTORY = 'telemetry/elm_capture'
+OBD_CAPTURE_MAX_BYTES = 50 * 1024 ** 2
 OBD_VEHICLE_NAME = 'Citroen C3 Picasso 2013 1.5 Flex'
 OBD_ENGINE_DISPLACEMENT_L = 1.449
 OBD_VOLUMETRIC_EFFICIENCY = 0.78
 OBD_DEFAULT_FUEL = 'gasoline_e27'
+OBD_TRIP_JOURNAL_PATH = str(Path.home() / '.pi-car' / 'obd_trip.journal')  # '' disables
+OBD_TRIP_JOURNAL_INTERVAL_S = 15.0           # Trip/gear checkpoint period while driving
 OBD_LOG_ENABLED = True
 OBD_LOG_INTERVAL_SECONDS = 1.0
 OBD_LOG_SYNC_INTERVAL_SECONDS = 900
@@ -44,12 +59,33 @@ OBD_LOG_SSH_KEY = MEDIA_SYNC_SSH_KEY
 OBD_LOG_REMOTE_DIRECTORY = '/repository/Car_datalog/'
 OBD_LOG_LOCAL_DIRECTORY = 'telemetry/obd'
 OBD_LOG_DEVICE_NAME = 'c3-picasso-2013'
+OBD_LOG_MAX_BYTES = 2 * 1024 ** 3            # Disk budget for OBD_LOG_LOCAL_DIRECTORY
+OBD_LOG_DOWNSAMPLE_AFTER_DAYS = 14           # Raw sessions older than this keep one record per interval
+OBD_LOG_DOWNSAMPLE_INTERVAL_SECONDS = 10.0
+OBD_LOG_RAW_RETENTION_DAYS = 180             # Raw/downsampled data is deleted after this
+OBD_LOG_SUMMARY_RETENTION_DAYS = 1825        # Session summaries outlive raw data
+OBD_LOG_TRANSPORT = 'rsync'                  # 'rsync' (ssh) or 'http' (chunked, resumable)
+OBD_LOG_HTTP_URL = 'http://picasso-repo:8765/obd'
+OBD_LOG_HTTP_CHUNK_BYTES = 256 * 1024
+OBD_LOG_HTTP_TOKEN = ''                      # Optional bearer token expected by the receiver
+OBD_FLIGHT_RECORDER_ENABLED = True
+OBD_FLIGHT_RECORDER_PRE_SECONDS = 30.0       # Full-rate samples kept before a trigger
+OBD_FLIGHT_RECORDER_POST_SECONDS = 30.0
+OBD_FLIGHT_RECORDER_RPM_DIP = 300            # RPM drop between samples at steady speed/throttle
 
 # RTL-SDR (Software Defined Radio)
 RTL_DEVICE_INDEX = 0              # Device index (0 for first RTL-SDR)
 RTL_SAMPLE_RATE = 2400000         # 2.4 MHz sample rate
 RTL_DEFAULT_FREQ = 99500000       # Default frequency: 99.5 MHz FM
 RTL_GAIN = 'auto'                 # 'auto' or gain in dB
+RTL_BACKEND = 'rtl_fm'            # 'rtl_fm' (subprocesses) or 'iq' (pyrtlsdr + numpy, instant retune)
+RTL_RDS_ENABLED = True            # Decode RDS (station name, RadioText, clock) on FM with the iq backend
+RTL_ADSB_GAIN = 49.6              # ADS-B mode (1090 MHz): weak distant squitters want full gain
+RTL_RECORD_DIRECTORY = 'telemetry/iq'  # Raw IQ recordings (sdr_iq.py header + samples)
+RTL_RECORD_FORMAT = 'cu8'         # 'cu8' (2 bytes/sample, dongle-native) or 'cf32' (8 bytes/sample)
+RTL_RECORD_MAX_BYTES = 2 * 1024 ** 3
+RTL_REPLAY_FILE = ''              # Recording in RTL_RECORD_DIRECTORY to run instead of the dongle
+RTL_STATION_CACHE = str(Path.home() / '.pi-car' / 'fm_stations.json')  # FM band scans per GPS cell
 
 # Flask
 FLASK_HOST = '0.0.0.0'
@@ -203,6 +203,12 @@ function maybeAutoSyncMedia(reason = 'browser-online') {
         .catch(err => console.error('Error auto-syncing media:', err));
 }
 
+function formatStorageUsage(used, budget) {
+    const toMB = bytes => `${(bytes / (1024 * 1024)).toFixed(0)} MB`;
+    if (used === null || used === undefined) return budget ? `-- / ${toMB(budget)}` : '--';
+    return budget ? `${toMB(used)} / ${toMB(budget)}` : toMB(used);
+}
+
 function updateOBDLoggerStatus(status) {
     obdLoggerStatus = status;
 
@@ -216,6 +222,7 @@ function updateOBDLoggerStatus(status) {
     const output = document.getElementById('obd-logger-output');
     const toggleButton = document.getElementById('obd-logger-toggle-button');
     const syncButton = document.getElementById('obd-logger-sync-button');
+    const storage = document.getElementById('obd-logger-storage');
     if (!enabled || !state || !session || !file || !localDir || !lastSuccess || !summary || !output || !toggleButton || !syncButton) return;
 
     enabled.textContent = status.enabled ? 'Yes' : 'No';
@@ -231,6 +238,10 @@ function updateOBDLoggerStatus(status) {
     session.textContent = status.current_session_id || 'None';
     file.textContent = status.last_file || '--';
     localDir.textContent = status.local_dir || 'telemetry/obd';
+    if (storage) {
+        storage.textContent = formatStorageUsage(status.storage_used_bytes, status.storage_budget_bytes);
+        storage.title = status.last_retention_summary || '';
+    }
     lastSuccess.textContent = formatSyncDate(status.last_sync_success_at);
     summary.textContent = status.enabled
         ? (status.last_sync_summary || 'No logger information available.')
@@ -1005,8 +1016,12 @@ function updateOBDDisplay(obdData) {
     const alerts = [];
     if (direct.mil_on) alerts.push('Check engine aceso');
     if (metadata.dynamic_stale) alerts.push(`Dados OBD atrasados: ${metadata.dynamic_stale_age_s || '?'}s`);
-    if (inferred.coolant_alert) alerts.push('Temperatura alta');
-    if (inferred.battery_alert) alerts.push('Tensao baixa com motor ligado');
+    if (Array.isArray(inferred.alerts)) {
+        inferred.alerts.forEach(alert => alerts.push(alert.message));
+    } else {
+        if (inferred.coolant_alert) alerts.push('Temperatura alta');
+        if (inferred.battery_alert) alerts.push('Tensao baixa com motor ligado');
+    }
     if ((direct.active_dtcs || []).length > 0) alerts.push(`DTC ativo: ${direct.active_dtcs.join(', ')}`);
     if ((direct.pending_dtcs || []).length > 0) alerts.push(`DTC pendente: ${direct.pending_dtcs.join(', ')}`);
     const alertsElement = document.getElementById('obd-alerts');
@@ -1852,7 +1867,10 @@ function updateRadioDisplay(radioData) {
         document.getElementById('radio-vol').textContent = currentRadioVolume + '%';
 
         // Update signal strength
-        updateSignalStrength(radioData.signal_strength || -100);
+        updateSignalStrength(radioData.signal_strength, radioData.snr);
+        updateAirScanStatus(radioData.scanner);
+        updateRdsInfo(radioData.rds);
+        updateAdsbTraffic(radioData.adsb);
 
         // Update spectrum info
         document.getElementById('spectrum-center').textContent = currentRadioFreq.toFixed(1);
@@ -1864,13 +1882,18 @@ function updateRadioDisplay(radioData) {
 }
 
 // Update signal strength bars
-function updateSignalStrength(dbm) {
+function updateSignalStrength(dbfs, snr) {
     const bars = document.querySelectorAll('.signal-bar');
-    document.getElementById('signal-dbm').textContent = dbm.toFixed(0) + ' dBm';
+    // Only the IQ backend measures the channel; rtl_fm reports nothing
+    const label = document.getElementById('signal-dbm');
+    if (dbfs === null || dbfs === undefined) {
+        label.textContent = '-- dBFS';
+    } else {
+        label.textContent = dbfs.toFixed(0) + ' dBFS' + (snr !== null && snr !== undefined ? ` · ${snr.toFixed(0)} dB SNR` : '');
+    }
 
-    // Map dBm to number of bars (rough approximation)
-    // -100 dBm = 0 bars, -30 dBm = 5 bars
-    const normalized = Math.max(0, Math.min(5, Math.floor((dbm + 100) / 14)));
+    // Bars follow the SNR: 0 dB = 0 bars, 30 dB and up = 5 bars
+    const normalized = snr === null || snr === undefined ? 0 : Math.max(0, Math.min(5, Math.floor(snr / 6)));
 
     bars.forEach((bar, i) => {
         bar.classList.toggle('active', i < normalized);
@@ -1975,6 +1998,132 @@ function radioVolumeDown() {
         .catch(err => console.error('Volume error:', err));
 }
 
+// Aviation scanner: all channels of an airport that fit in one capture
+let airScanIcao = null;
+
+function radioToggleAirScan(icao) {
+    const stopping = airScanIcao === icao;
+    fetch(stopping ? '/api/radio/scanner/stop' : '/api/radio/scanner/start', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ icao })
+    })
+        .then(r => r.json())
+        .then(result => {
+            if (result.error) {
+                setText('air-scan-status', result.error);
+                return;
+            }
+            airScanIcao = stopping ? null : icao;
+            if (!stopping && result.skipped && result.skipped.length) {
+                setText('air-scan-status', `Outside capture: ${result.skipped.map(f => f.toFixed(3)).join(', ')}`);
+            }
+        })
+        .catch(err => console.error('Scanner error:', err));
+}
+
+function updateAirScanStatus(scanner) {
+    airScanIcao = scanner ? scanner.icao : null;
+    document.querySelectorAll('.air-scan-btn').forEach(button => {
+        const active = button.dataset.icao === airScanIcao;
+        button.classList.toggle('active', active);
+        button.textContent = active ? 'Stop scan' : 'Scan all';
+    });
+    if (!scanner || !scanner.channels.length) return;
+    const active = scanner.active;
+    const channels = scanner.channels.map(c => `${c.freq.toFixed(3)}${c.open ? '*' : ''}`).join('  ');
+    setText('air-scan-status', active
+        ? `Listening ${active.freq.toFixed(3)} ${active.label || ''} | ${channels}`
+        : `Monitoring ${channels}`);
+}
+
+// RDS station name, programme type and RadioText (FM, iq backend)
+function updateRdsInfo(rds) {
+    if (!rds || (!rds.ps && !rds.radiotext)) {
+        setText('radio-rds', '');
+        return;
+    }
+    const name = [rds.ps ? rds.ps.trim() : null, rds.pty ? rds.pty_name : null].filter(Boolean).join(' · ');
+    setText('radio-rds', [name, rds.radiotext].filter(Boolean).join(' | '));
+}
+
+// ADS-B traffic (1090 MHz); the tuner goes silent while it runs
+let adsbActive = false;
+
+function radioToggleAdsb() {
+    fetch(adsbActive ? '/api/radio/adsb/stop' : '/api/radio/adsb/start', { method: 'POST' })
+        .then(r => r.json())
+        .then(result => {
+            if (result.error) {
+                setText('adsb-status', result.error);
+                return;
+            }
+            adsbActive = !!result.adsb;
+            if (!adsbActive) updateAdsbTraffic(null);
+        })
+        .catch(err => console.error('ADS-B error:', err));
+}
+
+function updateAdsbTraffic(adsb) {
+    adsbActive = !!(adsb && adsb.running);
+    setText('adsb-toggle-btn', adsbActive ? 'Stop' : 'Start');
+    const list = document.getElementById('adsb-list');
+    if (!list) return;
+    if (!adsb) {
+        setText('adsb-status', '1090 MHz - audio stops while listening');
+        list.innerHTML = '<div class="empty-message">ADS-B mode is off.</div>';
+        return;
+    }
+    setText('adsb-status', adsb.error || `${adsb.aircraft.length} aircraft · ${adsb.messages} messages`);
+    if (!adsb.aircraft.length) {
+        list.innerHTML = '<div class="empty-message">No aircraft yet.</div>';
+        return;
+    }
+    list.innerHTML = adsb.aircraft.map(plane => {
+        const details = [
+            plane.altitude_ft !== null ? `${plane.altitude_ft} ft` : null,
+            plane.ground_speed_kt !== null ? `${plane.ground_speed_kt.toFixed(0)} kt` : null,
+            plane.track_deg !== null ? `${plane.track_deg.toFixed(0)}°` : null,
+            plane.lat !== null ? `${plane.lat.toFixed(3)}, ${plane.lon.toFixed(3)}` : null,
+        ].filter(Boolean).join(' · ');
+        return `
+            <div class="favorite-item">
+                <div class="favorite-info">
+                    <span class="favorite-freq">${escapeHtml(plane.callsign || plane.icao)}</span>
+                    <span class="fav-mode-tag">${escapeHtml(plane.icao)}</span>
+                    <span class="favorite-name">${escapeHtml(details)}</span>
+                </div>
+                <span class="muted">${plane.seen_s.toFixed(0)} s</span>
+            </div>`;
+    }).join('');
+}
+
+// Sweep the FM band and show the stations found for this area
+function radioScanBand(force) {
+    const button = document.getElementById('fm-scan-btn');
+    if (button) {
+        button.disabled = true;
+        button.textContent = 'Scanning...';
+    }
+    fetch('/api/radio/scan', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ force: !!force })
+    })
+        .then(r => r.json())
+        .then(result => {
+            if (result.error) console.error('Scan error:', result.error);
+            loadRadioPresets();
+        })
+        .catch(err => console.error('Scan error:', err))
+        .finally(() => {
+            if (button) {
+                button.disabled = false;
+                button.textContent = 'Scan';
+            }
+        });
+}
+
 // Load presets from server
 function loadRadioPresets() {
     fetch('/api/radio/presets')
@@ -2197,6 +2346,15 @@ let waterfallMaxDb = -30;  // Will be dynamically adjusted based on signal level
 // Waterfall history buffer - stores previous FFT rows for scrolling display
 let waterfallHistory = [];
 
+// Binary row stream (/api/radio/fft/stream): rows are blitted into an
+// offscreen canvas one pixel high each, then scaled onto the visible one
+let waterfallStreamAbort = null;
+let waterfallRowsCanvas = null;
+let waterfallRowsCtx = null;
+let waterfallRowImage = null;
+const WATERFALL_ROW_HEADER_BYTES = 36;  // '<4sIHHddff' in sdr_spectrum.py
+const WATERFALL_PALETTE = buildWaterfallPalette();
+
 // Color map for waterfall (converts dB value to RGB color)
 // Based on typical SDR color schemes: dark blue (weak) -> cyan -> green -> yellow -> red (strong)
 function dbToColor(db) {
@@ -2205,7 +2363,21 @@ function dbToColor(db) {
     const normalized = range > 0 
         ? Math.max(0, Math.min(1, (db - waterfallMinDb) / range))
         : 0.5;
-    
+    const [r, g, b] = waterfallRgb(normalized);
+    return `rgb(${r}, ${g}, ${b})`;
+}
+
+// 256-entry RGBA lookup for uint8 rows from the stream
+function buildWaterfallPalette() {
+    const palette = new Uint8ClampedArray(256 * 4);
+    for (let level = 0; level < 256; level++) {
+        const [r, g, b] = waterfallRgb(level / 255);
+        palette.set([r, g, b, 255], level * 4);
+    }
+    return palette;
+}
+
+function waterfallRgb(normalized) {
     // Color gradient: dark blue -> blue -> cyan -> green -> yellow -> red
     let r, g, b;
     if (normalized < 0.2) {
@@ -2239,8 +2411,8 @@ function dbToColor(db) {
         g = Math.floor(255 * (1 - t));
         b = 0;
     }
-    
-    return `rgb(${r}, ${g}, ${b})`;
+
+    return [r, g, b];
 }
 
 function startSpectrogram() {
@@ -2277,14 +2449,14 @@ function startSpectrogram() {
         clearInterval(spectrogramInterval);
     }
 
-    // Start spectrum mode on server (pauses audio)
+    // Start spectrum mode on server (pauses audio unless the IQ backend shares the capture)
     fetch('/api/radio/spectrum/start', { method: 'POST' })
         .then(r => r.json())
         .then(result => {
             spectrumModeActive = result.spectrum_mode || false;
             updateSpectrumIndicator();
-            // Start fetching FFT data
-            spectrogramInterval = setInterval(updateSpectrogram, SPECTROGRAM_UPDATE_INTERVAL_MS);
+            // Prefer pushed binary rows; poll /api/radio/fft when the stream is unavailable
+            startWaterfallStream();
         })
         .catch(() => {
             // If spectrum mode fails, still start the interval but show waiting message
@@ -2299,6 +2471,7 @@ function stopSpectrogram() {
         clearInterval(spectrogramInterval);
         spectrogramInterval = null;
     }
+    stopWaterfallStream();
 
     // Stop spectrum mode on server (resumes audio)
     if (spectrumModeActive) {
@@ -2369,6 +2542,122 @@ function updateSpectrogram() {
         });
 }
 
+function startWaterfallStream() {
+    stopWaterfallStream();
+    const controller = new AbortController();
+    waterfallStreamAbort = controller;
+    const params = new URLSearchParams({
+        center: currentRadioFreq,
+        span: spectrumSpan,
+        integration: SPECTROGRAM_INTEGRATION_TIME_S,
+        interval: SPECTROGRAM_UPDATE_INTERVAL_MS,
+        smoothing: SPECTROGRAM_DB_SMOOTHING,
+        margin: SPECTROGRAM_DB_MARGIN,
+        min_range: SPECTROGRAM_MIN_RANGE,
+    });
+
+    fetch(`/api/radio/fft/stream?${params}`, { signal: controller.signal })
+        .then(response => {
+            if (!response.ok || !response.body) throw new Error('waterfall stream unavailable');
+            return readWaterfallStream(response.body.getReader(), controller);
+        })
+        .catch(() => {
+            if (controller.signal.aborted || waterfallStreamAbort !== controller) return;
+            waterfallStreamAbort = null;
+            // rtl_power fallback (or a dropped stream): back to polling
+            if (!spectrogramInterval) {
+                spectrogramInterval = setInterval(updateSpectrogram, SPECTROGRAM_UPDATE_INTERVAL_MS);
+            }
+        });
+}
+
+function stopWaterfallStream() {
+    if (waterfallStreamAbort) {
+        const controller = waterfallStreamAbort;
+        waterfallStreamAbort = null;
+        controller.abort();
+    }
+}
+
+function restartWaterfallStream() {
+    if (waterfallStreamAbort) startWaterfallStream();
+}
+
+async function readWaterfallStream(reader, controller) {
+    let pending = new Uint8Array(0);
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) throw new Error('waterfall stream ended');
+        if (waterfallStreamAbort !== controller) return;
+
+        const merged = new Uint8Array(pending.length + value.length);
+        merged.set(pending);
+        merged.set(value, pending.length);
+
+        const view = new DataView(merged.buffer);
+        let offset = 0;
+        while (offset + WATERFALL_ROW_HEADER_BYTES <= merged.length) {
+            const bins = view.getUint16(offset + 8, true);
+            const end = offset + WATERFALL_ROW_HEADER_BYTES + bins;
+            if (end > merged.length) break;
+            blitWaterfallRow(
+                merged.subarray(offset + WATERFALL_ROW_HEADER_BYTES, end),
+                view.getFloat64(offset + 12, true),
+                view.getFloat64(offset + 20, true),
+                view.getFloat32(offset + 28, true),
+                view.getFloat32(offset + 32, true),
+            );
+            offset = end;
+        }
+        pending = merged.slice(offset);
+    }
+}
+
+function blitWaterfallRow(levels, startMhz, endMhz, minDb, maxDb) {
+    const bins = levels.length;
+    const rows = SPECTROGRAM_MAX_ROWS;
+    if (!waterfallRowsCanvas || waterfallRowsCanvas.width !== bins || waterfallRowsCanvas.height !== rows) {
+        waterfallRowsCanvas = document.createElement('canvas');
+        waterfallRowsCanvas.width = bins;
+        waterfallRowsCanvas.height = rows;
+        waterfallRowsCtx = waterfallRowsCanvas.getContext('2d');
+        waterfallRowsCtx.fillStyle = '#0a0a0f';
+        waterfallRowsCtx.fillRect(0, 0, bins, rows);
+        waterfallRowImage = waterfallRowsCtx.createImageData(bins, 1);
+    }
+
+    // Server already quantised against its dB range: one palette lookup per bin
+    const pixels = waterfallRowImage.data;
+    for (let bin = 0; bin < bins; bin++) {
+        const color = levels[bin] * 4;
+        pixels[bin * 4] = WATERFALL_PALETTE[color];
+        pixels[bin * 4 + 1] = WATERFALL_PALETTE[color + 1];
+        pixels[bin * 4 + 2] = WATERFALL_PALETTE[color + 2];
+        pixels[bin * 4 + 3] = 255;
+    }
+    // Scroll up one row, newest at the bottom
+    waterfallRowsCtx.drawImage(waterfallRowsCanvas, 0, -1);
+    waterfallRowsCtx.putImageData(waterfallRowImage, 0, rows - 1);
+
+    waterfallMinDb = minDb;
+    waterfallMaxDb = maxDb;
+    setText('spectrum-start', startMhz.toFixed(1));
+    setText('spectrum-end', endMhz.toFixed(1));
+    setText('spectrum-center', ((startMhz + endMhz) / 2).toFixed(1));
+
+    const indicator = document.getElementById('spectrum-mode-indicator');
+    if (indicator && !indicator.classList.contains('live')) {
+        indicator.textContent = 'LIVE';
+        indicator.classList.add('live');
+    }
+
+    const width = spectrogramCanvas.width;
+    const height = spectrogramCanvas.height;
+    spectrogramCtx.imageSmoothingEnabled = false;
+    spectrogramCtx.drawImage(waterfallRowsCanvas, 0, 0, width, height);
+    drawWaterfallGrid(width, height);
+}
+
 // Update tuner frequency display
 function updateTunerFrequencyDisplay(freq) {
     document.getElementById('radio-freq').textContent = freq.toFixed(1);
@@ -2392,6 +2681,7 @@ function adjustSpectrumFreq(deltaMHz) {
     updateSpectrumFrequencyLabels();
     updateSpectrumFreqDisplay();
     updateTunerFrequencyDisplay(newFreq);
+    restartWaterfallStream();
 }
 
 // Update the large frequency display in spectrum panel
@@ -2412,19 +2702,22 @@ function applySpectrumUpdateInterval() {
         clearInterval(spectrogramInterval);
         spectrogramInterval = setInterval(updateSpectrogram, SPECTROGRAM_UPDATE_INTERVAL_MS);
     }
+    restartWaterfallStream();
 }
 
 // Apply new integration time
 function applySpectrumIntegrationTime() {
     const select = document.getElementById('spectrum-integration-time');
     SPECTROGRAM_INTEGRATION_TIME_S = parseFloat(select.value);
-    // Will be used in next FFT request
+    // Polling sends it with the next FFT request; the stream has to reopen
+    restartWaterfallStream();
 }
 
 // Apply new max rows
 function applySpectrumMaxRows() {
     const select = document.getElementById('spectrum-max-rows');
     SPECTROGRAM_MAX_ROWS = parseInt(select.value);
+    waterfallRowsCanvas = null;
     
     // Trim history if it exceeds new max
     if (waterfallHistory.length > SPECTROGRAM_MAX_ROWS) {
@@ -2436,18 +2729,21 @@ function applySpectrumMaxRows() {
 function applySpectrumDbSmoothing() {
     const select = document.getElementById('spectrum-db-smoothing');
     SPECTROGRAM_DB_SMOOTHING = parseFloat(select.value);
+    restartWaterfallStream();
 }
 
 // Apply new DB margin
 function applySpectrumDbMargin() {
     const select = document.getElementById('spectrum-db-margin');
     SPECTROGRAM_DB_MARGIN = parseFloat(select.value);
+    restartWaterfallStream();
 }
 
 // Apply new MIN range
 function applySpectrumMinRange() {
     const select = document.getElementById('spectrum-min-range');
     SPECTROGRAM_MIN_RANGE = parseFloat(select.value);
+    restartWaterfallStream();
 }
 
 function drawWaterfall(fftData) {
@@ -2510,6 +2806,10 @@ function drawWaterfall(fftData) {
         }
     }
 
+    drawWaterfallGrid(width, height);
+}
+
+function drawWaterfallGrid(width, height) {
     // Draw center frequency marker (thin vertical line)
     spectrogramCtx.strokeStyle = 'rgba(255, 107, 53, 0.5)';
     spectrogramCtx.lineWidth = 1;
@@ -2637,10 +2937,66 @@ function updateOBDData() {
             document.getElementById('ind-obd').classList.toggle('connected', !!obd.connected);
             updateOBDDisplay(obd);
             updateHomeOBD(obd);
+            receiveOBDEstimate(obd);
         })
         .catch(err => console.error('Error updating OBD:', err));
 }
 
+// ============ OBD GAUGE EXTRAPOLATION ============
+// The server publishes alpha-beta smoothed rpm/speed with their rates; between
+// polls the gauges are projected forward every frame instead of stepping.
+let obdEstimate = null;
+let obdEstimateReceivedAt = 0;
+let obdEstimateFrame = null;
+
+function receiveOBDEstimate(obd) {
+    obdEstimate = obd && obd.connected ? obd.estimate || null : null;
+    obdEstimateReceivedAt = performance.now();
+    if (obdEstimate && obdEstimateFrame === null) {
+        obdEstimateFrame = requestAnimationFrame(renderOBDEstimateFrame);
+    }
+}
+
+// The frame loop runs only while some channel is younger than the server's
+// stale_after_s (config.OBD_ESTIMATE_STALE_S); the next fresh poll restarts it.
+function obdEstimateIsFresh() {
+    if (!obdEstimate || !obdEstimate.channels) return false;
+    const elapsed = (performance.now() - obdEstimateReceivedAt) / 1000;
+    return Object.values(obdEstimate.channels).some(
+        c => !c.stale && c.age_s !== null && c.age_s + elapsed <= obdEstimate.stale_after_s
+    );
+}
+
+function projectEstimate(channel) {
+    const c = obdEstimate && obdEstimate.channels ? obdEstimate.channels[channel] : null;
+    if (!c || c.value === null || c.value === undefined) return null;
+    if (c.stale) return c.value;
+    // age_s is measured on the server clock, so client/server skew does not matter.
+    const elapsed = c.age_s + (performance.now() - obdEstimateReceivedAt) / 1000;
+    const dt = Math.min(obdEstimate.max_extrapolation_s || 0.5, Math.max(0, elapsed));
+    return Math.max(0, c.value + c.rate * dt);
+}
+
+function renderOBDEstimateFrame() {
+    obdEstimateFrame = null;
+    if (!obdEstimateIsFresh()) return;
+    const rpm = projectEstimate('rpm');
+    const speed = projectEstimate('speed_kmh');
+    if (speed !== null) {
+        setText('home-obd-speed', formatOBDValue(Math.round(speed)));
+        setText('obd-speed', formatOBDValue(Math.round(speed)));
+        const speedFill = document.getElementById('home-speed-fill');
+        if (speedFill) speedFill.style.width = Math.min(100, speed / 200 * 100) + '%';
+    }
+    if (rpm !== null) {
+        setText('home-rpm', rpm ? Math.round(rpm).toString() : '--');
+        setText('obd-rpm', formatOBDValue(Math.round(rpm)));
+        const rpmFill = document.getElementById('home-rpm-fill');
+        if (rpmFill) rpmFill.style.width = Math.min(100, rpm / 7000 * 100) + '%';
+    }
+    obdEstimateFrame = requestAnimationFrame(renderOBDEstimateFrame);
+}
+
 // Load presets and populate tuner favorite strip on page load
 if (document.getElementById('fm-presets')) {
     loadRadioPresets();
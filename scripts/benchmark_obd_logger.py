@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Benchmark the PiCASSO OBD logger write path.
+
+Stages measured per record:
+- build:      OBDLoggerService._build_record from an OBD snapshot
+- serialize:  compact json.dumps
+- write:      append + durability policy (fsync every record, fsync every
+              N records, flush only)
+- index:      retention ledger + upload manifest bookkeeping
+- formats:    jsonl, jsonl.gz (streamed, levels 1 and 6) and columnar npz
+
+Reports records/s, CPU ms per record and bytes per record.
+
+Examples:
+  python3 scripts/benchmark_obd_logger.py
+  python3 scripts/benchmark_obd_logger.py --records 5000 --batch 20
+  python3 scripts/benchmark_obd_logger.py --input telemetry/obd/2026/05/06/vin/session-2026-05-06T10-00-00Z.jsonl
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import gzip
+import importlib.util
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List
+
+REPO_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_DIR))
+
+
+def _load(name: str, path: Path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    assert spec.loader is not None
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+# These modules have no Pi-only dependencies, so the benchmark also runs on a
+# workstation; only the build stage needs the full service stack.
+estimate = _load("estimate_obd_logger_storage", REPO_DIR / "scripts" / "estimate_obd_logger_storage.py")
+retention = _load("backend.services.obd_log_retention", REPO_DIR / "backend" / "services" / "obd_log_retention.py")
+manifest = _load("backend.services.obd_log_manifest", REPO_DIR / "backend" / "services" / "obd_log_manifest.py")
+
+
+def synthetic_records(count: int) -> List[Dict[str, Any]]:
+    base = estimate.synthetic_record()
+    started = datetime(2026, 5, 1, 10, 0, 0, tzinfo=timezone.utc)
+    rng = random.Random(7)
+    records = []
+    for index in range(count):
+        record = copy.deepcopy(base)
+        stamp = (started + timedelta(seconds=index)).isoformat()
+        record["logged_at"] = stamp
+        record["metadata"]["sample_time"] = stamp
+        record["time_context"]["sample_time"] = stamp
+        record["direct"]["rpm"] = round(rng.uniform(800, 3800), 1)
+        record["direct"]["speed_kmh"] = rng.randint(0, 120)
+        record["inferred"]["trip_distance_km"] = round(index * 0.015, 2)
+        record["inferred"]["trip_consumed_l"] = round(index * 0.0011, 3)
+        record["metrics"]["RPM"] = record["direct"]["rpm"]
+        records.append(record)
+    return records
+
+
+def real_records(paths: Iterable[Path], limit: int) -> List[Dict[str, Any]]:
+    records: List[Dict[str, Any]] = []
+    for path in paths:
+        for record in retention.iter_records(path):
+            records.append(record)
+            if len(records) >= limit:
+                return records
+    return records
+
+
+def snapshot_from_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Rebuild the OBDService snapshot a logged record was made from."""
+    metadata = dict(record.get("metadata") or {})
+    metadata.update({"vehicle": record.get("vehicle"), "vin": record.get("vin")})
+    return {
+        "connected": True,
+        "supported_commands": record.get("supported_commands") or [],
+        "connection": record.get("connection") or {},
+        "metadata": metadata,
+        "direct": record.get("direct") or {},
+        "inferred": record.get("inferred") or {},
+        "metrics": {key: {"value": value} for key, value in (record.get("metrics") or {}).items()},
+    }
+
+
+def measure(name: str, count: int, run: Callable[[], int]) -> Dict[str, Any]:
+    wall_started = time.perf_counter()
+    cpu_started = time.process_time()
+    nbytes = run()
+    wall = time.perf_counter() - wall_started
+    cpu = time.process_time() - cpu_started
+    return {
+        "stage": name,
+        "records_per_s": count / wall if wall > 0 else float("inf"),
+        "cpu_ms_per_record": cpu * 1000 / count if count else 0.0,
+        "wall_ms_per_record": wall * 1000 / count if count else 0.0,
+        "bytes_per_record": nbytes / count if count and nbytes is not None else None,
+    }
+
+
+def bench_build(records: List[Dict[str, Any]]) -> Dict[str, Any] | None:
+    try:
+        from backend.services.network_service import network_service
+        from backend.services.obd_logger_service import OBDLoggerService
+    except ImportError as exc:
+        print(f"  build: skipped ({exc})", file=sys.stderr)
+        return None
+    service = OBDLoggerService()
+    snapshots = [snapshot_from_record(record) for record in records]
+    network_service.get_wifi_status(force=False)  # prime the cache outside the timing
+
+    def run() -> int:
+        for snapshot in snapshots:
+            service._build_record(snapshot)
+        return 0
+
+    result = measure("build (_build_record)", len(records), run)
+    result["bytes_per_record"] = None
+    return result
+
+
+def bench_serialize(records: List[Dict[str, Any]]) -> tuple[Dict[str, Any], List[str]]:
+    lines: List[str] = []
+
+    def run() -> int:
+        lines.clear()
+        for record in records:
+            lines.append(json.dumps(record, ensure_ascii=True, separators=(",", ":")) + "\n")
+        return sum(len(line) for line in lines)
+
+    return measure("serialize (json.dumps)", len(records), run), lines
+
+
+def bench_write(lines: List[str], tmp: Path, policy: str, batch: int) -> Dict[str, Any]:
+    path = tmp / f"write-{policy}.jsonl"
+
+    def run() -> int:
+        if policy == "fsync-every":
+            # What the logger does today: reopen, append, flush, fsync per record.
+            for line in lines:
+                with path.open("a", encoding="utf-8") as handle:
+                    handle.write(line)
+                    handle.flush()
+                    os.fsync(handle.fileno())
+        else:
+            with path.open("a", encoding="utf-8") as handle:
+                for index, line in enumerate(lines, 1):
+                    handle.write(line)
+                    handle.flush()
+                    if policy == "fsync-batch" and index % batch == 0:
+                        os.fsync(handle.fileno())
+                if policy == "fsync-batch":
+                    os.fsync(handle.fileno())
+        return path.stat().st_size
+
+    label = f"write jsonl ({policy}{f', N={batch}' if policy == 'fsync-batch' else ''})"
+    return measure(label, len(lines), run)
+
+
+def bench_gzip(lines: List[str], tmp: Path, level: int) -> Dict[str, Any]:
+    path = tmp / f"write-gz{level}.jsonl.gz"
+
+    def run() -> int:
+        with gzip.open(path, "wt", encoding="utf-8", compresslevel=level) as handle:
+            for line in lines:
+                handle.write(line)
+        return path.stat().st_size
+
+    return measure(f"write jsonl.gz (level {level})", len(lines), run)
+
+
+def bench_npz(tmp: Path, count: int) -> Dict[str, Any] | None:
+    try:
+        import numpy as np
+
+        from backend.analysis.columnar import read_session_columns
+    except ImportError as exc:
+        print(f"  npz: skipped ({exc})", file=sys.stderr)
+        return None
+    source = tmp / "write-flush-only.jsonl"
+    target = tmp / "session.npz"
+
+    def run() -> int:
+        np.savez_compressed(target, **read_session_columns(source))
+        return target.stat().st_size
+
+    return measure("convert to npz (compressed, batch)", count, run)
+
+
+def bench_index(lines: List[str], tmp: Path) -> Dict[str, Any]:
+    root = tmp / "index"
+    path = root / "2026/05/01/vin/session-2026-05-01T10-00-00Z.jsonl"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.touch()
+    ledger = retention.TelemetryRetentionManager(
+        root,
+        budget_bytes=10 ** 12,
+        downsample_after_days=14,
+        downsample_interval_s=10,
+        raw_retention_days=180,
+        summary_retention_days=1825,
+    )
+    ledger.rescan()
+    upload_manifest = manifest.UploadManifest(root)
+    summary = retention.SessionSummary(path)
+    records = [json.loads(line) for line in lines]
+
+    def run() -> int:
+        for line, record in zip(lines, records):
+            ledger.note_write(path, len(line))
+            upload_manifest.note_write(path, len(line), time.time())
+            summary.add(record)
+        upload_manifest.save()
+        return 0
+
+    result = measure("index (ledger + manifest + summary)", len(lines), run)
+    result["bytes_per_record"] = None
+    return result
+
+
+def print_table(results: List[Dict[str, Any]]) -> None:
+    print(f"{'stage':<42} {'records/s':>11} {'CPU ms/rec':>11} {'wall ms/rec':>12} {'B/rec':>9}")
+    for row in results:
+        per_record = "-" if row["bytes_per_record"] is None else f"{row['bytes_per_record']:.1f}"
+        print(
+            f"{row['stage']:<42} {row['records_per_s']:>11.0f} {row['cpu_ms_per_record']:>11.4f} "
+            f"{row['wall_ms_per_record']:>12.4f} {per_record:>9}"
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the OBD logger write path.")
+    parser.add_argument("--input", type=Path, nargs="*", default=[], help="Real JSONL sessions to replay.")
+    parser.add_argument("--records", type=int, default=2000, help="Records to benchmark. Default: 2000")
+    parser.add_argument("--batch", type=int, default=10, help="Records per fsync for the batched policy.")
+    parser.add_argument("--dir", type=Path, default=None, help="Directory to write in (default: a temp dir).")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    args = parser.parse_args()
+
+    if args.records <= 0:
+        raise SystemExit("--records must be > 0")
+    records = real_records(args.input, args.records) if args.input else synthetic_records(args.records)
+    if not records:
+        raise SystemExit("No records to benchmark.")
+    source = ", ".join(str(path) for path in args.input) if args.input else "synthetic"
+    print(f"Source: {source} ({len(records)} records)", file=sys.stderr)
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmpdir:
+        tmp = Path(tmpdir)
+        results: List[Dict[str, Any]] = []
+        build = bench_build(records)
+        if build:
+            results.append(build)
+        serialize, lines = bench_serialize(records)
+        results.append(serialize)
+        for policy in ("fsync-every", "fsync-batch", "flush-only"):
+            results.append(bench_write(lines, tmp, policy, max(1, args.batch)))
+        for level in (1, 6):
+            results.append(bench_gzip(lines, tmp, level))
+        npz = bench_npz(tmp, len(lines))
+        if npz:
+            results.append(npz)
+        results.append(bench_index(lines, tmp))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Convert PiCASSO OBD logs to columnar numpy arrays and summarise trips.
+
+Each JSONL session is parsed once and cached under --cache-dir as `.npz`
+(default) or as a directory of memory-mappable `.npy` files; later runs
+only read arrays.
+
+Examples:
+  python3 scripts/obd_columnar.py convert
+  python3 scripts/obd_columnar.py convert --format npy telemetry/obd/2026/05
+  python3 scripts/obd_columnar.py stats --since 2026-05-01 --until 2026-06-01
+  python3 scripts/obd_columnar.py stats --csv trips.csv
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from backend.analysis.columnar import (  # noqa: E402
+    FORMATS,
+    concat_sessions,
+    find_sessions,
+    load_session,
+    trip_stats,
+)
+
+
+def _parse_date(value: str | None) -> float | None:
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _sessions(args: argparse.Namespace) -> list[Path]:
+    roots = [Path(path) for path in args.paths] or [Path(args.root)]
+    paths: list[Path] = []
+    for root in roots:
+        if root.is_file():
+            paths.append(root)
+        else:
+            paths.extend(find_sessions(root, since=_parse_date(args.since), until=_parse_date(args.until)))
+    return paths
+
+
+def _load_all(args: argparse.Namespace):
+    paths = _sessions(args)
+    started = time.perf_counter()
+    sessions = [
+        load_session(path, source_root=Path(args.root), cache_root=Path(args.cache_dir), fmt=args.format)
+        for path in paths
+    ]
+    elapsed = time.perf_counter() - started
+    return paths, sessions, elapsed
+
+
+def cmd_convert(args: argparse.Namespace) -> int:
+    paths, sessions, elapsed = _load_all(args)
+    samples = sum(len(session["t"]) for session in sessions)
+    fields = len({name for session in sessions for name in session})
+    print(f"{len(paths)} session(s), {samples} samples, {fields} fields in {elapsed:.2f} s -> {args.cache_dir}")
+    return 0
+
+
+def cmd_stats(args: argparse.Namespace) -> int:
+    paths, sessions, load_elapsed = _load_all(args)
+    started = time.perf_counter()
+    combined = concat_sessions(sessions, [path.name for path in paths])
+    stats = trip_stats(combined)
+    stats_elapsed = time.perf_counter() - started
+
+    rows = []
+    for index, name in enumerate(combined.names):
+        rows.append({
+            "session": name,
+            "start": datetime.fromtimestamp(stats["start"][index], timezone.utc).isoformat(),
+            **{key: float(values[index]) for key, values in stats.items() if key != "start"},
+        })
+
+    if args.csv:
+        with open(args.csv, "w", newline="", encoding="utf-8") as handle:
+            writer = csv.DictWriter(handle, fieldnames=list(rows[0]) if rows else ["session"])
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        print(f"{'start':<26} {'min':>6} {'km':>7} {'L':>6} {'km/L':>6} {'vmax':>6} {'rpm avg':>8} {'rpm max':>8}")
+        for row in rows:
+            print(
+                f"{row['start'][:25]:<26} {row['duration_s'] / 60:>6.1f} {row['distance_km']:>7.2f} "
+                f"{row['fuel_l']:>6.2f} {row['km_per_l']:>6.1f} {row['max_speed_kmh']:>6.0f} "
+                f"{row['mean_rpm']:>8.0f} {row['max_rpm']:>8.0f}"
+            )
+    print(
+        f"{len(rows)} trip(s), {len(combined)} samples; load {load_elapsed:.2f} s, stats {stats_elapsed * 1000:.1f} ms",
+        file=sys.stderr,
+    )
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Columnar export and trip statistics for OBD logs.")
+    parser.add_argument("command", choices=["convert", "stats"])
+    parser.add_argument("paths", nargs="*", help="Session files or directories (default: --root).")
+    parser.add_argument("--root", default="telemetry/obd", help="OBD log root; cache paths mirror it.")
+    parser.add_argument("--cache-dir", default="telemetry/columnar", help="Where converted arrays are cached.")
+    parser.add_argument("--format", choices=FORMATS, default="npz")
+    parser.add_argument("--since", default=None, help="ISO date/time; sessions starting earlier are skipped.")
+    parser.add_argument("--until", default=None, help="ISO date/time; sessions starting later are skipped.")
+    parser.add_argument("--csv", default=None, help="Write per-trip stats to this CSV instead of a table.")
+    args = parser.parse_args()
+    return cmd_convert(args) if args.command == "convert" else cmd_stats(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Replay a raw ELM327 capture through OBDService.
+
+Feeds a capture recorded with OBD_CAPTURE_ENABLED (see
+backend/services/elm_capture.py) back through the real init sequence,
+response parsing and poll scheduler, with no adapter attached. Without
+--realtime it runs as fast as the parser allows and reports commands/s; the
+poll clock advances one POLL_INTERVAL per loop so the secondary/slow PID
+cadence matches the car.
+
+Examples:
+  python3 scripts/replay_elm_capture.py telemetry/elm_capture/elm-2026-05-06T10-00-00Z.elmcap
+  python3 scripts/replay_elm_capture.py capture.elmcap --realtime --print-samples
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from backend.services.elm_capture import ReplaySerial  # noqa: E402
+from backend.services.obd_service import POLL_INTERVAL, OBDService  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Replay a raw ELM327 capture through OBDService.")
+    parser.add_argument("capture")
+    parser.add_argument("--realtime", action="store_true", help="Hold each response for its recorded duration.")
+    parser.add_argument("--print-samples", action="store_true")
+    parser.add_argument("--json", default=None, help="Also write the summary to this file.")
+    args = parser.parse_args()
+
+    capture = Path(args.capture)
+    if not capture.exists():
+        raise SystemExit(f"Capture not found: {capture}")
+
+    service = OBDService(
+        device=str(capture),
+        trip_journal_path="",
+        serial_factory=lambda port: ReplaySerial.from_file(Path(port), realtime=args.realtime),
+    )
+    port = service._open_serial(str(capture))
+    service._serial = port
+
+    started = time.perf_counter()
+    init = service._initialize_elm()
+    loops = 0
+    direct = {}
+    clock = time.monotonic()
+    while port.remaining("010C") > 0 and port.remaining() > 0:
+        served = port.served
+        direct = service._read_direct_data(clock)
+        clock += POLL_INTERVAL
+        loops += 1
+        if port.served == served:
+            # The poll stopped asking for anything the capture still holds.
+            break
+        if args.print_samples:
+            print(f"{loops:6d} rpm={direct.get('rpm')} speed={direct.get('speed_kmh')} coolant={direct.get('coolant_temp_c')}")
+    elapsed = time.perf_counter() - started
+
+    summary = {
+        "capture": str(capture),
+        "protocol": init.get("protocol"),
+        "vin": init.get("vin"),
+        "loops": loops,
+        "commands_recorded": port.total,
+        "commands_served": port.served,
+        "commands_unknown": len(port.unknown),
+        "commands_left": port.remaining(),
+        "elapsed_s": round(elapsed, 3),
+        "commands_per_s": round(port.served / elapsed, 1) if elapsed > 0 else None,
+        "last_direct": direct,
+    }
+    print(
+        f"{capture.name}: {port.served}/{port.total} commands in {elapsed:.3f}s "
+        f"({summary['commands_per_s']} cmd/s), {loops} poll loops, "
+        f"{len(port.unknown)} unanswered, {port.remaining()} left over"
+    )
+    if args.json:
+        Path(args.json).write_text(json.dumps(summary, indent=2, default=str) + "\n", encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
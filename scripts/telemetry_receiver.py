@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Receive PiCASSO OBD logs over the chunked HTTP transport.
+
+Modes:
+- Serve: store uploads under --root (run this on the sync host).
+- Benchmark: start a receiver on localhost and time uploads of a file,
+  or of synthetic data, for several chunk sizes.
+
+Examples:
+  python3 scripts/telemetry_receiver.py --root /repository/Car_datalog --port 8765
+  python3 scripts/telemetry_receiver.py --benchmark --size-mb 32
+  python3 scripts/telemetry_receiver.py --benchmark --input telemetry/obd/2026/05/06/vin/session.jsonl --chunk-kb 64 256 1024
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import os
+import tempfile
+from pathlib import Path
+
+# Load the transport module directly so the receiver host does not need the
+# Pi-side dependencies pulled in by `backend.services`.
+_MODULE_PATH = Path(__file__).resolve().parents[1] / "backend" / "services" / "telemetry_http.py"
+_spec = importlib.util.spec_from_file_location("telemetry_http", _MODULE_PATH)
+telemetry_http = importlib.util.module_from_spec(_spec)
+assert _spec.loader is not None
+_spec.loader.exec_module(telemetry_http)
+TelemetryReceiver = telemetry_http.TelemetryReceiver
+benchmark_upload = telemetry_http.benchmark_upload
+
+
+def serve(args: argparse.Namespace) -> int:
+    root = Path(args.root).expanduser()
+    root.mkdir(parents=True, exist_ok=True)
+    server = TelemetryReceiver(root, (args.host, args.port), token=args.token, verbose=True)
+    print(f"Receiving telemetry into {root} at {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+def benchmark(args: argparse.Namespace) -> int:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmp = Path(tmpdir)
+        if args.input:
+            source = Path(args.input)
+        else:
+            source = tmp / "synthetic.bin"
+            with source.open("wb") as handle:
+                handle.write(os.urandom(int(args.size_mb * 1024 * 1024)))
+
+        server = TelemetryReceiver(tmp / "received", ("127.0.0.1", 0), token=args.token)
+        server.start_background()
+        try:
+            size = source.stat().st_size
+            print(f"Source: {source} ({size / 1024 ** 2:.1f} MB)")
+            print(f"{'chunk':>10} {'requests':>9} {'seconds':>9} {'MB/s':>9}")
+            for chunk_kb in args.chunk_kb:
+                result = benchmark_upload(
+                    source,
+                    server.url,
+                    key=f"bench-{chunk_kb}.bin",
+                    chunk_bytes=chunk_kb * 1024,
+                    token=args.token,
+                )
+                print(
+                    f"{chunk_kb:>8}KB {result['requests']:>9} {result['seconds']:>9.3f} "
+                    f"{(result['mb_per_s'] or 0):>9.1f}"
+                )
+        finally:
+            server.shutdown()
+            server.server_close()
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Chunked HTTP receiver for PiCASSO OBD logs.")
+    parser.add_argument("--root", default="telemetry/received", help="Directory uploads are stored under.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--token", default=None, help="Bearer token clients must send.")
+    parser.add_argument("--benchmark", action="store_true", help="Run a local upload benchmark and exit.")
+    parser.add_argument("--input", default=None, help="File to upload in benchmark mode.")
+    parser.add_argument("--size-mb", type=float, default=16.0, help="Synthetic payload size in benchmark mode.")
+    parser.add_argument("--chunk-kb", type=int, nargs="+", default=[64, 256, 1024], help="Chunk sizes to benchmark.")
+    args = parser.parse_args()
+    return benchmark(args) if args.benchmark else serve(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Tune the gear ratio bands used by the OBD gear inference.
+
+Loads recorded sessions as columns (cached, see scripts/obd_columnar.py),
+clusters the steady rpm/speed ratios into one centre per gear, derives
+entry/hold bands and replays the current and tuned bands through
+OBDService's gear state machine, reporting flicker, coverage and accuracy.
+
+Examples:
+  python3 scripts/tune_gear_bands.py
+  python3 scripts/tune_gear_bands.py --since 2026-05-01 --gears 5 --json tuned.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from backend.analysis.columnar import concat_sessions, find_sessions, load_session  # noqa: E402
+from backend.analysis.gear_tuner import tune  # noqa: E402
+from backend.services.obd_service import GEAR_ENTRY_BANDS, GEAR_HOLD_BANDS, OBDService  # noqa: E402
+
+
+def _parse_date(value: str | None) -> float | None:
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _format_bands(bands) -> str:
+    return "{" + ", ".join(f"{gear}: ({lower}, {upper})" for gear, (lower, upper) in bands.items()) + "}"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Tune OBD gear ratio bands from recorded sessions.")
+    parser.add_argument("--root", default="telemetry/obd")
+    parser.add_argument("--cache-dir", default="telemetry/columnar")
+    parser.add_argument("--since", default=None)
+    parser.add_argument("--until", default=None)
+    parser.add_argument("--gears", type=int, default=len(GEAR_ENTRY_BANDS))
+    parser.add_argument("--json", default=None, help="Also write the full result to this file.")
+    args = parser.parse_args()
+
+    paths = find_sessions(Path(args.root), since=_parse_date(args.since), until=_parse_date(args.until))
+    if not paths:
+        raise SystemExit(f"No sessions found under {args.root}")
+    sessions = [load_session(path, source_root=Path(args.root), cache_root=Path(args.cache_dir)) for path in paths]
+    combined = concat_sessions(sessions, [path.name for path in paths])
+
+    def service_factory() -> OBDService:
+        return OBDService(device="/nonexistent-obd-for-replay")
+
+    result = tune(
+        service_factory,
+        combined.columns,
+        gears=args.gears,
+        baseline=(GEAR_ENTRY_BANDS, GEAR_HOLD_BANDS),
+        offsets=combined.offsets,
+    )
+
+    print(f"{len(paths)} session(s), {len(combined)} samples")
+    print(f"Gear ratio centres (rpm per km/h): {result['centres']}")
+    print(f"{'candidate':<26} {'accuracy':>9} {'coverage':>9} {'changes':>8} {'flicker/min':>12} {'x realtime':>11}")
+    for candidate in result["candidates"]:
+        metrics = candidate["metrics"]
+        print(
+            f"{candidate['name']:<26} {metrics['accuracy']:>9.3f} {metrics['coverage']:>9.3f} "
+            f"{metrics['gear_changes']:>8} {metrics['flicker_per_min']:>12.3f} {metrics['realtime_factor']:>11.0f}"
+        )
+    best = result["best"]
+    print("")
+    print(f"Best: {best['name']}. To use it, add to config.py:")
+    print(f"OBD_GEAR_ENTRY_BANDS = {_format_bands(best['entry_bands'])}")
+    print(f"OBD_GEAR_HOLD_BANDS = {_format_bands(best['hold_bands'])}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(result, indent=2, default=str) + "\n", encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
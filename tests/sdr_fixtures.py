@@ -0,0 +1,117 @@
+"""Shared fixtures for the SDR tests: a synthetic tunable dongle and an audio sink."""
+
+import importlib.util
+import sys
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+FS = 2_400_000
+
+
+def load(name, relative_path):
+    spec = importlib.util.spec_from_file_location(name, ROOT / relative_path)
+    module = importlib.util.module_from_spec(spec)
+    assert spec.loader is not None
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+class Station:
+    """A transmitter: `envelope(t, n)` is its complex baseband at times t / sample indices n."""
+
+    def __init__(self, frequency_hz, envelope, length=None):
+        self.frequency_hz = frequency_hz
+        self.envelope = envelope
+        self.length = length
+
+
+def fm_tone(frequency_hz, tone_hz, amplitude=0.3, deviation_hz=37_500):
+    index = deviation_hz / tone_hz
+    return Station(frequency_hz, lambda t, n: amplitude * np.exp(-1j * index * np.cos(2 * np.pi * tone_hz * t)))
+
+
+def am_tone(frequency_hz, tone_hz, amplitude=0.2, depth=0.6):
+    return Station(frequency_hz, lambda t, n: amplitude * (1 + depth * np.sin(2 * np.pi * tone_hz * t)))
+
+
+def fm_mpx(frequency_hz, mpx, mpx_rate, sample_rate=FS, deviation_hz=75_000):
+    """FM station whose discriminator output is `mpx`; the source ends with it."""
+    factor = sample_rate // mpx_rate
+    up = np.interp(np.arange(len(mpx) * factor) / factor, np.arange(len(mpx)), mpx)
+    phase = 2 * np.pi * deviation_hz * np.cumsum(up) / sample_rate
+    return Station(frequency_hz, lambda t, n: np.exp(1j * phase[n]), length=len(phase))
+
+
+class TunableSource:
+    """Stations over white noise, seen through a tunable front end.
+
+    Only stations inside the captured band are mixed in; with `keyed` set,
+    only the frequencies it contains transmit. read() returns None once a
+    finite station (fm_mpx) runs out.
+    """
+
+    def __init__(self, stations, noise=0.0, seed=1, sample_rate=FS, keyed=None):
+        self.stations = stations
+        self.noise = noise
+        self.sample_rate = sample_rate
+        self.keyed = keyed
+        self.center = 0
+        self.tunes = []
+        self.gains = []
+        self._n = 0
+        self._rng = np.random.default_rng(seed)
+        lengths = [station.length for station in stations if station.length is not None]
+        self.length = min(lengths) if lengths else None
+
+    def set_center_freq(self, hz):
+        self.center = hz
+        self.tunes.append(hz)
+
+    def set_gain(self, gain):
+        self.gains.append(gain)
+
+    def read(self, count):
+        if self.length is not None and self._n + count > self.length:
+            return None
+        n = self._n + np.arange(count)
+        t = n / self.sample_rate
+        self._n += count
+        iq = np.zeros(count, dtype=np.complex128)
+        if self.noise:
+            iq += self.noise * (self._rng.standard_normal(count) + 1j * self._rng.standard_normal(count))
+        for station in self.stations:
+            offset = station.frequency_hz - self.center
+            if abs(offset) >= self.sample_rate / 2 or (self.keyed is not None and station.frequency_hz not in self.keyed):
+                continue
+            iq += station.envelope(t, n) * np.exp(2j * np.pi * offset * t)
+        return iq.astype(np.complex64)
+
+    def close(self):
+        pass
+
+
+class ListSink:
+    """Audio sink keeping every PCM block."""
+
+    def __init__(self):
+        self.blocks = []
+
+    def start(self):
+        pass
+
+    def write(self, pcm):
+        self.blocks.append(pcm)
+
+    def stop(self):
+        pass
+
+
+def dominant_hz(pcm_blocks, rate):
+    audio = np.concatenate(pcm_blocks).astype(np.float64)
+    spectrum = np.abs(np.fft.rfft(audio * np.hanning(len(audio))))
+    return np.fft.rfftfreq(len(audio), 1 / rate)[spectrum.argmax()]
@@ -0,0 +1,79 @@
+import importlib.util
+import sys
+import time
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+spec = importlib.util.spec_from_file_location("alert_rules_under_test", ROOT / "backend/services/alert_rules.py")
+alert_rules = importlib.util.module_from_spec(spec)
+assert spec.loader is not None
+spec.loader.exec_module(alert_rules)
+
+
+class AlertRulesTest(unittest.TestCase):
+    def test_default_rules_match_the_historical_coolant_and_battery_checks(self):
+        engine = alert_rules.AlertRulesEngine()
+        cases = [
+            ({"coolant_temp_c": 104.9, "adapter_voltage_v": 12.5, "rpm": 0}, False, False),
+            ({"coolant_temp_c": 105, "adapter_voltage_v": 12.9, "rpm": 800}, True, True),
+            ({"coolant_temp_c": None, "adapter_voltage_v": 13.0, "rpm": 800}, False, False),
+            ({"adapter_voltage_v": 12.0, "rpm": None}, False, False),
+        ]
+        for index, (values, coolant, battery) in enumerate(cases):
+            result = engine.evaluate(values, now=float(index))
+            self.assertEqual(result["flags"], {"battery_alert": battery, "coolant_alert": coolant})
+        result = engine.evaluate({"coolant_temp_c": 110, "adapter_voltage_v": 12.0, "rpm": 900}, now=10.0)
+        self.assertEqual([alert["id"] for alert in result["alerts"]], ["coolant_high", "battery_low_running"])
+
+    def test_duration_rate_and_mean_rules_are_incremental(self):
+        engine = alert_rules.AlertRulesEngine([
+            {"id": "idle_hot", "type": "duration", "metric": "coolant_temp_c", "op": ">=", "value": 100, "for_s": 2.0},
+            {"id": "heating", "type": "rate", "metric": "coolant_temp_c", "op": ">", "value": 0.8, "window_s": 1.0},
+            {"id": "lean", "type": "mean", "metric": "long_fuel_trim_b1_pct", "op": ">=", "value": 10, "window_s": 2.0},
+        ])
+        fired = []
+        for step in range(13):
+            now = step * 0.25
+            values = {"coolant_temp_c": 99 + now, "long_fuel_trim_b1_pct": 4 if step < 4 else 14}
+            fired.append({alert["id"] for alert in engine.evaluate(values, now)["alerts"]})
+
+        self.assertNotIn("idle_hot", fired[11])  # 100 C reached at t=1.0, held 1.75 s
+        self.assertIn("idle_hot", fired[12])
+        self.assertIn("heating", fired[4])  # +1 C/s
+        self.assertNotIn("lean", fired[5])
+        self.assertIn("lean", fired[12])  # only 14 % samples left in the 2 s window
+
+        # A missing value resets the duration timer.
+        engine.evaluate({"coolant_temp_c": None, "long_fuel_trim_b1_pct": 14}, 3.25)
+        ids = {alert["id"] for alert in engine.evaluate({"coolant_temp_c": 102, "long_fuel_trim_b1_pct": 14}, 3.5)["alerts"]}
+        self.assertNotIn("idle_hot", ids)
+
+    def test_invalid_rules_are_rejected_and_twenty_rules_stay_cheap(self):
+        with self.assertRaises(ValueError):
+            alert_rules.AlertRulesEngine([{"id": "x", "type": "median", "metric": "rpm", "op": ">", "value": 1}])
+        with self.assertRaises(ValueError):
+            alert_rules.AlertRulesEngine([{"id": "x", "type": "duration", "metric": "rpm", "op": ">", "value": 1}])
+
+        specs = []
+        for index in range(5):
+            specs += [
+                {"id": f"t{index}", "metric": "rpm", "op": ">", "value": 3000 + index},
+                {"id": f"d{index}", "type": "duration", "metric": "rpm", "op": ">", "value": 2000, "for_s": 5},
+                {"id": f"r{index}", "type": "rate", "metric": "speed_kmh", "op": "<", "value": -20, "window_s": 1},
+                {"id": f"m{index}", "type": "mean", "metric": "rpm", "op": ">", "value": 2500, "window_s": 30},
+            ]
+        engine = alert_rules.AlertRulesEngine(specs)
+        samples = 4 * 60 * 10  # ten minutes at 4 Hz
+        started = time.perf_counter()
+        for step in range(samples):
+            engine.evaluate({"rpm": 800 + (step % 400) * 8, "speed_kmh": step % 120}, step * 0.25)
+        per_sample_ms = (time.perf_counter() - started) * 1000 / samples
+        self.assertLess(per_sample_ms, 2.0)  # the OBD loop budget at 4 Hz is 250 ms
+        self.assertLessEqual(len(engine.rules[3]._samples), 121)
+
+
+if __name__ == "__main__":
+    unittest.main()
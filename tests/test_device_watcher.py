@@ -0,0 +1,147 @@
+import importlib.util
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+
+def _load(name, relative_path):
+    spec = importlib.util.spec_from_file_location(name, ROOT / relative_path)
+    module = importlib.util.module_from_spec(spec)
+    assert spec.loader is not None
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+_load("backend.services.alert_rules", "backend/services/alert_rules.py")
+device_watcher = _load("backend.services.device_watcher", "backend/services/device_watcher.py")
+_load("backend.services.trip_journal", "backend/services/trip_journal.py")
+obd_service = _load("obd_service_under_test", "backend/services/obd_service.py")
+
+
+class QuickElm:
+    RESPONSES = {
+        "0100": b"41 00 BE 3E B8 13\r\r>",
+        "010C": b"41 0C 1F 40\r\r>",
+        "010D": b"41 0D 3C\r\r>",
+    }
+
+    def __init__(self):
+        self._pending = b""
+
+    def reset_input_buffer(self):
+        self._pending = b""
+
+    def write(self, data):
+        command = data.decode().strip()
+        self._pending = self.RESPONSES.get(command, b"OK\r\r>" if command.startswith("AT") else b"NO DATA\r\r>")
+        return len(data)
+
+    def read(self, size=1):
+        chunk, self._pending = self._pending[:size], self._pending[size:]
+        return chunk
+
+    def close(self):
+        pass
+
+
+def _later(delay_s, action):
+    timer = threading.Timer(delay_s, action)
+    timer.start()
+    return timer
+
+
+class DeviceWatcherTest(unittest.TestCase):
+    def test_backoff_doubles_up_to_the_cap_and_resets(self):
+        backoff = device_watcher.Backoff(0.25, 1.5)
+        self.assertEqual([backoff.next() for _ in range(5)], [0.25, 0.5, 1.0, 1.5, 1.5])
+        self.assertEqual(backoff.attempts, 5)
+        backoff.reset()
+        self.assertEqual((backoff.next(), backoff.attempts), (0.25, 1))
+
+    def test_wait_returns_when_the_adapter_node_appears_but_not_for_other_files(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            adapter = root / "serial" / "by-id" / "usb-FTDI_adapter"
+            watcher = device_watcher.DeviceWatcher([str(adapter), str(root / "ttyUSB0")], poll_interval_s=0.05)
+            try:
+                _later(0.05, lambda: (root / "ttyS9").touch())
+                self.assertFalse(watcher.wait(0.3))
+
+                def plug():
+                    adapter.parent.mkdir(parents=True)
+                    adapter.touch()
+
+                _later(0.05, plug)
+                started = time.monotonic()
+                while not adapter.exists():
+                    self.assertTrue(watcher.wait(2.0))
+                self.assertLess(time.monotonic() - started, 1.0)
+
+                _later(0.05, watcher.wake)
+                self.assertTrue(watcher.wait(2.0))
+            finally:
+                watcher.close()
+            watcher.wake()
+
+    def test_node_created_before_wait_is_not_missed(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            adapter = Path(tmpdir) / "serial" / "by-id" / "usb-FTDI_adapter"
+            watcher = device_watcher.DeviceWatcher([str(adapter)], poll_interval_s=0.05)
+            try:
+                # The node shows up after the caller's lookup failed but before it waits.
+                adapter.parent.mkdir(parents=True)
+                adapter.touch()
+                started = time.monotonic()
+                self.assertTrue(watcher.wait(2.0))
+                self.assertLess(time.monotonic() - started, 0.5)
+                self.assertFalse(watcher.wait(0.1))
+            finally:
+                watcher.close()
+
+    def test_service_connects_on_hotplug_and_reports_time_to_first_sample(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            device = Path(tmpdir) / "ttyUSB-obd"
+            opens = []
+
+            def factory(port):
+                opens.append(port)
+                if len(opens) <= 2:
+                    raise OSError("adapter not ready")
+                return QuickElm()
+
+            service = obd_service.OBDService(device=str(device), trip_journal_path="", serial_factory=factory)
+            service.fallback_device = str(Path(tmpdir) / "missing")
+            self.assertFalse(service.start())
+            try:
+                time.sleep(0.1)
+                self.assertEqual(opens, [])
+                device.touch()
+                deadline = time.monotonic() + 5.0
+                connection = {}
+                while time.monotonic() < deadline:
+                    connection = service.get_status()["connection"]
+                    if connection.get("time_to_first_sample_s") is not None:
+                        break
+                    time.sleep(0.02)
+            finally:
+                service.stop()
+                service._thread.join(2.0)
+
+            self.assertEqual(len(opens), 3)
+            self.assertEqual(connection["reconnect_attempts"], 2)
+            # Two protocol errors at 0.25 s + 0.5 s backoff, instead of 2 x 5 s.
+            self.assertLess(connection["time_to_first_sample_s"], 2.0)
+            self.assertLess(connection["connect_to_first_sample_s"], 1.0)
+            self.assertIn(connection["watch_mode"], ("inotify", "polling"))
+            self.assertFalse(service._thread.is_alive())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+import importlib.util
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+
+def _load(name, relative_path):
+    spec = importlib.util.spec_from_file_location(name, ROOT / relative_path)
+    module = importlib.util.module_from_spec(spec)
+    assert spec.loader is not None
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+_load("backend.services.alert_rules", "backend/services/alert_rules.py")
+_load("backend.services.device_watcher", "backend/services/device_watcher.py")
+_load("backend.services.trip_journal", "backend/services/trip_journal.py")
+elm_capture = _load("backend.services.elm_capture", "backend/services/elm_capture.py")
+obd_service = _load("obd_service_under_test", "backend/services/obd_service.py")
+
+ELM_RESPONSES = {
+    "ATZ": b"\r\rELM327 v1.5\r\r>",
+    "ATDP": b"AUTO, ISO 15765-4 (CAN 11/500)\r\r>",
+    "0100": b"41 00 BE 3E B8 13\r\r>",
+    "0902": b"49 02 01 56 46 37 53 43 39 48 52 38 43 54 35 30 30 30 30 31\r\r>",
+    "010C": b"41 0C 1F 40\r\r>",
+    "010D": b"41 0D 3C\r\r>",
+}
+
+
+class FakeElm:
+    """Answers from ELM_RESPONSES; RPM climbs by 100 per read."""
+
+    def __init__(self):
+        self._pending = b""
+        self._rpm = 2000
+
+    def reset_input_buffer(self):
+        self._pending = b""
+
+    def write(self, data):
+        command = data.decode().strip()
+        if command == "010C":
+            raw = self._rpm * 4
+            self._pending = f"41 0C {raw >> 8:02X} {raw & 0xFF:02X}\r\r>".encode()
+            self._rpm += 100
+        else:
+            self._pending = ELM_RESPONSES.get(command, b"OK\r\r>" if command.startswith("AT") else b"NO DATA\r\r>")
+        return len(data)
+
+    def read(self, size=1):
+        chunk, self._pending = self._pending[:size], self._pending[size:]
+        return chunk
+
+    def close(self):
+        pass
+
+
+def _run_session(service, loops):
+    service._serial = service._open_serial(service.device)
+    init = service._initialize_elm()
+    samples = []
+    for index in range(loops):
+        direct = service._read_direct_data(100.0 + index * 0.25)
+        samples.append((direct["rpm"], direct["speed_kmh"]))
+    return init, samples
+
+
+class ElmCaptureTest(unittest.TestCase):
+    def test_recorded_session_replays_to_identical_decoded_data(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "session.elmcap"
+            recorder = obd_service.OBDService(device=str(path), trip_journal_path="", serial_factory=lambda port: FakeElm())
+            recorder._capture = elm_capture.ElmCaptureWriter(path)
+            recorder._capture.mark_open("/dev/ttyUSB0")
+            recorded_init, recorded = _run_session(recorder, 8)
+            recorder._stop_capture()
+
+            records = list(elm_capture.read_capture(path))
+            self.assertEqual(records[0]["kind"], elm_capture.KIND_OPEN)
+            self.assertEqual(records[1]["command"], "ATZ")
+            self.assertTrue(records[1]["response"].endswith(b">"))
+
+            replayer = obd_service.OBDService(
+                device=str(path), trip_journal_path="", serial_factory=lambda port: elm_capture.ReplaySerial.from_file(port),
+            )
+            replayed_init, replayed = _run_session(replayer, 8)
+
+            self.assertEqual(replayed_init, recorded_init)
+            self.assertEqual(replayed_init["vin"], "VF7SC9HR8CT500001")
+            self.assertEqual(replayed, recorded)
+            self.assertEqual(recorded[-1][0], 2700)
+            self.assertEqual(replayer._serial.remaining(), 0)
+            self.assertEqual(replayer._serial.unknown, [])
+
+    def test_torn_tail_is_ignored_and_size_cap_stops_recording(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "capped.elmcap"
+            writer = elm_capture.ElmCaptureWriter(path, max_bytes=200)
+            for _ in range(10):
+                writer.record("010D", b"41 0D 3C\r\r>", time.monotonic(), 0.05, 0.45)
+            writer.close()
+            self.assertTrue(writer.full)
+            self.assertLessEqual(path.stat().st_size, 200)
+
+            with path.open("ab") as handle:
+                handle.write(b"\x01\x00\x00")
+            records = list(elm_capture.read_capture(path))
+            self.assertEqual(len(records), writer.records)
+            self.assertAlmostEqual(records[0]["duration_s"], 0.05)
+            self.assertEqual(records[0]["timeout_s"], 0.45)
+
+    def test_replay_answers_unknown_commands_and_honours_recorded_timing(self):
+        records = [{"kind": elm_capture.KIND_COMMAND, "command": "010D", "response": b"41 0D 3C\r\r>", "duration_s": 0.1}]
+        port = elm_capture.ReplaySerial(records, realtime=True)
+
+        port.write(b"010D\r")
+        self.assertEqual(port.read(256), b"")
+        time.sleep(0.12)
+        self.assertEqual(port.read(256), b"41 0D 3C\r\r>")
+        port.write(b"0105\r")
+        self.assertEqual(port.read(256), elm_capture.UNKNOWN_RESPONSE)
+        self.assertEqual(port.unknown, ["0105"])
+
+
+if __name__ == "__main__":
+    unittest.main()
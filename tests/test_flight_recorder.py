@@ -0,0 +1,95 @@
+import importlib.util
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+retention_spec = importlib.util.spec_from_file_location(
+    "backend.services.obd_log_retention", ROOT / "backend/services/obd_log_retention.py"
+)
+retention = importlib.util.module_from_spec(retention_spec)
+assert retention_spec.loader is not None
+sys.modules[retention_spec.name] = retention
+retention_spec.loader.exec_module(retention)
+
+spec = importlib.util.spec_from_file_location("flight_recorder_under_test", ROOT / "backend/services/flight_recorder.py")
+flight_recorder = importlib.util.module_from_spec(spec)
+assert spec.loader is not None
+spec.loader.exec_module(flight_recorder)
+
+T0 = 1_780_000_000.0
+RATE_S = 0.25
+
+
+def _sample(index, *, rpm=2200, speed=60, throttle=20, coolant_alert=False, dtcs=()):
+    return {
+        "t": T0 + index * RATE_S,
+        "vin": "VIN123",
+        "direct": {"rpm": rpm, "speed_kmh": speed, "throttle_pct": throttle, "active_dtcs": list(dtcs)},
+        "inferred": {"coolant_alert": coolant_alert, "battery_alert": False},
+    }
+
+
+class FlightRecorderTest(unittest.TestCase):
+    def _recorder(self, root, written):
+        return flight_recorder.FlightRecorder(
+            root, pre_seconds=5, post_seconds=2, on_event_written=written.append,
+        )
+
+    def test_trigger_dumps_every_sample_in_the_pre_and_post_window(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            written = []
+            recorder = self._recorder(Path(tmpdir), written)
+            recorder.start()
+            for index in range(100):
+                recorder.on_sample(_sample(index, coolant_alert=index >= 60, dtcs=["P0300"]))
+            recorder.stop()
+
+            self.assertEqual(len(written), 1)
+            self.assertTrue(written[0].name.endswith("-coolant_alert.event.json"))
+            self.assertEqual(retention.classify_log_file(written[0]), "event")
+            event = json.loads(written[0].read_text())
+            times = [sample["t"] for sample in event["samples"]]
+            self.assertEqual([item["trigger"] for item in event["triggers"]], ["coolant_alert"])
+            # 5 s before at 4 Hz (inclusive) plus 2 s after.
+            self.assertEqual(times[0], T0 + 40 * RATE_S)
+            self.assertEqual(times[-1], T0 + 68 * RATE_S)
+            self.assertEqual(len(times), 29)
+
+    def test_rpm_dip_triggers_only_at_steady_speed_and_throttle(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            written = []
+            recorder = self._recorder(Path(tmpdir), written)
+            samples = [_sample(0), _sample(1, rpm=1500, throttle=0), _sample(2, rpm=1500, throttle=0)]
+            samples += [_sample(3, rpm=2200), _sample(4, rpm=1750)]
+            samples += [_sample(index) for index in range(5, 20)]
+            for sample in samples:
+                recorder.on_sample(sample)
+            recorder.stop()
+
+            self.assertEqual(len(written), 1)
+            event = json.loads(written[0].read_text())
+            self.assertEqual(event["triggers"][0]["trigger"], "rpm_dip")
+            self.assertEqual(event["triggers"][0]["rpm_after"], 1750)
+
+    def test_new_dtc_triggers_but_codes_present_at_start_do_not(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            written = []
+            recorder = self._recorder(Path(tmpdir), written)
+            for index in range(10):
+                recorder.on_sample(_sample(index, dtcs=["P0300"]))
+            for index in range(10, 30):
+                recorder.on_sample(_sample(index, dtcs=["P0300", "P0171"]))
+            recorder.stop()
+
+            self.assertEqual(len(written), 1)
+            event = json.loads(written[0].read_text())
+            self.assertEqual(event["triggers"], [{"trigger": "new_dtc", "t": T0 + 10 * RATE_S, "codes": ["P0171"]}])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import importlib.util
+import json
+import random
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+spec = importlib.util.spec_from_file_location("fuel_trim_monitor_under_test", ROOT / "backend/services/fuel_trim_monitor.py")
+fuel_trim_monitor = importlib.util.module_from_spec(spec)
+assert spec.loader is not None
+spec.loader.exec_module(fuel_trim_monitor)
+
+T0 = 1_780_000_000.0
+
+
+def _drive(monitor, seconds, *, ltft=2.0, o2_switching=True, vin="VIN1", rpm=2500, load=45, seed=1, start=0.0):
+    rng = random.Random(seed)
+    for step in range(int(seconds * 4)):
+        t = start + step * 0.25
+        # A ~1 Hz switching sensor read every 5 s lands on a random side each time.
+        o2_high = o2_switching and rng.random() < 0.5
+        monitor.on_sample({
+            "t": T0 + t,
+            "vin": vin,
+            "direct": {
+                "rpm": rpm,
+                "engine_load_pct": load,
+                "coolant_temp_c": 90,
+                "short_fuel_trim_b1_pct": rng.gauss(0, 2),
+                "long_fuel_trim_b1_pct": ltft + rng.gauss(0, 0.5),
+                "o2_b1s1_voltage_v": (0.75 if o2_high else 0.15) + rng.gauss(0, 0.02),
+            },
+        })
+    return start + seconds
+
+
+class FuelTrimMonitorTest(unittest.TestCase):
+    def test_baselines_are_kept_per_regime_and_take_each_metric_at_its_poll_rate(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            monitor = fuel_trim_monitor.FuelTrimMonitor(Path(tmpdir))
+            _drive(monitor, 300)
+            _drive(monitor, 60, rpm=900, load=20, start=300)
+            monitor.on_sample({"t": T0 + 400, "vin": "VIN1", "direct": {"rpm": 2500, "engine_load_pct": 45, "coolant_temp_c": 40, "long_fuel_trim_b1_pct": 25}})
+
+            status = monitor.get_status()
+            cruise = status["regimes"]["rpm2-load1"]
+            self.assertEqual(cruise["long_fuel_trim_b1_pct"]["samples"], 300)
+            self.assertEqual(cruise["o2_b1s1_voltage_v"]["samples"], 60)
+            self.assertAlmostEqual(cruise["long_fuel_trim_b1_pct"]["baseline_mean"], 2.0, delta=0.15)
+            self.assertIn("rpm0-load0", status["regimes"])
+            self.assertEqual(status["warnings"], [])
+            self.assertAlmostEqual(status["o2_switching"]["baseline_cross_fraction"], 0.5, delta=0.15)
+
+    def test_trim_drift_and_lazy_o2_are_flagged(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            monitor = fuel_trim_monitor.FuelTrimMonitor(Path(tmpdir))
+            end = _drive(monitor, 300)
+            end = _drive(monitor, 120, ltft=9.0, start=end, seed=2)
+
+            kinds = {(item["kind"], item.get("metric")) for item in monitor.warnings()}
+            self.assertIn(("drift", "long_fuel_trim_b1_pct"), kinds)
+            baseline = monitor.get_status()["regimes"]["rpm2-load1"]["long_fuel_trim_b1_pct"]["baseline_mean"]
+            self.assertLess(baseline, 3.0)  # the drifted level did not leak into the baseline
+
+            _drive(monitor, 600, o2_switching=False, start=end, seed=3)
+            kinds = {item["kind"] for item in monitor.warnings()}
+            self.assertIn("o2_lazy", kinds)
+
+    def test_baselines_persist_per_vin(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            monitor = fuel_trim_monitor.FuelTrimMonitor(Path(tmpdir), save_interval_s=30)
+            _drive(monitor, 100, vin="VIN/1")
+            monitor.save()
+            _drive(monitor, 10, vin="OTHER")
+
+            saved = json.loads((Path(tmpdir) / "VIN_1.json").read_text())
+            self.assertEqual(saved["regimes"]["rpm2-load1"]["long_fuel_trim_b1_pct"]["n"], 100)
+
+            restarted = fuel_trim_monitor.FuelTrimMonitor(Path(tmpdir))
+            _drive(restarted, 10, vin="VIN/1", start=1000)
+            self.assertEqual(restarted.get_status()["regimes"]["rpm2-load1"]["long_fuel_trim_b1_pct"]["samples"], 110)
+
+    def test_attached_monitor_saves_off_the_sample_thread_and_flushes_on_detach(self):
+        class Service:
+            def __init__(self):
+                self.listeners = []
+
+            def add_sample_listener(self, listener):
+                self.listeners.append(listener)
+
+            def remove_sample_listener(self, listener):
+                self.listeners.remove(listener)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            monitor = fuel_trim_monitor.FuelTrimMonitor(Path(tmpdir), save_interval_s=30)
+            writers = []
+            write = monitor._write
+            monitor._write = lambda path, payload: (writers.append(threading.current_thread().name), write(path, payload))
+            service = Service()
+            monitor.attach(service)
+            _drive(monitor, 100, vin="VIN1")
+            monitor.detach(service)
+
+            self.assertEqual(service.listeners, [])
+            self.assertIn("obd-trim-baselines", writers)
+            self.assertNotIn(threading.current_thread().name, writers[:-1])
+            saved = json.loads((Path(tmpdir) / "VIN1.json").read_text())
+            self.assertEqual(saved["regimes"]["rpm2-load1"]["long_fuel_trim_b1_pct"]["n"], 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import importlib.util
+import sys
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+rules_spec = importlib.util.spec_from_file_location("backend.services.alert_rules", ROOT / "backend/services/alert_rules.py")
+alert_rules = importlib.util.module_from_spec(rules_spec)
+assert rules_spec.loader is not None
+sys.modules[rules_spec.name] = alert_rules
+rules_spec.loader.exec_module(alert_rules)
+
+watcher_spec = importlib.util.spec_from_file_location("backend.services.device_watcher", ROOT / "backend/services/device_watcher.py")
+device_watcher = importlib.util.module_from_spec(watcher_spec)
+assert watcher_spec.loader is not None
+sys.modules[watcher_spec.name] = device_watcher
+watcher_spec.loader.exec_module(device_watcher)
+
+journal_spec = importlib.util.spec_from_file_location("backend.services.trip_journal", ROOT / "backend/services/trip_journal.py")
+trip_journal = importlib.util.module_from_spec(journal_spec)
+assert journal_spec.loader is not None
+sys.modules[journal_spec.name] = trip_journal
+journal_spec.loader.exec_module(trip_journal)
+
+spec = importlib.util.spec_from_file_location("obd_service_under_test", ROOT / "backend/services/obd_service.py")
+obd_service = importlib.util.module_from_spec(spec)
+assert spec.loader is not None
+spec.loader.exec_module(obd_service)
+
+from backend.analysis import gear_tuner  # noqa: E402
+
+# A car geared noticeably taller than the hand-tuned defaults.
+TRUE_RATIOS = [105.0, 68.0, 47.0, 36.0, 29.0]
+
+
+def _synthetic_drive(seed=3):
+    rng = np.random.default_rng(seed)
+    speeds, rpms = [], []
+    for _ in range(6):
+        for gear, ratio in enumerate(TRUE_RATIOS, start=1):
+            low, high = 1400 / ratio, 3200 / ratio
+            speed = np.linspace(low, high, 40)
+            speeds.append(speed)
+            rpms.append(speed * ratio * (1 + rng.normal(0, 0.01, speed.shape)))
+            # Clutch in during the shift.
+            speeds.append(np.array([high, high]))
+            rpms.append(np.array([900.0, 950.0]))
+    speed = np.concatenate(speeds)
+    rpm = np.concatenate(rpms)
+    return {"t": np.arange(len(speed), dtype=np.float64) * 0.5, "direct.rpm": rpm, "direct.speed_kmh": speed}
+
+
+class GearTunerTest(unittest.TestCase):
+    def _factory(self):
+        return obd_service.OBDService(device="/tmp/nonexistent-obd")
+
+    def test_clusters_recover_each_gear_ratio(self):
+        centres = gear_tuner.cluster_gear_ratios(gear_tuner.steady_ratios(_synthetic_drive()), gears=5)
+
+        np.testing.assert_allclose(centres, TRUE_RATIOS, rtol=0.03)
+
+    def test_tuned_bands_beat_the_hand_tuned_defaults_on_this_car(self):
+        columns = _synthetic_drive()
+        result = gear_tuner.tune(
+            self._factory,
+            columns,
+            baseline=(obd_service.GEAR_ENTRY_BANDS, obd_service.GEAR_HOLD_BANDS),
+        )
+
+        current = result["candidates"][0]["metrics"]
+        best = result["best"]["metrics"]
+        self.assertGreater(best["accuracy"], 0.95)
+        self.assertGreater(best["accuracy"], current["accuracy"])
+        # At most the 1st->2nd clutch blip per lap, whose idle rpm at 1st-gear speed looks like top gear.
+        self.assertLessEqual(best["short_dwell_changes"], 6)
+        self.assertGreater(best["realtime_factor"], 1000)
+        entry = result["best"]["entry_bands"]
+        self.assertIsNone(entry[1][1])
+        self.assertTrue(all(entry[gear][0] < TRUE_RATIOS[gear - 1] for gear in entry))
+
+    def test_service_uses_instance_bands(self):
+        service = self._factory()
+        entry, hold = gear_tuner.bands_from_centres(np.array(TRUE_RATIOS), 0.03)
+        service.set_gear_bands(entry, hold)
+
+        for now in (1.0, 1.4):
+            output = service._calculate_gear_inference(
+                {"rpm": 1880, "speed_kmh": 40}, dynamic_stale=False, dynamic_stale_age_s=0.0, now=now,
+            )
+        self.assertEqual(output["gear"], 3)
+        self.assertEqual(obd_service.OBDService(device="/tmp/x")._gear_entry_bands, obd_service.GEAR_ENTRY_BANDS)
+
+
+if __name__ == "__main__":
+    unittest.main()
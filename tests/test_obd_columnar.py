@@ -0,0 +1,92 @@
+import json
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from backend.analysis import columnar  # noqa: E402
+
+START = datetime(2026, 5, 1, 10, 0, 0, tzinfo=timezone.utc)
+
+
+def _write_session(root, started_at, records):
+    name = started_at.strftime("session-%Y-%m-%dT%H-%M-%SZ") + ".jsonl"
+    path = root / f"{started_at:%Y/%m/%d}" / "vin" / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as handle:
+        for index, (speed, rpm) in enumerate(records):
+            record = {
+                "metadata": {"sample_time": (started_at + timedelta(seconds=index)).isoformat()},
+                "direct": {"speed_kmh": speed, "rpm": rpm, "active_dtcs": []},
+                "inferred": {"trip_distance_km": index * 0.01, "trip_consumed_l": index * 0.001, "coolant_alert": False},
+                "gps": {"lat": -23.2, "lon": -45.9},
+            }
+            handle.write(json.dumps(record) + "\n")
+        handle.write('{"torn')
+    return path
+
+
+class ColumnarExportTest(unittest.TestCase):
+    def test_sessions_convert_once_and_reload_from_cache_in_both_formats(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir) / "obd"
+            cache = Path(tmpdir) / "columnar"
+            path = _write_session(root, START, [(50, 2000), (None, 2100), (52, None)])
+
+            for fmt in columnar.FORMATS:
+                first = columnar.load_session(path, source_root=root, cache_root=cache, fmt=fmt)
+                cached = columnar.cache_path_for(path, root, cache, fmt)
+                self.assertTrue(cached.exists())
+                again = columnar.load_session(path, source_root=root, cache_root=cache, fmt=fmt)
+
+                self.assertEqual(set(first), set(again))
+                np.testing.assert_array_equal(again["direct.speed_kmh"], [50, np.nan, 52])
+                np.testing.assert_array_equal(again["inferred.coolant_alert"], [0, 0, 0])
+                self.assertNotIn("direct.active_dtcs", again)
+                self.assertEqual(again["t"][0], START.timestamp())
+
+            with path.open("a", encoding="utf-8") as handle:
+                handle.write('"}\n')
+            refreshed = columnar.load_session(path, source_root=root, cache_root=cache)
+            self.assertEqual(len(refreshed["t"]), 3)
+
+    def test_resample_and_nearest_join_respect_gaps_and_tolerance(self):
+        t = np.array([0.0, 1.0, 2.0, 10.0])
+        values = np.array([0.0, 10.0, np.nan, 100.0])
+
+        grid = np.array([0.5, 1.5, 6.0, 10.0])
+        resampled = columnar.resample(t, values, grid, max_gap_s=2.0)
+        np.testing.assert_allclose(resampled, [5.0, 15.0, np.nan, 100.0])
+
+        joined = columnar.join_nearest(np.array([0.1, 0.9, 5.0]), t, values, tolerance_s=0.5)
+        np.testing.assert_array_equal(joined, [0.0, 10.0, np.nan])
+
+    def test_trip_stats_are_computed_per_session(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir) / "obd"
+            cache = Path(tmpdir) / "columnar"
+            _write_session(root, START, [(40, 1500), (60, 2500), (None, 3000)])
+            _write_session(root, START + timedelta(hours=3), [(90, 2000)] * 11)
+
+            paths = columnar.find_sessions(root)
+            sessions = [columnar.load_session(path, source_root=root, cache_root=cache) for path in paths]
+            combined = columnar.concat_sessions(sessions, [path.name for path in paths])
+            stats = columnar.trip_stats(combined)
+
+            np.testing.assert_array_equal(combined.offsets, [0, 3])
+            np.testing.assert_array_equal(stats["samples"], [3, 11])
+            np.testing.assert_array_equal(stats["max_speed_kmh"], [60, 90])
+            np.testing.assert_allclose(stats["mean_rpm"], [2333.333, 2000], rtol=1e-4)
+            np.testing.assert_allclose(stats["distance_km"], [0.02, 0.10])
+            np.testing.assert_allclose(stats["km_per_l"], [10.0, 10.0])
+            np.testing.assert_array_equal(stats["duration_s"], [2, 10])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -7,6 +7,24 @@ from unittest.mock import patch
 ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(ROOT))
 
+rules_spec = importlib.util.spec_from_file_location("backend.services.alert_rules", ROOT / "backend/services/alert_rules.py")
+alert_rules = importlib.util.module_from_spec(rules_spec)
+assert rules_spec.loader is not None
+sys.modules[rules_spec.name] = alert_rules
+rules_spec.loader.exec_module(alert_rules)
+
+watcher_spec = importlib.util.spec_from_file_location("backend.services.device_watcher", ROOT / "backend/services/device_watcher.py")
+device_watcher = importlib.util.module_from_spec(watcher_spec)
+assert watcher_spec.loader is not None
+sys.modules[watcher_spec.name] = device_watcher
+watcher_spec.loader.exec_module(device_watcher)
+
+journal_spec = importlib.util.spec_from_file_location("backend.services.trip_journal", ROOT / "backend/services/trip_journal.py")
+trip_journal = importlib.util.module_from_spec(journal_spec)
+assert journal_spec.loader is not None
+sys.modules[journal_spec.name] = trip_journal
+journal_spec.loader.exec_module(trip_journal)
+
 spec = importlib.util.spec_from_file_location("obd_service_under_test", ROOT / "backend/services/obd_service.py")
 obd_service = importlib.util.module_from_spec(spec)
 assert spec.loader is not None
@@ -0,0 +1,112 @@
+import importlib.util
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+spec = importlib.util.spec_from_file_location("obd_log_manifest_under_test", ROOT / "backend/services/obd_log_manifest.py")
+manifest_module = importlib.util.module_from_spec(spec)
+assert spec.loader is not None
+spec.loader.exec_module(manifest_module)
+UploadManifest = manifest_module.UploadManifest
+
+
+def _write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a", encoding="utf-8") as handle:
+        handle.write(text)
+    return len(text)
+
+
+class UploadManifestTest(unittest.TestCase):
+    def _files(self, root):
+        return [(path, path.stat().st_size, path.stat().st_mtime) for path in root.rglob("*.jsonl")]
+
+    def test_only_new_or_changed_closed_sessions_and_the_open_tail_are_pending(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            old = root / "2026/05/01/vin/session-a.jsonl"
+            current = root / "2026/05/02/vin/session-b.jsonl"
+            _write(old, '{"a":1}\n')
+            _write(current, '{"b":1}\n')
+            manifest = UploadManifest(root)
+            manifest.reconcile(self._files(root))
+
+            first = manifest.pending([current])
+            self.assertEqual([(item["key"], item["mode"]) for item in first], [
+                ("2026/05/01/vin/session-a.jsonl", "append"),
+                ("2026/05/02/vin/session-b.jsonl", "tail"),
+            ])
+            for item in first:
+                manifest.mark_uploaded(item["key"], size=item["size"], sha256=item.get("sha256"), bytes_sent=item["size"], seconds=0.1)
+            manifest.save()
+
+            nbytes = _write(current, '{"b":2}\n')
+            manifest.note_write(current, nbytes, current.stat().st_mtime)
+            second = manifest.pending([current])
+            self.assertEqual([(item["key"], item["mode"], item["offset"]) for item in second], [
+                ("2026/05/02/vin/session-b.jsonl", "tail", 8),
+            ])
+
+            # Once the session closes its tail-only upload is confirmed by hash, without resending bytes.
+            manifest.mark_uploaded(second[0]["key"], size=16, sha256=None, bytes_sent=8, seconds=0.1)
+            closed = manifest.pending([])
+            self.assertEqual([(item["mode"], item["offset"]) for item in closed], [("append", 16)])
+
+    def test_upload_state_survives_restart_so_sync_resumes_after_a_drop(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            done = root / "2026/05/01/vin/session-a.jsonl"
+            todo = root / "2026/05/01/vin/session-b.jsonl"
+            _write(done, '{"a":1}\n')
+            _write(todo, '{"b":1}\n')
+            manifest = UploadManifest(root)
+            manifest.reconcile(self._files(root))
+            item = next(item for item in manifest.pending() if item["key"].endswith("session-a.jsonl"))
+            manifest.mark_uploaded(item["key"], size=item["size"], sha256=item["sha256"], bytes_sent=8, seconds=0.2)
+            manifest.save()
+
+            reloaded = UploadManifest(root)
+            reloaded.reconcile(self._files(root))
+
+            self.assertTrue(reloaded.is_uploaded(done))
+            self.assertFalse(reloaded.is_uploaded(todo))
+            self.assertEqual([item["key"] for item in reloaded.pending()], ["2026/05/01/vin/session-b.jsonl"])
+
+    def test_rewritten_closed_session_is_resent_in_full(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            path = root / "2026/05/01/vin/session-a.jsonl"
+            _write(path, '{"a":1}\n{"a":2}\n')
+            manifest = UploadManifest(root)
+            manifest.reconcile(self._files(root))
+            item = manifest.pending()[0]
+            manifest.mark_uploaded(item["key"], size=item["size"], sha256=item["sha256"], bytes_sent=16, seconds=0.1)
+
+            path.write_text('{"a":1}\n', encoding="utf-8")
+            manifest.note_file(path)
+
+            self.assertEqual([(entry["mode"], entry["offset"]) for entry in manifest.pending()], [("full", 0)])
+
+    def test_summary_rewritten_at_the_same_size_is_resent(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            path = root / "2026/05/01/vin/session-a.summary.jsonl"
+            _write(path, '{"partial":1}\n')
+            manifest = UploadManifest(root)
+            manifest.reconcile(self._files(root))
+            item = manifest.pending()[0]
+            manifest.mark_uploaded(item["key"], size=item["size"], sha256=item["sha256"], bytes_sent=14, seconds=0.1)
+
+            path.write_text('{"partial":0}\n', encoding="utf-8")
+            stat = path.stat()
+            manifest.reconcile([(path, stat.st_size, stat.st_mtime + 1)])
+
+            self.assertEqual([(entry["mode"], entry["offset"]) for entry in manifest.pending()], [("full", 0)])
+
+
+if __name__ == "__main__":
+    unittest.main()
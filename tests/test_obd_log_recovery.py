@@ -0,0 +1,108 @@
+import importlib.util
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+retention_spec = importlib.util.spec_from_file_location(
+    "backend.services.obd_log_retention", ROOT / "backend/services/obd_log_retention.py"
+)
+retention = importlib.util.module_from_spec(retention_spec)
+assert retention_spec.loader is not None
+sys.modules[retention_spec.name] = retention
+retention_spec.loader.exec_module(retention)
+
+spec = importlib.util.spec_from_file_location("obd_log_recovery_under_test", ROOT / "backend/services/obd_log_recovery.py")
+recovery = importlib.util.module_from_spec(spec)
+assert spec.loader is not None
+spec.loader.exec_module(recovery)
+
+
+def _record(index):
+    return {
+        "session_id": "session-2026-05-01T10-00-00Z",
+        "metadata": {"sample_time": f"2026-05-01T10:00:{index:02d}+00:00"},
+        "direct": {"speed_kmh": 40 + index, "rpm": 2000},
+        "inferred": {"trip_distance_km": index * 0.1},
+    }
+
+
+def _write_session(root, records, trailer=b""):
+    path = root / "2026/05/01/vin/session-2026-05-01T10-00-00Z.jsonl"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("wb") as handle:
+        for record in records:
+            handle.write(json.dumps(record, separators=(",", ":")).encode() + b"\n")
+        handle.write(trailer)
+    return path
+
+
+class LogRecoveryTest(unittest.TestCase):
+    def test_torn_and_zero_filled_tails_are_truncated_to_the_last_intact_record(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            path = _write_session(root, [_record(i) for i in range(5)])
+            intact = path.read_bytes()
+            torn = b'{"session_id":"x","metad\n' + b"\x00" * 512
+            with path.open("ab") as handle:
+                handle.write(torn)
+
+            removed = recovery.repair_tail(path)
+
+            self.assertEqual(path.read_bytes(), intact)
+            self.assertEqual(removed, len(torn))
+            self.assertEqual(recovery.repair_tail(path), 0)
+
+    def test_only_the_tail_window_is_inspected(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            # A corrupt record far from the end is outside the window and left alone.
+            path = _write_session(root, [_record(i) for i in range(40)], trailer=b'{"torn"')
+            with path.open("r+b") as handle:
+                handle.write(b"garbage")
+            size = path.stat().st_size
+
+            removed = recovery.repair_tail(path, tail_bytes=512)
+
+            self.assertEqual(removed, len(b'{"torn"'))
+            self.assertEqual(path.stat().st_size, size - removed)
+            self.assertTrue(path.read_bytes().startswith(b"garbage"))
+
+    def test_missing_summary_is_rebuilt_as_partial_and_replaced_before_deletion(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            path = _write_session(root, [_record(i) for i in range(30)], trailer=b'{"tor')
+            files = [(path, path.stat().st_size, path.stat().st_mtime)]
+
+            report = recovery.recover_log_tree(files)
+
+            summary_path = retention.summary_path_for(path)
+            self.assertEqual(report["repaired"], [path])
+            self.assertEqual(report["summaries"], [summary_path])
+            summary = json.loads(summary_path.read_text())
+            self.assertTrue(summary["partial"])
+            self.assertIsNone(summary["record_count"])
+            self.assertEqual(summary["duration_s"], 29.0)
+            self.assertEqual(summary["distance_km"], 2.9)
+
+            manager = retention.TelemetryRetentionManager(
+                root,
+                budget_bytes=0,
+                downsample_after_days=14,
+                downsample_interval_s=10,
+                raw_retention_days=180,
+                summary_retention_days=1825,
+            )
+            manager.rescan()
+            manager._delete_data(path, {"deleted": 0})
+            full = json.loads(summary_path.read_text())
+            self.assertNotIn("partial", full)
+            self.assertEqual(full["record_count"], 30)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+import importlib.util
+import json
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+spec = importlib.util.spec_from_file_location("obd_log_retention_under_test", ROOT / "backend/services/obd_log_retention.py")
+retention = importlib.util.module_from_spec(spec)
+assert spec.loader is not None
+sys.modules[spec.name] = retention
+spec.loader.exec_module(retention)
+
+NOW = datetime(2026, 6, 1, 12, 0, 0, tzinfo=timezone.utc)
+
+
+def _write_session(root, started_at, *, records=60, speed=50):
+    name = started_at.strftime("session-%Y-%m-%dT%H-%M-%SZ") + ".jsonl"
+    path = root / f"{started_at:%Y/%m/%d}" / "vin" / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as handle:
+        for index in range(records):
+            sample_time = (started_at + timedelta(seconds=index)).isoformat()
+            record = {
+                "session_id": path.stem,
+                "vin": "VIN",
+                "metadata": {"sample_time": sample_time},
+                "direct": {"speed_kmh": speed, "rpm": 2000 + index},
+                "inferred": {"trip_distance_km": index * 0.01, "trip_consumed_l": index * 0.001},
+                "padding": "x" * 200,
+            }
+            handle.write(json.dumps(record, separators=(",", ":")) + "\n")
+    return path
+
+
+class TelemetryRetentionManagerTest(unittest.TestCase):
+    def _manager(self, root, *, budget, synced=()):
+        synced = {Path(path) for path in synced}
+        return retention.TelemetryRetentionManager(
+            root,
+            budget_bytes=budget,
+            downsample_after_days=14,
+            downsample_interval_s=10,
+            raw_retention_days=180,
+            summary_retention_days=1825,
+            is_synced=lambda path, mtime: path in synced,
+            clock=NOW.timestamp,
+        )
+
+    def test_note_write_tracks_usage_without_rescanning(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            path = _write_session(root, NOW - timedelta(hours=1), records=3)
+            manager = self._manager(root, budget=10 ** 9)
+            manager.rescan()
+            initial = manager.usage_bytes
+
+            manager.note_write(path, 120)
+            manager.note_write(root / "notes.txt", 999)
+
+            self.assertEqual(initial, path.stat().st_size)
+            self.assertEqual(manager.usage_bytes, initial + 120)
+
+    def test_budget_sweep_deletes_synced_sessions_before_touching_unsynced_ones(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            synced = _write_session(root, NOW - timedelta(days=3))
+            unsynced = _write_session(root, NOW - timedelta(days=2))
+            current = _write_session(root, NOW - timedelta(hours=1))
+            budget = unsynced.stat().st_size + current.stat().st_size + 4096
+            manager = self._manager(root, budget=budget, synced=[synced])
+
+            report = manager.enforce(protected=[current])
+
+            self.assertFalse(synced.exists())
+            self.assertTrue(retention.summary_path_for(synced).exists())
+            self.assertTrue(unsynced.exists())
+            self.assertTrue(current.exists())
+            self.assertEqual(report["deleted"], 1)
+            self.assertEqual(report["downsampled"], 0)
+            self.assertFalse(report["over_budget"])
+
+    def test_unsynced_sessions_are_downsampled_before_being_deleted(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            unsynced = _write_session(root, NOW - timedelta(days=2))
+            current = _write_session(root, NOW - timedelta(hours=1))
+            budget = current.stat().st_size + unsynced.stat().st_size // 3
+            manager = self._manager(root, budget=budget)
+
+            report = manager.enforce(protected=[current])
+
+            downsampled = retention.downsampled_path_for(unsynced)
+            self.assertFalse(unsynced.exists())
+            self.assertTrue(downsampled.exists())
+            self.assertEqual(report["downsampled"], 1)
+            self.assertEqual(report["deleted"], 0)
+            kept = list(retention.iter_records(downsampled))
+            self.assertEqual(len(kept), 6)
+            summary = json.loads(retention.summary_path_for(unsynced).read_text())
+            self.assertEqual(summary["record_count"], 60)
+            self.assertEqual(summary["max_rpm"], 2059)
+
+    def test_age_sweep_keeps_summaries_longer_than_raw_data(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            expired = _write_session(root, NOW - timedelta(days=200))
+            stale = _write_session(root, NOW - timedelta(days=20))
+            manager = self._manager(root, budget=10 ** 9)
+
+            manager.enforce()
+
+            self.assertFalse(expired.exists())
+            self.assertTrue(retention.summary_path_for(expired).exists())
+            self.assertFalse(stale.exists())
+            self.assertTrue(retention.downsampled_path_for(stale).exists())
+            self.assertFalse(manager.needs_enforcement())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+import importlib.util
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+
+def _load(name, relative_path):
+    spec = importlib.util.spec_from_file_location(name, ROOT / relative_path)
+    module = importlib.util.module_from_spec(spec)
+    assert spec.loader is not None
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+sdr_iq = _load("backend.services.sdr_iq", "backend/services/sdr_iq.py")
+sdr_adsb = _load("backend.services.sdr_adsb", "backend/services/sdr_adsb.py")
+
+CALLSIGN = "8D4840D6202CC371C32CE0576098"   # KLM1023
+EVEN = "8D40621D58C382D690C8AC2863A7"       # 38000 ft, even CPR frame
+ODD = "8D40621D58C386435CC412692AD6"        # 38000 ft, odd CPR frame
+VELOCITY = "8D485020994409940838175B284F"   # 159 kt, track 183, -832 fpm
+
+
+def _burst(message_hex, amplitude, phase):
+    bits = np.unpackbits(np.frombuffer(bytes.fromhex(message_hex), dtype=np.uint8))
+    chips = np.zeros(sdr_adsb.MESSAGE_SAMPLES)
+    chips[list(sdr_adsb.PULSES)] = 1
+    chips[16::2] = bits
+    chips[17::2] = 1 - bits
+    return amplitude * chips * np.exp(1j * phase)
+
+
+def _recording(messages, samples=600_000, noise=0.02, seed=11):
+    """rtl_sdr-style interleaved uint8 capture with `messages` at (start, hex)."""
+    rng = np.random.default_rng(seed)
+    iq = noise * (rng.standard_normal(samples) + 1j * rng.standard_normal(samples))
+    for start, message_hex in messages:
+        iq[start:start + sdr_adsb.MESSAGE_SAMPLES] += _burst(message_hex, 0.4, rng.uniform(0, 2 * np.pi))
+    interleaved = np.empty(2 * samples)
+    interleaved[0::2], interleaved[1::2] = iq.real, iq.imag
+    return np.clip(np.round(interleaved * 128 + 127.4), 0, 255).astype(np.uint8).tobytes()
+
+
+class RecordingSource:
+    """Replays a uint8 IQ file block by block, like a dongle that never retunes."""
+
+    sample_rate = sdr_adsb.ADSB_SAMPLE_RATE
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self.center = None
+
+    def set_center_freq(self, hz):
+        self.center = hz
+
+    def read(self, count):
+        raw = self._file.read(2 * count)
+        return sdr_iq.uint8_to_complex(raw) if raw else None
+
+    def close(self):
+        self._file.close()
+
+
+class SdrAdsbTest(unittest.TestCase):
+    def test_crc_and_field_decoding_of_reference_messages(self):
+        messages = np.array([list(bytes.fromhex(item)) for item in (CALLSIGN, EVEN, ODD, VELOCITY)], dtype=np.uint8)
+        np.testing.assert_array_equal(sdr_adsb.crc24(messages), sdr_adsb._parity(messages))
+        corrupted = messages.copy()
+        corrupted[:, 6] ^= 0x10
+        self.assertFalse(np.any(sdr_adsb.crc24(corrupted) == sdr_adsb._parity(corrupted)))
+
+        self.assertEqual(sdr_adsb.decode_message(bytes.fromhex(CALLSIGN))["callsign"], "KLM1023")
+        even = sdr_adsb.decode_message(bytes.fromhex(EVEN))
+        self.assertEqual((even["icao"], even["altitude_ft"], even["cpr_odd"]), ("40621D", 38000, False))
+        velocity = sdr_adsb.decode_message(bytes.fromhex(VELOCITY))
+        self.assertAlmostEqual(velocity["ground_speed_kt"], 159.2, places=1)
+        self.assertAlmostEqual(velocity["track_deg"], 182.9, places=1)
+        self.assertEqual(velocity["vertical_rate_fpm"], -832)
+
+    def test_cpr_positions_global_pair_and_local_reference(self):
+        even = sdr_adsb.decode_message(bytes.fromhex(EVEN))["cpr"]
+        odd = sdr_adsb.decode_message(bytes.fromhex(ODD))["cpr"]
+        self.assertEqual(sdr_adsb.cpr_global(even, odd, latest_odd=False), (52.2572, 3.91937))
+        self.assertEqual(sdr_adsb.cpr_local(even, False, (52.0, 4.0)), (52.2572, 3.91937))
+
+        table = sdr_adsb.AircraftTable(ttl_s=60)
+        table.update(sdr_adsb.decode_message(bytes.fromhex(ODD)), now=100.0)
+        self.assertIsNone(table.snapshot(now=100.0)[0]["lat"])  # One frame, no reference yet
+        entry = table.update(sdr_adsb.decode_message(bytes.fromhex(EVEN)), now=101.0)
+        self.assertEqual((entry["lat"], entry["lon"]), (52.2572, 3.91937))
+        self.assertEqual(table.expire(now=200.0), 1)
+        self.assertEqual(len(table), 0)
+
+    def test_receiver_builds_aircraft_table_from_recorded_iq(self):
+        block = 65_536
+        # One burst straddles a block boundary; KLM1023 is heard twice.
+        messages = [(10_000, CALLSIGN), (block - 100, EVEN), (200_000, ODD), (400_000, VELOCITY), (500_000, CALLSIGN)]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "adsb.cu8"
+            path.write_bytes(_recording(messages))
+            source = RecordingSource(path)
+            receiver = sdr_adsb.AdsbReceiver(source, block_samples=block)
+            while receiver.step():
+                pass
+            source.close()
+
+        status = receiver.get_status()
+        self.assertEqual(status["messages"], len(messages))
+        aircraft = {plane["icao"]: plane for plane in status["aircraft"]}
+        self.assertEqual(aircraft["4840D6"]["callsign"], "KLM1023")
+        self.assertEqual(aircraft["4840D6"]["messages"], 2)
+        self.assertEqual((aircraft["40621D"]["lat"], aircraft["40621D"]["lon"], aircraft["40621D"]["altitude_ft"]),
+                         (52.26578, 3.93891, 38000))
+        self.assertEqual(aircraft["485020"]["vertical_rate_fpm"], -832)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+
+import numpy as np
+
+from sdr_fixtures import FS, ListSink, TunableSource, am_tone, dominant_hz, load
+
+sdr_dsp = load("backend.services.sdr_dsp", "backend/services/sdr_dsp.py")
+sdr_channelizer = load("backend.services.sdr_channelizer", "backend/services/sdr_channelizer.py")
+sdr_rds = load("backend.services.sdr_rds", "backend/services/sdr_rds.py")
+sdr_pipeline = load("backend.services.sdr_pipeline", "backend/services/sdr_pipeline.py")
+
+
+class ChannelizerTest(unittest.TestCase):
+    def test_channels_land_in_their_columns_and_reject_neighbours(self):
+        t = np.arange(4 * 32768) / FS
+        iq = (0.1 * np.exp(2j * np.pi * 75_000 * t) + 0.05 * np.exp(-2j * np.pi * 500_000 * t)).astype(np.complex64)
+        whole = sdr_channelizer.PolyphaseChannelizer(96).process(iq)
+        chunked = sdr_channelizer.PolyphaseChannelizer(96)
+        pieces = np.concatenate([chunked.process(iq[start:start + 30000]) for start in range(0, len(iq), 30000)])
+
+        np.testing.assert_allclose(pieces[:len(whole)], whole, rtol=1e-3, atol=1e-5)
+        power = 10 * np.log10((np.abs(whole[20:]) ** 2).mean(axis=0))
+        self.assertAlmostEqual(power[3], -20.0, delta=0.5)        # +75 kHz, 25 kHz spacing
+        self.assertAlmostEqual(power[96 - 20], -26.0, delta=0.5)  # -500 kHz
+        self.assertLess(max(power[2], power[4]), -70.0)
+
+    def test_plan_keeps_the_channels_that_fit_in_one_capture(self):
+        sbsj = [118_500_000, 119_250_000, 129_050_000, 121_900_000, 127_650_000]
+        center, monitored, skipped = sdr_channelizer.plan_channels(sbsj, FS)
+
+        self.assertEqual(monitored, [118_500_000, 119_250_000])
+        self.assertEqual(skipped, [129_050_000, 121_900_000, 127_650_000])
+        self.assertEqual(center % 25_000, 0)
+        self.assertNotIn(center, monitored)
+        self.assertTrue(all(abs(freq - center) <= FS * 0.4 for freq in monitored))
+
+    def test_scanner_routes_the_first_active_channel_without_retuning(self):
+        # Transmitters are keyed on and off through source.keyed.
+        source = TunableSource([am_tone(118_500_000, 700, 0.1), am_tone(119_250_000, 1100, 0.1)], noise=0.002, seed=7, keyed=set())
+        sink = ListSink()
+        pipeline = sdr_pipeline.IQPipeline(source, audio_sink=sink)
+        pipeline.configure(scan_mhz=[118.5, 119.25])
+        for _ in range(6):
+            pipeline.step()
+        self.assertIsNone(pipeline.stats["scanner"]["active_hz"])
+        self.assertFalse(np.any(sink.blocks[-1]))
+        self.assertEqual(pipeline.get_status()["mode"], "SCAN")
+
+        source.keyed = {119_250_000}
+        sink.blocks.clear()
+        for _ in range(10):
+            pipeline.step()
+        self.assertEqual(pipeline.stats["scanner"]["active_hz"], 119_250_000)
+        self.assertAlmostEqual(dominant_hz(sink.blocks[3:], sdr_pipeline.AUDIO_RATE), 1100, delta=20)
+
+        # The busy lower-priority channel keeps the audio until it goes quiet.
+        source.keyed = {118_500_000, 119_250_000}
+        for _ in range(4):
+            pipeline.step()
+        self.assertEqual(pipeline.stats["scanner"]["active_hz"], 119_250_000)
+        source.keyed = {118_500_000}
+        sink.blocks.clear()
+        for _ in range(10):
+            pipeline.step()
+        self.assertEqual(pipeline.stats["scanner"]["active_hz"], 118_500_000)
+        self.assertAlmostEqual(dominant_hz(sink.blocks[3:], sdr_pipeline.AUDIO_RATE), 700, delta=20)
+        self.assertEqual(len(source.tunes), 1)
+
+        # Tuning a frequency leaves the scanner and retunes the hardware.
+        pipeline.configure(frequency_mhz=118.5, mode="AM")
+        pipeline.step()
+        self.assertIsNone(pipeline.stats["scanner"])
+        self.assertEqual(source.center, 118_750_000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from sdr_fixtures import FS, ListSink, TunableSource, dominant_hz, fm_tone, load
+
+sdr_iq = load("backend.services.sdr_iq", "backend/services/sdr_iq.py")
+sdr_dsp = load("backend.services.sdr_dsp", "backend/services/sdr_dsp.py")
+sdr_channelizer = load("backend.services.sdr_channelizer", "backend/services/sdr_channelizer.py")
+sdr_rds = load("backend.services.sdr_rds", "backend/services/sdr_rds.py")
+sdr_pipeline = load("backend.services.sdr_pipeline", "backend/services/sdr_pipeline.py")
+
+
+def _noise(count, seed=2):
+    rng = np.random.default_rng(seed)
+    return (0.2 * (rng.standard_normal(count) + 1j * rng.standard_normal(count))).astype(np.complex64)
+
+
+class SdrIqTest(unittest.TestCase):
+    def test_recordings_round_trip_through_the_memmap_source(self):
+        samples = _noise(50_000)
+        with tempfile.TemporaryDirectory() as tmp:
+            for fmt, tolerance in (("cu8", 1 / 128), ("cf32", 0)):
+                path = str(Path(tmp) / f"capture-{fmt}.pciq")
+                recorder = sdr_iq.IQRecorder(path, FS, 99_750_000, fmt=fmt)
+                for start in range(0, len(samples), 16_384):
+                    self.assertTrue(recorder.write(samples[start:start + 16_384], 99_750_000))
+                recorder.close()
+
+                header = sdr_iq.read_iq_header(path)
+                self.assertEqual((header["format"], header["sample_rate"], header["center_freq"], header["samples"]),
+                                 (fmt, FS, 99_750_000, len(samples)))
+                source = sdr_iq.IQFileSource(path, realtime=False)
+                blocks = []
+                while (block := source.read(7_000)) is not None:
+                    blocks.append(block)
+                replayed = np.concatenate(blocks)
+                source.close()
+                self.assertEqual(len(replayed), len(samples))
+                self.assertLessEqual(float(np.max(np.abs(replayed - samples))), tolerance)
+
+    def test_recorder_stops_at_its_limit_and_on_a_hardware_retune(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            limited = sdr_iq.IQRecorder(str(Path(tmp) / "limit.pciq"), FS, 100_000_000, max_seconds=0.01)
+            self.assertFalse(limited.write(_noise(30_000), 100_000_000))
+            limited.close()
+            self.assertEqual((limited.samples, limited.reason), (24_000, "limit"))
+            self.assertEqual(sdr_iq.read_iq_header(limited.path)["samples"], 24_000)
+
+            retuned = sdr_iq.IQRecorder(str(Path(tmp) / "retune.pciq"), FS, 100_000_000)
+            self.assertTrue(retuned.write(_noise(1_000), 100_000_000))
+            self.assertFalse(retuned.write(_noise(1_000), 101_000_000))
+            retuned.close()
+            self.assertEqual((retuned.samples, retuned.reason, retuned.active), (1_000, "retuned", False))
+            self.assertEqual(sdr_iq.read_iq_header(retuned.path)["samples"], 1_000)
+
+    def test_slow_disk_ends_the_recording_instead_of_leaving_a_gap(self):
+        class GatedFile:
+            def __init__(self, handle):
+                self.handle = handle
+                self.gate = threading.Event()
+
+            def write(self, data):
+                self.gate.wait()
+                return self.handle.write(data)
+
+            def close(self):
+                self.handle.close()
+
+        samples = _noise(4_000)
+        with tempfile.TemporaryDirectory() as tmp:
+            recorder = sdr_iq.IQRecorder(str(Path(tmp) / "slow.pciq"), FS, 100_000_000, fmt="cf32", max_blocks=1)
+            gated = recorder._file = GatedFile(recorder._file)
+            started = time.monotonic()
+            results = []
+            for start in range(0, len(samples), 1_000):
+                results.append(recorder.write(samples[start:start + 1_000], 100_000_000))
+                time.sleep(0.05)  # Let the writer pick the first block and stall on it
+            self.assertLess(time.monotonic() - started, 1.0)
+            # Block 1 is being written, block 2 fills the queue, block 3 overruns.
+            self.assertEqual(results, [True, True, False, False])
+            self.assertEqual((recorder.reason, recorder.active), ("overrun", False))
+            gated.gate.set()
+            recorder.close()
+
+            self.assertEqual((recorder.samples, recorder.reason), (2_000, "overrun"))
+            source = sdr_iq.IQFileSource(recorder.path, realtime=False)
+            replayed = source.read(2_000)
+            self.assertIsNone(source.read(1))
+            source.close()
+        np.testing.assert_array_equal(replayed, samples[:2_000])
+
+    def test_realtime_replay_is_paced_and_loops(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = str(Path(tmp) / "short.pciq")
+            recorder = sdr_iq.IQRecorder(path, 240_000, 100_000_000)
+            recorder.write(_noise(24_000))  # 100 ms
+            recorder.close()
+
+            source = sdr_iq.IQFileSource(path, realtime=True, loop=True)
+            started = time.monotonic()
+            blocks = [source.read(12_000) for _ in range(4)]  # Two passes over the file
+            elapsed = time.monotonic() - started
+            source.close()
+        self.assertTrue(all(block is not None and len(block) == 12_000 for block in blocks))
+        np.testing.assert_array_equal(blocks[0], blocks[2])
+        self.assertGreaterEqual(elapsed, 0.19)
+
+    def test_pipeline_replays_what_it_recorded(self):
+        live = sdr_pipeline.IQPipeline(TunableSource([fm_tone(99_500_000, 1_000, 0.5)]), rds=False)
+        live.configure(frequency_mhz=99.5, mode="FM")
+        with tempfile.TemporaryDirectory() as tmp:
+            live.apply_pending()
+            recorder = sdr_iq.IQRecorder(str(Path(tmp) / "fm.pciq"), FS, live.center_freq_hz)
+            live.add_consumer(recorder.write)
+            for _ in range(30):
+                live.step()
+            recorder.close()
+
+            source = sdr_iq.IQFileSource(recorder.path, realtime=False)
+            sink = ListSink()
+            replay = sdr_pipeline.IQPipeline(source, audio_sink=sink, rds=False)
+            # The first tune asks for another centre; the file cannot move, so
+            # the station is then found with the NCO relative to the recording.
+            replay.configure(frequency_mhz=99.4, mode="FM")
+            replay.step()
+            replay.configure(frequency_mhz=99.5)
+            while replay.step():
+                pass
+            source.close()
+
+        self.assertEqual(source.requested_center_freq, 99_650_000)
+        self.assertEqual(replay.center_freq_hz, live.center_freq_hz)
+        self.assertEqual(replay.stats["nco_retunes"], 1)
+        self.assertAlmostEqual(dominant_hz(sink.blocks[5:], sdr_pipeline.AUDIO_RATE), 1_000, delta=30)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import unittest
+
+import numpy as np
+
+from sdr_fixtures import FS, ListSink, TunableSource, am_tone, dominant_hz, fm_tone, load
+
+sdr_dsp = load("backend.services.sdr_dsp", "backend/services/sdr_dsp.py")
+sdr_rds = load("backend.services.sdr_rds", "backend/services/sdr_rds.py")
+sdr_pipeline = load("backend.services.sdr_pipeline", "backend/services/sdr_pipeline.py")
+sdr_spectrum = load("backend.services.sdr_spectrum", "backend/services/sdr_spectrum.py")
+
+
+class SdrPipelineTest(unittest.TestCase):
+    def test_fir_decimator_is_seamless_across_block_boundaries(self):
+        rng = np.random.default_rng(3)
+        signal = (rng.standard_normal(5000) + 1j * rng.standard_normal(5000)).astype(np.complex64)
+        taps = sdr_dsp.lowpass_taps(63, 0.05)
+        whole = sdr_dsp.FirDecimator(taps, 7).process(signal)
+        chunked = sdr_dsp.FirDecimator(taps, 7)
+        pieces = [chunked.process(signal[start:start + size]) for start, size in ((0, 1000), (1000, 333), (1333, 3667))]
+        np.testing.assert_allclose(np.concatenate(pieces), whole, rtol=1e-4, atol=1e-5)
+
+    def test_fm_retunes_apply_within_a_block_without_reopening(self):
+        source = TunableSource([fm_tone(97_500_000, 1000), fm_tone(97_900_000, 2500), fm_tone(101_300_000, 400)], noise=0.01)
+        sink = ListSink()
+        pipeline = sdr_pipeline.IQPipeline(source, audio_sink=sink)
+
+        pipeline.configure(frequency_mhz=97.5, gain=28.0)
+        for _ in range(8):
+            self.assertTrue(pipeline.step())
+        self.assertEqual(source.gains, [28.0])
+        self.assertEqual(pipeline.stats["hardware_retunes"], 1)
+        self.assertAlmostEqual(dominant_hz(sink.blocks[3:], sdr_pipeline.AUDIO_RATE), 1000, delta=20)
+
+        # 400 kHz away is still inside the 2.4 MHz capture: only the NCO moves.
+        sink.blocks.clear()
+        pipeline.configure(frequency_mhz=97.9)
+        for _ in range(8):
+            pipeline.step()
+        self.assertEqual(pipeline.stats["nco_retunes"], 1)
+        self.assertEqual(pipeline.stats["hardware_retunes"], 1)
+        self.assertLess(pipeline.stats["last_apply_ms"], 50)
+        self.assertAlmostEqual(dominant_hz(sink.blocks[2:], sdr_pipeline.AUDIO_RATE), 2500, delta=20)
+
+        sink.blocks.clear()
+        pipeline.configure(frequency_mhz=101.3)
+        for _ in range(8):
+            pipeline.step()
+        self.assertEqual(pipeline.stats["hardware_retunes"], 2)
+        self.assertEqual(len(sink.blocks), 7)  # One block flushed after the hardware retune
+        self.assertAlmostEqual(dominant_hz(sink.blocks[2:], sdr_pipeline.AUDIO_RATE), 400, delta=20)
+
+    def test_am_squelch_mutes_an_empty_channel_and_opens_on_a_carrier(self):
+        source = TunableSource([am_tone(118_500_000, 700)], noise=0.002)
+        sink = ListSink()
+        pipeline = sdr_pipeline.IQPipeline(source, audio_sink=sink)
+
+        pipeline.configure(frequency_mhz=119.25, mode="AM")
+        for _ in range(6):
+            pipeline.step()
+        self.assertFalse(pipeline.stats["squelch_open"])
+        self.assertFalse(np.any(sink.blocks[-1]))
+
+        sink.blocks.clear()
+        pipeline.configure(frequency_mhz=118.5)
+        for _ in range(8):
+            pipeline.step()
+        self.assertTrue(pipeline.stats["squelch_open"])
+        self.assertAlmostEqual(dominant_hz(sink.blocks[3:], sdr_pipeline.AUDIO_RATE), 700, delta=20)
+
+    def test_signal_meter_reports_rssi_noise_floor_and_snr(self):
+        source = TunableSource([fm_tone(97_500_000, 1000), fm_tone(98_300_000, 2500)], noise=0.01)
+        pipeline = sdr_pipeline.IQPipeline(source)
+        pipeline.configure(frequency_mhz=97.5)
+        for _ in range(10):
+            pipeline.step()
+
+        # Complex noise with sigma 0.01 per rail: 2e-4 of full scale over 2.4 MHz.
+        expected_noise_db = 10 * np.log10(2e-4 * 240_000 / FS)
+        expected_rssi_db = 10 * np.log10(0.09 + 2e-4 * 240_000 / FS)
+        self.assertAlmostEqual(pipeline.stats["noise_floor_db"], expected_noise_db, delta=1.5)
+        self.assertAlmostEqual(pipeline.stats["rssi_db"], expected_rssi_db, delta=1.0)
+        self.assertAlmostEqual(pipeline.stats["snr_db"], expected_rssi_db - expected_noise_db, delta=2.0)
+
+        # An empty channel reads close to 0 dB SNR.
+        pipeline.configure(frequency_mhz=97.9)
+        for _ in range(10):
+            pipeline.step()
+        self.assertLess(pipeline.stats["snr_db"], 3.0)
+
+    def test_waterfall_shares_the_audio_iq_blocks(self):
+        source = TunableSource([fm_tone(97_500_000, 1000), fm_tone(98_100_000, 2500)], noise=0.01)
+        sink = ListSink()
+        pipeline = sdr_pipeline.IQPipeline(source, audio_sink=sink)
+        engine = sdr_spectrum.SpectrumEngine(FS, frame_interval_s=0.0, integration_s=0.0)
+        engine.start()
+        seen = []
+        pipeline.add_consumer(lambda samples, center: seen.append(samples))
+        pipeline.add_consumer(engine.feed)
+
+        pipeline.configure(frequency_mhz=97.5)
+        for _ in range(8):
+            pipeline.step()
+
+        self.assertEqual(len(seen), 7)
+        self.assertEqual(engine.frames, 7)
+        self.assertEqual(pipeline.stats["consumers"], 2)
+        self.assertAlmostEqual(dominant_hz(sink.blocks[3:], sdr_pipeline.AUDIO_RATE), 1000, delta=20)
+        frame = engine.latest(span_mhz=1.6, center_mhz=97.5)
+        self.assertAlmostEqual(frame["frequency"], 97.5, delta=0.01)
+        fft = np.array(frame["fft"])
+        freqs = frame["start_freq"] + (np.arange(frame["bins"]) + 0.5) * frame["span"] / frame["bins"]
+        for station in (97.5, 98.1):
+            self.assertGreater(fft[np.abs(freqs - station) < 0.05].max(), np.median(fft) + 20)
+
+        pipeline.remove_consumer(engine.feed)
+        pipeline.step()
+        self.assertEqual(engine.frames, 7)
+        self.assertEqual(len(seen), 8)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+from datetime import datetime, timezone
+
+import numpy as np
+
+from sdr_fixtures import TunableSource, fm_mpx, load
+
+sdr_dsp = load("backend.services.sdr_dsp", "backend/services/sdr_dsp.py")
+sdr_channelizer = load("backend.services.sdr_channelizer", "backend/services/sdr_channelizer.py")
+sdr_rds = load("backend.services.sdr_rds", "backend/services/sdr_rds.py")
+sdr_pipeline = load("backend.services.sdr_pipeline", "backend/services/sdr_pipeline.py")
+
+MPX_RATE = 240_000
+CLOCK = datetime(2026, 10, 19, 14, 35, tzinfo=timezone.utc)
+
+
+def _station_bits(repeats=3):
+    bits = sdr_rds.encode_station(0xE123, 10, "PICAR FM", "Tocando agora: teste RDS", CLOCK)
+    return np.tile(bits, repeats)
+
+
+def _mpx(bits, seed=3):
+    """Mono audio + pilot + RDS, as the FM discriminator would output it."""
+    rng = np.random.default_rng(seed)
+    rds = sdr_rds.rds_waveform(bits, MPX_RATE, phase=1.3)
+    t = np.arange(len(rds)) / MPX_RATE
+    audio = 0.5 * np.sin(2 * np.pi * 1_000 * t) + 0.1 * np.cos(2 * np.pi * 19_000 * t)
+    return (rds + audio + 0.01 * rng.standard_normal(len(rds))).astype(np.float32)
+
+
+class SdrRdsTest(unittest.TestCase):
+    def test_block_offsets_accept_valid_blocks_and_reject_bit_errors(self):
+        bits = sdr_rds.encode_blocks([0xE123, 0x0140, 0xE0CD, 0x5049], ["A", "B", "C'", "D"])
+        offsets = sdr_rds.block_offsets(bits)
+
+        self.assertEqual(
+            [int(offsets[position]) for position in (0, 26, 52, 78)],
+            [sdr_rds.OFFSETS[name] for name in ("A", "B", "C'", "D")],
+        )
+        corrupted = bits.copy()
+        corrupted[30] ^= 1
+        self.assertEqual(int(sdr_rds.block_offsets(corrupted)[26]), 0)
+
+    def test_decodes_ps_radiotext_pty_and_clock_from_mpx(self):
+        mpx = _mpx(_station_bits())
+        decoder = sdr_rds.RdsDecoder(MPX_RATE)
+        rng = np.random.default_rng(5)
+        position = 0
+        while position < len(mpx):
+            size = int(rng.integers(500, 5000))  # Uneven blocks: state must carry across calls
+            decoder.process(mpx[position:position + size])
+            position += size
+
+        status = decoder.get_status()
+        self.assertTrue(status["synced"])
+        self.assertEqual(status["pi"], "E123")
+        self.assertEqual(status["ps"], "PICAR FM")
+        self.assertEqual(status["radiotext"], "Tocando agora: teste RDS")
+        self.assertEqual((status["pty"], status["pty_name"]), (10, "Pop Music"))
+        self.assertEqual(status["clock"], "2026-10-19T14:35:00+00:00")
+
+        decoder.reset()
+        self.assertIsNone(decoder.get_status()["ps"])
+
+    def test_radiotext_terminator_ends_the_message_and_clears_older_text(self):
+        groups = sdr_rds.RdsGroups()
+
+        def segment(index, text):
+            codes = [ord(char) for char in text]
+            b = 0x2000 | index  # Group 2A, A/B flag 0
+            groups.handle([0xE123, b, codes[0] << 8 | codes[1], codes[2] << 8 | codes[3]], version_b=False)
+
+        for index, text in enumerate(("Long", " old", " tex", "t on")):
+            segment(index, text)
+        self.assertEqual(groups.radiotext, "Long old text on")
+
+        segment(0, "HI\rX")
+        self.assertEqual(groups.radiotext, "HI")
+
+    def test_iq_pipeline_publishes_rds_alongside_audio(self):
+        source = TunableSource([fm_mpx(99_500_000, _mpx(_station_bits(repeats=2)), MPX_RATE)])
+        pipeline = sdr_pipeline.IQPipeline(source)
+        pipeline.configure(frequency_mhz=99.5, mode="FM")
+        while pipeline.step():
+            pass
+
+        rds = pipeline.get_status()["rds"]
+        self.assertEqual(rds["ps"], "PICAR FM")
+        self.assertEqual(rds["radiotext"], "Tocando agora: teste RDS")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from sdr_fixtures import FS, ListSink, TunableSource, fm_tone, load
+
+sdr_dsp = load("backend.services.sdr_dsp", "backend/services/sdr_dsp.py")
+sdr_spectrum = load("backend.services.sdr_spectrum", "backend/services/sdr_spectrum.py")
+sdr_rds = load("backend.services.sdr_rds", "backend/services/sdr_rds.py")
+sdr_pipeline = load("backend.services.sdr_pipeline", "backend/services/sdr_pipeline.py")
+sdr_scan = load("backend.services.sdr_scan", "backend/services/sdr_scan.py")
+rtlsdr_service = load("rtlsdr_service_under_test", "backend/services/rtlsdr_service.py")
+
+
+def _carriers(stations):
+    """Lightly modulated FM carriers (frequency_hz, amplitude) over a low noise floor."""
+    return TunableSource([fm_tone(frequency, 1000, amplitude, deviation_hz=50_000) for frequency, amplitude in stations],
+                         noise=0.003, seed=5)
+
+
+class FmScanTest(unittest.TestCase):
+    def test_scan_finds_carriers_on_the_grid_ranked_by_snr(self):
+        source = _carriers([(89_300_000, 0.05), (97_500_000, 0.2), (97_900_000, 0.02), (107_900_000, 0.1)])
+
+        result = sdr_scan.scan_band(source)
+
+        centers = sdr_scan.hop_centers(sdr_scan.FM_BAND_START_HZ, sdr_scan.FM_BAND_END_HZ, FS)
+        self.assertEqual(result["hops"], len(centers))
+        self.assertEqual(len(centers), 11)
+        self.assertLessEqual(centers[0] - FS * 0.4, sdr_scan.FM_BAND_START_HZ)
+        self.assertGreaterEqual(centers[-1] + FS * 0.4, sdr_scan.FM_BAND_END_HZ)
+        self.assertEqual([station["freq"] for station in result["stations"]], [97.5, 107.9, 89.3, 97.9])
+        snrs = [station["snr_db"] for station in result["stations"]]
+        self.assertEqual(snrs, sorted(snrs, reverse=True))
+        self.assertGreater(snrs[-1], sdr_scan.MIN_SNR_DB)
+
+    def test_station_cache_is_keyed_by_grid_cell(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "stations.json"
+            cache = sdr_scan.StationCache(str(path))
+            self.assertIsNone(cache.get(-23.2, -45.9))
+            cache.put(-23.2, -45.9, [{"freq": 97.5, "snr_db": 30.0, "power_db": -20.0}])
+
+            reloaded = sdr_scan.StationCache(str(path))
+            # A few km away is the same cell; Sao Paulo is not.
+            self.assertEqual(reloaded.get(-23.21, -45.88)["stations"][0]["freq"], 97.5)
+            self.assertIsNone(reloaded.get(-23.55, -46.63))
+            self.assertIsNone(reloaded.get(None, None))
+
+    def test_running_pipeline_lends_its_source_and_retunes_back(self):
+        source = _carriers([(97_500_000, 0.2)])
+        pipeline = sdr_pipeline.IQPipeline(source, audio_sink=ListSink())
+        pipeline.configure(frequency_mhz=97.5)
+        pipeline.start()
+        try:
+            seen = pipeline.borrow_source(lambda borrowed: borrowed.center, timeout=5)
+            self.assertEqual(seen, 97_750_000)
+            deadline = time.monotonic() + 5
+            while pipeline.stats["hardware_retunes"] < 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            pipeline.stop()
+        self.assertEqual(pipeline.stats["hardware_retunes"], 2)
+        self.assertEqual(source.center, 97_750_000)
+
+    def test_scan_is_refused_while_a_recording_stands_in_for_the_dongle(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            service = rtlsdr_service.RTLSDRService()
+            service._station_cache = sdr_scan.StationCache(str(Path(tmp) / "stations.json"))
+            service._position = lambda: (-23.2, -45.9)
+            service._replay = {"path": str(Path(tmp) / "fm.pciq"), "realtime": True, "loop": True}
+            # What sweeping a recording yields: its one band slice at every hop.
+            service._scan_with_own_source = lambda scan: {
+                "stations": [{"freq": 97.5, "snr_db": 30.0, "power_db": -20.0}], "duration_s": 0.1, "hops": 9,
+            }
+
+            result = service.scan_fm_band(force=True)
+
+            self.assertIn("error", result)
+            self.assertIsNone(service._station_cache.get(-23.2, -45.9))
+            self.assertFalse(service._scan_lock.locked())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import importlib.util
+import sys
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+
+def _load(name, relative_path):
+    spec = importlib.util.spec_from_file_location(name, ROOT / relative_path)
+    module = importlib.util.module_from_spec(spec)
+    assert spec.loader is not None
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+sdr_spectrum = _load("backend.services.sdr_spectrum", "backend/services/sdr_spectrum.py")
+
+FS = 2_400_000
+
+
+def _tone(offset_hz, count, amplitude=0.5, noise=0.001, seed=3):
+    rng = np.random.default_rng(seed)
+    t = np.arange(count) / FS
+    iq = amplitude * np.exp(2j * np.pi * offset_hz * t)
+    iq += noise * (rng.standard_normal(count) + 1j * rng.standard_normal(count))
+    return iq.astype(np.complex64)
+
+
+class SpectrumEngineTests(unittest.TestCase):
+    def test_tone_peaks_at_its_frequency(self):
+        engine = sdr_spectrum.SpectrumEngine(FS, integration_s=0.01)
+        self.assertTrue(engine.feed(_tone(300_000, 32768), 100_000_000, now=0.0))
+
+        frame = engine.latest(span_mhz=2.4)
+        fft = np.array(frame["fft"])
+        peak_mhz = frame["start_freq"] + (np.argmax(fft) + 0.5) * frame["span"] / frame["bins"]
+        self.assertAlmostEqual(peak_mhz, 100.3, delta=0.01)
+        self.assertGreater(fft.max(), -10)
+        self.assertLess(np.median(fft), fft.max() - 40)
+        self.assertEqual(frame["bins"], sdr_spectrum.TARGET_BINS)
+
+    def test_frames_are_rate_limited_and_blocks_between_them_skipped(self):
+        engine = sdr_spectrum.SpectrumEngine(FS, frame_interval_s=0.1, integration_s=0.0)
+        block = _tone(0, 4096)
+        produced = [engine.feed(block, 100_000_000, now=i * 0.01) for i in range(100)]
+
+        self.assertEqual(sum(produced), 10)
+        self.assertEqual(engine.ring.seq, 10)
+
+    def test_ring_wraps_and_since_returns_newest(self):
+        ring = sdr_spectrum.SpectrumRing(4, 8)
+        for value in range(6):
+            ring.push(np.full(8, value, dtype=np.float32), {"value": value})
+
+        seq, frame, meta = ring.latest()
+        self.assertEqual((seq, meta["value"], float(frame[0])), (6, 5, 5.0))
+        self.assertEqual([item[0] for item in ring.since(0)], [3, 4, 5, 6])
+        self.assertEqual([item[2]["value"] for item in ring.since(4)], [4, 5])
+        self.assertEqual(ring.since(6), [])
+
+    def test_crop_narrows_span_around_centre(self):
+        engine = sdr_spectrum.SpectrumEngine(FS, integration_s=0.0)
+        engine.feed(_tone(-500_000, 4096), 98_000_000, now=0.0)
+
+        frame = engine.latest(span_mhz=0.6)
+        self.assertAlmostEqual(frame["span"], 0.6, delta=0.01)
+        self.assertAlmostEqual(frame["start_freq"], 97.7, delta=0.01)
+        self.assertAlmostEqual(frame["end_freq"], 98.3, delta=0.01)
+        self.assertEqual(engine.latest(span_mhz=5.0)["span"], 2.4)
+
+    def test_waterfall_rows_round_trip_as_uint8(self):
+        engine = sdr_spectrum.SpectrumEngine(FS, frame_interval_s=0.0, integration_s=0.0)
+        for _ in range(3):
+            engine.feed(_tone(300_000, 4096), 100_000_000, now=0.0)
+        encoder = sdr_spectrum.WaterfallEncoder(span_mhz=2.0, smoothing=1.0)
+
+        data = b"".join(encoder.encode(seq, frame, meta) for seq, frame, meta in engine.ring.since(0))
+        rows = sdr_spectrum.decode_rows(data)
+
+        self.assertEqual(sdr_spectrum.ROW_HEADER.size, 36)
+        self.assertEqual(len(data), 3 * (36 + sdr_spectrum.TARGET_BINS))
+        self.assertEqual([header["seq"] for header, _ in rows], [1, 2, 3])
+        header, levels = rows[-1]
+        self.assertAlmostEqual(header["start_freq"], 99.0, delta=0.01)
+        self.assertAlmostEqual(header["end_freq"], 101.0, delta=0.01)
+        peak_mhz = header["start_freq"] + (levels.argmax() + 0.5) * 2.0 / len(levels)
+        self.assertAlmostEqual(peak_mhz, 100.3, delta=0.01)
+        # Margin keeps the peak just under full scale and the floor above zero.
+        self.assertGreater(levels.max(), 230)
+        self.assertLess(np.median(levels), 80)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import importlib.util
+import sys
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+spec = importlib.util.spec_from_file_location("telemetry_estimator_under_test", ROOT / "backend/services/telemetry_estimator.py")
+estimator_module = importlib.util.module_from_spec(spec)
+assert spec.loader is not None
+spec.loader.exec_module(estimator_module)
+
+T0 = 1_780_000_000.0
+
+
+class TelemetryEstimatorTest(unittest.TestCase):
+    def test_ramp_rate_converges_and_prediction_tracks_between_samples(self):
+        estimator = estimator_module.TelemetryEstimator(stale_after_s=1.5)
+        for index in range(24):
+            t = T0 + index * 0.25
+            jitter = 0.4 if index % 2 else -0.4
+            estimator.on_obd_sample({
+                "t": t,
+                "sample_time": str(index),
+                "dynamic_stale_age_s": 0.1,
+                "direct": {"speed_kmh": 20 + 10 * (t - T0) + jitter, "rpm": 1500 + 400 * (t - T0)},
+            })
+
+        snapshot = estimator.snapshot(now=T0 + 23 * 0.25 + 0.2)
+        speed = snapshot["channels"]["speed_kmh"]
+        rpm = snapshot["channels"]["rpm"]
+        self.assertAlmostEqual(speed["rate"], 10.0, delta=1.5)
+        self.assertAlmostEqual(rpm["rate"], 400.0, delta=40.0)
+        self.assertFalse(speed["stale"])
+        self.assertAlmostEqual(speed["age_s"], 0.2, places=3)
+        # value + rate * age lands on the true ramp within the noise.
+        projected = speed["value"] + speed["rate"] * speed["age_s"]
+        self.assertAlmostEqual(projected, 20 + 10 * (23 * 0.25 + 0.2), delta=1.0)
+
+        tracker = estimator._filters["speed_kmh"]
+        self.assertEqual(
+            tracker.predict(tracker.t + 10), tracker.value + tracker.rate * estimator_module.MAX_EXTRAPOLATION_S
+        )
+
+    def test_old_or_stale_source_samples_stop_extrapolation(self):
+        estimator = estimator_module.TelemetryEstimator(stale_after_s=1.5)
+        estimator.on_obd_sample({"t": T0, "sample_time": "a", "direct": {"rpm": 900, "speed_kmh": 0}})
+        estimator.on_obd_sample({"t": T0 + 0.25, "sample_time": "b", "direct": {"rpm": 1000, "speed_kmh": 5}})
+
+        self.assertTrue(estimator.snapshot(now=T0 + 2.0)["channels"]["rpm"]["stale"])
+        self.assertEqual(estimator.snapshot(now=T0 + 2.0)["stale_after_s"], 1.5)
+        self.assertEqual(estimator.snapshot(now=T0 + 2.0)["channels"]["rpm"]["rate"], 0.0)
+        self.assertTrue(estimator.snapshot(now=T0)["channels"]["gps_speed_kmh"]["stale"])
+
+        estimator.on_obd_sample({"t": T0 + 0.5, "sample_time": "c", "dynamic_stale_age_s": 3.0, "direct": {"rpm": 1000}})
+        self.assertTrue(estimator.snapshot(now=T0 + 0.6)["channels"]["rpm"]["stale"])
+
+        # After a long gap the filter restarts from the raw value instead of coasting.
+        estimator.on_obd_sample({"t": T0 + 10, "sample_time": "d", "direct": {"rpm": 3000, "speed_kmh": 90}})
+        self.assertEqual(estimator.snapshot(now=T0 + 10)["channels"]["speed_kmh"]["value"], 90)
+
+    def test_snapshot_ingest_is_deduplicated_and_skipped_when_attached(self):
+        estimator = estimator_module.TelemetryEstimator()
+        obd = {"connected": True, "metadata": {"sample_time": "s1"}, "direct": {"rpm": 800, "speed_kmh": 0}}
+        gps = {"connected": True, "speed": 12.0}
+
+        estimator.ingest_snapshot(obd, gps)
+        first_t = estimator._filters["rpm"].t
+        estimator.ingest_snapshot(obd, gps)
+        self.assertEqual(estimator._filters["rpm"].t, first_t)
+        self.assertEqual(estimator._filters["gps_speed_kmh"].raw, 12.0)
+
+        class FakeService:
+            def __init__(self):
+                self.listeners = []
+
+            def add_sample_listener(self, listener):
+                self.listeners.append(listener)
+
+        service = FakeService()
+        estimator.attach(service)
+        estimator.ingest_snapshot({**obd, "metadata": {"sample_time": "s2"}}, gps)
+        self.assertEqual(estimator._filters["rpm"].t, first_t)
+        self.assertEqual(service.listeners, [estimator.on_obd_sample])
+
+
+if __name__ == "__main__":
+    unittest.main()
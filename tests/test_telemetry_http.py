@@ -0,0 +1,88 @@
+import importlib.util
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+spec = importlib.util.spec_from_file_location("telemetry_http_under_test", ROOT / "backend/services/telemetry_http.py")
+telemetry_http = importlib.util.module_from_spec(spec)
+assert spec.loader is not None
+spec.loader.exec_module(telemetry_http)
+
+
+class ChunkedUploadTest(unittest.TestCase):
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.tmp = Path(self._tmpdir.name)
+        self.server = telemetry_http.TelemetryReceiver(self.tmp / "remote", token="secret")
+        self.server.start_background()
+        self.client = telemetry_http.ChunkedUploadClient(self.server.url + "/obd", chunk_bytes=1024, token="secret")
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self._tmpdir.cleanup()
+
+    def test_upload_resumes_at_the_last_acknowledged_chunk(self):
+        source = self.tmp / "session.jsonl"
+        source.write_bytes(b"x" * 5000)
+        remote = self.tmp / "remote/obd/car/session.jsonl"
+        remote.parent.mkdir(parents=True)
+        remote.write_bytes(b"x" * 3072)
+
+        sent = self.client.upload(source, "car/session.jsonl", size=5000)
+
+        self.assertEqual(sent, 5000 - 3072)
+        self.assertEqual(remote.read_bytes(), source.read_bytes())
+        # One HEAD plus two chunk PUTs, all over the same keep-alive connection.
+        self.assertEqual(self.client.requests, 3)
+
+    def test_open_file_tail_then_verified_close(self):
+        source = self.tmp / "session.jsonl"
+        source.write_bytes(b'{"a":1}\n' * 200)
+        self.client.upload(source, "car/session.jsonl", size=source.stat().st_size)
+        with source.open("ab") as handle:
+            handle.write(b'{"a":2}\n' * 10)
+        size = source.stat().st_size
+
+        sent = self.client.upload(source, "car/session.jsonl", size=size, sha256=telemetry_http._sha256_file(source))
+
+        self.assertEqual(sent, 80)
+        self.assertEqual((self.tmp / "remote/obd/car/session.jsonl").read_bytes(), source.read_bytes())
+
+    def test_rewritten_remote_copy_is_replaced_and_bad_tokens_are_rejected(self):
+        source = self.tmp / "session.jsonl"
+        source.write_bytes(b"new" * 1000)
+        remote = self.tmp / "remote/obd/car/session.jsonl"
+        remote.parent.mkdir(parents=True)
+        remote.write_bytes(b"old" * 400)
+
+        self.client.upload(source, "car/session.jsonl", size=3000, sha256=telemetry_http._sha256_file(source))
+        self.assertEqual(remote.read_bytes(), source.read_bytes())
+
+        intruder = telemetry_http.ChunkedUploadClient(self.server.url + "/obd", token="wrong")
+        with self.assertRaises(telemetry_http.UploadError):
+            intruder.upload(source, "car/other.jsonl", size=3000)
+        intruder.close()
+        self.assertFalse((self.tmp / "remote/obd/car/other.jsonl").exists())
+
+    def test_quoted_keys_are_stored_decoded_and_directories_are_refused(self):
+        source = self.tmp / "session 1.jsonl"
+        source.write_bytes(b"x" * 100)
+
+        self.client.upload(source, "car/session 1.jsonl", size=100)
+        self.assertEqual((self.tmp / "remote/obd/car/session 1.jsonl").read_bytes(), source.read_bytes())
+
+        with self.assertRaises(telemetry_http.UploadError):
+            self.client.upload(source, "car", size=100)
+        with self.assertRaises(telemetry_http.UploadError):
+            self.client.upload(source, "car/../escape.jsonl", size=100)
+        self.assertFalse((self.tmp / "remote/obd/escape.jsonl").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import importlib.util
+import json
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+
+def _load(name, relative_path):
+    spec = importlib.util.spec_from_file_location(name, ROOT / relative_path)
+    module = importlib.util.module_from_spec(spec)
+    assert spec.loader is not None
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+_load("backend.services.obd_log_retention", "backend/services/obd_log_retention.py")
+_load("backend.services.alert_rules", "backend/services/alert_rules.py")
+_load("backend.services.device_watcher", "backend/services/device_watcher.py")
+_load("backend.services.trip_journal", "backend/services/trip_journal.py")
+_load("backend.services.obd_service", "backend/services/obd_service.py")
+replay_module = _load("telemetry_replay_under_test", "backend/services/telemetry_replay.py")
+
+# Seconds since 10:00:00; the 100 s gap is a parked car and replays as MAX_GAP_S.
+OFFSETS_S = [0, 1, 2, 3, 103, 104]
+
+
+def _write_session(root):
+    path = root / "session-2026-05-01T10-00-00Z.jsonl"
+    with path.open("w", encoding="utf-8") as handle:
+        for index, offset in enumerate(OFFSETS_S):
+            minutes, seconds = divmod(offset, 60)
+            record = {
+                "vin": "VIN123",
+                "vehicle": "Test car",
+                "metadata": {"sample_time": f"2026-05-01T10:{minutes:02d}:{seconds:02d}+00:00"},
+                "connection": {"adapter": "ELM327 v1.5", "protocol": None},
+                "gps": {"lat": -23.2 + index * 0.001, "lon": -45.9, "connected": True},
+                "direct": {"rpm": 1000 + index * 100, "speed_kmh": index * 10},
+                "inferred": {"trip_distance_km": index * 0.01},
+                "metrics": {"RPM": 1000 + index * 100, "CUSTOM": index},
+            }
+            handle.write(json.dumps(record) + "\n")
+        handle.write('{"torn')
+    return path
+
+
+def _wait_for(predicate, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TelemetryReplayTest(unittest.TestCase):
+    def _replay(self, tmpdir, **kwargs):
+        obd_data = {"connection": {"port": "/dev/ttyUSB0"}, "metadata": {}, "direct": {}, "inferred": {}, "metrics": {}}
+        gps_data = {"lat": None, "lon": None, "connected": False}
+        replay = replay_module.TelemetryReplay(_write_session(Path(tmpdir)), obd_data, gps_data, **kwargs)
+        self.addCleanup(replay.stop)
+        return replay, obd_data, gps_data
+
+    def test_index_skips_torn_tail_and_seek_lands_on_recorded_time(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            replay, obd_data, _ = self._replay(tmpdir)
+
+            self.assertEqual(replay.get_status()["records"], len(OFFSETS_S))
+            self.assertEqual(replay.duration_s, 104)
+            status = replay.seek(50)
+            self.assertEqual(status["index"], 4)
+            self.assertEqual(status["position_s"], 103)
+
+    def test_records_are_published_in_the_service_shape(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            replay, obd_data, gps_data = self._replay(tmpdir, speed=100)
+            replay.start()
+
+            self.assertTrue(_wait_for(lambda: replay.get_status()["finished"]))
+            # 3 s + a 100 s gap clamped to MAX_GAP_S + 1 s at 100x.
+            self.assertEqual(obd_data["direct"]["rpm"], 1500)
+            self.assertEqual(obd_data["metrics"]["RPM"], {"value": 1500, "label": "RPM", "unit": "rpm"})
+            self.assertEqual(obd_data["metrics"]["CUSTOM"]["label"], "CUSTOM")
+            self.assertEqual(obd_data["connection"]["port"], "/dev/ttyUSB0")
+            self.assertEqual(obd_data["connection"]["adapter"], "ELM327 v1.5")
+            self.assertEqual(obd_data["metadata"]["vin"], "VIN123")
+            self.assertEqual(obd_data["metadata"]["replay"]["recorded_sample_time"], "2026-05-01T10:01:44+00:00")
+            self.assertAlmostEqual(gps_data["lat"], -23.195)
+            self.assertEqual(replay.get_status()["records_published"], len(OFFSETS_S))
+
+    def test_loop_restarts_and_pause_holds_position(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            replay, _, _ = self._replay(tmpdir, speed=200, loop=True)
+            replay.start()
+
+            self.assertTrue(_wait_for(lambda: replay.get_status()["loops"] >= 2))
+            status = replay.pause()
+            time.sleep(0.1)
+            self.assertEqual(replay.get_status()["records_published"], status["records_published"])
+            self.assertFalse(replay.get_status()["finished"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import importlib.util
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+rules_spec = importlib.util.spec_from_file_location("backend.services.alert_rules", ROOT / "backend/services/alert_rules.py")
+alert_rules = importlib.util.module_from_spec(rules_spec)
+assert rules_spec.loader is not None
+sys.modules[rules_spec.name] = alert_rules
+rules_spec.loader.exec_module(alert_rules)
+
+watcher_spec = importlib.util.spec_from_file_location("backend.services.device_watcher", ROOT / "backend/services/device_watcher.py")
+device_watcher = importlib.util.module_from_spec(watcher_spec)
+assert watcher_spec.loader is not None
+sys.modules[watcher_spec.name] = device_watcher
+watcher_spec.loader.exec_module(device_watcher)
+
+journal_spec = importlib.util.spec_from_file_location("backend.services.trip_journal", ROOT / "backend/services/trip_journal.py")
+trip_journal = importlib.util.module_from_spec(journal_spec)
+assert journal_spec.loader is not None
+sys.modules[journal_spec.name] = trip_journal
+journal_spec.loader.exec_module(trip_journal)
+
+spec = importlib.util.spec_from_file_location("obd_service_under_test", ROOT / "backend/services/obd_service.py")
+obd_service = importlib.util.module_from_spec(spec)
+assert spec.loader is not None
+spec.loader.exec_module(obd_service)
+
+
+def _state(distance, gear=3):
+    return {"trip_consumed_l": distance / 12, "trip_distance_km": distance, "gear": gear, "gear_state": "IN_GEAR"}
+
+
+class TripJournalTest(unittest.TestCase):
+    def test_checkpoints_are_rate_limited_and_torn_tail_is_dropped(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "trip.journal"
+            journal = trip_journal.TripJournal(path, interval_s=15.0)
+
+            self.assertTrue(journal.checkpoint(_state(1.0), now=0.0))
+            self.assertFalse(journal.checkpoint(_state(1.1), now=5.0))
+            self.assertFalse(journal.checkpoint(_state(1.0), now=20.0))
+            self.assertTrue(journal.checkpoint(_state(1.5), now=20.0))
+            self.assertTrue(journal.checkpoint(_state(1.6, gear=None), force=True, now=21.0))
+            self.assertEqual(path.stat().st_size, 3 * trip_journal.RECORD_SIZE)
+
+            with path.open("ab") as handle:
+                handle.write(trip_journal.encode_record(99, _state(9.0))[:-3])
+            loaded = trip_journal.TripJournal(path).load()
+
+            self.assertAlmostEqual(loaded["trip_distance_km"], 1.6)
+            self.assertIsNone(loaded["gear"])
+            self.assertEqual(loaded["seq"], 3)
+            self.assertEqual(path.stat().st_size, 3 * trip_journal.RECORD_SIZE)
+
+    def test_journal_is_compacted_to_the_latest_record(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "trip.journal"
+            journal = trip_journal.TripJournal(path, compact_after=4)
+
+            for index in range(10):
+                journal.checkpoint(_state(float(index)), force=True)
+
+            self.assertLessEqual(path.stat().st_size, 4 * trip_journal.RECORD_SIZE)
+            loaded = trip_journal.TripJournal(path).load()
+            self.assertEqual(loaded["trip_distance_km"], 9.0)
+            self.assertEqual(loaded["seq"], 10)
+
+    def test_service_restores_trip_and_recent_gear_and_journals_reset(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = str(Path(tmpdir) / "trip.journal")
+            service = obd_service.OBDService(device="/tmp/nonexistent-obd", trip_journal_path=path)
+            service._trip_consumed_l = 2.5
+            service._trip_distance_km = 30.0
+            service._gear_confirmed_state = "IN_GEAR"
+            service._last_confirmed_gear = 4
+            service._checkpoint_trip(force=True)
+
+            restarted = obd_service.OBDService(device="/tmp/nonexistent-obd", trip_journal_path=path)
+            restarted.restore_trip()
+            self.assertEqual(restarted._trip_distance_km, 30.0)
+            self.assertEqual(restarted._trip_consumed_l, 2.5)
+            self.assertEqual(restarted._gear_confirmed_gear, 4)
+            self.assertEqual(obd_service.obd_data["inferred"]["trip_average_km_l"], 12.0)
+            # The restored gear is held while the ratio stays inside its hold band.
+            output = restarted._calculate_gear_inference(
+                {"rpm": 2000, "speed_kmh": 2000 / 37.0}, dynamic_stale=False, dynamic_stale_age_s=0.0, now=1e9,
+            )
+            self.assertEqual(output["gear"], 4)
+
+            restarted.reset_trip()
+            again = obd_service.OBDService(device="/tmp/nonexistent-obd", trip_journal_path=path)
+            again.restore_trip()
+            self.assertEqual(again._trip_distance_km, 0.0)
+
+    def test_reset_before_restore_does_not_bring_the_old_trip_back(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = str(Path(tmpdir) / "trip.journal")
+            service = obd_service.OBDService(device="/tmp/nonexistent-obd", trip_journal_path=path)
+            service._trip_consumed_l = 2.5
+            service._trip_distance_km = 30.0
+            service._checkpoint_trip(force=True)
+
+            fresh = obd_service.OBDService(device="/tmp/nonexistent-obd", trip_journal_path=path)
+            fresh.reset_trip()
+            self.assertIsNone(fresh.restore_trip())
+            self.assertEqual(fresh._trip_distance_km, 0.0)
+            self.assertEqual(obd_service.obd_data["inferred"]["trip_distance_km"], 0.0)
+
+            again = obd_service.OBDService(device="/tmp/nonexistent-obd", trip_journal_path=path)
+            again.restore_trip()
+            self.assertEqual(again._trip_distance_km, 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()